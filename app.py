@@ -8,10 +8,12 @@ try:
     from logic.services.orchestrator import Orchestrator
     from logic.adapters.excel_adapter import ColumnValidationError, HeaderNotFoundError
     from logic.services.sync_service import PARQUET_FILE, get_cache_update_time
+    from logic.services import enrichment_prejoin
 
     from ui.styles import inject_styles
     from ui.header import render_header
-    from ui.sidebar import render_sidebar_metrics
+    from ui.sidebar import render_sidebar_metrics, render_sidebar_cache_stats
+    from logic.services import result_cache
     from ui.groups_wizard_ui import render_groups_section_wizard
     from ui.admin import render_admin_panel
 except Exception as import_err:
@@ -63,11 +65,13 @@ if not os.path.exists(template_file):
 # --- LÓGICA PRINCIPAL ---
 
 @st.cache_resource(show_spinner="Carregando base de dados...")
-def load_orchestrator_v3(base_path: str, template_path: str, sheet: str, _mtime: float):
+def load_orchestrator_v3(base_path: str, template_path: str, sheet: str, _mtime: float, enrichment_mtime: float = 0.0):
     """
     Cria o Orchestrator cacheado.
     _mtime é o timestamp de modificação do parquet — prefixado com _
     para o Streamlit não tentar fazer hash do valor diretamente.
+    enrichment_mtime é o mtime do enriquecimento pré-juntado (0.0 se desligado)
+    e entra na chave do cache para recarregar a base quando ele muda.
     """
     return Orchestrator(base_path, template_path, sheet_name=sheet)
 
@@ -77,13 +81,16 @@ if base_file and template_file:
         _parquet_mtime = os.path.getmtime(base_file) if os.path.exists(base_file) else 0.0
         
         orch = load_orchestrator_v3(
-            base_file, template_file, settings.base_sheet_name, _parquet_mtime
+            base_file, template_file, settings.base_sheet_name, _parquet_mtime,
+            enrichment_prejoin.prejoined_mtime(),
         )
             
         available_periods = orch.get_available_periods()
         available_clients = orch.get_available_clients()
 
-        render_sidebar_metrics(available_clients, available_periods, len(orch.reader.df))
+        render_sidebar_metrics(available_clients, available_periods, orch.base_row_count)
+        cache_stats = result_cache.stats()
+        render_sidebar_cache_stats(cache_stats.hits, cache_stats.misses)
         
         # --- NAVEGAÇÃO ---
         st.sidebar.markdown("---")
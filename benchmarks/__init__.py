@@ -0,0 +1,8 @@
+"""
+Suíte de benchmarks do gerador de Memória de Cálculo.
+Gera bases sintéticas (Balanço/Gestão/Parquet) reprodutíveis por seed e mede
+throughput (linhas/s) e memória das etapas críticas do pipeline.
+
+Uso:
+    python -m benchmarks.run --sizes 10k,100k
+"""
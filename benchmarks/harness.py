@@ -0,0 +1,138 @@
+"""
+Infraestrutura de medição dos benchmarks: cronometragem, pico de memória
+(tracemalloc) e comparação com o baseline JSON versionado.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Tolerância padrão: regressão se throughput cair >25% ou memória subir >25%
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado de um caso de benchmark em um tamanho de base."""
+    name: str
+    size: str
+    rows: int
+    seconds: float
+    rows_per_s: float
+    peak_mb: Optional[float] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+
+@dataclass
+class Regression:
+    """Métrica que piorou além da tolerância em relação ao baseline."""
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    def describe(self) -> str:
+        delta = (self.current - self.baseline) / self.baseline * 100 if self.baseline else 0.0
+        return f"{self.key}: {self.metric} {self.baseline:.2f} → {self.current:.2f} ({delta:+.1f}%)"
+
+
+def measure(name: str, size: str, rows: int, fn: Callable[[], Any], repeat: int = 1, track_memory: bool = True) -> BenchmarkResult:
+    """
+    Executa `fn` `repeat` vezes e guarda o melhor tempo.
+    O pico de memória é medido numa execução extra com tracemalloc ligado,
+    para não distorcer a cronometragem.
+    """
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / (1024 * 1024)
+
+    return BenchmarkResult(
+        name=name,
+        size=size,
+        rows=rows,
+        seconds=best,
+        rows_per_s=rows / best if best > 0 else 0.0,
+        peak_mb=peak_mb,
+    )
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    """Lê o baseline JSON; retorna dicionário vazio se não existir."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("results", {})
+
+
+def save_baseline(path: str, results: List[BenchmarkResult], meta: Optional[Dict[str, Any]] = None) -> None:
+    """Mescla os resultados no baseline existente e grava o JSON."""
+    current = load_baseline(path)
+    for r in results:
+        current[r.key] = {"rows": r.rows, "rows_per_s": round(r.rows_per_s, 2)}
+        if r.peak_mb is not None:
+            current[r.key]["peak_mb"] = round(r.peak_mb, 2)
+    payload = {"meta": meta or {}, "results": dict(sorted(current.items()))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def compare_to_baseline(results: List[BenchmarkResult], baseline: Dict[str, Dict[str, float]], tolerance: float = DEFAULT_TOLERANCE) -> List[Regression]:
+    """
+    Compara cada resultado com o baseline.
+    Throughput abaixo de (1 - tolerância) ou memória acima de (1 + tolerância) é regressão.
+    Casos sem baseline são ignorados.
+    """
+    regressions = []
+    for r in results:
+        ref = baseline.get(r.key)
+        if not ref:
+            continue
+        ref_rps = ref.get("rows_per_s")
+        if ref_rps and r.rows_per_s < ref_rps * (1 - tolerance):
+            regressions.append(Regression(r.key, "rows_per_s", ref_rps, r.rows_per_s))
+        ref_mem = ref.get("peak_mb")
+        if ref_mem and r.peak_mb is not None and r.peak_mb > ref_mem * (1 + tolerance):
+            regressions.append(Regression(r.key, "peak_mb", ref_mem, r.peak_mb))
+    return regressions
+
+
+def format_table(results: List[BenchmarkResult], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """Tabela de texto com tempo, throughput, memória e variação contra o baseline."""
+    baseline = baseline or {}
+    header = f"{'caso':<28}{'linhas':>10}{'tempo (s)':>12}{'linhas/s':>14}{'pico (MB)':>12}{'Δ linhas/s':>13}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        ref = baseline.get(r.key, {}).get("rows_per_s")
+        delta = f"{(r.rows_per_s - ref) / ref * 100:+.1f}%" if ref else "—"
+        mem = f"{r.peak_mb:.1f}" if r.peak_mb is not None else "—"
+        lines.append(f"{r.key:<28}{r.rows:>10}{r.seconds:>12.3f}{r.rows_per_s:>14.0f}{mem:>12}{delta:>13}")
+    return "\n".join(lines)
+
+
+def results_to_json(results: List[BenchmarkResult]) -> List[Dict[str, Any]]:
+    return [asdict(r) | {"key": r.key} for r in results]
@@ -0,0 +1,297 @@
+"""
+Executor da suíte de benchmarks.
+
+Exemplos:
+    python -m benchmarks.run                              # 10k, todos os casos
+    python -m benchmarks.run --sizes 10k,100k --cases filter_data,generate
+    python -m benchmarks.run --sizes 10k --update-baseline
+    python -m benchmarks.run --sizes 1m --cases load_base,filter_data --data-dir .bench_data
+
+Casos disponíveis:
+- process_dataframes: sync completo (Balanço .xlsx + Gestão .xlsx → Parquet)
+- load_base:          leitura do Parquet consolidado (Orchestrator/BaseExcelReader)
+- filter_data:        filtro por clientes + períodos sobre a base inteira
+- generate:           geração de uma Memória de Cálculo (escopo ~5% da base)
+- generate_multiple:  geração em lote (ZIP sem recompressão, o padrão) com vários grupos
+- generate_multiple_deflated: o mesmo lote com ZIP_DEFLATED (nível settings.archive_compresslevel)
+- generate_multiple_workbook:  o mesmo lote como um único .xlsx com uma aba por grupo
+- writer:             TemplateExcelWriter.generate_bytes sobre um DataFrame pronto
+
+Sai com código 1 se algum caso regredir além da tolerância contra o baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from benchmarks.harness import (
+    DEFAULT_TOLERANCE,
+    BenchmarkResult,
+    compare_to_baseline,
+    format_table,
+    load_baseline,
+    measure,
+    results_to_json,
+    save_baseline,
+)
+from benchmarks.synthetic import DEFAULT_SEED, SyntheticFiles, materialize, parse_size, size_label
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+TEMPLATE_FILE = os.path.join(PROJECT_ROOT, "mc.xlsx")
+
+# Linhas máximas do DataFrame entregue ao writer no caso isolado
+WRITER_MAX_ROWS = 20_000
+# Fração aproximada da base coberta pelo escopo do caso "generate"
+GENERATE_SCOPE_FRACTION = 0.05
+# Quantidade de grupos no caso "generate_multiple"
+MULTIPLE_GROUPS = 8
+
+
+@contextlib.contextmanager
+def _patched_sync_paths(files: SyntheticFiles, work_dir: str) -> Iterator[None]:
+    """
+    Redireciona as constantes de cache do sync_service, do enriquecimento pré-juntado
+    e do snapshot de enriquecimento para o diretório temporário: o sync sintético não
+    sobrescreve o cache real e a carga da base não junta o enriquecimento da máquina.
+    """
+    import logic.services.enrichment_cache as enrichment_cache
+    import logic.services.enrichment_prejoin as enrichment_prejoin
+    import logic.services.sync_service as sync
+
+    patches = [
+        (sync, "CACHE_DIR", work_dir),
+        (sync, "PARQUET_FILE", os.path.join(work_dir, "base_consolidada.parquet")),
+        (sync, "PENDENCIAS_FILE", os.path.join(work_dir, "pendencias.json")),
+        (sync, "BALANCO_LOCAL", files.balanco_xlsx),
+        (sync, "GESTAO_LOCAL", files.gestao_xlsx),
+        (enrichment_prejoin, "PREJOINED_FILE", os.path.join(work_dir, "enrichment_prejoined.parquet")),
+        (enrichment_cache, "SNAPSHOT_FILE", os.path.join(work_dir, "enrichment_snapshot.parquet")),
+        (enrichment_cache, "SNAPSHOT_META_FILE", os.path.join(work_dir, "enrichment_snapshot.json")),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    try:
+        for module, name, value in patches:
+            setattr(module, name, value)
+        enrichment_cache.invalidate()
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+        enrichment_cache.invalidate()
+
+
+@contextlib.contextmanager
+def _settings_override(**values) -> Iterator[None]:
+    """Aplica valores temporários em config.settings (estratégias de saída em lote)."""
+    from config.settings import settings
+
+    saved = {name: getattr(settings, name) for name in values}
+    try:
+        for name, value in values.items():
+            setattr(settings, name, value)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def _client_scope(df: pd.DataFrame, fraction: float) -> List[str]:
+    """Seleciona os maiores clientes até cobrir ~`fraction` das linhas da base."""
+    counts = df["Razao Social"].dropna().value_counts()
+    target = max(1, int(len(df) * fraction))
+    cumulative = counts.cumsum()
+    n = int((cumulative < target).sum()) + 1
+    return counts.index[:n].tolist()
+
+
+def _writer_frame(orch) -> Tuple[pd.DataFrame, "OrderedDict[str, str]"]:
+    """DataFrame no formato final do pipeline (colunas do mapping + flags) para o writer."""
+    from logic.core.mapping import CHILD_ROW_FLAG, COLUMN_MAPPING, PARENT_ROW_FLAG, SEPARATOR_ROW_FLAG
+
+    df = orch.reader.df.head(WRITER_MAX_ROWS).copy()
+    df = orch._apply_classification(df)
+    for flag in (PARENT_ROW_FLAG, CHILD_ROW_FLAG, SEPARATOR_ROW_FLAG):
+        df[flag] = False
+    # Uma linha Pai a cada 10 exercita a formatação diferenciada
+    df.loc[df.index[::10], PARENT_ROW_FLAG] = True
+    df = df.reindex(columns=list(COLUMN_MAPPING.keys()) + [PARENT_ROW_FLAG, CHILD_ROW_FLAG, SEPARATOR_ROW_FLAG])
+    return df, OrderedDict(COLUMN_MAPPING)
+
+
+def build_cases(files: SyntheticFiles, work_dir: str) -> Dict[str, Callable[[], Tuple[int, Callable[[], object]]]]:
+    """
+    Cada caso é uma fábrica que prepara o cenário (fora da medição) e devolve
+    (linhas processadas, função medida).
+    """
+    from logic.services.orchestrator import Orchestrator
+
+    state: Dict[str, object] = {}
+
+    def orchestrator() -> Orchestrator:
+        if "orch" not in state:
+            state["orch"] = Orchestrator(files.parquet, TEMPLATE_FILE)
+        return state["orch"]  # type: ignore[return-value]
+
+    def case_process_dataframes():
+        from logic.services.sync_service import _process_dataframes
+
+        with open(files.gestao_xlsx, "rb") as f:
+            gestao_bytes = f.read()
+
+        def run():
+            ok, _ = _process_dataframes(files.balanco_xlsx, gestao_bytes, files.gestao_xlsx)
+            if not ok:
+                raise RuntimeError("_process_dataframes falhou na base sintética")
+
+        return files.n_rows, run
+
+    def case_load_base():
+        return files.n_rows, lambda: Orchestrator(files.parquet, TEMPLATE_FILE)
+
+    def case_filter_data():
+        orch = orchestrator()
+        clients = _client_scope(orch.reader.df, GENERATE_SCOPE_FRACTION)
+        periods = orch.get_available_periods()[-3:]
+        return len(orch.reader.df), lambda: orch.reader.filter_data(clients, periods)
+
+    def case_generate():
+        orch = orchestrator()
+        clients = _client_scope(orch.reader.df, GENERATE_SCOPE_FRACTION)
+        periods = orch.get_available_periods()
+        rows = len(orch.reader.filter_data(clients, periods))
+        return rows, lambda: orch.generate(clients, periods, incluir_resumo=True)
+
+    def multiple_scope():
+        orch = orchestrator()
+        clients = _client_scope(orch.reader.df, GENERATE_SCOPE_FRACTION)
+        periods = orch.get_available_periods()[-2:]
+        groups = [
+            {"name": f"Grupo_{i + 1}", "clients": clients[i::MULTIPLE_GROUPS], "periods": periods}
+            for i in range(min(MULTIPLE_GROUPS, len(clients)))
+        ]
+        rows = len(orch.reader.filter_data(clients, periods))
+        return orch, groups, rows
+
+    def case_generate_multiple():
+        orch, groups, rows = multiple_scope()
+        return rows, lambda: orch.generate_multiple(groups)
+
+    def case_generate_multiple_deflated():
+        orch, groups, rows = multiple_scope()
+
+        def run():
+            with _settings_override(archive_compression="deflated"):
+                return orch.generate_multiple(groups)
+
+        return rows, run
+
+    def case_generate_multiple_workbook():
+        orch, groups, rows = multiple_scope()
+        return rows, lambda: orch.generate_multiple(groups, output_format="workbook")
+
+    def case_writer():
+        from logic.adapters.excel_adapter import TemplateExcelWriter
+
+        df, mapping = _writer_frame(orchestrator())
+        return len(df), lambda: TemplateExcelWriter(TEMPLATE_FILE).generate_bytes(df, mapping, incluir_resumo=True)
+
+    return OrderedDict([
+        ("process_dataframes", case_process_dataframes),
+        ("load_base", case_load_base),
+        ("filter_data", case_filter_data),
+        ("generate", case_generate),
+        ("generate_multiple", case_generate_multiple),
+        ("generate_multiple_deflated", case_generate_multiple_deflated),
+        ("generate_multiple_workbook", case_generate_multiple_workbook),
+        ("writer", case_writer),
+    ])
+
+
+CASE_NAMES = [
+    "process_dataframes", "load_base", "filter_data", "generate",
+    "generate_multiple", "generate_multiple_deflated", "generate_multiple_workbook", "writer",
+]
+
+
+def run_benchmarks(sizes: List[int], cases: List[str], data_dir: str, seed: int = DEFAULT_SEED, repeat: int = 1, track_memory: bool = True) -> List[BenchmarkResult]:
+    """Materializa as bases de cada tamanho e executa os casos pedidos."""
+    results = []
+    for n_rows in sizes:
+        label = size_label(n_rows)
+        print(f"[bench] preparando base sintética de {label} linhas (seed={seed})...", file=sys.stderr)
+        files = materialize(n_rows, data_dir, seed=seed, with_workbooks="process_dataframes" in cases)
+        with tempfile.TemporaryDirectory(prefix="bench_sync_") as work_dir, _patched_sync_paths(files, work_dir):
+            factories = build_cases(files, work_dir)
+            for name in cases:
+                rows, fn = factories[name]()
+                print(f"[bench] {name}@{label}...", file=sys.stderr)
+                results.append(measure(name, label, rows, fn, repeat=repeat, track_memory=track_memory))
+    return results
+
+
+def _parse_args(argv: List[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmarks do gerador de Memória de Cálculo.")
+    parser.add_argument("--sizes", default="10k", help="Tamanhos separados por vírgula (10k, 100k, 1m ou inteiros).")
+    parser.add_argument("--cases", default=",".join(CASE_NAMES), help=f"Casos separados por vírgula. Disponíveis: {', '.join(CASE_NAMES)}.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="Repetições por caso (vale o melhor tempo).")
+    parser.add_argument("--data-dir", default=None, help="Diretório para reaproveitar as bases sintéticas entre execuções.")
+    parser.add_argument("--no-memory", action="store_true", help="Não mede pico de memória (tracemalloc).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Arquivo JSON de baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Tolerância relativa para regressão (0.25 = 25%%).")
+    parser.add_argument("--update-baseline", action="store_true", help="Grava os resultados atuais no baseline.")
+    parser.add_argument("--output", default=None, help="Grava os resultados brutos em JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = _parse_args(argv)
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASE_NAMES]
+    if unknown:
+        print(f"Casos desconhecidos: {unknown}. Disponíveis: {CASE_NAMES}", file=sys.stderr)
+        return 2
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_data_")
+    try:
+        results = run_benchmarks(sizes, cases, data_dir, seed=args.seed, repeat=args.repeat, track_memory=not args.no_memory)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    baseline = load_baseline(args.baseline)
+    print(format_table(results, baseline))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results_to_json(results), f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        meta = {"python": platform.python_version(), "pandas": pd.__version__, "seed": args.seed}
+        save_baseline(args.baseline, results, meta=meta)
+        print(f"Baseline atualizado em {args.baseline}")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        print("\nRegressões detectadas:")
+        for reg in regressions:
+            print(f"  - {reg.describe()}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
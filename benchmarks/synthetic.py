@@ -0,0 +1,453 @@
+"""
+Gerador sintético e determinístico das bases Balanço Energético e Gestão de Cobrança.
+
+As bases reproduzem as sujeiras encontradas na operação real:
+- hierarquias Pai/Filha (Main = Y/N, UC p Rateio, Excecao Fat. = Agrupamento, No. IBM);
+- aliases alfanuméricos de UC (ex.: "W700...") cujo portal usa o id numérico de rateio;
+- variações de Razão Social para o mesmo CPF/CNPJ;
+- faturas duplicadas e canceladas na Gestão, cobranças só-portal;
+- datas de referência/vencimento em formatos mistos ("01/2026", "2026-01-01", "15-01-2026"...).
+
+Tudo é gerado com numpy vetorizado a partir de uma seed, então o mesmo
+(tamanho, seed) produz sempre os mesmos DataFrames.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from logic.core.mapping import (
+    ACCOUNT_NUMBER_COL,
+    CLASSIFICATION_SOURCE_COL,
+    GROUPING_FLAG_COL,
+    GROUPING_FLAG_VALUE,
+    GROUPING_IBM_COL,
+    HIERARCHY_KEY_COL,
+    HIERARCHY_PARENT_COL,
+    ID_UC_NEGOCIADA_COL,
+    PORTAL_UC_COL,
+)
+from logic.core.grouping import PARENT_GROUP_COL, build_parent_aggregates
+from logic.core.periods import PERIOD_KEY_COL, period_keys
+from logic.core.portal import resolve_portal_identity
+
+DEFAULT_SEED = 20260101
+
+# Rótulos aceitos na linha de comando → quantidade de linhas do Balanço
+SIZE_LABELS = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+# Quantidade de competências mensais geradas (terminando em fev/2026)
+N_PERIODS = 12
+_LAST_PERIOD = pd.Timestamp(2026, 2, 1)
+
+# Linhas auxiliares antes do header, como na planilha real (header na linha 6)
+AUX_ROWS = 5
+
+# Colunas extras que não são lidas pelo BaseExcelReader (exercitam o usecols)
+_NOISE_COLUMNS = [f"Coluna Auxiliar {i}" for i in range(1, 9)]
+
+_DISTRIBUIDORAS = np.array(["CEMIG", "CPFL PAULISTA", "LIGHT", "ENEL SP", "COELBA", "EQUATORIAL PA", "ENERGISA MT"])
+_NAME_WORDS = np.array([
+    "ALPHA", "BRASIL", "COMERCIO", "SERVICOS", "AGRO", "LOGISTICA", "SUPERMERCADOS",
+    "PARTICIPACOES", "ENERGIA", "TEXTIL", "ALIMENTOS", "FARMACIA", "CONSTRUTORA", "AUTO POSTO",
+    "EDUCACAO", "HOSPITALAR", "METALURGICA", "TRANSPORTES", "DELTA", "NORDESTE",
+])
+_NAME_SUFFIXES = np.array(["LTDA", "S.A.", "EIRELI", "ME", "LTDA EPP"])
+_SOURCES = np.array(["Fatura", "Contrato", "Demonstrativo Portal"])
+_SOURCE_WEIGHTS = np.array([0.7, 0.2, 0.1])
+_GESTAO_STATUS = np.array(["Pago", "Em aberto", "Vencido", "Negociado"])
+_GESTAO_STATUS_WEIGHTS = np.array([0.6, 0.25, 0.1, 0.05])
+_DISCOUNTS = np.array([0.10, 0.12, 0.15, 0.20])
+
+
+@dataclass
+class SyntheticBases:
+    """Par de DataFrames sintéticos (Balanço + Gestão) e a base consolidada equivalente ao cache."""
+    balanco: pd.DataFrame
+    gestao: pd.DataFrame
+    consolidated: pd.DataFrame
+
+
+@dataclass
+class SyntheticFiles:
+    """Caminhos dos arquivos materializados em disco para um tamanho/seed."""
+    n_rows: int
+    seed: int
+    balanco_xlsx: str
+    gestao_xlsx: str
+    parquet: str
+
+
+def parse_size(label: str | int) -> int:
+    """Converte rótulos como '10k', '100k', '1m' ou inteiros em quantidade de linhas."""
+    if isinstance(label, int):
+        return label
+    key = str(label).strip().lower()
+    if key in SIZE_LABELS:
+        return SIZE_LABELS[key]
+    if key.endswith("k"):
+        return int(float(key[:-1]) * 1_000)
+    if key.endswith("m"):
+        return int(float(key[:-1]) * 1_000_000)
+    return int(key)
+
+
+def size_label(n_rows: int) -> str:
+    """Rótulo curto para uso em nomes de arquivos e chaves de baseline."""
+    for label, value in SIZE_LABELS.items():
+        if value == n_rows:
+            return label
+    return str(n_rows)
+
+
+def _period_starts() -> pd.DatetimeIndex:
+    return pd.date_range(end=_LAST_PERIOD, periods=N_PERIODS, freq="MS")
+
+
+def _format_cnpj(digits: np.ndarray) -> np.ndarray:
+    s = pd.Series(digits)
+    return (
+        s.str[0:2] + "." + s.str[2:5] + "." + s.str[5:8] + "/" + s.str[8:12] + "-" + s.str[12:14]
+    ).to_numpy()
+
+
+def _dirty_reference(periods: pd.Series, rng: np.random.Generator) -> np.ndarray:
+    """Referência do Balanço: maioria datetime (célula Excel), restante em textos variados."""
+    out = periods.astype(object).to_numpy(copy=True)
+    pick = rng.random(len(periods))
+    as_br_date = pick < 0.10
+    as_month_year = (pick >= 0.10) & (pick < 0.18)
+    as_iso_text = (pick >= 0.18) & (pick < 0.22)
+    out[as_br_date] = periods[as_br_date].dt.strftime("01/%m/%Y").to_numpy()
+    out[as_month_year] = periods[as_month_year].dt.strftime("%m/%Y").to_numpy()
+    out[as_iso_text] = periods[as_iso_text].dt.strftime("%Y-%m-01").to_numpy()
+    return out
+
+
+def _dirty_due_date(due: pd.Series, rng: np.random.Generator) -> np.ndarray:
+    """Vencimento da Gestão em formatos mistos, com alguns vazios/traços."""
+    out = due.dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+    pick = rng.random(len(due))
+    iso = pick < 0.25
+    dashed = (pick >= 0.25) & (pick < 0.35)
+    blank = (pick >= 0.35) & (pick < 0.37)
+    dash = (pick >= 0.37) & (pick < 0.38)
+    out[iso] = due[iso].dt.strftime("%Y-%m-%d").to_numpy()
+    out[dashed] = due[dashed].dt.strftime("%d-%m-%Y").to_numpy()
+    out[blank] = None
+    out[dash] = "-"
+    return out
+
+
+def generate_balanco(n_rows: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Gera a aba Balanço Operacional com `n_rows` linhas (UC × competência).
+    Mantém a coluna técnica `_bench_portal_uc` (instalação usada no portal)
+    para que a Gestão seja gerada de forma consistente; ela não vai para o Excel.
+    """
+    rng = np.random.default_rng(seed)
+    n_ucs = max(1, -(-n_rows // N_PERIODS))
+    n_clients = max(3, n_ucs // 8)
+
+    # Distribuição enviesada: poucos clientes grandes, cauda longa de pequenos.
+    client_of_uc = np.sort((n_clients * rng.random(n_ucs) ** 2).astype(np.int64))
+
+    words_a = rng.choice(_NAME_WORDS, size=n_clients)
+    words_b = rng.choice(_NAME_WORDS, size=n_clients)
+    suffixes = rng.choice(_NAME_SUFFIXES, size=n_clients)
+    client_names = np.char.add(
+        np.char.add(np.char.add(np.char.add(words_a.astype(str), " "), words_b.astype(str)), " "),
+        np.char.add(np.char.add(suffixes.astype(str), " "), np.char.zfill(np.arange(n_clients).astype(str), 5)),
+    )
+    client_docs = np.char.zfill((10_000_000 + rng.permutation(n_clients) * 7).astype(str), 12)
+    client_docs = np.char.add(client_docs, np.char.zfill(rng.integers(0, 100, n_clients).astype(str), 2))
+    client_dist = rng.choice(_DISTRIBUIDORAS, size=n_clients)
+
+    # UCs numéricas únicas; ~3% recebem alias alfanumérico (portal usa o numérico).
+    uc_numeric = (3_000_000 + rng.permutation(n_ucs * 3)[:n_ucs] * 11).astype(np.int64)
+    is_alias = rng.random(n_ucs) < 0.03
+    alias_prefix = rng.choice(np.array(["W700", "D706", "E702"]), size=n_ucs)
+    uc_text = uc_numeric.astype(str).astype(object)
+    uc_text[is_alias] = np.char.add(alias_prefix[is_alias].astype(str), uc_numeric[is_alias].astype(str))
+
+    # Hierarquias: parte dos clientes com 3+ UCs fatura agrupado (1 Pai + filhas).
+    first_uc_of_client = np.r_[True, client_of_uc[1:] != client_of_uc[:-1]]
+    client_start = np.maximum.accumulate(np.where(first_uc_of_client, np.arange(n_ucs), 0))
+    ucs_per_client = np.bincount(client_of_uc, minlength=n_clients)
+    grouped_client = (ucs_per_client >= 3) & (rng.random(n_clients) < 0.35)
+    in_group = grouped_client[client_of_uc]
+    main = np.where(in_group, np.where(first_uc_of_client, "Y", "N"), None).astype(object)
+    rateio = np.full(n_ucs, None, dtype=object)
+    rateio[in_group] = uc_numeric[client_start[in_group]].astype(str)
+    rateio[is_alias & ~in_group] = uc_numeric[is_alias & ~in_group].astype(str)
+    excecao = np.where(in_group, GROUPING_FLAG_VALUE, None).astype(object)
+    ibm_client = grouped_client & (rng.random(n_clients) < 0.3)
+    ibm = np.where(ibm_client[client_of_uc], np.char.add("IBM", client_of_uc.astype(str)), None).astype(object)
+    portal_uc = np.where(is_alias, uc_numeric.astype(str), uc_text).astype(object)
+
+    # Expande UC × competência e corta exatamente em n_rows.
+    periods = _period_starts()
+    uc_idx = np.repeat(np.arange(n_ucs), N_PERIODS)[:n_rows]
+    per_idx = np.tile(np.arange(N_PERIODS), n_ucs)[:n_rows]
+    cli_idx = client_of_uc[uc_idx]
+    ref = pd.Series(periods[per_idx])
+
+    # Variação de Razão Social para ~5% dos clientes (mesmo CNPJ, nome diferente).
+    names = client_names[cli_idx].astype(object)
+    variant_client = rng.random(n_clients) < 0.05
+    variant_row = variant_client[cli_idx] & (per_idx % 2 == 0)
+    names[variant_row] = np.char.replace(client_names[cli_idx][variant_row], " LTDA", " LTDA.")
+
+    docs = client_docs[cli_idx].astype(object)
+    formatted = rng.random(n_rows) < 0.3
+    docs[formatted] = _format_cnpj(client_docs[cli_idx][formatted])
+
+    cred = np.round(rng.gamma(2.0, 900.0, n_rows), 2)
+    tarifa = np.round(rng.uniform(0.55, 1.05, n_rows), 4)
+    discount = rng.choice(_DISCOUNTS, size=n_rows)
+    custo_sem = np.round(cred * tarifa * 1.18, 2)
+    custo_com = np.round(custo_sem * (1 - discount), 2)
+    ganho = np.round(custo_sem - custo_com, 2)
+
+    df = pd.DataFrame({
+        ID_UC_NEGOCIADA_COL: np.char.add("UCN-", np.char.zfill(uc_idx.astype(str), 7)),
+        "Referencia": _dirty_reference(ref, rng),
+        "No. UC": uc_text[uc_idx],
+        "CPF/CNPJ": docs,
+        "Razao Social": names,
+        "Distribuidora": client_dist[cli_idx],
+        "Cred. Consumido Raizen": cred,
+        "Desconto Contratado": np.char.add((discount * 100).astype(int).astype(str), "%"),
+        "Status Pos-Faturamento": rng.choice(np.array(["Em aberto", "Faturado", "Pago"]), size=n_rows),
+        "Valor Enviado Emissão": custo_com,
+        "Tarifa Raizen": tarifa,
+        "Custo c/ GD": custo_com,
+        "Custo s/ GD": custo_sem,
+        "Ganho total Padrão": ganho,
+        GROUPING_FLAG_COL: excecao[uc_idx],
+        HIERARCHY_KEY_COL: rateio[uc_idx],
+        HIERARCHY_PARENT_COL: main[uc_idx],
+        GROUPING_IBM_COL: ibm[uc_idx],
+        CLASSIFICATION_SOURCE_COL: rng.choice(_SOURCES, size=n_rows, p=_SOURCE_WEIGHTS),
+    })
+    for col in _NOISE_COLUMNS:
+        df[col] = rng.integers(0, 1000, n_rows)
+    df["_bench_portal_uc"] = portal_uc[uc_idx]
+    df["_bench_period"] = ref.to_numpy()
+    return df
+
+
+def generate_gestao(balanco: pd.DataFrame, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Gera a Gestão de Cobrança correspondente ao Balanço sintético.
+    ~92% das linhas do Balanço têm cobrança no portal; o restante vira pendência.
+    Inclui ~1% de duplicatas, ~0,5% de canceladas e ~0,5% de cobranças só-portal.
+    """
+    rng = np.random.default_rng(seed + 1)
+    n = len(balanco)
+    has_invoice = rng.random(n) < 0.92
+    base = balanco.loc[has_invoice, ["_bench_portal_uc", "_bench_period", "Razao Social", "CPF/CNPJ", "Distribuidora", "Valor Enviado Emissão"]]
+    base = base.reset_index(drop=True)
+
+    # Duplicatas (mesma UC + período, vencimento diferente) e canceladas.
+    n_dupes = int(len(base) * 0.01)
+    dupes = base.sample(n=n_dupes, random_state=seed) if n_dupes else base.iloc[0:0]
+    n_cancel = int(len(base) * 0.005)
+    cancels = base.sample(n=n_cancel, random_state=seed + 2) if n_cancel else base.iloc[0:0]
+
+    # Cobranças só-portal: documento conhecido, instalação inexistente no Balanço.
+    n_portal_only = int(len(base) * 0.005)
+    portal_only = base.sample(n=n_portal_only, random_state=seed + 3).copy() if n_portal_only else base.iloc[0:0].copy()
+    portal_only["_bench_portal_uc"] = (90_000_000 + np.arange(len(portal_only))).astype(str)
+
+    frames = [base, dupes, cancels, portal_only]
+    kinds = np.concatenate([np.full(len(f), k) for k, f in enumerate(frames)]) if n else np.array([], dtype=int)
+    g = pd.concat(frames, ignore_index=True)
+    total = len(g)
+
+    period = pd.to_datetime(g["_bench_period"])
+    due = period + pd.offsets.MonthBegin(1) + pd.to_timedelta(rng.integers(4, 25, total), unit="D")
+    due = due + pd.to_timedelta(np.where(kinds == 1, -3, 0), unit="D")
+
+    ref_text = period.dt.strftime("%m/%Y").to_numpy(dtype=object)
+    ref_pick = rng.random(total)
+    ref_text[ref_pick < 0.2] = period[ref_pick < 0.2].dt.strftime("%Y-%m").to_numpy()
+
+    valor = np.round(pd.to_numeric(g["Valor Enviado Emissão"], errors="coerce").fillna(0).to_numpy() * rng.uniform(0.97, 1.03, total), 2)
+    valor[rng.random(total) < 0.01] = 0.0
+
+    status = rng.choice(_GESTAO_STATUS, size=total, p=_GESTAO_STATUS_WEIGHTS)
+    pagamento = np.where(status == "Pago", (due - pd.to_timedelta(rng.integers(0, 5, total), unit="D")).dt.strftime("%d/%m/%Y"), None)
+
+    instalacao = g["_bench_portal_uc"].to_numpy(dtype=object)
+    as_float = rng.random(total) < 0.15
+    instalacao[as_float] = np.char.add(instalacao[as_float].astype(str), ".0")
+
+    return pd.DataFrame({
+        "Instalação": instalacao,
+        "Nome": g["Razao Social"].to_numpy(),
+        "CNPJ/CPF": g["CPF/CNPJ"].to_numpy(),
+        "Distribuidora": g["Distribuidora"].to_numpy(),
+        "Mês de Referência": ref_text,
+        "Vencimento": _dirty_due_date(due, rng),
+        "Status": status,
+        "Base para cálculo": np.round(valor * 1.1, 2),
+        "Valor da cobrança R$": valor,
+        "Número da conta": (7_000_000_000 + rng.permutation(total)).astype(np.int64),
+        "Data de Pagamento": pagamento,
+        "Cancelada": np.where(kinds == 2, "Sim", "Não"),
+        "Data de Cancelamento": np.where(kinds == 2, due.dt.strftime("%d/%m/%Y"), None),
+    })
+
+
+def build_consolidated(balanco: pd.DataFrame, gestao: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta, de forma vetorizada, um DataFrame equivalente ao `base_consolidada.parquet`
+    produzido pelo sync (Balanço + Vencimento/Status/Valor da Gestão + linhas só-portal).
+    Não replica toda a lógica do sync — serve apenas como insumo para os benchmarks
+    de leitura/filtro/geração em tamanhos onde o sync completo é proibitivo.
+    """
+    g = gestao[gestao["Cancelada"] != "Sim"].copy()
+    g["_bench_portal_uc"] = g["Instalação"].astype(str).str.replace(r"\.0$", "", regex=True)
+    ref = g["Mês de Referência"].astype(str)
+    month_first = ref.str.match(r"^\d{2}/\d{4}$")
+    g["_bench_period"] = pd.to_datetime(
+        np.where(month_first, "01/" + ref, ref + "-01"), format="mixed", dayfirst=True
+    )
+    g["_is_duplicate_gestao"] = g.duplicated(subset=["_bench_portal_uc", "_bench_period"], keep=False)
+    g = g.drop_duplicates(subset=["_bench_portal_uc", "_bench_period"], keep="first")
+
+    known_ucs = set(balanco["_bench_portal_uc"].unique())
+    portal_only = g[~g["_bench_portal_uc"].isin(known_ucs)]
+    g_match = g[g["_bench_portal_uc"].isin(known_ucs)]
+
+    cols = {
+        "Vencimento": "Vencimento",
+        "Status": "Status Pos-Faturamento_gestao",
+        "Valor da cobrança R$": "Valor_gestao",
+        "Base para cálculo": "Base_gestao",
+        "Número da conta": ACCOUNT_NUMBER_COL,
+        "Data de Pagamento": "Data de Pagamento",
+        "_is_duplicate_gestao": "_is_duplicate_gestao",
+    }
+    right = g_match[["_bench_portal_uc", "_bench_period", *cols]].rename(columns=cols)
+    right[PORTAL_UC_COL] = right["_bench_portal_uc"]
+    df = balanco.drop(columns=_NOISE_COLUMNS).merge(right, on=["_bench_portal_uc", "_bench_period"], how="left")
+    df["Status Pos-Faturamento"] = df.pop("Status Pos-Faturamento_gestao").combine_first(df["Status Pos-Faturamento"])
+
+    if not portal_only.empty:
+        extra = pd.DataFrame({
+            "No. UC": portal_only["_bench_portal_uc"].to_numpy(),
+            PORTAL_UC_COL: portal_only["_bench_portal_uc"].to_numpy(),
+            "Referencia": portal_only["_bench_period"].to_numpy(),
+            "CPF/CNPJ": portal_only["CNPJ/CPF"].to_numpy(),
+            "Razao Social": portal_only["Nome"].to_numpy(),
+            "Distribuidora": portal_only["Distribuidora"].to_numpy(),
+            CLASSIFICATION_SOURCE_COL: "Fatura",
+            HIERARCHY_PARENT_COL: "Y",
+            "Valor_gestao": portal_only["Valor da cobrança R$"].to_numpy(),
+            "Valor Enviado Emissão": portal_only["Valor da cobrança R$"].to_numpy(),
+            "Vencimento": portal_only["Vencimento"].to_numpy(),
+            "Status Pos-Faturamento": portal_only["Status"].to_numpy(),
+            ACCOUNT_NUMBER_COL: portal_only["Número da conta"].to_numpy(),
+            "Data de Pagamento": portal_only["Data de Pagamento"].to_numpy(),
+        })
+        df = pd.concat([df, extra], ignore_index=True, sort=False)
+
+    df = df.drop(columns=["_bench_portal_uc", "_bench_period"])
+    df[ACCOUNT_NUMBER_COL] = df[ACCOUNT_NUMBER_COL].astype("Int64").astype(str).replace("<NA>", pd.NA)
+    from logic.services.sync_service import _TEXT_COLUMNS
+    for col in df.columns:
+        if col in _TEXT_COLUMNS or df[col].dtype == object:
+            df[col] = df[col].astype(str).replace({"nan": pd.NA, "None": pd.NA})
+    df[PERIOD_KEY_COL] = period_keys(df["Referencia"])
+    df = resolve_portal_identity(df)
+    built = build_parent_aggregates(df)
+    if built is not None:
+        df[PARENT_GROUP_COL] = built[0]
+    return df
+
+
+def generate_bases(n_rows: int, seed: int = DEFAULT_SEED) -> SyntheticBases:
+    """Gera Balanço, Gestão e a base consolidada para um tamanho/seed."""
+    balanco = generate_balanco(n_rows, seed)
+    gestao = generate_gestao(balanco, seed)
+    consolidated = build_consolidated(balanco, gestao)
+    return SyntheticBases(balanco=balanco, gestao=gestao, consolidated=consolidated)
+
+
+def write_balanco_xlsx(balanco: pd.DataFrame, path: str, sheet_name: str = "Balanco Operacional") -> str:
+    """
+    Escreve o Balanço sintético com 5 linhas auxiliares antes do header (como a planilha real).
+    Usa o modo write_only do openpyxl para suportar 1M de linhas sem estourar memória.
+    """
+    import openpyxl
+
+    public = balanco.drop(columns=[c for c in balanco.columns if c.startswith("_bench_")])
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for i in range(1, AUX_ROWS + 1):
+        ws.append([f"Informação auxiliar {i}"])
+    ws.append(list(public.columns))
+    for row in public.itertuples(index=False, name=None):
+        ws.append([None if (v is None or (isinstance(v, float) and np.isnan(v))) else v for v in row])
+    wb.save(path)
+    return path
+
+
+def write_gestao_xlsx(gestao: pd.DataFrame, path: str) -> str:
+    """Escreve a Gestão de Cobrança sintética (header na primeira linha)."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Cobranças")
+    ws.append(list(gestao.columns))
+    for row in gestao.itertuples(index=False, name=None):
+        ws.append([None if (v is None or (isinstance(v, float) and np.isnan(v))) else v for v in row])
+    wb.save(path)
+    return path
+
+
+def materialize(n_rows: int, data_dir: str, seed: int = DEFAULT_SEED, with_workbooks: bool = True, bases: Optional[SyntheticBases] = None) -> SyntheticFiles:
+    """
+    Grava em `data_dir` os arquivos do tamanho/seed pedido, reaproveitando os já existentes.
+    Os workbooks (.xlsx) são opcionais porque escrevê-los em 1M de linhas leva minutos
+    e só o benchmark do sync precisa deles.
+    """
+    from logic.services.sync_service import _save_parquet_safe, parent_aggregates_path
+
+    os.makedirs(data_dir, exist_ok=True)
+    stem = f"{size_label(n_rows)}_s{seed}"
+    files = SyntheticFiles(
+        n_rows=n_rows,
+        seed=seed,
+        balanco_xlsx=os.path.join(data_dir, f"balanco_{stem}.xlsx"),
+        gestao_xlsx=os.path.join(data_dir, f"gestao_{stem}.xlsx"),
+        parquet=os.path.join(data_dir, f"base_consolidada_{stem}.parquet"),
+    )
+    needed = [files.parquet]
+    if with_workbooks:
+        needed += [files.balanco_xlsx, files.gestao_xlsx]
+    if all(os.path.exists(p) for p in needed):
+        return files
+
+    bases = bases or generate_bases(n_rows, seed)
+    if not os.path.exists(files.parquet) and not _save_parquet_safe(bases.consolidated, files.parquet):
+        raise RuntimeError(f"Falha ao salvar Parquet sintético em {files.parquet}")
+    built = build_parent_aggregates(bases.consolidated)
+    if built is not None:
+        _save_parquet_safe(built[1], parent_aggregates_path(files.parquet))
+    if with_workbooks:
+        if not os.path.exists(files.balanco_xlsx):
+            write_balanco_xlsx(bases.balanco, files.balanco_xlsx)
+        if not os.path.exists(files.gestao_xlsx):
+            write_gestao_xlsx(bases.gestao, files.gestao_xlsx)
+    return files
@@ -29,6 +29,27 @@ class Settings(BaseSettings):
     # Firebase (Opcional para operação offline, obrigatório para produção cloud)
     firebase_credentials_path: Optional[str] = Field(default=None, description="Caminho local ou var ambiente para chave do firebase")
     firebase_storage_bucket: Optional[str] = Field(default=None, description="Nome do bucket de storage no Firebase")
+    firebase_health_ttl_seconds: int = Field(default=60, description="Tempo (s) em que um test_connection bem-sucedido é reaproveitado sem nova ida ao Firestore")
+
+    # Cache de enriquecimento (uc_enrichment)
+    enrichment_cache_ttl_seconds: int = Field(default=300, description="Tempo (s) em que o enriquecimento é servido da memória antes de buscar alterações no Firestore")
+    enrichment_full_refresh_seconds: int = Field(default=3600, description="Intervalo (s) entre varreduras completas da collection, que capturam exclusões feitas fora do app")
+    prejoin_enrichment: bool = Field(default=False, description="Materializa o enriquecimento numa tabela ao lado do cache consolidado e o junta à base na carga, dispensando o merge e a consulta ao Firestore a cada geração")
+
+    # Cache de resultados (planilhas já geradas)
+    result_cache_enabled: bool = Field(default=True, description="Reaproveita planilhas já geradas com o mesmo escopo, opções, base e enriquecimento")
+    result_cache_max_mb: int = Field(default=512, description="Tamanho máximo (MB) do cache de resultados em disco; os menos usados são descartados")
+
+    # Planilha gerada
+    missing_marker_mode: str = Field(default="comment", description="Como sinalizar dados ausentes além da fonte laranja: 'comment' (comentário na UC), 'column' (coluna 'Dados Ausentes') ou 'legend' (aba única 'Legenda') — as duas últimas evitam o custo dos comentários ao salvar")
+
+    # Saídas em lote (ZIP com vários .xlsx)
+    archive_compression: str = Field(default="stored", description="Compressão dos ZIPs gerados: 'stored' (sem recompressão — os .xlsx já são comprimidos) ou 'deflated'")
+    archive_compresslevel: int = Field(default=1, description="Nível de compressão (0-9) usado quando archive_compression='deflated'")
+    batch_output_format: str = Field(default="zip", description="Formato da geração em lote: 'zip' (um .xlsx por grupo/período) ou 'workbook' (um único .xlsx com uma aba por grupo/período)")
+
+    # Motor de consulta sobre a base consolidada
+    query_backend: str = Field(default="pandas", description="Motor de filtro/agregação da base consolidada: 'pandas' (base inteira em memória) ou 'duckdb' (SQL sobre o Parquet, só o escopo é carregado; requer o pacote duckdb)")
 
     # Caminho de Rede (Opcional, com fallback vazio)
     network_balanco_path_override: Optional[str] = Field(default=None, description="Caminho estrito definido no .env", validation_alias="NETWORK_SHARE_PATH")
@@ -0,0 +1,498 @@
+"""
+Backend DuckDB para consultas sobre a base consolidada (Parquet).
+
+Alternativa ao BaseExcelReader, escolhida por settings.query_backend = "duckdb": o
+Parquet é registrado numa conexão DuckDB embutida e o recorte por cliente/período,
+as contagens da revisão, o filtro portal-first e os agregados de Fatura Pai viram
+SQL, com os predicados empurrados para a leitura do Parquet. Só o escopo pedido é
+materializado (Arrow → pandas) para o restante do pipeline e para o writer; a base
+inteira não precisa caber em memória.
+
+As expressões SQL reproduzem a normalização do caminho pandas (logic.core.portal,
+logic.core.grouping, logic.core.summary.to_numeric_column); tests/test_duckdb_adapter.py
+compara os dois motores. duckdb é dependência opcional, importada sob demanda.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from logic.adapters.excel_adapter import BaseExcelReader, ColumnValidationError
+from logic.core.catalog import BaseCatalog, load_catalog, period_sort_key
+from logic.core.client_resolver import UC_COLUMNS, ClientResolver
+from logic.core.grouping import AGG_IS_GROUP, AGG_MEMBERS, PARENT_GROUP_COL
+from logic.core.mapping import (
+    ACCOUNT_NUMBER_COL,
+    CLASSIFICATION_SOURCE_COL,
+    CLIENT_COLUMN,
+    DOCUMENT_COLUMN,
+    ENRICHMENT_KEY,
+    GROUPING_FLAG_COL,
+    GROUPING_FLAG_VALUE,
+    HIERARCHY_KEY_COL,
+    HIERARCHY_PARENT_COL,
+    HIERARCHY_PARENT_VALUE,
+    OPTIONAL_BASE_COLUMNS,
+    PERIOD_COLUMN,
+    PORTAL_UC_COL,
+    SUM_COLUMNS,
+    get_base_columns,
+)
+from logic.core.periods import PERIOD_KEY_COL, PERIOD_KEY_MISSING, PeriodRange, period_key, periods_in_range
+from logic.core.portal import (
+    PORTAL_KEEP_COL,
+    PORTAL_RANK_COL,
+    PORTAL_UC_FINAL_COL,
+    PORTAL_VALUE_COL,
+    apply_portal_filter,
+    client_scope_keys,
+)
+
+logger = logging.getLogger(__name__)
+
+QUERY_BACKEND_PANDAS = "pandas"
+QUERY_BACKEND_DUCKDB = "duckdb"
+
+BASE_VIEW = "base"
+CLIENT_SCOPE_TABLE = "_client_scope"
+_ROW_COL = "file_row_number"
+_NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                  "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL", "BOOLEAN")
+_FLOAT_TYPES = ("FLOAT", "DOUBLE")
+
+
+def query_backend(name: Optional[str] = None) -> str:
+    """Motor de consulta pedido ou configurado ('pandas' ou 'duckdb')."""
+    backend = (name or settings.query_backend).lower()
+    if backend not in (QUERY_BACKEND_PANDAS, QUERY_BACKEND_DUCKDB):
+        raise ValueError(f"Backend de consulta desconhecido: '{backend}'. Use '{QUERY_BACKEND_PANDAS}' ou '{QUERY_BACKEND_DUCKDB}'.")
+    return backend
+
+
+def open_base_reader(base_file: Any, sheet_name: str = "Balanco Operacional", backend: Optional[str] = None):
+    """
+    Leitor da base para o motor configurado. O DuckDB só atende o Parquet consolidado;
+    planilhas/buffers e a ausência do pacote duckdb caem no BaseExcelReader.
+    """
+    if query_backend(backend) == QUERY_BACKEND_DUCKDB and isinstance(base_file, str) and base_file.endswith(".parquet"):
+        try:
+            return DuckDBBaseReader(base_file, sheet_name=sheet_name)
+        except ImportError as e:
+            logger.warning("Backend DuckDB indisponível (%s); usando pandas.", e)
+    return BaseExcelReader(base_file, sheet_name=sheet_name)
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("O backend de consulta 'duckdb' requer o pacote duckdb (pip install duckdb).") from e
+    return duckdb
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBBaseReader:
+    """
+    Leitor da base consolidada sobre DuckDB, com a mesma interface de consulta do
+    BaseExcelReader (clientes, períodos, filter_data) e consultas próprias que o
+    Orchestrator usa no lugar das máscaras sobre a base inteira.
+    """
+
+    def __init__(self, parquet_path: str, sheet_name: str = "Balanco Operacional"):
+        duckdb = _import_duckdb()
+        self.file_path = parquet_path
+        self.sheet_name = sheet_name
+        self._conn = duckdb.connect(database=":memory:")
+        self._scope_transforms: List[Callable[[pd.DataFrame], pd.DataFrame]] = []
+
+        source = f"read_parquet({_literal(parquet_path)}, file_row_number = true)"
+        described = self._conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+        self._types: Dict[str, str] = {}
+        projection = []
+        for name, col_type, *_ in described:
+            if name == _ROW_COL:
+                continue
+            # Mesma normalização de nomes do BaseExcelReader (espaços extras)
+            clean = str(name).strip()
+            self._types[clean] = str(col_type).upper()
+            projection.append(f"{_quote(name)} AS {_quote(clean)}")
+        projection.append(_ROW_COL)
+        self._conn.execute(f"CREATE VIEW {BASE_VIEW} AS SELECT {', '.join(projection)} FROM {source}")
+
+        self.columns: List[str] = list(self._types)
+        self._validate_columns()
+        self._catalog: Optional[BaseCatalog] = load_catalog(parquet_path)
+        self._period_keys: Optional[Dict[str, str]] = None
+        self._row_count: Optional[int] = None
+        self._client_scope_ready = False
+        logger.info("Base Parquet registrada no DuckDB: %s (%d colunas).", parquet_path, len(self.columns))
+
+    def _validate_columns(self):
+        expected = get_base_columns()
+        missing = [c for c in expected if c not in self._types and c not in OPTIONAL_BASE_COLUMNS]
+        if missing:
+            raise ColumnValidationError(
+                f"Colunas obrigatórias ausentes na planilha base: {missing}. "
+                f"Colunas encontradas: {self.columns}"
+            )
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def _execute(self, sql: str, params: Optional[list] = None):
+        # Um cursor por consulta: a conexão é compartilhada entre sessões do Streamlit
+        return self._conn.cursor().execute(sql, params or [])
+
+    def query_arrow(self, sql: str, params: Optional[list] = None):
+        """Executa SQL sobre a view `base` e devolve uma pyarrow.Table."""
+        result = self._execute(sql, params)
+        # to_arrow_table substitui fetch_arrow_table nas versões recentes do duckdb
+        return result.to_arrow_table() if hasattr(result, "to_arrow_table") else result.fetch_arrow_table()
+
+    def _frame(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        """Resultado como DataFrame indexado pela posição da linha na base (como no pandas)."""
+        df = self.query_arrow(sql, params).to_pandas()
+        if _ROW_COL in df.columns:
+            df.index = pd.Index(df.pop(_ROW_COL).to_numpy(dtype=np.int64))
+        for transform in self._scope_transforms:
+            df = transform(df)
+        return df
+
+    def add_scope_transform(self, transform: Callable[[pd.DataFrame], pd.DataFrame]) -> None:
+        """
+        Registra uma transformação aplicada a cada escopo materializado (ex.: junção do
+        enriquecimento pré-juntado), no lugar do extend_frame sobre a base inteira.
+        """
+        self._scope_transforms.append(transform)
+
+    def schema_frame(self) -> pd.DataFrame:
+        """DataFrame vazio com as colunas e tipos da base (e das transformações de escopo)."""
+        return self._frame(f"SELECT * FROM {BASE_VIEW} LIMIT 0")
+
+    @property
+    def row_count(self) -> int:
+        if self._row_count is None:
+            self._row_count = int(self._execute(f"SELECT count(*) FROM {BASE_VIEW}").fetchone()[0])
+        return self._row_count
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Base inteira em memória — só para consumidores legados; evite no backend DuckDB."""
+        if "_full_df" not in self.__dict__:
+            logger.warning("Materializando a base inteira a partir do DuckDB (%d linhas).", self.row_count)
+            self._full_df = self._frame(f"SELECT * FROM {BASE_VIEW} ORDER BY {_ROW_COL}")
+        return self._full_df
+
+    # ------------------------------------------------------------------
+    # Expressões SQL equivalentes à normalização do caminho pandas
+    # ------------------------------------------------------------------
+    def _is_numeric(self, col: str) -> bool:
+        return self._types.get(col, "").startswith(_NUMERIC_TYPES)
+
+    def _text(self, col: str) -> str:
+        return f"CAST({_quote(col)} AS VARCHAR)"
+
+    def _present(self, col: str) -> str:
+        """notna() do pandas: NaN de colunas float também conta como ausente."""
+        expr = f"{_quote(col)} IS NOT NULL"
+        if self._types.get(col, "").startswith(_FLOAT_TYPES):
+            expr += f" AND NOT isnan({_quote(col)})"
+        return expr
+
+    def _to_double(self, col: str) -> str:
+        """pd.to_numeric(errors='coerce'): NULL quando não numérico (NaN incluído)."""
+        if self._is_numeric(col):
+            value = f"CAST({_quote(col)} AS DOUBLE)"
+        else:
+            value = f"TRY_CAST(trim({self._text(col)}) AS DOUBLE)"
+        return f"(CASE WHEN isnan({value}) THEN NULL ELSE {value} END)"
+
+    def _to_number_br(self, col: str) -> str:
+        """to_numeric_column: aceita '1.234,56' e '1234.56'; vazios e lixo viram 0."""
+        if col not in self._types:
+            return "0.0"
+        if self._is_numeric(col):
+            return f"COALESCE({self._to_double(col)}, 0.0)"
+        text = f"trim({self._text(col)})"
+        normalized = f"(CASE WHEN contains({text}, ',') THEN replace(replace({text}, '.', ''), ',', '.') ELSE {text} END)"
+        value = f"TRY_CAST(CASE WHEN lower({text}) IN ('', 'nan', 'none', '<na>') THEN NULL ELSE {normalized} END AS DOUBLE)"
+        return f"COALESCE(CASE WHEN isnan({value}) THEN NULL ELSE {value} END, 0.0)"
+
+    def _uc(self, col: str) -> str:
+        """logic.core.portal.normalize_uc."""
+        text = f"trim({self._text(col)})"
+        return f"(CASE WHEN lower({text}) IN ('', 'nan', 'none', '<na>') THEN NULL ELSE regexp_replace({text}, '\\.0$', '') END)"
+
+    def _document_key(self) -> str:
+        return f"regexp_replace({self._text(DOCUMENT_COLUMN)}, '\\D', '', 'g')"
+
+    # ------------------------------------------------------------------
+    # Catálogo e filtros
+    # ------------------------------------------------------------------
+    def _period_labels(self) -> Dict[str, str]:
+        """Referência como texto → MM/YYYY, calculado uma vez por valor distinto da base."""
+        if self._period_keys is None:
+            rows = self._execute(
+                f"SELECT {_quote(PERIOD_COLUMN)}, {self._text(PERIOD_COLUMN)}, count(*) FROM {BASE_VIEW} "
+                f"WHERE {_quote(PERIOD_COLUMN)} IS NOT NULL GROUP BY ALL"
+            ).fetchall()
+            self._period_keys = {}
+            self._period_counts: Dict[str, int] = {}
+            for raw, key, count in rows:
+                label = BaseExcelReader._normalize_period_value(raw)
+                self._period_keys[key] = label
+                if label:
+                    self._period_counts[label] = self._period_counts.get(label, 0) + int(count)
+        return self._period_keys
+
+    def _build_catalog(self) -> BaseCatalog:
+        catalog = BaseCatalog(row_count=self.row_count)
+        client = self._text(CLIENT_COLUMN)
+        rows = self._execute(f"SELECT {client}, count(*) FROM {BASE_VIEW} WHERE {client} IS NOT NULL GROUP BY 1").fetchall()
+        catalog.client_rows = {name: int(count) for name, count in sorted(rows)}
+        catalog.clients = list(catalog.client_rows)
+
+        if DOCUMENT_COLUMN in self._types:
+            doc = f"regexp_replace(regexp_replace({self._text(DOCUMENT_COLUMN)}, '\\.0$', ''), '\\D', '', 'g')"
+            pairs = self._execute(
+                f"SELECT {client}, {doc} AS doc FROM {BASE_VIEW} "
+                f"WHERE {client} IS NOT NULL AND {self._present(DOCUMENT_COLUMN)} AND {doc} <> '' "
+                f"GROUP BY ALL ORDER BY min({_ROW_COL})"
+            ).fetchall()
+            for name, value in pairs:
+                catalog.client_documents.setdefault(name, []).append(value)
+
+        self._period_labels()
+        catalog.periods = sorted(self._period_counts, key=period_sort_key)
+        catalog.period_rows = {period: self._period_counts[period] for period in catalog.periods}
+        return catalog
+
+    @property
+    def catalog(self) -> BaseCatalog:
+        """Catálogo gravado no sync ou, na falta dele, calculado com agregações SQL."""
+        if self._catalog is None:
+            self._catalog = self._build_catalog()
+        return self._catalog
+
+    def get_clients(self) -> List[str]:
+        return list(self.catalog.clients)
+
+    def get_client_documents(self) -> Dict[str, List[str]]:
+        return {client: list(docs) for client, docs in self.catalog.client_documents.items()}
+
+    def get_periods(self) -> List[str]:
+        return list(self.catalog.periods)
+
+    @property
+    def client_resolver(self) -> ClientResolver:
+        """Índices da resolução em lote, montados sobre as combinações distintas de UC/documento/cliente."""
+        if "_client_resolver" not in self.__dict__:
+            columns = [c for c in [CLIENT_COLUMN, DOCUMENT_COLUMN, *UC_COLUMNS] if c in self._types]
+            self._client_resolver = ClientResolver.from_frame(self.distinct_rows(columns))
+        return self._client_resolver
+
+    def periods_in_range(self, period_range: PeriodRange) -> List[str]:
+        return periods_in_range(self.catalog.periods, period_range)
+
+    def _where(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> Tuple[str, list]:
+        """Predicado SQL equivalente a BaseExcelReader.filter_mask (inclui a expansão por CPF/CNPJ)."""
+        clauses, params = [], []
+        if clients:
+            client_in = f"list_contains(?::VARCHAR[], {self._text(CLIENT_COLUMN)})"
+            if DOCUMENT_COLUMN in self._types:
+                doc = self._document_key()
+                clauses.append(
+                    f"({client_in} OR {doc} IN (SELECT {doc} FROM {BASE_VIEW} WHERE {client_in} AND {doc} <> ''))"
+                )
+                params += [list(clients), list(clients)]
+            else:
+                clauses.append(client_in)
+                params.append(list(clients))
+
+        if isinstance(periods, PeriodRange) and PERIOD_KEY_COL not in self._types:
+            # Base sem a chave inteira: o intervalo vira a lista de períodos do catálogo
+            periods = self.periods_in_range(periods) or ["-"]
+        if isinstance(periods, PeriodRange):
+            clauses.append(f"{_quote(PERIOD_KEY_COL)} BETWEEN ? AND ?")
+            params += [periods.start or PERIOD_KEY_MISSING + 1, periods.end or np.iinfo(np.int32).max]
+        elif periods:
+            selected = {period_key(p) for p in periods} - {PERIOD_KEY_MISSING}
+            if PERIOD_KEY_COL in self._types:
+                keys = sorted(selected)
+                column = _quote(PERIOD_KEY_COL)
+            else:
+                keys = [key for key, label in self._period_labels().items() if period_key(label) in selected]
+                column = self._text(PERIOD_COLUMN)
+            if keys:
+                clauses.append(f"list_contains(?, {column})")
+                params.append(keys)
+            else:
+                clauses.append("FALSE")
+
+        return (" AND ".join(clauses) or "TRUE"), params
+
+    def filter_data(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> pd.DataFrame:
+        """Filtra a base pelos clientes e períodos, lendo do Parquet só as linhas do escopo."""
+        where, params = self._where(clients, periods)
+        filtered = self._frame(f"SELECT * FROM {BASE_VIEW} WHERE {where} ORDER BY {_ROW_COL}", params)
+        logger.info("Filtro aplicado (DuckDB): %d clientes, períodos %s → %d registros.", len(clients), periods if isinstance(periods, PeriodRange) else len(periods), len(filtered))
+        return filtered
+
+    def count_rows(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> int:
+        where, params = self._where(clients, periods)
+        return int(self._execute(f"SELECT count(*) FROM {BASE_VIEW} WHERE {where}", params).fetchone()[0])
+
+    def incomplete_rows(self, clients: List[str], periods: Union[List[str], PeriodRange], columns: List[str]) -> pd.DataFrame:
+        """Linhas do escopo sem Vencimento (mesma regra de Orchestrator._incomplete_mask), só com `columns`."""
+        present = [c for c in columns if c in self._types]
+        if "Vencimento" not in self._types:
+            return pd.DataFrame(columns=present)
+        where, params = self._where(clients, periods)
+        due = f"trim(lower({self._text('Vencimento')}))"
+        projection = ", ".join([_quote(c) for c in present] + [_ROW_COL])
+        return self._frame(
+            f"SELECT {projection} FROM {BASE_VIEW} WHERE {where} "
+            f"AND ({_quote('Vencimento')} IS NULL OR {due} IN ('', 'nan', 'nat', 'none')) ORDER BY {_ROW_COL}",
+            params,
+        )
+
+    def distinct_rows(self, columns: List[str]) -> pd.DataFrame:
+        """Combinações distintas de `columns`, na ordem de primeira aparição na base."""
+        projection = ", ".join(_quote(c) for c in columns)
+        return self.query_arrow(
+            f"SELECT {projection} FROM {BASE_VIEW} GROUP BY ALL ORDER BY min({_ROW_COL})"
+        ).to_pandas()
+
+    # ------------------------------------------------------------------
+    # Filtro portal-first
+    # ------------------------------------------------------------------
+    def _client_scope_table(self) -> str:
+        """
+        Tabela (cliente, documento) → escopo de cliente (logic.core.portal.client_scope_keys),
+        calculada sobre os pares distintos da base e criada uma vez no banco em memória.
+        """
+        if not self._client_scope_ready:
+            client = self._text(CLIENT_COLUMN)
+            document = self._document_key() if DOCUMENT_COLUMN in self._types else "CAST(NULL AS VARCHAR)"
+            pairs = self.query_arrow(
+                f"SELECT DISTINCT {client} AS _scope_client, {document} AS _scope_doc FROM {BASE_VIEW}"
+            ).to_pandas()
+            pairs["_scope"] = client_scope_keys(pairs["_scope_client"], pairs["_scope_doc"])
+            cursor = self._conn.cursor()
+            cursor.register("_client_scope_pairs", pairs)
+            cursor.execute(f"CREATE OR REPLACE TABLE {CLIENT_SCOPE_TABLE} AS SELECT * FROM _client_scope_pairs")
+            cursor.unregister("_client_scope_pairs")
+            self._client_scope_ready = True
+        return CLIENT_SCOPE_TABLE
+
+    def _portal_identity_sql(self) -> str:
+        """
+        resolve_portal_identity em SQL, para bases sincronizadas antes das colunas
+        técnicas: UC final (portal → alias → No. UC) e posição entre as candidatas,
+        ambas dentro do escopo de cliente.
+        """
+        uc_col = ENRICHMENT_KEY
+        portal_source = PORTAL_UC_COL if PORTAL_UC_COL in self._types else HIERARCHY_KEY_COL if HIERARCHY_KEY_COL in self._types else None
+        portal_uc = self._uc(portal_source) if portal_source else "CAST(NULL AS VARCHAR)"
+        source = f"coalesce(lower(trim({self._text(CLASSIFICATION_SOURCE_COL)})) = 'fatura', FALSE)" if CLASSIFICATION_SOURCE_COL in self._types else "FALSE"
+        account = f"({self._present(ACCOUNT_NUMBER_COL)} AND trim({self._text(ACCOUNT_NUMBER_COL)}) <> '')" if ACCOUNT_NUMBER_COL in self._types else "FALSE"
+        eligible = (f"coalesce({self._to_double(PORTAL_VALUE_COL)} > 0, FALSE) AND _uc_final IS NOT NULL "
+                    f"AND {self._present(PERIOD_COLUMN)}")
+        scope_table = self._client_scope_table()
+        document = self._document_key() if DOCUMENT_COLUMN in self._types else "CAST(NULL AS VARCHAR)"
+        return f"""
+            WITH src AS (
+                SELECT {BASE_VIEW}.*, {self._uc(uc_col)} AS _uc_base, {portal_uc} AS _uc_portal,
+                    coalesce({scope_table}._scope, -1) AS _scope
+                FROM {BASE_VIEW} LEFT JOIN {scope_table}
+                    ON {scope_table}._scope_client IS NOT DISTINCT FROM {self._text(CLIENT_COLUMN)}
+                    AND {scope_table}._scope_doc IS NOT DISTINCT FROM {document}
+            ),
+            alias AS (
+                SELECT _scope AS scope, _uc_portal AS portal, arg_min({self._text(uc_col)}, {_ROW_COL}) AS alias
+                FROM src
+                WHERE _uc_portal IS NOT NULL AND _uc_base IS NOT NULL AND regexp_matches({self._text(uc_col)}, '\\p{{L}}')
+                GROUP BY 1, 2
+            ),
+            resolved AS (
+                SELECT src.*, coalesce(_uc_portal, alias.alias, _uc_base) AS {PORTAL_UC_FINAL_COL}
+                FROM src LEFT JOIN alias ON alias.scope = src._scope AND alias.portal = src._uc_base
+            ),
+            flagged AS (
+                SELECT *, {eligible} AS _eligible FROM resolved
+            )
+            SELECT * EXCLUDE (_uc_base, _uc_portal, _scope, _eligible),
+                CAST(CASE WHEN _eligible THEN row_number() OVER (
+                    PARTITION BY _eligible, _scope, {PORTAL_UC_FINAL_COL}, {_quote(PERIOD_COLUMN)}
+                    ORDER BY {source} DESC, {account} DESC, {self._to_number_br('Valor Enviado Emissão')} DESC, {_ROW_COL}
+                ) - 1 ELSE -1 END AS INTEGER) AS {PORTAL_RANK_COL}
+            FROM flagged
+        """
+
+    def portal_data(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> Optional[pd.DataFrame]:
+        """
+        Escopo já no recorte portal-first (como Orchestrator._restrict_to_portal_invoices
+        + apply_portal_filter), com a deduplicação feita em SQL. None quando a base
+        não tem Valor_gestao (sem filtro portal).
+        """
+        if PORTAL_VALUE_COL not in self._types:
+            return None
+        where, params = self._where(clients, periods)
+        if PORTAL_KEEP_COL in self._types:
+            sql = f"SELECT * FROM {BASE_VIEW} WHERE {where} AND {_quote(PORTAL_KEEP_COL)} ORDER BY {_ROW_COL}"
+        else:
+            sql = (f"SELECT *, {PORTAL_RANK_COL} = 0 AS {PORTAL_KEEP_COL} FROM ({self._portal_identity_sql()}) AS {BASE_VIEW} "
+                   f"WHERE {where} AND {PORTAL_RANK_COL} = 0 ORDER BY {_ROW_COL}")
+        work = apply_portal_filter(self._frame(sql, params))
+        logger.info("Filtro portal-first (DuckDB) aplicado: %d registros mantidos.", len(work))
+        return work
+
+    # ------------------------------------------------------------------
+    # Agregados de Fatura Pai
+    # ------------------------------------------------------------------
+    def parent_aggregates(self) -> Optional[pd.DataFrame]:
+        """
+        Tabela de agregados por _parent_group (membros, Fatura Pai e somas das
+        SUM_COLUMNS) calculada com GROUP BY sobre o Parquet, no formato lido por
+        Orchestrator._precomputed_grouping. None se a base não tem os ids de grupo.
+        """
+        if PARENT_GROUP_COL not in self._types:
+            return None
+        marked = []
+        if GROUPING_FLAG_COL in self._types:
+            marked.append(f"coalesce(trim({self._text(GROUPING_FLAG_COL)}) = {_literal(GROUPING_FLAG_VALUE)}, FALSE)")
+        if HIERARCHY_PARENT_COL in self._types:
+            marked.append(f"coalesce(upper(trim({self._text(HIERARCHY_PARENT_COL)})) = {_literal(HIERARCHY_PARENT_VALUE)}, FALSE)")
+        # No recorte portal, o valor exibido (e somado) é o da Gestão
+        portal = PORTAL_VALUE_COL in self._types and PORTAL_KEEP_COL in self._types
+        sums = []
+        for col in SUM_COLUMNS:
+            if col not in self._types:
+                continue
+            value = f"COALESCE({self._to_double(PORTAL_VALUE_COL)}, 0.0)" if portal and col == "Valor Enviado Emissão" else self._to_number_br(col)
+            sums.append(f"sum({value}) AS {_quote(col)}")
+        projection = ", ".join([
+            "CAST(_parent_group AS BIGINT) AS gid",
+            f"count(*) AS {AGG_MEMBERS}",
+            f"bool_or({' OR '.join(marked) or 'FALSE'}) AS _marked",
+            *sums,
+        ])
+        result = self.query_arrow(
+            f"SELECT {projection} FROM {BASE_VIEW} WHERE {_quote(PARENT_GROUP_COL)} >= 0 GROUP BY 1 ORDER BY 1"
+        ).to_pandas()
+        if result.empty:
+            return None
+
+        table = result.set_index("gid").reindex(range(int(result["gid"].max()) + 1))
+        table[AGG_MEMBERS] = table[AGG_MEMBERS].fillna(0).astype(np.int64)
+        table[AGG_IS_GROUP] = table.pop("_marked").fillna(False).astype(bool) & (table[AGG_MEMBERS] > 1)
+        return table.reset_index(drop=True)
@@ -6,15 +6,25 @@ Otimizações de performance:
 - Detecção de header com openpyxl read_only (leve)
 - Leitura seletiva de colunas (usecols) — ~15 de 125
 - Compatível com @st.cache_data no app.py
+- Template lido uma vez por processo (e por mtime): TemplateDescriptor em cache
+- Clientes/períodos dos seletores vêm do catálogo gravado no sync (sem varrer a base)
 """
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Union
 from logic.core.mapping import (
     get_base_columns,
     get_required_columns,
     HEADER_MARKER_COLUMNS,
     HEADER_SCAN_ROWS,
     CLIENT_COLUMN,
+    DOCUMENT_COLUMN,
     PERIOD_COLUMN,
     PARENT_ROW_FLAG,
     OPTIONAL_BASE_COLUMNS,
@@ -26,7 +36,11 @@ from logic.core.mapping import (
     CHILD_ROW_FLAG,
     CLASSIFICATION_LABEL_REGRA,
 )
+from logic.core.catalog import BaseCatalog, build_catalog, load_catalog
+from logic.core.client_resolver import ClientResolver
+from logic.core.periods import PERIOD_KEY_COL, PERIOD_KEY_MISSING, PeriodRange, period_key, period_keys, periods_in_range
 from logic.core.dates import format_reference_period, format_full_date
+from logic.core.summary import build_executive_summary
 
 import logging
 
@@ -90,6 +104,9 @@ class BaseExcelReader:
             self.df = pd.read_parquet(file_path_or_buffer, engine="fastparquet")
             self._normalize_columns()
             self._validate_columns()
+            catalog = load_catalog(file_path_or_buffer)
+            if catalog is not None:
+                self._derived_cache = {"catalog": (self.df, catalog)}
             logger.info("Base Parquet carregada com %d registros e %d colunas.", len(self.df), len(self.df.columns))
             return
         
@@ -159,42 +176,93 @@ class BaseExcelReader:
                 f"Colunas encontradas: {list(self.df.columns)}"
             )
 
+    @property
+    def catalog(self) -> BaseCatalog:
+        """Catálogo de clientes/períodos: o gravado no sync ou, na falta dele, calculado uma vez por versão da base."""
+        return self._derived_column("catalog", build_catalog)
+
     def get_clients(self) -> List[str]:
         """Retorna lista de clientes (Razao Social) únicos na base, ordenados."""
-        if CLIENT_COLUMN not in self.df.columns:
-            return []
-        clients = self.df[CLIENT_COLUMN].dropna().unique().tolist()
-        return sorted([str(c) for c in clients])
+        return list(self.catalog.clients)
+
+    def get_client_documents(self) -> Dict[str, List[str]]:
+        """Retorna, por cliente, os CPF/CNPJ distintos (apenas dígitos) presentes na base."""
+        return {client: list(docs) for client, docs in self.catalog.client_documents.items()}
 
     def get_periods(self) -> List[str]:
-        """Retorna lista de períodos (Referencia) únicos."""
-        if PERIOD_COLUMN not in self.df.columns:
-            return []
-        normalized_periods = (
-            self.df[PERIOD_COLUMN]
-            .dropna()
-            .map(self._normalize_period_value)
+        """Retorna lista de períodos (Referencia) únicos, em ordem cronológica."""
+        return list(self.catalog.periods)
+
+    @property
+    def client_resolver(self) -> ClientResolver:
+        """Índices UC/CPF/CNPJ → clientes para a resolução em lote, montados uma vez por versão da base."""
+        return self._derived_column("client_resolver", ClientResolver.from_frame)
+
+    def extend_frame(self, df: pd.DataFrame) -> None:
+        """
+        Substitui self.df por uma versão com colunas adicionais e as mesmas linhas
+        (ex.: enriquecimento pré-juntado), preservando catálogo e séries já derivadas.
+        """
+        cache = self.__dict__.get("_derived_cache", {})
+        self.df = df
+        for name, (_, value) in list(cache.items()):
+            cache[name] = (df, value)
+
+    def _derived_column(self, name: str, builder) -> pd.Series:
+        """
+        Série derivada da base (ex.: períodos normalizados), calculada uma vez por
+        versão do DataFrame — se self.df for substituído, o cache é refeito.
+        """
+        cache = self.__dict__.setdefault("_derived_cache", {})
+        entry = cache.get(name)
+        if entry is None or entry[0] is not self.df:
+            entry = (self.df, builder(self.df))
+            cache[name] = entry
+        return entry[1]
+
+    def _document_keys(self) -> pd.Series:
+        return self._derived_column(
+            "document_keys",
+            lambda df: df[DOCUMENT_COLUMN].astype("string").str.replace(r"\D", "", regex=True).fillna(""),
         )
 
-        def _period_sort_key(period: str) -> tuple[int, int, str]:
-            # Ordenação cronológica real (ano -> mês), com fallback lexical.
-            # Aceita MM/YYYY ou MM-YYYY.
-            try:
-                normalized = str(period).strip().replace("-", "/")
-                month_str, year_str = normalized.split("/")
-                month = int(month_str)
-                year = int(year_str)
-                if 1 <= month <= 12:
-                    return (year, month, str(period))
-            except Exception:
-                pass
-            return (9999, 99, str(period))
-
-        valid_periods = sorted({p for p in normalized_periods if p}, key=_period_sort_key)
-        return valid_periods
-
-    def filter_data(self, clients: List[str], periods: List[str]) -> pd.DataFrame:
-        """Filtra o DataFrame pelos clientes e períodos especificados."""
+    def _period_keys(self) -> np.ndarray:
+        """Chave yyyymm por linha: a coluna gravada no sync ou, em bases antigas, calculada uma vez."""
+        def _build(df: pd.DataFrame) -> np.ndarray:
+            if PERIOD_KEY_COL in df.columns:
+                return df[PERIOD_KEY_COL].to_numpy(dtype=np.int32)
+            return period_keys(df[PERIOD_COLUMN]).to_numpy()
+        return self._derived_column("period_keys", _build)
+
+    def _period_index(self) -> tuple:
+        """(chaves ordenadas, posições correspondentes) para recortar intervalos por busca binária."""
+        def _build(df: pd.DataFrame) -> tuple:
+            keys = self._period_keys()
+            order = np.argsort(keys, kind="stable")
+            return keys[order], order
+        return self._derived_column("period_index", _build)
+
+    def periods_in_range(self, period_range: PeriodRange) -> List[str]:
+        """Períodos do catálogo dentro do intervalo ("últimos N meses", "de/até")."""
+        return periods_in_range(self.catalog.periods, period_range)
+
+    def _period_mask(self, periods: Union[List[str], PeriodRange]) -> np.ndarray:
+        if isinstance(periods, PeriodRange):
+            sorted_keys, order = self._period_index()
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[order[periods.locate(sorted_keys)]] = True
+            return mask
+        selected = {period_key(period) for period in periods} - {PERIOD_KEY_MISSING}
+        if not selected:
+            return np.zeros(len(self.df), dtype=bool)
+        return np.isin(self._period_keys(), np.fromiter(selected, dtype=np.int32))
+
+    def filter_mask(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> pd.Series:
+        """
+        Máscara booleana (alinhada a self.df) dos registros dos clientes e períodos
+        informados — permite contar e recortar sem copiar o DataFrame. `periods` é uma
+        lista de competências ou um PeriodRange (intervalo contínuo).
+        """
         mask = pd.Series(True, index=self.df.index)
 
         if clients:
@@ -202,43 +270,223 @@ class BaseExcelReader:
 
             # Quando há variação de Razão Social para o mesmo documento,
             # inclui todas as linhas do mesmo CPF/CNPJ dos clientes selecionados.
-            if "CPF/CNPJ" in self.df.columns:
-                def _normalize_doc(v: Any) -> str:
-                    if pd.isna(v):
-                        return ""
-                    return "".join(ch for ch in str(v) if ch.isdigit())
-
-                selected_docs = (
-                    self.df.loc[client_mask, "CPF/CNPJ"]
-                    .map(_normalize_doc)
-                    .replace("", pd.NA)
-                    .dropna()
-                    .unique()
-                    .tolist()
-                )
-                if selected_docs:
-                    docs_mask = self.df["CPF/CNPJ"].map(_normalize_doc).isin(selected_docs)
-                    client_mask = client_mask | docs_mask
+            if DOCUMENT_COLUMN in self.df.columns:
+                doc_keys = self._document_keys()
+                selected_docs = doc_keys[client_mask]
+                selected_docs = selected_docs[selected_docs != ""].unique()
+                if len(selected_docs):
+                    client_mask = client_mask | doc_keys.isin(selected_docs)
 
             mask = mask & client_mask
 
-        if periods:
-            selected_periods = set()
-            for period in periods:
-                normalized = self._normalize_period_value(period)
-                if normalized:
-                    selected_periods.add(normalized)
-            if not selected_periods:
-                mask = mask & pd.Series(False, index=self.df.index)
-            else:
-                period_series = self.df[PERIOD_COLUMN].map(self._normalize_period_value)
-                mask = mask & period_series.isin(selected_periods)
+        if isinstance(periods, PeriodRange) or periods:
+            mask = mask & self._period_mask(periods)
+
+        return mask
 
-        filtered = self.df[mask].copy()
-        logger.info("Filtro aplicado: %d clientes, %d períodos → %d registros.", len(clients), len(periods), len(filtered))
+    def filter_data(self, clients: List[str], periods: Union[List[str], PeriodRange]) -> pd.DataFrame:
+        """Filtra o DataFrame pelos clientes e períodos (lista ou PeriodRange) especificados."""
+        filtered = self.df[self.filter_mask(clients, periods)].copy()
+        logger.info("Filtro aplicado: %d clientes, períodos %s → %d registros.", len(clients), periods if isinstance(periods, PeriodRange) else len(periods), len(filtered))
         return filtered
 
 
+@dataclass(frozen=True)
+class CellStyleSpec:
+    """Estilo de uma célula do template, independente do workbook de origem."""
+    font: Any = None
+    border: Any = None
+    fill: Any = None
+    alignment: Any = None
+    protection: Any = None
+    number_format: str = "General"
+
+    @classmethod
+    def from_cell(cls, cell) -> "CellStyleSpec":
+        from copy import copy
+        return cls(
+            font=copy(cell.font),
+            border=copy(cell.border),
+            fill=copy(cell.fill),
+            alignment=copy(cell.alignment),
+            protection=copy(cell.protection),
+            number_format=cell.number_format,
+        )
+
+    def style_id(self, ws) -> Any:
+        """Registra o estilo no workbook de `ws` e devolve o StyleArray a atribuir às células."""
+        from copy import copy
+        from openpyxl.cell.cell import Cell
+
+        cell = Cell(ws, row=1, column=1)
+        for attr in ("font", "border", "fill", "alignment", "protection"):
+            value = getattr(self, attr)
+            if value is not None:
+                setattr(cell, attr, value)
+        cell.number_format = self.number_format
+        return copy(cell._style)
+
+
+@dataclass
+class TemplateDescriptor:
+    """
+    O que cada aba de saída herda do template: cabeçalho (rótulo + estilo por coluna),
+    larguras, altura do cabeçalho, painel congelado, estilos da linha 2 (modelo das
+    linhas de dados), formatação condicional, validação de dados e configuração de
+    impressão. Capturado uma vez; as abas são escritas do zero a partir dele, sem
+    copy_worksheet.
+    """
+    headers: List[str]
+    header_styles: List[CellStyleSpec]
+    row_styles: List[CellStyleSpec]
+    column_widths: Dict[str, float] = field(default_factory=dict)
+    header_height: Optional[float] = None
+    freeze_panes: Optional[str] = None
+    show_grid_lines: Optional[bool] = None
+    conditional_formats: List[tuple] = field(default_factory=list)  # (intervalo, regra)
+    data_validations: List[Any] = field(default_factory=list)
+    page_setup: Any = None
+    page_setup_properties: Any = None
+    print_options: Any = None
+    page_margins: Any = None
+    header_footer: Any = None
+    print_title_rows: Optional[str] = None
+    print_title_cols: Optional[str] = None
+
+    @classmethod
+    def from_template(cls, template_source: Any, column_mapping: Dict[str, str]) -> "TemplateDescriptor":
+        import openpyxl
+        from copy import copy
+        from openpyxl.utils import get_column_letter
+
+        wb = openpyxl.load_workbook(template_source)
+        ws = wb.active
+        try:
+            n_cols = len(column_mapping)
+            widths = {}
+            for idx in range(1, n_cols + 1):
+                letter = get_column_letter(idx)
+                dim = ws.column_dimensions.get(letter)
+                if dim is not None and dim.width:
+                    widths[letter] = dim.width
+            header_dim = ws.row_dimensions.get(1)
+            return cls(
+                headers=[str(label).strip() for label in column_mapping.values()],
+                header_styles=[CellStyleSpec.from_cell(ws.cell(row=1, column=idx)) for idx in range(1, n_cols + 1)],
+                row_styles=[CellStyleSpec.from_cell(ws.cell(row=2, column=idx)) for idx in range(1, n_cols + 1)],
+                column_widths=widths,
+                header_height=header_dim.height if header_dim is not None else None,
+                freeze_panes=ws.freeze_panes,
+                show_grid_lines=ws.sheet_view.showGridLines,
+                conditional_formats=[(str(cf.sqref), copy(rule)) for cf in ws.conditional_formatting for rule in cf.rules],
+                data_validations=[copy(dv) for dv in ws.data_validations.dataValidation],
+                page_setup=copy(ws.page_setup),
+                page_setup_properties=copy(ws.sheet_properties.pageSetUpPr),
+                print_options=copy(ws.print_options),
+                page_margins=copy(ws.page_margins),
+                header_footer=copy(ws.HeaderFooter),
+                print_title_rows=ws.print_title_rows,
+                print_title_cols=ws.print_title_cols,
+            )
+        finally:
+            wb.close()
+
+    def create_sheet(self, wb, title: str):
+        """
+        Cria uma aba (write-only) com larguras, painel congelado, formatação condicional,
+        validações, configuração de impressão e cabeçalho do template.
+        """
+        from copy import copy
+        from openpyxl.cell import WriteOnlyCell
+
+        ws = wb.create_sheet(title=title)
+        for letter, width in self.column_widths.items():
+            ws.column_dimensions[letter].width = width
+        if self.freeze_panes:
+            ws.freeze_panes = self.freeze_panes
+        if self.show_grid_lines is not None:
+            ws.sheet_view.showGridLines = self.show_grid_lines
+        if self.header_height:
+            ws.row_dimensions[1].height = self.header_height
+        for sqref, rule in self.conditional_formats:
+            ws.conditional_formatting.add(sqref, copy(rule))
+        for dv in self.data_validations:
+            ws.data_validations.append(copy(dv))
+        if self.page_setup is not None:
+            ws.page_setup = copy(self.page_setup)
+            ws.print_options = copy(self.print_options)
+            ws.page_margins = copy(self.page_margins)
+            ws.HeaderFooter = copy(self.header_footer)
+            ws.sheet_properties.pageSetUpPr = copy(self.page_setup_properties)
+        if self.print_title_rows:
+            ws.print_title_rows = self.print_title_rows
+        if self.print_title_cols:
+            ws.print_title_cols = self.print_title_cols
+
+        header_cells = []
+        for label, spec in zip(self.headers, self.header_styles):
+            cell = WriteOnlyCell(ws, value=label)
+            cell._style = spec.style_id(ws)
+            header_cells.append(cell)
+        ws.append(header_cells)
+        return ws
+
+
+# Cache de processo dos descritores de template: (identidade do template, mapeamento) → descritor
+TEMPLATE_CACHE_MAX_ENTRIES = 16
+_template_cache: "OrderedDict[tuple, TemplateDescriptor]" = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def _template_identity(template_source: Any) -> Optional[tuple]:
+    """
+    Identidade do template para o cache: caminho + mtime + tamanho para arquivos;
+    hash do conteúdo para buffers (upload). None quando não dá para identificar.
+    """
+    if isinstance(template_source, (str, os.PathLike)):
+        try:
+            stat = os.stat(template_source)
+        except OSError:
+            return None
+        return ("path", os.path.abspath(template_source), stat.st_mtime_ns, stat.st_size)
+    if hasattr(template_source, "getvalue"):
+        return ("buffer", hashlib.sha256(template_source.getvalue()).hexdigest())
+    return None
+
+
+def get_template_descriptor(template_source: Any, column_mapping: Dict[str, str]) -> TemplateDescriptor:
+    """
+    Devolve o descritor do template para o mapeamento, lendo o .xlsx só na primeira vez
+    (por processo e por versão do arquivo). Gerações seguintes — inclusive cada período
+    de uma exportação multiplexada — não reabrem o XML do template.
+    """
+    identity = _template_identity(template_source)
+    if identity is None:
+        return TemplateDescriptor.from_template(template_source, column_mapping)
+
+    key = (identity, tuple((str(k), str(v)) for k, v in column_mapping.items()))
+    with _template_cache_lock:
+        descriptor = _template_cache.get(key)
+        if descriptor is not None:
+            _template_cache.move_to_end(key)
+            return descriptor
+
+    # Leitura fora do lock; em corrida, a última escrita vence (descritores equivalentes)
+    descriptor = TemplateDescriptor.from_template(template_source, column_mapping)
+    with _template_cache_lock:
+        _template_cache[key] = descriptor
+        _template_cache.move_to_end(key)
+        while len(_template_cache) > TEMPLATE_CACHE_MAX_ENTRIES:
+            _template_cache.popitem(last=False)
+    return descriptor
+
+
+def clear_template_cache() -> None:
+    """Descarta os descritores em cache (ex.: testes ou troca de template em disco)."""
+    with _template_cache_lock:
+        _template_cache.clear()
+
+
 class TemplateExcelWriter:
     """Adaptador para escrever dados no template mc.xlsx com formatação de dados."""
 
@@ -315,7 +563,84 @@ class TemplateExcelWriter:
                 return f"{raw[:2]}.{raw[2:5]}.{raw[5:8]}/{raw[8:12]}-{raw[12:14]}"
             return str(val)
 
-    def generate_bytes(self, data_to_insert: pd.DataFrame, column_mapping: Dict[str, str], tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False) -> bytes:
+    # Tipos de linha com estilo próprio na tabela de estilos do writer
+    ROW_NORMAL = "normal"
+    ROW_PARENT = "parent"
+    ROW_MISSING = "missing"
+    ROW_PARENT_MISSING = "parent_missing"
+
+    # Colunas cujo valor ausente é destacado (fonte laranja + marcador de ausência)
+    MISSING_HIGHLIGHT_COLUMNS = {"Vencimento", "Status Pos-Faturamento"}
+
+    # Como a ausência é sinalizada além da fonte laranja:
+    # - comment: comentário na célula da UC (cada comentário vira desenho VML — caro de salvar)
+    # - column: coluna extra "Dados Ausentes" com os campos faltantes da linha
+    # - legend: uma única aba "Legenda" listando aba, linha, UC e campos faltantes
+    MISSING_MARKER_COMMENT = "comment"
+    MISSING_MARKER_COLUMN = "column"
+    MISSING_MARKER_LEGEND = "legend"
+    MISSING_MARKERS = (MISSING_MARKER_COMMENT, MISSING_MARKER_COLUMN, MISSING_MARKER_LEGEND)
+    MISSING_MARKER_NOTE = "⚠ Dado ausente na Gestão de Cobrança para este período"
+    MISSING_MARKER_KEY = "_dados_ausentes"
+    MISSING_MARKER_HEADER = "Dados Ausentes"
+    LEGEND_SHEET = "Legenda"
+
+    def describe_template(self, column_mapping: Dict[str, str]) -> TemplateDescriptor:
+        """Cabeçalho, larguras e estilos que cada aba de saída herda (em cache por processo)."""
+        return get_template_descriptor(self.template_source, column_mapping)
+
+    def _build_style_table(self, ws, descriptor: TemplateDescriptor, column_mapping: Dict[str, str], parent_font, parent_fill, missing_font, currency_format: str) -> Dict[tuple, Any]:
+        """
+        Resolve uma única vez, por (coluna, tipo de linha), o StyleArray que as células
+        recebem — em vez de copiar fonte/borda/alinhamento/proteção a cada célula.
+        Os estilos vêm da linha 2 do template; colunas sem borda (ou a classificação)
+        usam a primeira coluna como modelo visual. Separadores usam o estilo normal.
+        Os estilos são registrados no workbook de `ws` (o de saída).
+        """
+        from copy import copy
+        from openpyxl.cell.cell import Cell
+        from openpyxl.styles import PatternFill
+
+        model_ref = descriptor.row_styles[0]
+        no_fill = PatternFill(fill_type=None)
+        table = {}
+        for col_idx, base_col in enumerate(column_mapping, 1):
+            col_ref = descriptor.row_styles[col_idx - 1]
+            use_model = (base_col == CLASSIFICATION_COL) or (not col_ref.border or not col_ref.border.left.style)
+            style_source = model_ref if use_model else col_ref
+
+            if base_col in self.CURRENCY_COLUMNS:
+                number_format = currency_format
+            elif base_col in self.TEXT_COLUMNS:
+                number_format = "@"
+            else:
+                number_format = col_ref.number_format
+
+            # Célula avulsa (fora da grade da planilha): só registra os estilos no workbook
+            normal = Cell(ws, row=1, column=col_idx)
+            normal.font = copy(style_source.font)
+            normal.border = copy(style_source.border)
+            normal.alignment = copy(style_source.alignment)
+            normal.protection = copy(style_source.protection)
+            normal.number_format = number_format
+            normal.fill = no_fill
+
+            parent = Cell(ws, row=1, column=col_idx)
+            parent.font = parent_font
+            parent.fill = parent_fill
+            if base_col in self.CURRENCY_COLUMNS or base_col in self.TEXT_COLUMNS:
+                parent.number_format = number_format
+
+            table[(col_idx, self.ROW_NORMAL)] = copy(normal._style)
+            table[(col_idx, self.ROW_PARENT)] = copy(parent._style)
+            if base_col in self.MISSING_HIGHLIGHT_COLUMNS:
+                normal.font = missing_font
+                parent.font = missing_font
+                table[(col_idx, self.ROW_MISSING)] = copy(normal._style)
+                table[(col_idx, self.ROW_PARENT_MISSING)] = copy(parent._style)
+        return table
+
+    def generate_bytes(self, data_to_insert: pd.DataFrame, column_mapping: Dict[str, str], tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False, missing_marker: str = MISSING_MARKER_COMMENT) -> bytes:
         """
         Lê o template, insere as linhas filtradas e retorna os bytes do Excel gerado.
         Aplica formatação:
@@ -323,35 +648,11 @@ class TemplateExcelWriter:
         - CPF/CNPJ → XX.XXX.XXX/XXXX-XX
         - Valores monetários → R$ #.##0,00
         - Fatura Pai → negrito + fundo amarelo
-        """
-        import io
-        import openpyxl
-        from copy import copy
-
-        # Carregar o template
-        wb = openpyxl.load_workbook(self.template_source)
-        ws = wb.active
-
-        template_ws = ws
-        template_ws.title = "_template_temp"
-
-        # 1. Mapear e Enforcar Layout (Strict layout)
-        header_row_idx = 1
-        original_max_col = template_ws.max_column
-        
-        for c in range(1, original_max_col + 1):
-            template_ws.cell(row=header_row_idx, column=c).value = None
-
-        template_col_to_idx = {}
-        for idx, (logical_name, target_label) in enumerate(column_mapping.items(), 1):
-            target_label = target_label.strip()
-            template_ws.cell(row=header_row_idx, column=idx, value=target_label)
-            template_col_to_idx[logical_name] = idx
-            
-        expected_cols = len(column_mapping)
-        if original_max_col > expected_cols:
-            template_ws.delete_cols(expected_cols + 1, original_max_col - expected_cols + 50)
 
+        O template é lido uma única vez (TemplateDescriptor); cada aba é criada do zero
+        num workbook write-only, sem copy_worksheet — o custo não cresce com o número
+        de abas (uma por distribuidora).
+        """
         # Preparar dados: Separar Auditoria se ativo
         df_financeiro = data_to_insert
         df_auditoria = pd.DataFrame()
@@ -381,7 +682,45 @@ class TemplateExcelWriter:
                 if separar_auditoria and not df_auditoria.empty:
                     df_groups.append(("Aud - Faturas", df_auditoria))
 
-        start_row = 2
+        return self._write_workbook(df_groups, column_mapping, summary_source=data_to_insert if incluir_resumo else None, missing_marker=missing_marker)
+
+    def generate_sheets_bytes(self, sheets: List[tuple], column_mapping: Dict[str, str], incluir_resumo: bool = False, missing_marker: str = MISSING_MARKER_COMMENT) -> bytes:
+        """
+        Gera um único workbook com uma aba por item de `sheets` ([(título, quadro)]),
+        todas no layout do template. Usado na geração em lote como alternativa ao ZIP;
+        o Resumo Executivo, se pedido, cobre todas as abas.
+        """
+        summary_source = None
+        if incluir_resumo:
+            frames = [df for _, df in sheets]
+            summary_source = pd.concat(frames, ignore_index=True, sort=False) if frames else pd.DataFrame()
+        return self._write_workbook(list(sheets), column_mapping, summary_source=summary_source, missing_marker=missing_marker)
+
+    def _write_workbook(self, df_groups: List[tuple], column_mapping: Dict[str, str], summary_source: Optional[pd.DataFrame] = None, missing_marker: str = MISSING_MARKER_COMMENT) -> bytes:
+        """Escreve cada (título, quadro) numa aba nova e, opcionalmente, a Legenda e o Resumo Executivo."""
+        import io
+        import openpyxl
+        from copy import copy
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.comments import Comment
+
+        if missing_marker not in self.MISSING_MARKERS:
+            raise ValueError(f"Marcador de ausência desconhecido: '{missing_marker}'. Use um de {', '.join(self.MISSING_MARKERS)}.")
+
+        # Rótulos dos campos destacados, para a coluna "Dados Ausentes" e a Legenda
+        missing_labels = {col: str(column_mapping.get(col, col)).strip() for col in self.MISSING_HIGHLIGHT_COLUMNS}
+        if missing_marker == self.MISSING_MARKER_COLUMN:
+            column_mapping = {**column_mapping, self.MISSING_MARKER_KEY: self.MISSING_MARKER_HEADER}
+
+        # 1. Layout estrito: cabeçalho e estilos vêm do template, na ordem do mapeamento
+        descriptor = self.describe_template(column_mapping)
+        template_col_to_idx = {logical_name: idx for idx, logical_name in enumerate(column_mapping, 1)}
+
+        wb = openpyxl.Workbook(write_only=True)
+
+        # Workbook sem abas não pode ser salvo
+        if not df_groups:
+            df_groups = [("Consolidado", pd.DataFrame(columns=list(column_mapping)))]
 
         # Estilos para a linha "Fatura Pai" — fundo amarelo visível
         parent_font = openpyxl.styles.Font(bold=True, size=11)
@@ -396,16 +735,32 @@ class TemplateExcelWriter:
             color="BF360C", bold=True
         )
 
+        style_table = None
+        uc_logical_col = ENRICHMENT_KEY if ENRICHMENT_KEY in template_col_to_idx else "CPF/CNPJ"
+        uc_idx = template_col_to_idx.get(uc_logical_col)
+
         total_rows_written = 0
+        legend_rows = []
+        used_titles = set()
         for name, group_df in df_groups:
-            ws = wb.copy_worksheet(template_ws)
-            safe_title = "".join([c for c in name if c not in r"\/?*[]:"])[:31]
-            ws.title = safe_title if safe_title else "Consolidado"
-            current_row = start_row
-
-            for _, row in group_df.iterrows():
+            safe_title = "".join([c for c in name if c not in r"\/?*[]:"])[:31] or "Consolidado"
+            # Abas são criadas com o título final; evita colisão (ex.: nomes truncados iguais)
+            title, suffix = safe_title, 1
+            while title.lower() in used_titles:
+                suffix += 1
+                title = f"{safe_title[:31 - len(str(suffix))]}{suffix}"
+            used_titles.add(title.lower())
+
+            ws = descriptor.create_sheet(wb, title)
+            if style_table is None:
+                style_table = self._build_style_table(ws, descriptor, column_mapping, parent_font, parent_fill, missing_font, currency_format)
+
+            for row_number, (_, row) in enumerate(group_df.iterrows(), 2):
                 is_parent = bool(row.get(PARENT_ROW_FLAG, False))
                 is_separator = bool(row.get(SEPARATOR_ROW_FLAG, False))
+                row_kind = self.ROW_PARENT if is_parent else self.ROW_NORMAL
+                row_cells = []
+                row_missing = []
 
                 for base_col, col_idx in template_col_to_idx.items():
                     val = None
@@ -429,104 +784,98 @@ class TemplateExcelWriter:
                         else:
                             val = None
 
-                    new_cell = ws.cell(row=current_row, column=col_idx, value=val)
-
-                    # Formato numérico para moeda
-                    if base_col in self.CURRENCY_COLUMNS:
-                        new_cell.number_format = currency_format
-                    elif base_col in self.TEXT_COLUMNS:
-                        new_cell.number_format = '@'
-                        # Forçar valor como string se já foi lido como número
-                        if val is not None:
-                            new_cell.value = str(val).strip()
-
-                    if is_parent:
-                        # Formatação especial para Fatura Pai
-                        new_cell.font = parent_font
-                        new_cell.fill = parent_fill
-                    else:
-                        # Para colunas adicionadas logicamente, usar a primeira coluna como modelo visual seguro.
-                        col_ref = ws.cell(row=2, column=col_idx)
-                        model_ref = ws.cell(row=2, column=1)
-                        use_model = (base_col == CLASSIFICATION_COL) or (not col_ref.border or not col_ref.border.left.style)
-                        style_source = model_ref if use_model else col_ref
-
-                        new_cell.font = copy(style_source.font)
-                        new_cell.border = copy(style_source.border)
-                        new_cell.alignment = copy(style_source.alignment)
-                        new_cell.protection = copy(style_source.protection)
-
-                        if base_col not in self.CURRENCY_COLUMNS:
-                            new_cell.number_format = copy(col_ref.number_format)
-
-                    if is_separator:
-                        new_cell.fill = openpyxl.styles.PatternFill(fill_type=None)
-                    elif not is_parent:
-                        new_cell.fill = openpyxl.styles.PatternFill(fill_type=None)
+                    # Forçar valor como string se já foi lido como número
+                    if base_col in self.TEXT_COLUMNS and val is not None:
+                        val = str(val).strip()
+
+                    new_cell = WriteOnlyCell(ws, value=val)
+                    cell_kind = row_kind
 
                     # Destaque de ausência (apenas na fonte, fundo permanece limpo)
-                    if not is_separator:
+                    if not is_separator and base_col in self.MISSING_HIGHLIGHT_COLUMNS:
                         is_empty = val is None or str(val).strip().lower() in ["", "nan", "nat", "none"]
-                        if is_empty and base_col in {"Vencimento", "Status Pos-Faturamento"}:
-                            new_cell.font = missing_font
-
-                            uc_logical_col = ENRICHMENT_KEY if ENRICHMENT_KEY in template_col_to_idx else "CPF/CNPJ"
-                            if uc_logical_col in template_col_to_idx:
-                                uc_idx = template_col_to_idx[uc_logical_col]
-                                uc_cell = ws.cell(row=current_row, column=uc_idx)
-                                if uc_cell.comment is None:
-                                    from openpyxl.comments import Comment
-                                    uc_cell.comment = Comment(
-                                        "⚠ Dado ausente na Gestão de Cobrança para este período",
-                                        "Sistema MC"
-                                    )
-                                    uc_cell.comment.width = 200
-                                    uc_cell.comment.height = 50
-
-                current_row += 1
+                        if is_empty:
+                            cell_kind = self.ROW_PARENT_MISSING if is_parent else self.ROW_MISSING
+                            row_missing.append(missing_labels[base_col])
+
+                    new_cell._style = copy(style_table[(col_idx, cell_kind)])
+                    row_cells.append(new_cell)
+
+                # Em write-only o marcador precisa estar na célula antes do append
+                if row_missing:
+                    if missing_marker == self.MISSING_MARKER_COLUMN:
+                        row_cells[template_col_to_idx[self.MISSING_MARKER_KEY] - 1].value = ", ".join(row_missing)
+                    elif missing_marker == self.MISSING_MARKER_LEGEND:
+                        uc_value = row_cells[uc_idx - 1].value if uc_idx is not None else None
+                        legend_rows.append([title, row_number, uc_value, ", ".join(row_missing)])
+                    elif uc_idx is not None:
+                        comment = Comment(self.MISSING_MARKER_NOTE, "Sistema MC")
+                        comment.width = 200
+                        comment.height = 50
+                        row_cells[uc_idx - 1].comment = comment
+
+                ws.append(row_cells)
                 total_rows_written += 1
 
-        # Remover aba temporária
-        wb.remove(template_ws)
+        # Legenda: uma aba só em vez de um comentário por linha
+        if missing_marker == self.MISSING_MARKER_LEGEND and legend_rows:
+            legend_ws = wb.create_sheet(self.LEGEND_SHEET)
+            note = WriteOnlyCell(legend_ws, value=self.MISSING_MARKER_NOTE)
+            note.font = missing_font
+            legend_ws.append([note])
+            legend_ws.append([])
+            header_cells = []
+            for label in ("Aba", "Linha", str(column_mapping.get(uc_logical_col, uc_logical_col)).strip(), "Campos ausentes"):
+                cell = WriteOnlyCell(legend_ws, value=label)
+                cell.font = openpyxl.styles.Font(bold=True)
+                header_cells.append(cell)
+            legend_ws.append(header_cells)
+            for legend_row in legend_rows:
+                legend_ws.append(legend_row)
 
         # Resumo Executivo
-        if incluir_resumo:
+        if summary_source is not None:
             resumo_ws = wb.create_sheet("Resumo Executivo")
-            resumo_ws.append(["Resumo Executivo"])
-            resumo_ws.append([])
 
-            is_parent = data_to_insert.get(PARENT_ROW_FLAG, pd.Series(False, index=data_to_insert.index)).astype(bool)
-            is_separator = data_to_insert.get(SEPARATOR_ROW_FLAG, pd.Series(False, index=data_to_insert.index)).astype(bool)
-            raw_rows = data_to_insert[~(is_parent | is_separator)]
-
-            def _parse_num(v):
-                if pd.isna(v): return 0.0
-                if isinstance(v, (int, float)): return float(v)
-                s = str(v).strip()
-                if s in ["", "-", "--"]: return 0.0
-                if "," in s: s = s.replace(".", "").replace(",", ".")
-                try: return float(s)
-                except: return 0.0
-
-            eco_total = raw_rows["Ganho total Padrão"].apply(_parse_num).sum() if "Ganho total Padrão" in raw_rows.columns else 0.0
-            # Total de faturamento deve usar valor monetário da fatura, não tarifa unitária.
-            fat_total = raw_rows["Valor Enviado Emissão"].apply(_parse_num).sum() if "Valor Enviado Emissão" in raw_rows.columns else 0.0
-
-            resumo_ws.append(["Soma da Economia Gerada (R$):", eco_total])
-            resumo_ws.append(["Soma da Fatura Raízen (R$):", fat_total])
+            # Em write-only a formatação vai na célula antes do append
+            def _styled(value, bold=False, number_format=None):
+                cell = WriteOnlyCell(resumo_ws, value=value)
+                if bold:
+                    cell.font = openpyxl.styles.Font(bold=True)
+                if number_format:
+                    cell.number_format = number_format
+                return cell
+
+            resumo_ws.append([_styled("Resumo Executivo", bold=True)])
             resumo_ws.append([])
-            resumo_ws.append(["Situação do Pagamento", "Contagem"])
-            
-            if "Status Pos-Faturamento" in raw_rows.columns:
-                counts = raw_rows["Status Pos-Faturamento"].value_counts()
-                for status, count in counts.items():
-                    resumo_ws.append([status, count])
-
-            # Formatação básica do resumo
-            for row_idx in [1, 4, 5, 7]:
-                resumo_ws.cell(row=row_idx, column=1).font = openpyxl.styles.Font(bold=True)
-            resumo_ws.cell(row=4, column=2).number_format = currency_format
-            resumo_ws.cell(row=5, column=2).number_format = currency_format
+
+            summary = build_executive_summary(summary_source)
+            totals = summary.totals
+            percent_format = "0.00%"
+
+            resumo_ws.append([_styled("Soma da Economia Gerada (R$):", bold=True), _styled(totals["economia"], number_format=currency_format)])
+            resumo_ws.append([_styled("Soma da Fatura Raízen (R$):", bold=True), _styled(totals["faturamento"], number_format=currency_format)])
+            resumo_ws.append([_styled("Energia Compensada (kWh):", bold=True), _styled(totals["kwh"], number_format=currency_format)])
+            resumo_ws.append([_styled("Economia sobre Custo s/ GD (%):", bold=True), _styled(summary.economy_pct, number_format=percent_format)])
+
+            # Recortes: mesma estrutura de colunas para distribuidora, referência e situação
+            breakdowns = [
+                ("Situação do Pagamento", summary.by_status),
+                ("Distribuidora", summary.by_distributor),
+                ("Mês de Referência", summary.by_period),
+            ]
+            for label, table in breakdowns:
+                resumo_ws.append([])
+                resumo_ws.append([_styled(h, bold=True) for h in (label, "Contagem", "Energia Compensada (kWh)", "Fatura Raízen (R$)", "Economia Gerada (R$)", "Economia (%)")])
+                for key, item in table.iterrows():
+                    resumo_ws.append([
+                        key,
+                        int(item["linhas"]),
+                        _styled(item["kwh"], number_format=currency_format),
+                        _styled(item["faturamento"], number_format=currency_format),
+                        _styled(item["economia"], number_format=currency_format),
+                        _styled(item["economia_pct"] if pd.notna(item["economia_pct"]) else None, number_format=percent_format),
+                    ])
 
         logger.info("Planilha gerada com %d linhas de dados em %d separadores.", total_rows_written, len(df_groups))
 
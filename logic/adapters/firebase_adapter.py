@@ -1,17 +1,32 @@
 """
 Adaptador para comunicação com o Firebase Cloud Storage.
 Permite inicializar o app, verificar metadata, fazer upload e download de arquivos.
+
+O SDK (firebase_admin, Firestore e a pilha gRPC) só é importado quando um
+adaptador é de fato criado — importar este módulo não pesa no cold start do app.
+
+get_shared_adapter() mantém um adaptador por processo (um app inicializado, um
+cliente Firestore e um handle de bucket), compartilhado por todos os serviços.
 """
 
+import hashlib
+import json
 import os
-import firebase_admin
-from firebase_admin import credentials, storage, firestore
+import threading
+import time
 from datetime import datetime, timezone
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+
+def _firebase_sdk():
+    """Importa o SDK do Firebase sob demanda. Retorna (firebase_admin, credentials, storage, firestore)."""
+    import firebase_admin
+    from firebase_admin import credentials, storage, firestore
+    return firebase_admin, credentials, storage, firestore
+
 class FirebaseAdapterError(Exception):
     """Exceção customizada para erros operacionais do Firebase."""
     pass
@@ -25,6 +40,9 @@ class FirebaseAdapter:
             
         self.credentials_path = credentials_path
         self.bucket_name = bucket_name
+        self._db = None
+        self._bucket = None
+        self._healthy_at: Optional[float] = None  # monotonic do último test_connection bem-sucedido
         self._app = self._initialize_app()
         self._db = self._get_db()
 
@@ -36,6 +54,7 @@ class FirebaseAdapter:
         3. Streamlit Secrets (st.secrets["firebase"])
         """
         try:
+            firebase_admin, credentials, _, _ = _firebase_sdk()
             if not firebase_admin._apps:
                 import streamlit as st
                 cred = None
@@ -89,20 +108,41 @@ class FirebaseAdapter:
         except Exception as e:
             raise FirebaseAdapterError(f"Falha inesperada ao inicializar credenciais Firebase: {e}")
 
-    def test_connection(self):
-        """Tenta listar as coleções do Firestore para validar conexão. Levanta erro se falhar."""
+    def test_connection(self, max_age_seconds: Optional[float] = None):
+        """
+        Tenta listar as coleções do Firestore para validar conexão. Levanta erro se falhar.
+        Um sucesso é reaproveitado por `max_age_seconds` (padrão: settings.firebase_health_ttl_seconds);
+        uma falha descarta os clientes, que são recriados na próxima chamada.
+        """
+        if max_age_seconds is None:
+            from config.settings import settings
+            max_age_seconds = settings.firebase_health_ttl_seconds
+        if self._healthy_at is not None and (time.monotonic() - self._healthy_at) < max_age_seconds:
+            return True
         try:
             db = self._get_db()
             _ = list(db.collections(timeout=5))
+            self._healthy_at = time.monotonic()
             return True
         except Exception as e:
+            self.reset_clients()
             raise FirebaseAdapterError(f"Firestore indisponível ou timeout na conexão: {e}")
 
+    def reset_clients(self) -> None:
+        """Descarta os clientes Firestore/Storage e o health-check; são recriados sob demanda."""
+        self._db = None
+        self._bucket = None
+        self._healthy_at = None
+
     def _get_bucket(self):
         if not self._app:
             raise FirebaseAdapterError("App Firebase não inicializado corretamente. Bucket inacessível.")
+        if self._bucket is not None:
+            return self._bucket
         try:
-            return storage.bucket(app=self._app)
+            _, _, storage, _ = _firebase_sdk()
+            self._bucket = storage.bucket(app=self._app)
+            return self._bucket
         except Exception as e:
             raise FirebaseAdapterError(f"Erro ao acessar Storage Bucket '{self.bucket_name}': {e}")
 
@@ -110,8 +150,12 @@ class FirebaseAdapter:
         """Inicializa e retorna o cliente do Firestore."""
         if not self._app:
             raise FirebaseAdapterError("App Firebase não inicializado. Banco de dados inacessível.")
+        if self._db is not None:
+            return self._db
         try:
-            return firestore.client(app=self._app)
+            _, _, _, firestore = _firebase_sdk()
+            self._db = firestore.client(app=self._app)
+            return self._db
         except Exception as e:
             raise FirebaseAdapterError(f"Erro ao obter cliente Firestore: {e}")
 
@@ -158,3 +202,65 @@ class FirebaseAdapter:
             return True
         except Exception as e:
             raise FirebaseAdapterError(f"Erro ao fazer upload do arquivo para '{blob_name}': {e}")
+
+
+# --- REGISTRO DE PROCESSO ---
+
+# Após uma falha de inicialização, novas tentativas esperam este intervalo (s)
+# para que cada rerun do Streamlit não repita a resolução de credenciais.
+RETRY_AFTER_SECONDS = 30.0
+
+_registry: Dict[Tuple[str, str], FirebaseAdapter] = {}
+_failures: Dict[Tuple[str, str], Tuple[float, FirebaseAdapterError]] = {}
+_registry_lock = threading.Lock()
+
+
+def _registry_key(credentials_path: Any, bucket_name: Optional[str]) -> Tuple[str, str]:
+    if isinstance(credentials_path, dict):
+        raw = json.dumps(credentials_path, sort_keys=True, default=str)
+        cred_key = "dict:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    else:
+        cred_key = f"path:{credentials_path or ''}"
+    return cred_key, bucket_name or ""
+
+
+def get_shared_adapter(credentials_path: Any = None, bucket_name: Optional[str] = None) -> FirebaseAdapter:
+    """
+    Adaptador Firebase compartilhado pelo processo (padrão: credenciais e bucket de settings).
+    A inicialização acontece uma vez; falhas levantam FirebaseAdapterError e só são
+    tentadas de novo após RETRY_AFTER_SECONDS (reconexão preguiçosa).
+    """
+    if credentials_path is None and bucket_name is None:
+        from config.settings import settings
+        credentials_path = settings.firebase_credentials_path
+        bucket_name = settings.firebase_storage_bucket
+
+    key = _registry_key(credentials_path, bucket_name)
+    with _registry_lock:
+        adapter = _registry.get(key)
+        if adapter is not None:
+            return adapter
+        failure = _failures.get(key)
+        if failure is not None and (time.monotonic() - failure[0]) < RETRY_AFTER_SECONDS:
+            raise failure[1]
+
+        try:
+            adapter = FirebaseAdapter(credentials_path, bucket_name)
+        except FirebaseAdapterError as e:
+            _failures[key] = (time.monotonic(), e)
+            raise
+        except Exception as e:
+            error = FirebaseAdapterError(f"Falha inesperada ao inicializar adaptador Firebase: {e}")
+            _failures[key] = (time.monotonic(), error)
+            raise error from e
+
+        _failures.pop(key, None)
+        _registry[key] = adapter
+        return adapter
+
+
+def reset_shared_adapters() -> None:
+    """Esquece adaptadores e falhas registrados (testes ou troca de credenciais)."""
+    with _registry_lock:
+        _registry.clear()
+        _failures.clear()
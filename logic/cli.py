@@ -0,0 +1,528 @@
+"""
+CLI headless para geração em massa de Memórias de Cálculo (ex.: fechamento mensal agendado).
+
+Uso:
+    python -m logic.cli generate --manifest fechamento.json --output saidas/
+    python -m logic.cli generate --manifest fechamento.yaml --output saidas/ --workers 4 --resume
+
+O manifesto descreve os grupos a gerar. Formatos aceitos:
+
+JSON / YAML — lista de grupos ou objeto com "defaults" + "groups":
+    {
+      "defaults": {"incluir_resumo": true, "incomplete_filter": "complete_only"},
+      "groups": [
+        {"name": "Fortbras", "clients": ["FORTBRAS LTDA"], "periods": ["01/2026", "02/2026"],
+         "grouping_mode": "cnpj", "options": {"split_periods": true}}
+      ]
+    }
+
+CSV (separador "," ou ";") — colunas name, clients, periods e opções;
+listas dentro de uma célula separadas por "|":
+    name;clients;periods;grouping_mode;incluir_resumo
+    Fortbras;FORTBRAS LTDA;01/2026|02/2026;cnpj;sim
+
+A base consolidada é carregada uma única vez (por worker) e cada grupo gera um
+.xlsx (ou .zip com um arquivo por período quando split_periods=true; com
+settings.batch_output_format='workbook', um .xlsx com uma aba por período) no diretório
+de saída. O arquivo summary.json registra o hash das entradas de cada saída; com
+--resume, saídas já presentes e com o mesmo hash são puladas.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from logic.core.fingerprint import canonical_hash, dataframe_fingerprint, optional_file_fingerprint
+from logic.core.mapping import (
+    GROUPING_MODE_CNPJ,
+    GROUPING_MODE_DEFAULT,
+    GROUPING_MODE_DISTRIBUTOR,
+    GROUPING_MODE_NONE,
+)
+from logic.services import archive, enrichment_prejoin
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FILE = "summary.json"
+
+# Versão do esquema de hash; incrementar invalida saídas antigas no modo --resume
+_HASH_VERSION = 2
+
+GROUP_OPTION_DEFAULTS: Dict[str, Any] = {
+    "incomplete_filter": "all",
+    "grouping_mode": GROUPING_MODE_DEFAULT,
+    "include_child_rows": True,
+    "somente_pendencias": False,
+    "tipo_apresentacao": "Tabela Única",
+    "incluir_resumo": False,
+    "separar_auditoria": False,
+    "sort_by": "Economia Gerada (Desc)",
+    "split_periods": False,
+}
+
+_BOOL_OPTIONS = {"include_child_rows", "somente_pendencias", "incluir_resumo", "separar_auditoria", "split_periods"}
+_VALID_GROUPING_MODES = {GROUPING_MODE_DEFAULT, GROUPING_MODE_DISTRIBUTOR, GROUPING_MODE_CNPJ, GROUPING_MODE_NONE}
+_VALID_INCOMPLETE_FILTERS = {"all", "complete_only", "incomplete_only"}
+
+
+class ManifestError(Exception):
+    """Erro levantado quando o manifesto de geração é inválido ou ilegível."""
+    pass
+
+
+@dataclass
+class GenerationJob:
+    """Um grupo do manifesto, já normalizado, com o nome do arquivo de saída."""
+    name: str
+    clients: List[str]
+    periods: List[str]
+    options: Dict[str, Any]
+    output_file: str
+    input_hash: str = ""
+
+
+@dataclass
+class JobResult:
+    """Resultado de um job, como registrado no summary.json."""
+    name: str
+    file: str
+    status: str  # ok | skipped | empty | failed
+    input_hash: str
+    bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class RunSummary:
+    """Relatório agregado de uma execução do CLI."""
+    started_at: str
+    base_file: str
+    base_fingerprint: str
+    template_fingerprint: str
+    enrichment_fingerprint: str
+    workers: int
+    finished_at: Optional[str] = None
+    outputs: List[JobResult] = field(default_factory=list)
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        counts = {"ok": 0, "skipped": 0, "empty": 0, "failed": 0}
+        for r in self.outputs:
+            counts[r.status] = counts.get(r.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["totals"] = self.totals
+        return data
+
+
+# ---------------------------------------------------------------------------
+# Manifesto
+# ---------------------------------------------------------------------------
+
+def _split_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [part.strip() for part in str(value).split("|") if part.strip()]
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "sim", "s", "yes", "y", "x"}
+
+
+def _read_manifest_data(path: str) -> Any:
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            content = f.read()
+    except OSError as e:
+        raise ManifestError(f"Não foi possível ler o manifesto '{path}': {e}") from e
+
+    if ext == ".json":
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ManifestError(f"Manifesto JSON inválido: {e}") from e
+
+    if ext in {".yaml", ".yml"}:
+        try:
+            import yaml
+        except ImportError as e:
+            raise ManifestError("Manifestos YAML exigem o pacote PyYAML (pip install pyyaml).") from e
+        try:
+            return yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ManifestError(f"Manifesto YAML inválido: {e}") from e
+
+    if ext == ".csv":
+        try:
+            dialect = csv.Sniffer().sniff(content.splitlines()[0] if content else ",", delimiters=",;")
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.DictReader(io.StringIO(content), dialect=dialect))
+        groups = []
+        for row in rows:
+            row = {str(k).strip(): v for k, v in row.items() if k is not None}
+            group = {k: v for k, v in row.items() if v not in (None, "")}
+            groups.append(group)
+        return {"groups": groups}
+
+    raise ManifestError(f"Formato de manifesto não suportado: '{ext}'. Use .json, .yaml/.yml ou .csv.")
+
+
+def _normalize_options(raw: Dict[str, Any], where: str) -> Dict[str, Any]:
+    unknown = sorted(set(raw) - set(GROUP_OPTION_DEFAULTS))
+    if unknown:
+        raise ManifestError(f"{where}: opções desconhecidas {unknown}. Aceitas: {sorted(GROUP_OPTION_DEFAULTS)}")
+
+    options = {}
+    for key, value in raw.items():
+        options[key] = _parse_bool(value) if key in _BOOL_OPTIONS else str(value).strip()
+
+    if "grouping_mode" in options and options["grouping_mode"] not in _VALID_GROUPING_MODES:
+        raise ManifestError(f"{where}: grouping_mode inválido '{options['grouping_mode']}'. Aceitos: {sorted(_VALID_GROUPING_MODES)}")
+    if "incomplete_filter" in options and options["incomplete_filter"] not in _VALID_INCOMPLETE_FILTERS:
+        raise ManifestError(f"{where}: incomplete_filter inválido '{options['incomplete_filter']}'. Aceitos: {sorted(_VALID_INCOMPLETE_FILTERS)}")
+    return options
+
+
+def _unique_filename(file_name: str, used: set) -> str:
+    stem, ext = os.path.splitext(file_name)
+    candidate = file_name
+    n = 2
+    while candidate.lower() in used:
+        candidate = f"{stem}_{n}{ext}"
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def load_manifest(path: str) -> List[GenerationJob]:
+    """Lê e valida o manifesto, retornando a lista de jobs com nomes de saída únicos."""
+    from logic.services.orchestrator import build_output_filename
+
+    data = _read_manifest_data(path)
+    if isinstance(data, list):
+        defaults_raw, groups_raw = {}, data
+    elif isinstance(data, dict):
+        defaults_raw, groups_raw = data.get("defaults") or {}, data.get("groups") or []
+    else:
+        raise ManifestError("O manifesto deve ser uma lista de grupos ou um objeto com 'groups'.")
+
+    if not groups_raw:
+        raise ManifestError("O manifesto não contém grupos.")
+
+    defaults = dict(GROUP_OPTION_DEFAULTS)
+    defaults.update(_normalize_options(dict(defaults_raw), "defaults"))
+
+    jobs = []
+    used_names: set = set()
+    for index, raw in enumerate(groups_raw, 1):
+        if not isinstance(raw, dict):
+            raise ManifestError(f"Grupo {index}: esperado um objeto, recebido {type(raw).__name__}.")
+        raw = dict(raw)
+        name = str(raw.pop("name", "") or f"Grupo_{index}").strip()
+        clients = _split_list(raw.pop("clients", None))
+        periods = _split_list(raw.pop("periods", None))
+        where = f"Grupo {index} ('{name}')"
+        if not clients:
+            raise ManifestError(f"{where}: nenhum cliente informado.")
+        if not periods:
+            raise ManifestError(f"{where}: nenhum período informado.")
+
+        # Opções podem vir no nível do grupo ou aninhadas em "options"
+        nested = raw.pop("options", None) or {}
+        if not isinstance(nested, dict):
+            raise ManifestError(f"{where}: 'options' deve ser um objeto.")
+        options = dict(defaults)
+        options.update(_normalize_options({**raw, **nested}, where))
+
+        file_name = build_output_filename(name, clients, periods)
+        if options["split_periods"] and len(periods) > 1 and archive.batch_format() == archive.BATCH_FORMAT_ZIP:
+            file_name = os.path.splitext(file_name)[0] + ".zip"
+        jobs.append(GenerationJob(
+            name=name,
+            clients=clients,
+            periods=periods,
+            options=options,
+            output_file=_unique_filename(file_name, used_names),
+        ))
+    return jobs
+
+
+def compute_input_hash(job: GenerationJob, base_fingerprint: str, template_fingerprint: str, enrichment_fingerprint: str = "") -> str:
+    """Hash de tudo que determina o conteúdo da saída de um job."""
+    from config.settings import settings
+    return canonical_hash({
+        "version": _HASH_VERSION,
+        "clients": job.clients,
+        "periods": job.periods,
+        "options": job.options,
+        "base": base_fingerprint,
+        "template": template_fingerprint,
+        "enrichment": enrichment_fingerprint,
+        "missing_marker": settings.missing_marker_mode,
+    })
+
+
+# ---------------------------------------------------------------------------
+# Execução (inline ou em processos)
+# ---------------------------------------------------------------------------
+
+_WORKER_ORCH = None
+_WORKER_ENRICHMENT = None
+
+
+def _init_worker(base_file: str, template_file: str, sheet_name: str, enrichment_df: Any = None) -> None:
+    """
+    Carrega o Orchestrator uma única vez por processo.
+    Em plataformas com fork o estado do processo pai é herdado e nada é recarregado.
+    """
+    global _WORKER_ORCH, _WORKER_ENRICHMENT
+    if _WORKER_ORCH is None:
+        from logic.services.orchestrator import Orchestrator
+        _WORKER_ORCH = Orchestrator(base_file, template_file, sheet_name=sheet_name)
+    _WORKER_ENRICHMENT = enrichment_df
+
+
+def _period_entry_name(job: GenerationJob, period: str) -> str:
+    from logic.services.orchestrator import _format_periods_for_name, _is_generic_group_name, _sanitize_filename, build_output_filename
+
+    if _is_generic_group_name(job.name):
+        return build_output_filename(job.name, job.clients, [period])
+    token = _format_periods_for_name([period]) or _sanitize_filename(period)
+    return f"{_sanitize_filename(job.name)}_{token}.xlsx"
+
+
+def _render_job(job: GenerationJob) -> Optional[bytes]:
+    options = dict(job.options)
+    split_periods = options.pop("split_periods", False)
+
+    def _generate(periods: List[str]) -> Optional[bytes]:
+        return _WORKER_ORCH.generate(job.clients, periods, enrichment_df=_WORKER_ENRICHMENT, **options)
+
+    if not (split_periods and len(job.periods) > 1):
+        return _generate(job.periods)
+
+    if archive.batch_format() == archive.BATCH_FORMAT_WORKBOOK:
+        # Um único .xlsx com uma aba por período
+        sections = [{"name": period, "clients": job.clients, "periods": [period]} for period in job.periods]
+        return _WORKER_ORCH.generate_multiple(sections, enrichment_df=_WORKER_ENRICHMENT, output_format=archive.BATCH_FORMAT_WORKBOOK, **options)
+
+    return archive.build_zip((_period_entry_name(job, period), _generate([period])) for period in job.periods)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _run_job(job: GenerationJob, output_dir: str) -> JobResult:
+    """Executa um job no processo atual e grava a saída de forma atômica."""
+    start = time.perf_counter()
+    try:
+        data = _render_job(job)
+        if not data:
+            return JobResult(job.name, job.output_file, "empty", job.input_hash, seconds=time.perf_counter() - start)
+        _write_atomic(os.path.join(output_dir, job.output_file), data)
+        return JobResult(job.name, job.output_file, "ok", job.input_hash, bytes=len(data), seconds=time.perf_counter() - start)
+    except Exception as e:
+        logger.exception("Falha ao gerar '%s'.", job.name)
+        return JobResult(job.name, job.output_file, "failed", job.input_hash, seconds=time.perf_counter() - start, error=str(e))
+
+
+def _load_previous_results(output_dir: str) -> Dict[str, Dict[str, Any]]:
+    path = os.path.join(output_dir, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {item["file"]: item for item in data.get("outputs", []) if "file" in item}
+    except Exception as e:
+        logger.warning("summary.json anterior ilegível (%s); nada será pulado.", e)
+        return {}
+
+
+def _is_up_to_date(job: GenerationJob, previous: Dict[str, Dict[str, Any]], output_dir: str) -> bool:
+    prev = previous.get(job.output_file)
+    if not prev or prev.get("input_hash") != job.input_hash:
+        return False
+    if prev.get("status") == "empty":
+        return True
+    return prev.get("status") in {"ok", "skipped"} and os.path.exists(os.path.join(output_dir, job.output_file))
+
+
+def _write_summary(summary: RunSummary, output_dir: str) -> None:
+    path = os.path.join(output_dir, SUMMARY_FILE)
+    data = json.dumps(summary.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")
+    _write_atomic(path, data)
+
+
+def run_generate(
+    jobs: List[GenerationJob],
+    output_dir: str,
+    base_file: str,
+    template_file: str,
+    sheet_name: str = "Balanco Operacional",
+    workers: int = 1,
+    resume: bool = False,
+    enrichment_df: Any = None,
+) -> RunSummary:
+    """
+    Gera todas as saídas do manifesto. O summary.json é regravado a cada job concluído,
+    de modo que uma execução interrompida pode ser retomada com resume=True.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    base_fp = optional_file_fingerprint(base_file)
+    template_fp = optional_file_fingerprint(template_file)
+    enrichment_fp = dataframe_fingerprint(enrichment_df)
+    if enrichment_df is None and enrichment_prejoin.is_enabled():
+        # Sem enriquecimento explícito, a geração usa a tabela pré-juntada à base
+        enrichment_fp = optional_file_fingerprint(enrichment_prejoin.PREJOINED_FILE)
+    for job in jobs:
+        job.input_hash = compute_input_hash(job, base_fp, template_fp, enrichment_fp)
+
+    summary = RunSummary(
+        started_at=datetime.now().isoformat(timespec="seconds"),
+        base_file=os.path.abspath(base_file),
+        base_fingerprint=base_fp,
+        template_fingerprint=template_fp,
+        enrichment_fingerprint=enrichment_fp,
+        workers=workers,
+    )
+
+    previous = _load_previous_results(output_dir) if resume else {}
+    pending = []
+    for job in jobs:
+        if resume and _is_up_to_date(job, previous, output_dir):
+            prev_status = previous[job.output_file].get("status")
+            status = "empty" if prev_status == "empty" else "skipped"
+            summary.outputs.append(JobResult(job.name, job.output_file, status, job.input_hash, bytes=previous[job.output_file].get("bytes", 0)))
+        else:
+            pending.append(job)
+
+    if pending:
+        logger.info("Gerando %d saídas (%d puladas) com %d worker(s)...", len(pending), len(jobs) - len(pending), workers)
+        # A base é carregada aqui uma vez; com fork os workers herdam o Orchestrator pronto.
+        _init_worker(base_file, template_file, sheet_name, enrichment_df)
+
+        if workers <= 1 or len(pending) == 1:
+            for job in pending:
+                summary.outputs.append(_run_job(job, output_dir))
+                _write_summary(summary, output_dir)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)),
+                initializer=_init_worker,
+                initargs=(base_file, template_file, sheet_name, enrichment_df),
+            ) as pool:
+                futures = {pool.submit(_run_job, job, output_dir): job for job in pending}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = JobResult(job.name, job.output_file, "failed", job.input_hash, error=str(e))
+                    summary.outputs.append(result)
+                    _write_summary(summary, output_dir)
+
+    order = {job.output_file: i for i, job in enumerate(jobs)}
+    summary.outputs.sort(key=lambda r: order.get(r.file, len(order)))
+    summary.finished_at = datetime.now().isoformat(timespec="seconds")
+    _write_summary(summary, output_dir)
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Entrada de linha de comando
+# ---------------------------------------------------------------------------
+
+def _build_parser() -> argparse.ArgumentParser:
+    from config.settings import settings
+    from logic.services.sync_service import PARQUET_FILE
+
+    parser = argparse.ArgumentParser(prog="python -m logic.cli", description="Geração headless de Memórias de Cálculo.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Gera as memórias descritas em um manifesto.")
+    gen.add_argument("--manifest", required=True, help="Manifesto .json, .yaml/.yml ou .csv com os grupos.")
+    gen.add_argument("--output", required=True, help="Diretório de saída (recebe os arquivos e o summary.json).")
+    gen.add_argument("--base", default=PARQUET_FILE, help="Base consolidada (Parquet do sync ou planilha Balanço).")
+    gen.add_argument("--template", default=settings.template_file, help="Template de saída (mc.xlsx).")
+    gen.add_argument("--sheet", default=settings.base_sheet_name, help="Aba da planilha base (quando não for Parquet).")
+    gen.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Processos paralelos (1 = sequencial).")
+    gen.add_argument("--resume", action="store_true", help="Pula saídas já presentes com o mesmo hash de entrada.")
+    gen.add_argument("--with-enrichment", action="store_true", help="Aplica o enriquecimento de metadados do Firestore.")
+    gen.add_argument("--log-level", default=settings.log_level)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from logic.core.logging_config import setup_logging
+
+    args = _build_parser().parse_args(argv)
+    setup_logging(args.log_level)
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except ManifestError as e:
+        print(f"Manifesto inválido: {e}", file=sys.stderr)
+        return 2
+
+    if not os.path.exists(args.base):
+        print(f"Base não encontrada: {args.base}", file=sys.stderr)
+        return 2
+    if not os.path.exists(args.template):
+        print(f"Template não encontrado: {args.template}", file=sys.stderr)
+        return 2
+
+    enrichment_df = None
+    if args.with_enrichment:
+        from logic.services import enrichment_cache
+        enrichment_df = enrichment_cache.get_enrichment_frame()
+
+    summary = run_generate(
+        jobs,
+        args.output,
+        base_file=args.base,
+        template_file=args.template,
+        sheet_name=args.sheet,
+        workers=max(1, args.workers),
+        resume=args.resume,
+        enrichment_df=enrichment_df,
+    )
+
+    totals = summary.totals
+    print(
+        f"Concluído: {totals['ok']} gerados, {totals['skipped']} pulados, "
+        f"{totals['empty']} sem dados, {totals['failed']} com falha. "
+        f"Relatório: {os.path.join(args.output, SUMMARY_FILE)}"
+    )
+    for r in summary.outputs:
+        if r.status == "failed":
+            print(f"  - {r.name}: {r.error}", file=sys.stderr)
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Catálogo da base consolidada: clientes, períodos e CPF/CNPJ para os seletores da interface.
+
+É calculado uma vez no sync (uma passada vetorizada sobre a base) e gravado num
+arquivo JSON ao lado do Parquet. O leitor carrega o catálogo sem varrer a base; o
+arquivo traz o tamanho e o mtime do Parquet de origem e é ignorado se não baterem
+(base trocada fora do sync), caso em que o catálogo é recalculado em memória.
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from logic.core.dates import format_reference_period
+from logic.core.mapping import CLIENT_COLUMN, DOCUMENT_COLUMN, PERIOD_COLUMN
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+CATALOG_SUFFIX = ".catalog.json"
+
+
+def period_sort_key(period: str) -> tuple:
+    """Ordenação cronológica real (ano -> mês) de MM/YYYY ou MM-YYYY, com fallback lexical."""
+    try:
+        month_str, year_str = str(period).strip().replace("-", "/").split("/")
+        month, year = int(month_str), int(year_str)
+        if 1 <= month <= 12:
+            return (year, month, str(period))
+    except Exception:
+        pass
+    return (9999, 99, str(period))
+
+
+@dataclass
+class BaseCatalog:
+    """Valores distintos da base usados pelos seletores, já ordenados, com contagem de linhas."""
+    clients: List[str] = field(default_factory=list)
+    periods: List[str] = field(default_factory=list)
+    client_rows: Dict[str, int] = field(default_factory=dict)
+    period_rows: Dict[str, int] = field(default_factory=dict)
+    client_documents: Dict[str, List[str]] = field(default_factory=dict)
+    row_count: int = 0
+
+    def document_clients(self) -> Dict[str, List[str]]:
+        """CPF/CNPJ → clientes (Razão Social) que o usam, para agrupar variações de nome."""
+        groups: Dict[str, List[str]] = {}
+        for client, docs in self.client_documents.items():
+            for doc in docs:
+                groups.setdefault(doc, []).append(client)
+        return groups
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "clients": self.clients,
+            "periods": self.periods,
+            "client_rows": self.client_rows,
+            "period_rows": self.period_rows,
+            "client_documents": self.client_documents,
+            "row_count": self.row_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BaseCatalog":
+        return cls(
+            clients=list(data.get("clients", [])),
+            periods=list(data.get("periods", [])),
+            client_rows={str(k): int(v) for k, v in data.get("client_rows", {}).items()},
+            period_rows={str(k): int(v) for k, v in data.get("period_rows", {}).items()},
+            client_documents={str(k): list(v) for k, v in data.get("client_documents", {}).items()},
+            row_count=int(data.get("row_count", 0)),
+        )
+
+
+def _document_digits(series: pd.Series) -> pd.Series:
+    return series.astype(str).str.replace(r"\.0$", "", regex=True).str.replace(r"\D", "", regex=True)
+
+
+def build_catalog(df: pd.DataFrame) -> BaseCatalog:
+    """Calcula o catálogo com operações vetorizadas; a referência é normalizada por valor único."""
+    catalog = BaseCatalog(row_count=len(df))
+
+    if CLIENT_COLUMN in df.columns:
+        client_counts = df[CLIENT_COLUMN].dropna().astype(str).value_counts(sort=False)
+        catalog.clients = sorted(client_counts.index)
+        catalog.client_rows = {client: int(client_counts[client]) for client in catalog.clients}
+
+        if DOCUMENT_COLUMN in df.columns:
+            pairs = df[[CLIENT_COLUMN, DOCUMENT_COLUMN]].dropna()
+            pairs = pd.DataFrame({"client": pairs[CLIENT_COLUMN].astype(str), "doc": _document_digits(pairs[DOCUMENT_COLUMN])})
+            pairs = pairs[pairs["doc"] != ""].drop_duplicates()
+            catalog.client_documents = pairs.groupby("client", sort=False)["doc"].agg(list).to_dict()
+
+    if PERIOD_COLUMN in df.columns:
+        raw_counts = df[PERIOD_COLUMN].dropna().value_counts(sort=False)
+        labels = pd.Series(
+            [str(format_reference_period(value, default="")).strip() for value in raw_counts.index],
+            index=raw_counts.index,
+        )
+        period_counts = raw_counts.groupby(labels.to_numpy(), sort=False).sum()
+        period_counts = period_counts[period_counts.index != ""]
+        catalog.periods = sorted(period_counts.index, key=period_sort_key)
+        catalog.period_rows = {period: int(period_counts[period]) for period in catalog.periods}
+
+    return catalog
+
+
+def catalog_path(parquet_path: str) -> str:
+    """Arquivo lateral do catálogo de um Parquet (mesmo diretório e nome-base)."""
+    return os.path.splitext(parquet_path)[0] + CATALOG_SUFFIX
+
+
+def _source_stamp(parquet_path: str) -> Dict[str, int]:
+    stat = os.stat(parquet_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def save_catalog(catalog: BaseCatalog, parquet_path: str) -> bool:
+    """Grava o catálogo ao lado do Parquet (que já deve existir). Falhas só geram log."""
+    try:
+        payload = {"version": CATALOG_VERSION, "source": _source_stamp(parquet_path), **catalog.to_dict()}
+        tmp_path = catalog_path(parquet_path) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, catalog_path(parquet_path))
+        return True
+    except Exception as e:
+        logger.warning("Falha ao gravar catálogo da base ao lado de %s: %s", parquet_path, e)
+        return False
+
+
+def load_catalog(parquet_path: str) -> Optional[BaseCatalog]:
+    """Lê o catálogo do Parquet; None se ausente, ilegível ou de outra versão da base."""
+    path = catalog_path(parquet_path)
+    if not os.path.exists(path) or not os.path.exists(parquet_path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != CATALOG_VERSION or payload.get("source") != _source_stamp(parquet_path):
+            logger.info("Catálogo %s desatualizado em relação à base; será recalculado.", path)
+            return None
+        return BaseCatalog.from_dict(payload)
+    except Exception as e:
+        logger.warning("Falha ao ler catálogo %s: %s", path, e)
+        return None
@@ -0,0 +1,119 @@
+"""
+Resolução em lote de listas de UCs/CPF/CNPJ para clientes (Razão Social).
+
+O analista recebe do cliente uma lista de identificadores e, em vez de buscá-los um
+a um no passo 1 do wizard, cola (ou envia) a lista inteira. Dois índices hash são
+montados uma vez por versão da base:
+
+- UC normalizada (No. UC, UC p Rateio e _portal_uc) → clientes
+- dígitos do CPF/CNPJ (sem zeros à esquerda) → clientes
+
+e cada identificador é resolvido com consultas O(1) a esses índices.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from logic.core.mapping import CLIENT_COLUMN, DOCUMENT_COLUMN, ENRICHMENT_KEY, HIERARCHY_KEY_COL, PORTAL_UC_COL
+
+# Colunas da base com identificação de UC, na ordem de preferência
+UC_COLUMNS = [ENRICHMENT_KEY, HIERARCHY_KEY_COL, PORTAL_UC_COL]
+
+# Separadores aceitos numa lista colada: quebra de linha, vírgula, ponto e vírgula, tab e espaço
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_identifiers(text: str) -> List[str]:
+    """Identificadores de um texto colado ou arquivo, sem vazios e sem repetição (ordem preservada)."""
+    return list(dict.fromkeys(token for token in _SEPARATORS.split(text or "") if token))
+
+
+def normalize_uc_identifier(value: str) -> str:
+    """UC comparável: sem sufixo '.0' de planilhas numéricas, só letras/dígitos, maiúscula."""
+    text = str(value).strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    return "".join(ch for ch in text if ch.isalnum()).upper()
+
+
+def normalize_document_identifier(value: str) -> str:
+    """CPF/CNPJ comparável: só dígitos, sem zeros à esquerda (perdidos quando a coluna foi numérica)."""
+    text = str(value).strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    return "".join(ch for ch in text if ch.isdigit()).lstrip("0")
+
+
+def _uc_keys(series: pd.Series) -> pd.Series:
+    text = series.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.str.replace(r"[\W_]", "", regex=True).str.upper()
+
+
+def _document_keys(series: pd.Series) -> pd.Series:
+    text = series.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.str.replace(r"\D", "", regex=True).str.lstrip("0")
+
+
+def _index(keys: pd.Series, clients: pd.Series) -> Dict[str, Tuple[str, ...]]:
+    pairs = pd.DataFrame({"key": keys, "client": clients}).dropna()
+    pairs = pairs[pairs["key"] != ""].drop_duplicates()
+    if pairs.empty:
+        return {}
+    grouped = pairs.sort_values("client", kind="stable").groupby("key", sort=False)["client"].agg(tuple)
+    return grouped.to_dict()
+
+
+@dataclass
+class ClientResolution:
+    """Resultado de uma resolução em lote."""
+    clients: List[str] = field(default_factory=list)
+    matches: Dict[str, List[str]] = field(default_factory=dict)
+    unmatched: List[str] = field(default_factory=list)
+
+    @property
+    def matched_count(self) -> int:
+        return len(self.matches)
+
+
+@dataclass
+class ClientResolver:
+    """Índices UC → clientes e CPF/CNPJ → clientes de uma versão da base."""
+    uc_index: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    document_index: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ClientResolver":
+        """Monta os índices com operações vetorizadas sobre as colunas de identificação."""
+        if CLIENT_COLUMN not in df.columns:
+            return cls()
+        # Nome exatamente como está na base (igual ao catálogo), para casar com filter_mask
+        clients = df[CLIENT_COLUMN].astype(str).where(df[CLIENT_COLUMN].notna())
+        uc_cols = [col for col in UC_COLUMNS if col in df.columns]
+        uc_keys = pd.concat([_uc_keys(df[col]) for col in uc_cols], ignore_index=True) if uc_cols else pd.Series(dtype="string")
+        uc_clients = pd.concat([clients] * len(uc_cols), ignore_index=True) if uc_cols else pd.Series(dtype="string")
+        document_index = _index(_document_keys(df[DOCUMENT_COLUMN]), clients) if DOCUMENT_COLUMN in df.columns else {}
+        return cls(uc_index=_index(uc_keys, uc_clients), document_index=document_index)
+
+    def lookup(self, identifier: str) -> List[str]:
+        """Clientes de um identificador, procurado como UC e como CPF/CNPJ."""
+        found = list(self.uc_index.get(normalize_uc_identifier(identifier), ()))
+        document = normalize_document_identifier(identifier)
+        if document:
+            found.extend(c for c in self.document_index.get(document, ()) if c not in found)
+        return found
+
+    def resolve(self, identifiers: Iterable[str]) -> ClientResolution:
+        """Resolve uma lista de identificadores numa passada: clientes encontrados e não encontrados."""
+        result = ClientResolution()
+        selected: Dict[str, None] = {}
+        for identifier in dict.fromkeys(str(i).strip() for i in identifiers if str(i).strip()):
+            found = self.lookup(identifier)
+            if found:
+                result.matches[identifier] = found
+                selected.update(dict.fromkeys(found))
+            else:
+                result.unmatched.append(identifier)
+        result.clients = list(selected)
+        return result
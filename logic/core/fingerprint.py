@@ -0,0 +1,49 @@
+"""
+Impressões digitais (hashes) estáveis para arquivos e parâmetros de geração.
+Usadas para decidir se uma saída já gerada continua válida (modo resumível do CLI).
+"""
+import hashlib
+import json
+import os
+from typing import Any
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def canonical_hash(payload: Any) -> str:
+    """
+    Hash SHA-256 de uma estrutura JSON-serializável em forma canônica
+    (chaves ordenadas, sem espaços). Valores não serializáveis viram str.
+    """
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Hash SHA-256 do conteúdo de um arquivo, lido em blocos de 1 MB."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def optional_file_fingerprint(path: Any) -> str:
+    """Como `file_fingerprint`, mas retorna string vazia para caminhos ausentes ou buffers."""
+    if isinstance(path, str) and os.path.exists(path):
+        return file_fingerprint(path)
+    return ""
+
+
+def dataframe_fingerprint(df: Any) -> str:
+    """Hash SHA-256 do conteúdo de um DataFrame (colunas + valores); vazio para None."""
+    if df is None:
+        return ""
+    import pandas as pd
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    if not df.empty:
+        row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+        digest.update(row_hashes.to_numpy().tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,118 @@
+"""
+Agregados de Fatura Pai do agrupamento padrão, pré-calculados sobre a base consolidada.
+
+No modo padrão, os grupos são definidos por (Referência, cliente, chave do grupo) —
+chave = No. IBM → UC p Rateio → No. UC — e só viram Fatura Pai quando têm mais de
+uma linha e alguma delas é 'Agrupamento' ou Main = 'Y'. Como isso depende apenas da
+base (já no recorte portal-first), o sync grava:
+
+- na base, o id do grupo de cada linha (_parent_group; -1 fora do recorte portal);
+- numa tabela lateral, por grupo: as chaves, o número de membros, se é Fatura Pai
+  e as somas das SUM_COLUMNS.
+
+A geração usa a tabela só quando o escopo contém os grupos inteiros e a partição
+coincide com a calculada na hora; caso contrário, agrega como antes.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from logic.core.mapping import (
+    CLIENT_COLUMN,
+    ENRICHMENT_KEY,
+    GROUPING_FLAG_COL,
+    GROUPING_FLAG_VALUE,
+    GROUPING_IBM_COL,
+    HIERARCHY_KEY_COL,
+    HIERARCHY_PARENT_COL,
+    HIERARCHY_PARENT_VALUE,
+    PERIOD_COLUMN,
+    SUM_COLUMNS,
+)
+from logic.core.portal import PORTAL_KEEP_COL, PORTAL_VALUE_COL, apply_portal_filter
+from logic.core.summary import to_numeric_column
+
+PARENT_GROUP_COL = "_parent_group"
+
+# Colunas da tabela de agregados (além das SUM_COLUMNS)
+AGG_REFERENCE = "referencia"
+AGG_CLIENT = "cliente"
+AGG_GROUP_KEY = "chave"
+AGG_MEMBERS = "membros"
+AGG_IS_GROUP = "is_group"
+
+
+def _upper_key(series: pd.Series) -> pd.Series:
+    return series.astype(str).str.strip().str.upper().replace(["NAN", "NONE", ""], pd.NA)
+
+
+def _sanitize_id(series: pd.Series) -> pd.Series:
+    return series.astype(str).str.replace(r"\.0$", "", regex=True).str.strip().replace(["nan", "None", ""], pd.NA)
+
+
+def default_group_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Chaves do agrupamento padrão, com a mesma normalização de Orchestrator._apply_grouping."""
+    if GROUPING_IBM_COL in df.columns and not df[GROUPING_IBM_COL].isna().all():
+        fallback = df[HIERARCHY_KEY_COL].fillna(df[ENRICHMENT_KEY]) if HIERARCHY_KEY_COL in df.columns else df[ENRICHMENT_KEY]
+        group = df[GROUPING_IBM_COL].fillna(fallback)
+    elif HIERARCHY_KEY_COL in df.columns:
+        group = _sanitize_id(df[HIERARCHY_KEY_COL].fillna(df[ENRICHMENT_KEY]))
+    else:
+        group = df[ENRICHMENT_KEY].copy()
+        if GROUPING_FLAG_COL in df.columns:
+            group[df[GROUPING_FLAG_COL].astype(str).str.strip() == GROUPING_FLAG_VALUE] = "AGRUPADO"
+
+    return pd.DataFrame({
+        AGG_REFERENCE: _upper_key(df[PERIOD_COLUMN]).fillna("N/A"),
+        AGG_CLIENT: _upper_key(df[CLIENT_COLUMN]).fillna("N/A"),
+        AGG_GROUP_KEY: group.fillna("N/A"),
+    }, index=df.index)
+
+
+def group_marked(df: pd.DataFrame) -> np.ndarray:
+    """Linhas que tornam o grupo elegível a Fatura Pai ('Agrupamento' ou Main = 'Y')."""
+    marked = np.zeros(len(df), dtype=bool)
+    if GROUPING_FLAG_COL in df.columns:
+        marked |= (df[GROUPING_FLAG_COL].astype(str).str.strip() == GROUPING_FLAG_VALUE).to_numpy()
+    if HIERARCHY_PARENT_COL in df.columns:
+        marked |= (df[HIERARCHY_PARENT_COL].astype(str).str.strip().str.upper() == HIERARCHY_PARENT_VALUE).to_numpy()
+    return marked
+
+
+def build_parent_aggregates(df: pd.DataFrame) -> Optional[Tuple[pd.Series, pd.DataFrame]]:
+    """
+    Calcula (id do grupo por linha da base, tabela de agregados por grupo).
+    None quando a base não permite o pré-cálculo (sem Referência/cliente, ou com
+    Valor_gestao mas sem a identidade portal resolvida).
+    """
+    if df.empty or PERIOD_COLUMN not in df.columns or CLIENT_COLUMN not in df.columns:
+        return None
+
+    # Mesmo recorte que a geração agrupa: posições da base como índice
+    frame = df.reset_index(drop=True)
+    if PORTAL_VALUE_COL in frame.columns:
+        if PORTAL_KEEP_COL not in frame.columns:
+            return None
+        frame = apply_portal_filter(frame)
+    if frame.empty:
+        return None
+
+    keys = default_group_keys(frame)
+    gid = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+    n_groups = int(gid.max()) + 1
+    members = np.bincount(gid, minlength=n_groups)
+    marked = np.bincount(gid, weights=group_marked(frame), minlength=n_groups) > 0
+
+    table = keys.groupby(gid, sort=True).first()
+    table[AGG_GROUP_KEY] = table[AGG_GROUP_KEY].astype(str)
+    table[AGG_MEMBERS] = members
+    table[AGG_IS_GROUP] = marked & (members > 1)
+    for col in SUM_COLUMNS:
+        if col in frame.columns:
+            table[col] = to_numeric_column(frame[col]).groupby(gid).sum().to_numpy()
+    table = table.reset_index(drop=True)
+
+    row_groups = np.full(len(df), -1, dtype=np.int32)
+    row_groups[frame.index.to_numpy()] = gid
+    return pd.Series(row_groups, index=df.index, name=PARENT_GROUP_COL), table
@@ -106,6 +106,9 @@ COLUMN_MAPPING = {
 # Coluna usada para identificar clientes na interface (seleção por nome)
 CLIENT_COLUMN = "Razao Social"
 
+# Documento do cliente (CPF/CNPJ), também aceito na busca de clientes da interface
+DOCUMENT_COLUMN = "CPF/CNPJ"
+
 # Colunas que existem no mapping, mas cuja ausência na base original não impede o processamento
 OPTIONAL_BASE_COLUMNS = [
     "Status Pos-Faturamento",
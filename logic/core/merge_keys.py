@@ -0,0 +1,77 @@
+"""
+Chaves inteiras do cruzamento Balanço × Gestão de Cobrança.
+
+O merge por colunas texto (UC normalizada) + Timestamp é lento e caro em memória
+nas bases grandes. Aqui a UC normalizada (só dígitos, sem zeros à esquerda) vira
+int64 e a competência usa a chave yyyymm (logic.core.periods); os dois lados são
+combinados numa única chave int64 e o cruzamento é uma busca hash (get_indexer)
+sobre a Gestão deduplicada.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from logic.core.periods import PERIOD_KEY_MISSING
+
+UC_KEY_MISSING = -1
+
+# Maior quantidade de dígitos que cabe com folga num int64
+_MAX_UC_DIGITS = 18
+# Espaço reservado para a competência (yyyymm < 10**6) na chave combinada
+_PERIOD_SPAN = 1_000_000
+
+
+def uc_digits(series: pd.Series) -> pd.Series:
+    """UC normalizada para o merge: sem sufixo '.0', só dígitos, sem zeros à esquerda ('' se vazia)."""
+    text = series.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.str.replace(r"\D", "", regex=True).str.lstrip("0").fillna("")
+
+
+def encode_uc_keys(*series: pd.Series) -> List[np.ndarray]:
+    """
+    UCs de várias colunas como int64 comparáveis entre si (UC_KEY_MISSING se vazia).
+    UCs com mais de 18 dígitos não cabem no inteiro e recebem códigos negativos
+    distintos, atribuídos em conjunto para continuarem casando entre as colunas.
+    """
+    digits = pd.concat([uc_digits(s) for s in series], ignore_index=True)
+    lengths = digits.str.len().to_numpy(dtype=np.int64)
+    keys = np.full(len(digits), UC_KEY_MISSING, dtype=np.int64)
+
+    fits = (lengths > 0) & (lengths <= _MAX_UC_DIGITS)
+    keys[fits] = digits[fits].astype("int64").to_numpy()
+    wide = lengths > _MAX_UC_DIGITS
+    if wide.any():
+        codes, _ = pd.factorize(digits[wide])
+        keys[wide] = UC_KEY_MISSING - 1 - codes
+
+    return np.split(keys, np.cumsum([len(s) for s in series])[:-1])
+
+
+def combined_keys(uc_keys: Sequence[np.ndarray], period_keys: Optional[Sequence[np.ndarray]] = None) -> List[np.ndarray]:
+    """
+    Chave int64 única por (UC, competência), calculada em conjunto para todas as colunas
+    (-1 quando a UC ou a competência faltam). A UC é recodificada de forma densa antes
+    da combinação, então a chave não transborda qualquer que seja a largura da UC.
+    """
+    all_uc = np.concatenate(uc_keys)
+    codes, _ = pd.factorize(all_uc)
+    codes = codes.astype(np.int64)
+    valid = all_uc != UC_KEY_MISSING
+    if period_keys is not None:
+        all_periods = np.concatenate(period_keys).astype(np.int64)
+        valid &= all_periods != PERIOD_KEY_MISSING
+        codes = codes * _PERIOD_SPAN + all_periods
+    keys = np.where(valid, codes, -1)
+    return np.split(keys, np.cumsum([len(k) for k in uc_keys])[:-1])
+
+
+def lookup_positions(right_keys: np.ndarray, left_keys: np.ndarray) -> np.ndarray:
+    """
+    Posição, em right_keys (únicas), de cada chave da esquerda; -1 sem correspondência.
+    Chaves ausentes (-1) nunca casam.
+    """
+    valid = np.flatnonzero(right_keys != -1)
+    index = pd.Index(right_keys[valid])
+    found = index.get_indexer(left_keys)
+    return np.where((found >= 0) & (left_keys != -1), valid[np.maximum(found, 0)], -1)
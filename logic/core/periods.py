@@ -0,0 +1,113 @@
+"""
+Chave inteira canônica das competências (Referência) e seleção por intervalo.
+
+A Referência chega em vários formatos (MM/YYYY, MM-YYYY, YYYY-MM, datas e Timestamps).
+Em vez de renormalizar o texto a cada filtro, o sync grava na base a coluna
+_period_key (int32 yyyymm; 0 = referência inválida/ausente), calculada uma vez por
+valor distinto. Filtros comparam inteiros e intervalos ("últimos N meses", "de/até")
+viram buscas binárias sobre as chaves ordenadas.
+"""
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from logic.core.dates import parse_reference_period
+
+PERIOD_KEY_COL = "_period_key"
+PERIOD_KEY_MISSING = 0
+
+_KEY_MAX = np.iinfo(np.int32).max
+
+
+def period_key(value: Any) -> int:
+    """Competência → yyyymm (ex.: '03/2026' → 202603); PERIOD_KEY_MISSING se inválida."""
+    # Já é uma chave (ex.: vinda da própria coluna _period_key)
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool) and 100001 <= value <= 999912 and 1 <= value % 100 <= 12:
+        return int(value)
+    normalized = parse_reference_period(value)  # MM-YYYY
+    if not normalized:
+        return PERIOD_KEY_MISSING
+    try:
+        month_str, year_str = normalized.split("-")
+        return int(year_str) * 100 + int(month_str)
+    except ValueError:
+        return PERIOD_KEY_MISSING
+
+
+def period_keys(series: pd.Series) -> pd.Series:
+    """period_key de uma coluna inteira, resolvido uma vez por valor distinto (int32)."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lookup = np.array([period_key(value) for value in uniques], dtype=np.int32)
+    keys = np.full(len(series), PERIOD_KEY_MISSING, dtype=np.int32)
+    valid = codes >= 0
+    keys[valid] = lookup[codes[valid]]
+    return pd.Series(keys, index=series.index, name=PERIOD_KEY_COL)
+
+
+def nullable_period_keys(series: pd.Series) -> pd.Series:
+    """period_keys com NA no lugar das inválidas (Int32), para chaves de merge."""
+    keys = period_keys(series)
+    return keys.astype("Int32").mask(keys == PERIOD_KEY_MISSING)
+
+
+def format_period_key(key: int) -> str:
+    """yyyymm → 'MM/YYYY' (mesmo formato dos seletores)."""
+    return f"{int(key) % 100:02d}/{int(key) // 100}"
+
+
+def period_key_to_timestamp(key: Any) -> Any:
+    """yyyymm → primeiro dia do mês (pd.NaT se ausente)."""
+    if pd.isna(key) or int(key) == PERIOD_KEY_MISSING:
+        return pd.NaT
+    return pd.Timestamp(year=int(key) // 100, month=int(key) % 100, day=1)
+
+
+def add_months(key: int, months: int) -> int:
+    """Desloca uma chave yyyymm em `months` meses (negativo volta no tempo)."""
+    total = (int(key) // 100) * 12 + (int(key) % 100 - 1) + months
+    return (total // 12) * 100 + total % 12 + 1
+
+
+@dataclass(frozen=True)
+class PeriodRange:
+    """Intervalo fechado de competências [start, end] em yyyymm; None = sem limite."""
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+    @classmethod
+    def between(cls, start: Any = None, end: Any = None) -> "PeriodRange":
+        """Intervalo 'de/até' a partir de competências em qualquer formato aceito."""
+        lo = period_key(start) if start is not None else PERIOD_KEY_MISSING
+        hi = period_key(end) if end is not None else PERIOD_KEY_MISSING
+        if lo and hi and lo > hi:
+            lo, hi = hi, lo
+        return cls(start=lo or None, end=hi or None)
+
+    @classmethod
+    def last_months(cls, months: int, latest: Any) -> "PeriodRange":
+        """Os `months` meses terminando em `latest` (inclusive)."""
+        if months < 1:
+            raise ValueError("O número de meses deve ser ao menos 1.")
+        end = period_key(latest)
+        if not end:
+            raise ValueError(f"Competência final inválida: {latest!r}")
+        return cls(start=add_months(end, -(months - 1)), end=end)
+
+    def locate(self, sorted_keys: np.ndarray) -> slice:
+        """Fatia [i, j) de `sorted_keys` (crescente) dentro do intervalo, por busca binária."""
+        lo = self.start if self.start is not None else PERIOD_KEY_MISSING + 1
+        hi = self.end if self.end is not None else _KEY_MAX
+        return slice(
+            int(np.searchsorted(sorted_keys, lo, side="left")),
+            int(np.searchsorted(sorted_keys, hi, side="right")),
+        )
+
+
+def periods_in_range(periods: List[str], period_range: PeriodRange) -> List[str]:
+    """Competências de `periods` (ex.: as do catálogo) dentro do intervalo, em ordem cronológica."""
+    keyed = sorted((period_key(p), p) for p in periods)
+    keyed = [(k, p) for k, p in keyed if k != PERIOD_KEY_MISSING]
+    keys = np.array([k for k, _ in keyed], dtype=np.int64)
+    return [p for _, p in keyed[period_range.locate(keys)]]
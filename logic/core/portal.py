@@ -0,0 +1,187 @@
+"""
+Identidade portal-first das cobranças, resolvida uma vez sobre a base consolidada.
+
+A geração só exibe cobranças que existem na Gestão (portal): uma linha por
+UC+Referência, com Valor_gestao positivo, identificada pela UC que o portal mostra.
+Como isso depende apenas da base, o sync grava o resultado em colunas técnicas:
+
+- _uc_final: UC do portal → alias alfanumérico → No. UC (nesta ordem)
+- _portal_rank: posição da linha entre as candidatas da mesma UC+Referência
+  (0 = preferida; -1 = não é cobrança do portal)
+- _portal_keep: _portal_rank == 0
+
+A preferência entre candidatas é: origem "Fatura", número de conta preenchido e
+maior Valor Enviado Emissão; empates mantêm a ordem da base.
+
+Antes do sync, a resolução era feita sobre o escopo do cliente selecionado. Para que
+outro cliente com a mesma UC do portal não mude o alias nem a deduplicação, alias e
+candidatas são calculados dentro do escopo de cliente (client_scope_keys): Razões
+Sociais ligadas por um mesmo CPF/CNPJ, como na seleção de filter_mask.
+
+O escopo é o fecho transitivo dessas ligações, enquanto filter_mask anda um passo
+só: numa cadeia A–doc1–B–doc2–C, selecionar A traz as linhas de A e as de doc1,
+mas o escopo reúne A, B e C. É intencional — o escopo precisa ser uma partição fixa
+da base (calculada no sync, independente da seleção) que contenha o alcance de
+qualquer seleção; com a cadeia inteira num escopo, uma cobrança repetida entre A e
+C é mantida uma única vez no grupo, e sai no arquivo de quem tem a linha preferida.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from logic.core.mapping import (
+    ACCOUNT_NUMBER_COL,
+    CLASSIFICATION_SOURCE_COL,
+    CLIENT_COLUMN,
+    DOCUMENT_COLUMN,
+    ENRICHMENT_KEY,
+    HIERARCHY_KEY_COL,
+    PERIOD_COLUMN,
+    PORTAL_UC_COL,
+)
+from logic.core.summary import to_numeric_column
+
+PORTAL_VALUE_COL = "Valor_gestao"
+PORTAL_UC_FINAL_COL = "_uc_final"
+PORTAL_RANK_COL = "_portal_rank"
+PORTAL_KEEP_COL = "_portal_keep"
+PORTAL_COLUMNS = [PORTAL_UC_FINAL_COL, PORTAL_RANK_COL, PORTAL_KEEP_COL]
+
+_NULL_TOKENS = ["", "nan", "none", "<na>"]
+
+
+def normalize_uc(series: pd.Series) -> pd.Series:
+    """UC como texto, sem espaços e sem sufixo '.0' de planilhas numéricas; vazio vira NA."""
+    s = series.astype("string").str.strip()
+    s = s.mask(s.str.lower().isin(_NULL_TOKENS))
+    return s.str.replace(r"\.0$", "", regex=True)
+
+
+def _portal_uc(df: pd.DataFrame) -> pd.Series:
+    if PORTAL_UC_COL in df.columns:
+        return normalize_uc(df[PORTAL_UC_COL])
+    if HIERARCHY_KEY_COL in df.columns:
+        return normalize_uc(df[HIERARCHY_KEY_COL])
+    return pd.Series(pd.NA, index=df.index, dtype="string")
+
+
+def document_keys(series: pd.Series) -> pd.Series:
+    """CPF/CNPJ só com dígitos ('' se ausente), como em BaseExcelReader.filter_mask."""
+    return series.astype("string").str.replace(r"\D", "", regex=True).fillna("")
+
+
+def client_scope_keys(clients: pd.Series, documents: Optional[pd.Series] = None) -> np.ndarray:
+    """
+    Escopo de cliente de cada linha (int64; -1 sem cliente nem documento): componentes
+    ligadas de Razão Social ↔ CPF/CNPJ. Selecionar um cliente em filter_mask traz também
+    as linhas do mesmo documento, então alias e deduplicação não cruzam esse limite.
+    A ligação é transitiva (cadeias de documentos entram inteiras), mais ampla que o
+    passo único de filter_mask; ver o docstring do módulo.
+    """
+    name_codes, names = pd.factorize(clients)
+    if documents is not None:
+        doc_codes, _ = pd.factorize(document_keys(documents).replace("", pd.NA))
+    else:
+        doc_codes = np.full(len(clients), -1, dtype=np.int64)
+    offset = len(names)
+    parent = list(range(offset + int(doc_codes.max(initial=-1)) + 1))
+    if not parent:
+        return np.full(len(clients), -1, dtype=np.int64)
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    linked = (name_codes >= 0) & (doc_codes >= 0)
+    pairs = np.unique(np.stack([name_codes[linked], doc_codes[linked] + offset], axis=1), axis=0)
+    for name, doc in pairs:
+        root_a, root_b = find(int(name)), find(int(doc))
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    roots = np.array([find(node) for node in range(len(parent))], dtype=np.int64)
+    nodes = np.where(name_codes >= 0, name_codes, np.where(doc_codes >= 0, doc_codes + offset, -1))
+    return np.where(nodes >= 0, roots[np.maximum(nodes, 0)], -1)
+
+
+def _client_scope(df: pd.DataFrame) -> np.ndarray:
+    if CLIENT_COLUMN not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return client_scope_keys(df[CLIENT_COLUMN], df[DOCUMENT_COLUMN] if DOCUMENT_COLUMN in df.columns else None)
+
+
+def resolve_uc_final(df: pd.DataFrame, scope: Optional[np.ndarray] = None) -> pd.Series:
+    """
+    UC de saída de cada linha. Alguns clientes usam no portal um alias alfanumérico
+    (ex.: "W700...") para a UC técnica de rateio: linhas cuja No. UC tem letras e cuja
+    UC do portal está preenchida definem o alias dessa UC do portal, dentro do mesmo
+    escopo de cliente (client_scope_keys).
+    """
+    if scope is None:
+        scope = _client_scope(df)
+    base_uc = normalize_uc(df[ENRICHMENT_KEY])
+    portal_uc = _portal_uc(df)
+
+    has_letter = df[ENRICHMENT_KEY].astype("string").str.contains(r"[^\W\d_]", regex=True, na=False)
+    alias_source = pd.DataFrame({"scope": scope, "portal": portal_uc, "alias": df[ENRICHMENT_KEY]}, index=df.index)
+    alias_source = alias_source[portal_uc.notna() & has_letter].dropna()
+    alias_map = alias_source.drop_duplicates(subset=["scope", "portal"], keep="first").set_index(["scope", "portal"])["alias"]
+    lookup = pd.MultiIndex.from_arrays([scope, base_uc.fillna("")])
+    alias = pd.Series(alias_map.reindex(lookup).to_numpy(), index=df.index).astype("string")
+
+    return portal_uc.fillna(alias).fillna(base_uc)
+
+
+def resolve_portal_identity(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta _uc_final, _portal_rank e _portal_keep à base consolidada.
+    Bases sem Valor_gestao (sem Gestão no sync) são devolvidas sem alteração.
+    """
+    if df.empty or any(col not in df.columns for col in (PORTAL_VALUE_COL, ENRICHMENT_KEY, PERIOD_COLUMN)):
+        return df
+
+    out = df.copy()
+    # Cálculo sobre posições (o índice da base pode ter rótulos repetidos)
+    frame = df.reset_index(drop=True)
+    scope = _client_scope(frame)
+    uc_final = resolve_uc_final(frame, scope)
+
+    value = pd.to_numeric(frame[PORTAL_VALUE_COL], errors="coerce")
+    eligible = (value > 0) & uc_final.notna() & frame[PERIOD_COLUMN].notna()
+
+    candidates = pd.DataFrame({"scope": scope, "uc": uc_final, "ref": frame[PERIOD_COLUMN]})[eligible]
+    source = frame.get(CLASSIFICATION_SOURCE_COL, pd.Series("", index=frame.index)).astype(str).str.strip().str.lower()
+    candidates["_pref_fatura"] = source[eligible] == "fatura"
+    if ACCOUNT_NUMBER_COL in frame.columns:
+        account = frame.loc[eligible, ACCOUNT_NUMBER_COL]
+        candidates["_pref_conta"] = account.notna() & (account.astype(str).str.strip() != "")
+    else:
+        candidates["_pref_conta"] = False
+    emitted = frame["Valor Enviado Emissão"] if "Valor Enviado Emissão" in frame.columns else pd.Series(0.0, index=frame.index)
+    candidates["_pref_valor"] = to_numeric_column(emitted[eligible])
+
+    # Ordenação estável: empates preservam a ordem da base
+    candidates = candidates.sort_values(
+        by=["_pref_fatura", "_pref_conta", "_pref_valor"], ascending=False, kind="stable",
+    )
+    rank = candidates.groupby(["scope", "uc", "ref"], sort=False).cumcount().reindex(frame.index).fillna(-1)
+
+    out[PORTAL_UC_FINAL_COL] = uc_final.to_numpy()
+    out[PORTAL_RANK_COL] = rank.astype("int32").to_numpy()
+    out[PORTAL_KEEP_COL] = out[PORTAL_RANK_COL].eq(0)
+    return out
+
+
+def apply_portal_filter(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recorte portal-first de uma base com as colunas de resolve_portal_identity:
+    só as linhas mantidas, com a UC final como No. UC e o valor da Gestão como
+    Valor Enviado Emissão. As colunas técnicas são removidas; o índice é preservado.
+    """
+    work = df[df[PORTAL_KEEP_COL].eq(True)].copy()
+    work[ENRICHMENT_KEY] = work[PORTAL_UC_FINAL_COL]
+    work["Valor Enviado Emissão"] = pd.to_numeric(work[PORTAL_VALUE_COL], errors="coerce").fillna(0.0)
+    return work.drop(columns=PORTAL_COLUMNS)
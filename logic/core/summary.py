@@ -0,0 +1,132 @@
+"""
+Resumo executivo da memória de cálculo.
+
+Todos os totais saem de um único groupby vetorizado por
+(Distribuidora, Referência, Situação do Pagamento); os recortes por dimensão são
+agregações desse resultado, que tem no máximo algumas centenas de linhas. Colunas
+que já chegam numéricas do cache tipado (Parquet) são usadas como estão — só
+colunas de texto passam pelo parse de números no formato brasileiro.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import pandas as pd
+
+from logic.core.dates import format_reference_period
+from logic.core.mapping import PARENT_ROW_FLAG, PERIOD_COLUMN, SEPARATOR_ROW_FLAG
+
+DISTRIBUTOR_COL = "Distribuidora"
+STATUS_COL = "Status Pos-Faturamento"
+
+# Métricas somadas no resumo: coluna da base → nome da métrica
+SUMMARY_METRICS = {
+    "Valor Enviado Emissão": "faturamento",
+    "Ganho total Padrão": "economia",
+    "Cred. Consumido Raizen": "kwh",
+    "Custo s/ GD": "custo_sem_gd",
+}
+
+# Rótulo para chaves vazias nos recortes (groupby não agrupa NaN)
+EMPTY_LABEL = "Não informado"
+
+_NULL_TOKENS = ["", "-", "--", "nan", "none", "<na>"]
+
+
+def to_numeric_column(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna em float sem laço Python. Numéricas passam direto;
+    textos aceitam '1.234,56' (pt-BR) e '1234.56'. Vazios e lixo viram 0.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(float)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(0.0)
+
+    text = series.astype("string").str.strip()
+    text = text.mask(text.str.lower().isin(_NULL_TOKENS))
+    has_comma = text.str.contains(",", regex=False, na=False)
+    text = text.where(~has_comma, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(text, errors="coerce").astype(float).fillna(0.0)
+
+
+def economy_ratio(economia: float, custo_sem_gd: float) -> Optional[float]:
+    """Economia sobre o custo sem desconto GD; None quando não há base de comparação."""
+    if not custo_sem_gd:
+        return None
+    return economia / custo_sem_gd
+
+
+@dataclass
+class ExecutiveSummary:
+    """Totais gerais e recortes por distribuidora, referência e situação do pagamento."""
+    totals: Dict[str, float] = field(default_factory=dict)
+    by_distributor: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_period: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_status: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    @property
+    def economy_pct(self) -> Optional[float]:
+        return economy_ratio(self.totals.get("economia", 0.0), self.totals.get("custo_sem_gd", 0.0))
+
+
+def _key_column(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(EMPTY_LABEL, index=df.index, dtype="string")
+    key = df[col].astype("string").str.strip()
+    return key.mask(key.str.lower().isin(_NULL_TOKENS)).fillna(EMPTY_LABEL)
+
+
+def _rollup(cube: pd.DataFrame, dimension: str) -> pd.DataFrame:
+    out = cube.groupby(dimension, sort=False)[["linhas", *SUMMARY_METRICS.values()]].sum()
+    out["economia_pct"] = [economy_ratio(e, c) for e, c in zip(out["economia"], out["custo_sem_gd"])]
+    return out
+
+
+def _period_sort_key(label: str) -> tuple:
+    month, _, year = label.partition("/")
+    if month.isdigit() and year.isdigit():
+        return (0, int(year), int(month))
+    return (1, 0, 0)
+
+
+def build_executive_summary(df: pd.DataFrame) -> ExecutiveSummary:
+    """
+    Calcula o resumo sobre as linhas de dados (sem Fatura Pai e separadores,
+    que duplicariam ou zerariam os totais).
+    """
+    if df.empty:
+        return ExecutiveSummary(totals={metric: 0.0 for metric in SUMMARY_METRICS.values()} | {"linhas": 0})
+
+    skip = pd.Series(False, index=df.index)
+    for flag in (PARENT_ROW_FLAG, SEPARATOR_ROW_FLAG):
+        if flag in df.columns:
+            skip |= df[flag].eq(True)
+    rows = df[~skip]
+
+    # Referência normalizada por valor único (poucas competências, muitas linhas)
+    period_raw = _key_column(rows, PERIOD_COLUMN)
+    period_labels = {value: format_reference_period(value, default=EMPTY_LABEL) for value in period_raw.unique()}
+
+    frame = pd.DataFrame({
+        "distribuidora": _key_column(rows, DISTRIBUTOR_COL),
+        "referencia": period_raw.map(period_labels),
+        "status": _key_column(rows, STATUS_COL),
+        "linhas": 1,
+    }, index=rows.index)
+    for col, metric in SUMMARY_METRICS.items():
+        frame[metric] = to_numeric_column(rows[col]) if col in rows.columns else 0.0
+
+    cube = frame.groupby(["distribuidora", "referencia", "status"], sort=False).sum().reset_index()
+
+    by_period = _rollup(cube, "referencia")
+    by_period = by_period.loc[sorted(by_period.index, key=_period_sort_key)]
+
+    totals = {metric: float(cube[metric].sum()) for metric in SUMMARY_METRICS.values()}
+    totals["linhas"] = int(cube["linhas"].sum())
+
+    return ExecutiveSummary(
+        totals=totals,
+        by_distributor=_rollup(cube, "distribuidora").sort_index(),
+        by_period=by_period,
+        by_status=_rollup(cube, "status").sort_values("linhas", ascending=False, kind="stable"),
+    )
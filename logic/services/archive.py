@@ -0,0 +1,66 @@
+"""
+Empacotamento das saídas em lote (vários .xlsx de uma vez).
+
+Os membros são planilhas .xlsx, que já são ZIPs comprimidos: recomprimir com
+ZIP_DEFLATED gasta CPU para ganho de tamanho desprezível. Por padrão o ZIP é
+gravado com ZIP_STORED; settings.archive_compression / archive_compresslevel
+permitem voltar ao deflate (com nível ajustável) para medir o trade-off.
+
+Alternativa ao ZIP (settings.batch_output_format = "workbook"): um único .xlsx
+com uma aba por grupo/período.
+"""
+import io
+import zipfile
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config.settings import settings
+
+ARCHIVE_STORED = "stored"
+ARCHIVE_DEFLATED = "deflated"
+
+BATCH_FORMAT_ZIP = "zip"
+BATCH_FORMAT_WORKBOOK = "workbook"
+
+ZIP_MIME_TYPE = "application/zip"
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_COMPRESSION = {
+    ARCHIVE_STORED: zipfile.ZIP_STORED,
+    ARCHIVE_DEFLATED: zipfile.ZIP_DEFLATED,
+}
+
+
+def zip_options(compression: Optional[str] = None, compresslevel: Optional[int] = None) -> Dict[str, Any]:
+    """Argumentos de zipfile.ZipFile para a estratégia pedida (ou a configurada)."""
+    name = (compression or settings.archive_compression).lower()
+    if name not in _COMPRESSION:
+        raise ValueError(f"Compressão de arquivo desconhecida: '{name}'. Use '{ARCHIVE_STORED}' ou '{ARCHIVE_DEFLATED}'.")
+    options: Dict[str, Any] = {"compression": _COMPRESSION[name]}
+    if name == ARCHIVE_DEFLATED:
+        options["compresslevel"] = settings.archive_compresslevel if compresslevel is None else compresslevel
+    return options
+
+
+def open_zip(buffer: Any, compression: Optional[str] = None, compresslevel: Optional[int] = None) -> zipfile.ZipFile:
+    """Abre um ZIP para escrita com a estratégia de compressão configurada."""
+    return zipfile.ZipFile(buffer, "w", **zip_options(compression, compresslevel))
+
+
+def build_zip(entries: Iterable[Tuple[str, Optional[bytes]]], compression: Optional[str] = None, compresslevel: Optional[int] = None) -> Optional[bytes]:
+    """Empacota [(nome, bytes)] num ZIP; entradas vazias são ignoradas. None se nada foi gravado."""
+    buffer = io.BytesIO()
+    written = 0
+    with open_zip(buffer, compression, compresslevel) as z:
+        for name, data in entries:
+            if data:
+                z.writestr(name, data)
+                written += 1
+    return buffer.getvalue() if written else None
+
+
+def batch_format(output_format: Optional[str] = None) -> str:
+    """Formato da saída em lote: o pedido ou o configurado ('zip' ou 'workbook')."""
+    name = (output_format or settings.batch_output_format).lower()
+    if name not in (BATCH_FORMAT_ZIP, BATCH_FORMAT_WORKBOOK):
+        raise ValueError(f"Formato de saída em lote desconhecido: '{name}'. Use '{BATCH_FORMAT_ZIP}' ou '{BATCH_FORMAT_WORKBOOK}'.")
+    return name
@@ -10,19 +10,15 @@ logger = logging.getLogger(__name__)
 
 # --- CONFIGURAÇÃO FIREBASE ---
 CLIENT_GROUPS_COLLECTION = "client_groups"
-_adapter = None
 
 def _get_adapter():
-    """Inicialização preguiçosa (Lazy loading) do adaptador Firebase."""
-    global _adapter
-    if _adapter is None:
-        try:
-            from logic.adapters.firebase_adapter import FirebaseAdapter
-            from config.settings import settings
-            _adapter = FirebaseAdapter(settings.firebase_credentials_path, settings.firebase_storage_bucket)
-        except Exception as e:
-            logger.error("Falha ao obter adaptador Firebase no ClientGroupService: %s", e)
-    return _adapter
+    """Adaptador Firebase compartilhado pelo processo (None se indisponível)."""
+    try:
+        from logic.adapters.firebase_adapter import get_shared_adapter
+        return get_shared_adapter()
+    except Exception as e:
+        logger.error("Falha ao obter adaptador Firebase no ClientGroupService: %s", e)
+        return None
 
 def save_client_group(group_name: str, client_list: list) -> bool:
     """
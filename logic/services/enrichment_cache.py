@@ -0,0 +1,298 @@
+"""
+Cache de processo para os dados de enriquecimento (collection 'uc_enrichment').
+
+Mantém o DataFrame em memória com TTL configurável e um snapshot local em Parquet
+com o maior `updated_at` já visto. Ao expirar o TTL, busca no Firestore apenas os
+documentos alterados desde então (consulta `updated_at > último visto`), em vez de
+varrer a collection inteira a cada geração.
+
+Exclusões não aparecem numa consulta delta: as feitas por este processo são
+aplicadas localmente (e gravadas no snapshot no próximo refresh), e uma
+varredura completa periódica captura as demais.
+
+Cada DataFrame entregue leva uma versão barata (maior `updated_at`, linhas e a
+última edição local), consultada por `version_of` para montar a chave do cache de
+resultados sem recalcular o hash do conteúdo a cada geração.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Optional
+
+import pandas as pd
+
+from config.settings import settings
+from logic.core.mapping import ENRICHMENT_KEY
+from logic.services.sync_service import CACHE_DIR, _read_parquet_safe, _save_parquet_safe
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = os.path.join(CACHE_DIR, "enrichment_snapshot.parquet")
+SNAPSHOT_META_FILE = os.path.join(CACHE_DIR, "enrichment_snapshot.json")
+
+# Margem aplicada ao filtro delta para tolerar diferenças de relógio entre escritores
+DELTA_OVERLAP = timedelta(seconds=5)
+
+# Atributo (DataFrame.attrs) com a versão do enriquecimento entregue
+VERSION_ATTR = "enrichment_version"
+
+
+@dataclass
+class _CacheState:
+    frame: Optional[pd.DataFrame] = None
+    max_updated_at: Optional[datetime] = None
+    refreshed_at: float = 0.0       # monotonic da última checagem no Firestore
+    full_refresh_at: float = 0.0    # epoch da última varredura completa
+    local_edit_at: Optional[float] = None  # epoch da última gravação/exclusão local
+    snapshot_dirty: bool = False    # edições locais ainda não gravadas no snapshot
+
+
+_state = _CacheState()
+_lock = threading.RLock()
+# Cópias entregues por get_enrichment_frame (id → DataFrame), para version_of
+_issued: "weakref.WeakValueDictionary[int, pd.DataFrame]" = weakref.WeakValueDictionary()
+
+
+class EnrichmentFetchError(Exception):
+    """Erro levantado quando o Firestore não está disponível para atualizar o cache."""
+    pass
+
+
+def get_enrichment_frame(force_refresh: bool = False) -> pd.DataFrame:
+    """
+    Retorna o DataFrame de enriquecimento (uma linha por UC, coluna ENRICHMENT_KEY).
+    Dentro do TTL é servido da memória; depois disso, aplica um refresh delta
+    (ou completo, se vencido o intervalo de varredura). Se o Firestore falhar,
+    serve a última versão conhecida.
+    """
+    with _lock:
+        ttl = settings.enrichment_cache_ttl_seconds
+        fresh = _state.frame is not None and (time.monotonic() - _state.refreshed_at) < ttl
+        if fresh and not force_refresh:
+            return _issue_copy()
+
+        if _state.frame is None:
+            _load_snapshot()
+
+        try:
+            full_due = (
+                _state.frame is None
+                or _state.max_updated_at is None
+                or force_refresh
+                or (time.time() - _state.full_refresh_at) >= settings.enrichment_full_refresh_seconds
+            )
+            if full_due:
+                _full_refresh()
+            else:
+                _delta_refresh()
+            _state.refreshed_at = time.monotonic()
+            _state.snapshot_dirty = True
+        except EnrichmentFetchError as e:
+            logger.warning("Enriquecimento: Firestore indisponível (%s); servindo versão em cache.", e)
+        except Exception as e:
+            logger.error("Enriquecimento: falha ao atualizar cache: %s", e)
+        if _state.snapshot_dirty:
+            _save_snapshot()
+
+        if _state.frame is None:
+            return pd.DataFrame(columns=[ENRICHMENT_KEY])
+        return _issue_copy()
+
+
+def version_of(df: Optional[pd.DataFrame]) -> Optional[str]:
+    """
+    Versão do enriquecimento se `df` é exatamente uma cópia entregue por
+    get_enrichment_frame (None para qualquer outro DataFrame, inclusive derivados dela).
+    """
+    if df is None or _issued.get(id(df)) is not df:
+        return None
+    return df.attrs.get(VERSION_ATTR)
+
+
+def apply_local_upsert(df: pd.DataFrame, uc_col: str = ENRICHMENT_KEY) -> None:
+    """
+    Reflete no cache uma gravação feita por este processo (semântica set(merge=True):
+    campos novos sobrescrevem, campos ausentes são preservados). O snapshot em disco
+    só é regravado no próximo refresh, não a cada lote.
+    """
+    with _lock:
+        if _state.frame is None or df.empty:
+            return
+        incoming = df.rename(columns={uc_col: ENRICHMENT_KEY}).copy()
+        incoming[ENRICHMENT_KEY] = incoming[ENRICHMENT_KEY].astype(str).str.strip()
+        incoming = incoming.drop_duplicates(subset=[ENRICHMENT_KEY], keep="last").set_index(ENRICHMENT_KEY)
+        current = _state.frame.set_index(ENRICHMENT_KEY)
+        merged = incoming.combine_first(current)
+        _state.frame = merged.reset_index().rename(columns={"index": ENRICHMENT_KEY})
+        _state.local_edit_at = time.time()
+        _state.snapshot_dirty = True
+
+
+def apply_local_delete(ucs: Iterable[Any]) -> None:
+    """Remove do cache as UCs excluídas por este processo (snapshot regravado no próximo refresh)."""
+    with _lock:
+        if _state.frame is None:
+            return
+        ids = {str(uc) for uc in ucs}
+        _state.frame = _state.frame[~_state.frame[ENRICHMENT_KEY].astype(str).isin(ids)].reset_index(drop=True)
+        _state.local_edit_at = time.time()
+        _state.snapshot_dirty = True
+
+
+def invalidate(remove_snapshot: bool = False) -> None:
+    """Descarta o cache em memória (e opcionalmente o snapshot em disco)."""
+    global _state
+    with _lock:
+        _state = _CacheState()
+        if remove_snapshot:
+            for path in (SNAPSHOT_FILE, SNAPSHOT_META_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+# --- HELPERS INTERNOS ---
+
+def _issue_copy() -> pd.DataFrame:
+    frame = _state.frame.copy()
+    max_ts = _state.max_updated_at.isoformat() if _state.max_updated_at else ""
+    frame.attrs[VERSION_ATTR] = f"{max_ts}|{len(frame)}|{_state.local_edit_at or ''}"
+    _issued[id(frame)] = frame
+    return frame
+
+
+def _get_collection():
+    from logic.services import enrichment_service
+
+    adapter = enrichment_service._get_adapter()
+    db = adapter._get_db() if adapter else None
+    if not db:
+        raise EnrichmentFetchError("adapter Firebase não inicializado")
+    return db.collection(enrichment_service.COLLECTION_ENRICHMENT)
+
+
+def _docs_to_frame(docs) -> tuple[pd.DataFrame, Optional[datetime]]:
+    from logic.services.enrichment_service import UPDATED_AT_FIELD
+
+    rows: List[dict] = []
+    max_ts = None
+    for doc in docs:
+        item = doc.to_dict() or {}
+        ts = item.pop(UPDATED_AT_FIELD, None)
+        if isinstance(ts, datetime) and (max_ts is None or ts > max_ts):
+            max_ts = ts
+        item[ENRICHMENT_KEY] = doc.id
+        rows.append(item)
+    if not rows:
+        return pd.DataFrame(columns=[ENRICHMENT_KEY]), max_ts
+    return pd.DataFrame(rows), max_ts
+
+
+def _full_refresh() -> None:
+    # Documentos legados (gravados antes do updated_at) não têm carimbo: sem nenhum,
+    # o início da varredura vira a marca d'água para os próximos refreshes delta.
+    started_at = datetime.now(timezone.utc)
+    try:
+        docs = list(_get_collection().stream())
+    except EnrichmentFetchError:
+        raise
+    except Exception as e:
+        raise EnrichmentFetchError(str(e)) from e
+
+    frame, max_ts = _docs_to_frame(docs)
+    _state.frame = frame
+    _state.max_updated_at = max_ts or started_at
+    _state.full_refresh_at = time.time()
+    _state.local_edit_at = None
+    logger.info("Enriquecimento: varredura completa carregou %d UCs.", len(frame))
+
+
+def _delta_refresh() -> None:
+    from logic.services.enrichment_service import UPDATED_AT_FIELD
+
+    since = _state.max_updated_at - DELTA_OVERLAP
+    try:
+        collection = _get_collection()
+        try:
+            from google.cloud.firestore_v1.base_query import FieldFilter
+            query = collection.where(filter=FieldFilter(UPDATED_AT_FIELD, ">", since))
+        except ImportError:
+            query = collection.where(UPDATED_AT_FIELD, ">", since)
+        docs = list(query.stream())
+    except EnrichmentFetchError:
+        raise
+    except Exception as e:
+        raise EnrichmentFetchError(str(e)) from e
+
+    if not docs:
+        return
+
+    changed, max_ts = _docs_to_frame(docs)
+    # O documento lido é sempre completo: substitui a linha inteira.
+    kept = _state.frame[~_state.frame[ENRICHMENT_KEY].isin(changed[ENRICHMENT_KEY])]
+    _state.frame = pd.concat([kept, changed], ignore_index=True, sort=False)
+    if max_ts and max_ts > _state.max_updated_at:
+        _state.max_updated_at = max_ts
+    logger.info("Enriquecimento: refresh delta aplicou %d UCs alteradas.", len(changed))
+
+
+def _load_snapshot() -> None:
+    if not (os.path.exists(SNAPSHOT_FILE) and os.path.exists(SNAPSHOT_META_FILE)):
+        return
+    try:
+        with open(SNAPSHOT_META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        frame = _read_parquet_safe(SNAPSHOT_FILE)
+        if ENRICHMENT_KEY not in frame.columns:
+            return
+        _state.frame = frame
+        max_ts = meta.get("max_updated_at")
+        _state.max_updated_at = datetime.fromisoformat(max_ts) if max_ts else None
+        _state.full_refresh_at = float(meta.get("full_refresh_at", 0.0))
+        _state.local_edit_at = meta.get("local_edit_at")
+        logger.info("Enriquecimento: snapshot local carregado (%d UCs).", len(frame))
+    except Exception as e:
+        logger.warning("Snapshot de enriquecimento ilegível, será refeito: %s", e)
+
+
+def _save_snapshot() -> None:
+    """
+    Grava parquet e metadados em arquivos temporários e os troca com os.replace,
+    metadados por último: uma interrupção no meio deixa no máximo o parquet novo com
+    a marca d'água antiga, o que só faz o próximo refresh delta reler alguns documentos.
+    """
+    if _state.frame is None:
+        return
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_snapshot, tmp_meta = SNAPSHOT_FILE + suffix, SNAPSHOT_META_FILE + suffix
+    try:
+        os.makedirs(os.path.dirname(SNAPSHOT_FILE) or ".", exist_ok=True)
+        frame = _state.frame
+        if not _save_parquet_safe(frame, tmp_snapshot):
+            # Metadados digitados à mão podem misturar tipos na mesma coluna
+            frame = frame.copy()
+            for col in frame.select_dtypes(include=["object"]).columns:
+                frame[col] = frame[col].where(frame[col].isna(), frame[col].astype(str))
+            if not _save_parquet_safe(frame, tmp_snapshot):
+                return
+        meta = {
+            "max_updated_at": _state.max_updated_at.isoformat() if _state.max_updated_at else None,
+            "full_refresh_at": _state.full_refresh_at,
+            "local_edit_at": _state.local_edit_at,
+            "rows": len(frame),
+        }
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_snapshot, SNAPSHOT_FILE)
+        os.replace(tmp_meta, SNAPSHOT_META_FILE)
+        _state.snapshot_dirty = False
+    except Exception as e:
+        logger.warning("Falha ao gravar snapshot de enriquecimento: %s", e)
+    finally:
+        for path in (tmp_snapshot, tmp_meta):
+            if os.path.exists(path):
+                os.remove(path)
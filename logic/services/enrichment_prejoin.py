@@ -0,0 +1,122 @@
+"""
+Enriquecimento pré-juntado (opcional, settings.prejoin_enrichment).
+
+Materializa os dados de 'uc_enrichment' numa tabela lateral ao cache consolidado,
+indexada pela UC normalizada. O Orchestrator junta essa tabela à base uma única vez
+ao carregá-la, e a geração passa a usar as colunas já presentes — sem merge por
+requisição e sem consulta ao Firestore.
+
+A tabela é refeita no sync da base e sempre que o enriquecimento é salvo/excluído.
+"""
+import logging
+import os
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from config.settings import settings
+from logic.core.mapping import COLUMN_MAPPING, ENRICHMENT_KEY, PORTAL_UC_COL
+from logic.core.portal import PORTAL_UC_FINAL_COL
+from logic.services.sync_service import CACHE_DIR, _read_parquet_safe, _save_parquet_safe
+
+logger = logging.getLogger(__name__)
+
+PREJOINED_FILE = os.path.join(CACHE_DIR, "enrichment_prejoined.parquet")
+
+# Chave técnica de junção (UC normalizada) — não vai para a planilha
+PREJOIN_KEY_COL = "_enrichment_uc"
+
+
+def normalize_uc_key(series: pd.Series) -> pd.Series:
+    """UC como texto, sem espaços e sem sufixo '.0' de planilhas numéricas; vazio vira NA."""
+    s = series.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return s.mask(s.str.lower().isin(["", "nan", "none", "<na>"]))
+
+
+def is_enabled() -> bool:
+    return bool(settings.prejoin_enrichment)
+
+
+def materialize_prejoined(enrichment_df: Optional[pd.DataFrame] = None) -> bool:
+    """
+    Grava a tabela lateral a partir do enriquecimento informado
+    (ou do enrichment_cache, se omitido). Retorna True se gravou.
+    """
+    if enrichment_df is None:
+        from logic.services import enrichment_cache
+        enrichment_df = enrichment_cache.get_enrichment_frame()
+
+    if enrichment_df is None or ENRICHMENT_KEY not in enrichment_df.columns:
+        return False
+
+    table = enrichment_df.copy()
+    table[PREJOIN_KEY_COL] = normalize_uc_key(table[ENRICHMENT_KEY])
+    table = (
+        table.dropna(subset=[PREJOIN_KEY_COL])
+        .drop_duplicates(subset=[PREJOIN_KEY_COL], keep="last")
+        .drop(columns=[ENRICHMENT_KEY])
+    )
+    # Colunas do mapeamento padrão nunca são sobrescritas pelo enriquecimento
+    table = table.drop(columns=[c for c in table.columns if c in COLUMN_MAPPING])
+
+    os.makedirs(os.path.dirname(PREJOINED_FILE) or ".", exist_ok=True)
+    if not _save_parquet_safe(table, PREJOINED_FILE):
+        for col in table.select_dtypes(include=["object"]).columns:
+            table[col] = table[col].where(table[col].isna(), table[col].astype(str))
+        if not _save_parquet_safe(table, PREJOINED_FILE):
+            logger.error("Falha ao gravar enriquecimento pré-juntado em %s.", PREJOINED_FILE)
+            return False
+    logger.info("Enriquecimento pré-juntado materializado: %d UCs, %d colunas.", len(table), len(table.columns) - 1)
+    return True
+
+
+def refresh_if_enabled(enrichment_df: Optional[pd.DataFrame] = None) -> None:
+    """Refaz a tabela lateral quando a opção está ligada; falhas só geram log."""
+    if not is_enabled():
+        return
+    try:
+        materialize_prejoined(enrichment_df)
+    except Exception as e:
+        logger.warning("Falha ao atualizar enriquecimento pré-juntado: %s", e)
+
+
+def load_prejoined() -> Optional[pd.DataFrame]:
+    """Lê a tabela lateral, se a opção estiver ligada e o arquivo existir."""
+    if not is_enabled() or not os.path.exists(PREJOINED_FILE):
+        return None
+    table = _read_parquet_safe(PREJOINED_FILE)
+    if PREJOIN_KEY_COL not in table.columns:
+        return None
+    return table
+
+
+def prejoined_mtime() -> float:
+    """mtime da tabela lateral (0.0 se ausente), para invalidar caches do Orchestrator."""
+    if not is_enabled() or not os.path.exists(PREJOINED_FILE):
+        return 0.0
+    return os.path.getmtime(PREJOINED_FILE)
+
+
+def join_prejoined(base_df: pd.DataFrame, table: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Junta a tabela lateral à base consolidada. A chave é a UC exibida no portal
+    (PORTAL_UC_COL) com fallback para No. UC — a mesma identificação que a geração
+    usa após o filtro portal-first; bases sincronizadas usam direto a UC final já
+    resolvida (_uc_final, que inclui o alias). Retorna (base enriquecida, colunas adicionadas).
+    """
+    existing = set(base_df.columns)
+    cols = [c for c in table.columns if c != PREJOIN_KEY_COL and c not in existing]
+    if not cols:
+        return base_df, []
+
+    key = normalize_uc_key(base_df[ENRICHMENT_KEY])
+    if PORTAL_UC_FINAL_COL in base_df.columns:
+        key = normalize_uc_key(base_df[PORTAL_UC_FINAL_COL]).fillna(key)
+    elif PORTAL_UC_COL in base_df.columns:
+        key = normalize_uc_key(base_df[PORTAL_UC_COL]).fillna(key)
+
+    lookup = table.set_index(PREJOIN_KEY_COL)[cols]
+    lookup.index = lookup.index.astype("string")
+    joined = lookup.reindex(key.to_numpy())
+    joined.index = base_df.index
+    return pd.concat([base_df, joined], axis=1), cols
@@ -5,9 +5,12 @@ Suporta migração automática de JSON local para a nuvem.
 """
 import os
 import json
+import time
 import pandas as pd
 import logging
-from typing import List, Optional, Union, Dict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple, Union, Dict
 from logic.core.mapping import ENRICHMENT_KEY
 
 logger = logging.getLogger(__name__)
@@ -15,21 +18,43 @@ logger = logging.getLogger(__name__)
 # --- CONFIGURAÇÃO FIREBASE ---
 COLLECTION_NAME = "uc_mappings"
 COLLECTION_ENRICHMENT = "uc_enrichment"
-_adapter = None
+# Carimbo de alteração usado pelo refresh delta do enrichment_cache (não vai para a memória)
+UPDATED_AT_FIELD = "updated_at"
+
+# --- ESCRITA EM LOTE ---
+# O Firestore aceita no máximo 500 operações por WriteBatch
+FIRESTORE_BATCH_LIMIT = 500
+# Lotes independentes são enviados em paralelo
+BATCH_MAX_WORKERS = 4
+# Tentativas por lote (e, no fallback, por documento) antes de desistir
+BATCH_MAX_RETRIES = 3
+# Backoff exponencial: 0.5s, 1s, 2s...
+BATCH_BACKOFF_SECONDS = 0.5
+
+
+@dataclass
+class BatchWriteSummary:
+    """
+    Resumo de uma escrita/exclusão em lote no Firestore.
+    Avalia como verdadeiro quando nenhuma operação falhou, preservando o
+    contrato booleano antigo de save_enrichment_data/delete_enrichment_data.
+    """
+    written: int = 0
+    failed: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return self.failed == 0
+
 
 def _get_adapter():
-    """Inicialização preguiçosa (Lazy loading) do adaptador Firebase."""
-    global _adapter
-    if _adapter is None:
-        try:
-            from logic.adapters.firebase_adapter import FirebaseAdapter
-            from config.settings import settings
-            _adapter = FirebaseAdapter(settings.firebase_credentials_path, settings.firebase_storage_bucket)
-            if not _adapter._app:
-                logger.warning("Firebase não inicializado no Enrichment Service. Fallback para Local? (Não implementado por design Nuvem First)")
-        except Exception as e:
-            logger.error("Falha ao obter adaptador Firebase: %s", e)
-    return _adapter
+    """Adaptador Firebase compartilhado pelo processo (None se indisponível)."""
+    try:
+        from logic.adapters.firebase_adapter import get_shared_adapter
+        return get_shared_adapter()
+    except Exception as e:
+        logger.error("Falha ao obter adaptador Firebase: %s", e)
+        return None
 
 # --- LEGACY LOCAL PATH (PARA MIGRAÇÃO) ---
 DATA_PATH = os.path.join(os.getcwd(), "data", "mappings")
@@ -191,6 +216,7 @@ def get_all_enrichment_data() -> pd.DataFrame:
         data = []
         for doc in docs:
             item = doc.to_dict()
+            item.pop(UPDATED_AT_FIELD, None)
             item[ENRICHMENT_KEY] = doc.id
             data.append(item)
             
@@ -202,75 +228,209 @@ def get_all_enrichment_data() -> pd.DataFrame:
         logger.error("Erro fatal ao buscar dados de enriquecimento: %s", e)
         return pd.DataFrame(columns=[ENRICHMENT_KEY])
 
-def save_enrichment_data(df: pd.DataFrame, uc_col: str = ENRICHMENT_KEY) -> bool:
+def save_enrichment_data(df: pd.DataFrame, uc_col: str = ENRICHMENT_KEY) -> BatchWriteSummary:
     """
-    Faz iteração no DF e um .set(data, merge=True) no Firestore na collection 'uc_enrichment'
-    usando o uc_col (No. UC) como ID.
+    Grava o DF na collection 'uc_enrichment' com .set(data, merge=True), usando o uc_col (No. UC) como ID.
+    As escritas vão em WriteBatches de até 500 operações, enviados em paralelo com retry/backoff.
     """
     try:
         if df.empty:
-            return True
-            
+            return BatchWriteSummary()
+
         adapter = _get_adapter()
         if not adapter:
             logger.error("Firebase adapter not initialized.")
-            return False
-            
+            return BatchWriteSummary(failed=len(df))
+
         db = adapter._get_db()
         if not db:
-            return False
+            return BatchWriteSummary(failed=len(df))
 
         if uc_col not in df.columns:
             logger.error(f"A coluna {uc_col} não foi encontrada no DataFrame para salvar.")
-            return False
+            return BatchWriteSummary(failed=len(df))
 
-        df_save = df.copy()
-        # IDs do Firestore precisam ser strings
-        df_save[uc_col] = df_save[uc_col].astype(str).str.strip()
+        # IDs do Firestore precisam ser strings. UCs repetidas: vale a última linha
+        # (lotes paralelos não garantem a ordem entre escritas do mesmo documento)
+        id_series = df[uc_col].astype(str).str.strip()
+        unique_rows = ~id_series.duplicated(keep="last")
+        df = df[unique_rows]
+        doc_ids = id_series[unique_rows].tolist()
+        # Remove a chave do dicionário de dados (já é o ID do doc) e filtra NaNs
+        # para evitar erro de serialização no Firebase
+        records = df.drop(columns=[uc_col]).to_dict(orient="records")
+        stamp = _server_timestamp()
+        operations = [
+            (uc_id, {**{k: v for k, v in record.items() if pd.notna(v)}, UPDATED_AT_FIELD: stamp})
+            for uc_id, record in zip(doc_ids, records)
+        ]
 
-        for _, row in df_save.iterrows():
-            uc_id = row[uc_col]
-            # Remove a chave do dicionário de dados (já é o ID do doc)
-            doc_data = row.drop(uc_col).to_dict()
-            # Filtra NaNs para evitar erro de serialização no Firebase
-            doc_data = {k: v for k, v in doc_data.items() if pd.notna(v)}
-            
-            db.collection(COLLECTION_ENRICHMENT).document(uc_id).set(doc_data, merge=True)
-            
-        logger.info(f"Salvos/Atualizados {len(df_save)} registros na collection {COLLECTION_ENRICHMENT}.")
-        return True
+        summary = _run_batched(db, operations, lambda batch, ref, data: batch.set(ref, data, merge=True), lambda ref, data: ref.set(data, merge=True))
+        logger.info(
+            "Enriquecimento: %d registros salvos/atualizados e %d com falha na collection %s.",
+            summary.written, summary.failed, COLLECTION_ENRICHMENT,
+        )
+        _notify_cache_upsert(df, uc_col, summary.failed_ids)
+        return summary
     except Exception as e:
         logger.exception("Erro ao salvar dados de enriquecimento: %s", e)
-        return False
+        return BatchWriteSummary(failed=len(df))
 
-def delete_enrichment_data(ucs: List[str]) -> bool:
+def delete_enrichment_data(ucs: List[str]) -> BatchWriteSummary:
     """
-    Recebe uma lista de UCs e faz um .delete() em cada documento correspondente na 'uc_enrichment'.
+    Exclui da 'uc_enrichment' os documentos das UCs informadas,
+    em WriteBatches de até 500 operações enviados em paralelo com retry/backoff.
     """
     try:
         if not ucs:
-            return True
-            
+            return BatchWriteSummary()
+
         adapter = _get_adapter()
         if not adapter:
             logger.error("Firebase adapter not initialized.")
-            return False
-            
+            return BatchWriteSummary(failed=len(ucs))
+
         db = adapter._get_db()
         if not db:
-            return False
+            return BatchWriteSummary(failed=len(ucs))
 
-        for uc_id in ucs:
-            db.collection(COLLECTION_ENRICHMENT).document(str(uc_id)).delete()
-            
-        logger.info(f"Excluiu {len(ucs)} documentos da collection {COLLECTION_ENRICHMENT}.")
-        return True
+        operations = [(uc_id, None) for uc_id in dict.fromkeys(str(uc) for uc in ucs)]
+        summary = _run_batched(db, operations, lambda batch, ref, _data: batch.delete(ref), lambda ref, _data: ref.delete())
+        logger.info(
+            "Enriquecimento: %d documentos excluídos e %d com falha na collection %s.",
+            summary.written, summary.failed, COLLECTION_ENRICHMENT,
+        )
+        failed = set(summary.failed_ids)
+        _notify_cache_delete([uc for uc, _ in operations if uc not in failed])
+        return summary
     except Exception as e:
         logger.error("Erro ao excluir dados de enriquecimento: %s", e)
-        return False
+        return BatchWriteSummary(failed=len(ucs))
 
 # --- HELPERS INTERNOS ---
 
+def _server_timestamp():
+    """Timestamp do servidor Firestore; cai para o relógio local (UTC) sem o SDK."""
+    try:
+        from google.cloud.firestore import SERVER_TIMESTAMP
+        return SERVER_TIMESTAMP
+    except ImportError:
+        from datetime import datetime, timezone
+        return datetime.now(timezone.utc)
+
+def _notify_cache_upsert(df: pd.DataFrame, uc_col: str, failed_ids: List[str]) -> None:
+    """Mantém o enrichment_cache do processo coerente com o que acabou de ser gravado."""
+    try:
+        from logic.services import enrichment_cache
+        written = df[~df[uc_col].astype(str).str.strip().isin(set(failed_ids))]
+        enrichment_cache.apply_local_upsert(written, uc_col)
+    except Exception as e:
+        logger.warning("Falha ao atualizar cache de enriquecimento após gravação: %s", e)
+    _refresh_prejoined()
+
+def _notify_cache_delete(ucs: List[str]) -> None:
+    try:
+        from logic.services import enrichment_cache
+        enrichment_cache.apply_local_delete(ucs)
+    except Exception as e:
+        logger.warning("Falha ao atualizar cache de enriquecimento após exclusão: %s", e)
+    _refresh_prejoined()
+
+def _refresh_prejoined() -> None:
+    """Refaz o enriquecimento pré-juntado à base, quando settings.prejoin_enrichment está ligado."""
+    from logic.services import enrichment_prejoin
+    enrichment_prejoin.refresh_if_enabled()
+
+def _transient_errors() -> Tuple[type, ...]:
+    """Erros do Firestore que valem nova tentativa (indisponibilidade, timeout, contenção, cota)."""
+    errors: List[type] = [ConnectionError, TimeoutError]
+    try:
+        from google.api_core import exceptions as gexc
+        errors += [gexc.ServiceUnavailable, gexc.DeadlineExceeded, gexc.Aborted, gexc.ResourceExhausted]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+def _with_retry(action: Callable[[], Any], description: str) -> Optional[Exception]:
+    """
+    Executa a ação com backoff exponencial, repetindo apenas erros transitórios.
+    Retorna None em caso de sucesso ou a exceção que encerrou as tentativas.
+    """
+    transient = _transient_errors()
+    for attempt in range(BATCH_MAX_RETRIES):
+        try:
+            action()
+            return None
+        except Exception as e:
+            if not isinstance(e, transient):
+                logger.error("Falha permanente em %s: %s", description, e)
+                return e
+            logger.warning("Falha em %s (tentativa %d/%d): %s", description, attempt + 1, BATCH_MAX_RETRIES, e)
+            if attempt + 1 == BATCH_MAX_RETRIES:
+                return e
+            time.sleep(BATCH_BACKOFF_SECONDS * (2 ** attempt))
+    return None
+
+def _document_errors() -> Tuple[type, ...]:
+    """Erros atribuíveis a um documento do lote (dado/ID inválido), que justificam isolá-lo."""
+    errors: List[type] = [ValueError, TypeError]
+    try:
+        from google.api_core import exceptions as gexc
+        errors += [gexc.InvalidArgument, gexc.NotFound, gexc.FailedPrecondition]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+def _commit_chunk(db, chunk: List[Tuple[str, Any]], batch_op: Callable, single_op: Callable) -> Tuple[int, List[str]]:
+    """
+    Envia um lote atômico. Só quando o lote é rejeitado por causa de algum documento
+    (dado ou ID inválido) cai para escrita documento a documento, isolando as falhas
+    reais. Falha transitória que esgota as tentativas (Firestore fora do ar) ou erro
+    que não é do documento (permissão) falham o lote inteiro, sem novas esperas.
+    """
+    collection = db.collection(COLLECTION_ENRICHMENT)
+    chunk_ids = [doc_id for doc_id, _ in chunk]
+
+    def _commit():
+        batch = db.batch()
+        for doc_id, data in chunk:
+            batch_op(batch, collection.document(doc_id), data)
+        batch.commit()
+
+    error = _with_retry(_commit, f"lote de {len(chunk)} operações")
+    if error is None:
+        return len(chunk), []
+    if not isinstance(error, _document_errors()):
+        return 0, chunk_ids
+
+    written, failed_ids = 0, []
+    transient = _transient_errors()
+    for position, (doc_id, data) in enumerate(chunk):
+        doc_error = _with_retry(lambda: single_op(collection.document(doc_id), data), f"documento {doc_id}")
+        if doc_error is None:
+            written += 1
+        elif isinstance(doc_error, transient):
+            # Firestore ficou indisponível no meio do isolamento: o restante falha junto
+            failed_ids.extend(chunk_ids[position:])
+            break
+        else:
+            failed_ids.append(doc_id)
+    return written, failed_ids
+
+def _run_batched(db, operations: List[Tuple[str, Any]], batch_op: Callable, single_op: Callable) -> BatchWriteSummary:
+    """Divide as operações em lotes de FIRESTORE_BATCH_LIMIT e os envia em paralelo."""
+    chunks = [operations[i:i + FIRESTORE_BATCH_LIMIT] for i in range(0, len(operations), FIRESTORE_BATCH_LIMIT)]
+    summary = BatchWriteSummary()
+    if not chunks:
+        return summary
+
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(chunks))) as pool:
+        for written, failed_ids in pool.map(lambda c: _commit_chunk(db, c, batch_op, single_op), chunks):
+            summary.written += written
+            summary.failed += len(failed_ids)
+            summary.failed_ids.extend(failed_ids)
+    return summary
+
 def _dict_to_df(mapping_dict: dict) -> pd.DataFrame:
     """Converte o dicionário do Firestore/JSON de volta para DataFrame do pandas."""
     if not mapping_dict:
@@ -2,7 +2,9 @@
 Serviço de orquestração para geração de planilhas de Memória de Cálculo.
 Suporta faturamento agrupado (Fatura Pai + UCs Filhas).
 """
-from logic.adapters.excel_adapter import BaseExcelReader, TemplateExcelWriter
+from config.settings import settings
+from logic.adapters.duckdb_adapter import DuckDBBaseReader, open_base_reader
+from logic.adapters.excel_adapter import TemplateExcelWriter
 from logic.core.mapping import (
     COLUMN_MAPPING,
     GROUPING_FLAG_COL,
@@ -31,9 +33,17 @@ from logic.core.mapping import (
     PORTAL_UC_COL,
 )
 from logic.core.cleaning import enforce_payment_rules
+from logic.core.client_resolver import ClientResolution
 from logic.core.dates import parse_reference_period
+from logic.core.fingerprint import canonical_hash, dataframe_fingerprint, optional_file_fingerprint
+from logic.core.grouping import AGG_IS_GROUP, AGG_MEMBERS, PARENT_GROUP_COL
+from logic.core.periods import PeriodRange, period_key
+from logic.core.portal import PORTAL_KEEP_COL, apply_portal_filter
+import numpy as np
 import pandas as pd
+from dataclasses import dataclass
 from typing import Any, List, Optional, Dict
+import hashlib
 import re
 
 import logging
@@ -135,24 +145,201 @@ def _format_periods_for_name(periods: List[Any]) -> str:
     return "_".join(parts)
 
 
+def build_output_filename(name: Any, clients: List[str], periods: List[Any]) -> str:
+    """
+    Nome do arquivo .xlsx de um grupo em lote.
+    Grupos com nome genérico (Grupo_N) derivam o nome dos clientes + períodos;
+    nomes manuais/custom permanecem como informados (apenas sanitização).
+    """
+    raw_name = str(name or "Sem_Nome")
+    if not _is_generic_group_name(raw_name):
+        return f"{_sanitize_filename(raw_name)}.xlsx"
+
+    if len(clients) == 1:
+        base = clients[0]
+    elif len(clients) > 1:
+        base = f"{clients[0]}_e_outros"
+    else:
+        base = raw_name
+    base = _sanitize_filename(base)
+    period_part = _format_periods_for_name(periods)
+    return f"{base}_{period_part}.xlsx" if period_part else f"{base}.xlsx"
+
+
+# Colunas exibidas no detalhe de faturas sem vencimento: origem -> nome na interface
+INCOMPLETE_DETAIL_COLUMNS = {ENRICHMENT_KEY: "no_uc", "Referencia": "referencia", CLIENT_COLUMN: "razao_social"}
+INCOMPLETE_PAGE_SIZE = 200
+
+# Linhas exibidas por padrão na prévia da planilha (Orchestrator.preview)
+PREVIEW_ROW_LIMIT = 200
+
+
+def _project_incomplete_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Projeta as colunas do detalhe de pendências como texto, de forma vetorizada."""
+    projected = pd.DataFrame(index=df.index)
+    for source, target in INCOMPLETE_DETAIL_COLUMNS.items():
+        projected[target] = df[source].astype(str) if source in df.columns else ""
+    return projected.reset_index(drop=True)
+
+
+@dataclass
+class IncompleteRows:
+    """
+    Faturas sem vencimento de um escopo, guardadas apenas como posições na base.
+    O quadro (no_uc, referencia, razao_social) é montado por página, sob demanda.
+    """
+    source: pd.DataFrame
+    positions: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.positions) // INCOMPLETE_PAGE_SIZE))
+
+    def page(self, number: int = 0, size: int = INCOMPLETE_PAGE_SIZE) -> pd.DataFrame:
+        start = max(0, number) * size
+        return _project_incomplete_rows(self.source.iloc[self.positions[start:start + size]])
+
+    def to_frame(self) -> pd.DataFrame:
+        return _project_incomplete_rows(self.source.iloc[self.positions])
+
+
+@dataclass
+class ReviewMetrics:
+    """Contagens da etapa de revisão do wizard."""
+    total: int
+    incomplete: int
+    incomplete_rows: IncompleteRows
+
+    @property
+    def complete(self) -> int:
+        return self.total - self.incomplete
+
+
 class Orchestrator:
     """Serviço central para orquestrar a geração de planilhas com suporte a agrupamento."""
 
     def __init__(self, base_file: Any, template_file: Any, sheet_name: str = "Balanco Operacional"):
-        self.reader = BaseExcelReader(base_file, sheet_name=sheet_name)
+        self.reader = open_base_reader(base_file, sheet_name=sheet_name)
+        self.base_file = base_file
         self.template_file = template_file
+        self.prejoined_enrichment_cols: List[str] = []
+        self._attach_prejoined_enrichment()
         logger.info("Orchestrator inicializado. Base: %s | Template: %s", base_file, template_file)
 
+    def _attach_prejoined_enrichment(self) -> None:
+        """Junta uma única vez o enriquecimento pré-juntado à base (settings.prejoin_enrichment)."""
+        from logic.services import enrichment_prejoin
+
+        table = enrichment_prejoin.load_prejoined()
+        if table is None or table.empty:
+            return
+        if self.uses_sql_backend:
+            # Sem base em memória: a junção é feita em cada escopo lido do DuckDB
+            if ENRICHMENT_KEY not in self.reader.columns:
+                return
+            _, self.prejoined_enrichment_cols = enrichment_prejoin.join_prejoined(self.reader.schema_frame(), table)
+            self.reader.add_scope_transform(lambda df: enrichment_prejoin.join_prejoined(df, table)[0])
+        else:
+            if ENRICHMENT_KEY not in self.reader.df.columns:
+                return
+            joined, self.prejoined_enrichment_cols = enrichment_prejoin.join_prejoined(self.reader.df, table)
+            self.reader.extend_frame(joined)
+        logger.info("Enriquecimento pré-juntado aplicado à base: %d colunas.", len(self.prejoined_enrichment_cols))
+
+    @property
+    def uses_sql_backend(self) -> bool:
+        """True quando a base é consultada via DuckDB (settings.query_backend = 'duckdb')."""
+        return isinstance(self.reader, DuckDBBaseReader)
+
+    @property
+    def base_row_count(self) -> int:
+        return self.reader.row_count if self.uses_sql_backend else len(self.reader.df)
+
+    @property
+    def has_prejoined_enrichment(self) -> bool:
+        return bool(self.prejoined_enrichment_cols)
+
+    def _merge_enrichment(self, df: pd.DataFrame, enrichment_df: Optional[pd.DataFrame]) -> tuple[pd.DataFrame, List[str]]:
+        """
+        Anexa as colunas de enriquecimento. Sem enrichment_df explícito, usa as colunas
+        pré-juntadas na carga da base; com ele, as pré-juntadas são descartadas e o merge
+        é feito por requisição, como antes.
+        """
+        if enrichment_df is None or enrichment_df.empty:
+            if enrichment_df is None:
+                return df, [c for c in self.prejoined_enrichment_cols if c in df.columns]
+            return df.drop(columns=self.prejoined_enrichment_cols, errors="ignore"), []
+
+        df = df.drop(columns=self.prejoined_enrichment_cols, errors="ignore")
+        clean_enrichment = enrichment_df.drop_duplicates(subset=[ENRICHMENT_KEY], keep='last')
+        existing_cols = set(df.columns) - {ENRICHMENT_KEY}
+        cols_to_drop = [c for c in clean_enrichment.columns if c in existing_cols]
+        if cols_to_drop: clean_enrichment = clean_enrichment.drop(columns=cols_to_drop)
+        enrichment_cols = [c for c in clean_enrichment.columns if c != ENRICHMENT_KEY and c not in COLUMN_MAPPING]
+        return pd.merge(df, clean_enrichment, on=ENRICHMENT_KEY, how='left'), enrichment_cols
+
     def get_available_clients(self) -> List[str]:
         return self.reader.get_clients()
 
     def get_available_periods(self) -> List[str]:
         return self.reader.get_periods()
 
+    def get_periods_in_range(self, period_range: PeriodRange) -> List[str]:
+        """Períodos da base dentro de um intervalo de competências (busca binária nas chaves yyyymm)."""
+        return self.reader.periods_in_range(period_range)
+
+    def get_last_periods(self, months: int) -> List[str]:
+        """Períodos dos últimos `months` meses, contados a partir da competência mais recente da base."""
+        periods = self.get_available_periods()
+        if not periods:
+            return []
+        return self.get_periods_in_range(PeriodRange.last_months(months, latest=max(periods, key=period_key)))
+
+    def get_client_documents(self) -> Dict[str, List[str]]:
+        return self.reader.get_client_documents()
+
+    def resolve_clients(self, identifiers: List[str]) -> ClientResolution:
+        """Resolve em lote uma lista de UCs/CPF/CNPJ para clientes da base (ver logic.core.client_resolver)."""
+        return self.reader.client_resolver.resolve(identifiers)
+
     def count_filtered(self, selected_clients: List[str], selected_periods: List[str]) -> int:
-        """Retorna a contagem de registros filtrados sem gerar o Excel."""
-        filtered_df = self.reader.filter_data(selected_clients, selected_periods)
-        return len(filtered_df)
+        """Retorna a contagem de registros filtrados sem gerar o Excel (nem copiar a base)."""
+        if self.uses_sql_backend:
+            return self.reader.count_rows(selected_clients, selected_periods)
+        return int(self.reader.filter_mask(selected_clients, selected_periods).sum())
+
+    def review_metrics(self, selected_clients: List[str], selected_periods: List[str]) -> "ReviewMetrics":
+        """
+        Métricas da etapa de revisão calculadas só com máscaras booleanas sobre a base:
+        total de faturas, quantas estão sem Vencimento e, sob demanda, o detalhe paginado.
+        No backend DuckDB, as contagens e as linhas pendentes vêm de consultas SQL.
+        """
+        if self.uses_sql_backend:
+            rows = self.reader.incomplete_rows(selected_clients, selected_periods, list(INCOMPLETE_DETAIL_COLUMNS))
+            return ReviewMetrics(
+                total=self.reader.count_rows(selected_clients, selected_periods),
+                incomplete=len(rows),
+                incomplete_rows=IncompleteRows(rows, np.arange(len(rows))),
+            )
+        df = self.reader.df
+        mask = self.reader.filter_mask(selected_clients, selected_periods).to_numpy()
+        incomplete_positions = np.flatnonzero(mask & self._base_incomplete_mask())
+        return ReviewMetrics(
+            total=int(mask.sum()),
+            incomplete=len(incomplete_positions),
+            incomplete_rows=IncompleteRows(df, incomplete_positions),
+        )
+
+    def _base_incomplete_mask(self) -> np.ndarray:
+        """_incomplete_mask da base inteira, calculada uma vez por versão do DataFrame."""
+        cached = getattr(self, "_incomplete_cache", None)
+        if cached is None or cached[0] is not self.reader.df:
+            cached = (self.reader.df, self._incomplete_mask(self.reader.df).to_numpy(dtype=bool))
+            self._incomplete_cache = cached
+        return cached[1]
 
     def check_incomplete_rows(self, selected_clients: List[str], selected_periods: List[str]) -> Dict[str, Any]:
         """
@@ -168,21 +355,11 @@ class Orchestrator:
             # Se não houve enriquecimento da gestão, assumimos que não há o que marcar como incompleto
             return {"total_registros": len(df), "registros_incompletos": 0, "ucs_afetadas": []}
             
-        mask_incomplete = self._incomplete_mask(df)
-        incomplete_df = df[mask_incomplete]
-        
-        ucs_afetadas = []
-        for _, row in incomplete_df.iterrows():
-            ucs_afetadas.append({
-                "no_uc": str(row[ENRICHMENT_KEY]),
-                "referencia": str(row["Referencia"]),
-                "razao_social": str(row["Razao Social"])
-            })
-            
+        incomplete_df = df[self._incomplete_mask(df)]
         return {
             "total_registros": len(df),
             "registros_incompletos": len(incomplete_df),
-            "ucs_afetadas": ucs_afetadas
+            "ucs_afetadas": _project_incomplete_rows(incomplete_df).to_dict("records"),
         }
 
     def _apply_grouping(
@@ -191,9 +368,12 @@ class Orchestrator:
         grouping_mode: str = GROUPING_MODE_DEFAULT,
         include_child_rows: bool = True,
         group_by_distributor: bool = False,
+        use_precomputed: bool = True,
     ) -> pd.DataFrame:
         """
         Aplica a lógica de agrupamento de faturas.
+        No modo padrão, usa os agregados de Fatura Pai gravados no sync quando o escopo
+        contém os grupos inteiros (ver _precomputed_grouping); senão, agrega na hora.
         """
         if grouping_mode == GROUPING_MODE_DEFAULT and group_by_distributor:
             grouping_mode = GROUPING_MODE_DISTRIBUTOR
@@ -258,6 +438,21 @@ class Orchestrator:
             if k in df.columns:
                 df[k] = df[k].fillna("N/A")
 
+        grouped = None
+        if use_precomputed and grouping_mode == GROUPING_MODE_DEFAULT:
+            grouped = self._precomputed_grouping(df, keys, include_child_rows)
+        if grouped is None:
+            grouped = self._aggregate_groups(df, keys, grouping_mode, include_child_rows)
+        df, parent_count = grouped
+
+        df.drop(columns=[c for c in _temp_cols if c in df.columns], inplace=True, errors='ignore')
+        df.drop(columns=["group_key", "dynamic_key", PARENT_GROUP_COL], inplace=True, errors='ignore')
+
+        logger.info("Agrupamento concluído: %d faturas pai geradas.", parent_count)
+        return df
+
+    def _aggregate_groups(self, df: pd.DataFrame, keys: List[str], grouping_mode: str, include_child_rows: bool) -> tuple[pd.DataFrame, int]:
+        """Agregação na hora: uma Fatura Pai por grupo elegível, filhas e separador por grupo."""
         grouped_dfs = []
         parent_count = 0
 
@@ -295,12 +490,77 @@ class Orchestrator:
 
         if grouped_dfs:
             df = pd.concat(grouped_dfs, ignore_index=True)
-
-        df.drop(columns=[c for c in _temp_cols if c in df.columns], inplace=True, errors='ignore')
-        df.drop(columns=["group_key", "dynamic_key"], inplace=True, errors='ignore')
-
-        logger.info("Agrupamento concluído: %d faturas pai geradas.", parent_count)
-        return df
+        return df, parent_count
+
+    def _parent_aggregates(self) -> Optional[pd.DataFrame]:
+        """Tabela de agregados de Fatura Pai gravada no sync (lida uma vez; None se indisponível)."""
+        if not hasattr(self, "_parent_aggregates_table"):
+            table = None
+            base_file = getattr(self, "base_file", None)
+            if self.uses_sql_backend:
+                table = self.reader.parent_aggregates()
+            elif isinstance(base_file, str) and base_file.endswith(".parquet"):
+                from logic.services.sync_service import load_parent_aggregates
+                table = load_parent_aggregates(base_file)
+            self._parent_aggregates_table = table
+        return self._parent_aggregates_table
+
+    def _precomputed_grouping(self, df: pd.DataFrame, keys: List[str], include_child_rows: bool) -> Optional[tuple[pd.DataFrame, int]]:
+        """
+        Monta o agrupamento padrão a partir dos agregados do sync, sem laço por grupo.
+        Só vale se cada grupo do escopo estiver inteiro (mesmo número de membros da
+        tabela) e a partição por _parent_group coincidir com a das chaves calculadas;
+        caso contrário retorna None e o chamador agrega na hora.
+        """
+        table = self._parent_aggregates()
+        if table is None or df.empty or PARENT_GROUP_COL not in df.columns:
+            return None
+        gid = pd.to_numeric(df[PARENT_GROUP_COL], errors="coerce")
+        if gid.isna().any() or (gid < 0).any() or (gid >= len(table)).any():
+            return None
+        gid = gid.to_numpy(dtype=np.int64)
+
+        live = df.groupby(keys, sort=False).ngroup().to_numpy()
+        pairs = pd.DataFrame({"live": live, "gid": gid}).drop_duplicates()
+        if len(pairs) != pairs["live"].nunique() or len(pairs) != pairs["gid"].nunique():
+            return None
+        order, first_pos, counts = np.unique(gid, return_index=True, return_counts=True)
+        if (counts != table[AGG_MEMBERS].to_numpy()[order]).any():
+            return None
+
+        # Grupos na ordem de primeira aparição (como groupby(sort=False))
+        appearance = np.argsort(first_pos, kind="stable")
+        groups, first_pos = order[appearance], first_pos[appearance]
+        rank = np.empty(len(table), dtype=np.int64)
+        rank[groups] = np.arange(len(groups))
+        is_group = table[AGG_IS_GROUP].to_numpy(dtype=bool)
+
+        positions = np.arange(len(df))
+        row_is_group = is_group[gid]
+        keep = ~row_is_group | include_child_rows
+        body = df.iloc[positions[keep]].copy()
+        body[CHILD_ROW_FLAG] = row_is_group[keep]
+
+        parent_groups = groups[is_group[groups]]
+        parents = df.iloc[first_pos[is_group[groups]]].copy()
+        parents[ENRICHMENT_KEY] = f"Consolidado ({GROUPING_MODE_DEFAULT.capitalize()})"
+        parents[PARENT_ROW_FLAG] = True
+        parents[CHILD_ROW_FLAG] = False
+        for col in SUM_COLUMNS:
+            if col in parents.columns and col in table.columns:
+                parents[col] = table[col].to_numpy()[parent_groups]
+
+        separators = pd.DataFrame({
+            SEPARATOR_ROW_FLAG: True, CHILD_ROW_FLAG: False, PARENT_ROW_FLAG: False,
+        }, index=range(len(groups)))
+
+        # Ordem final: por grupo, Fatura Pai → linhas do grupo → separador
+        sort_group = np.concatenate([rank[parent_groups], rank[gid[keep]], np.arange(len(groups))])
+        sort_slot = np.concatenate([np.zeros(len(parents)), np.ones(len(body)), np.full(len(groups), 2)])
+        sort_pos = np.concatenate([np.zeros(len(parents)), positions[keep], np.zeros(len(groups))])
+        out = pd.concat([parents, body, separators], ignore_index=True)
+        out = out.iloc[np.lexsort((sort_pos, sort_slot, sort_group))].reset_index(drop=True)
+        return out, len(parent_groups)
 
     def _incomplete_mask(self, df: pd.DataFrame) -> pd.Series:
         if "Vencimento" not in df.columns:
@@ -312,10 +572,18 @@ class Orchestrator:
         Mantém somente cobranças que existem na Gestão (portal), com no máximo
         uma linha por UC+Referência e valor positivo. Quando disponível, usa Valor_gestao como
         valor de faturamento final.
+
+        Bases sincronizadas já trazem a resolução pronta (logic.core.portal) e o filtro
+        se reduz a uma máscara; sem essas colunas, a resolução é feita aqui sobre o escopo.
         """
         if df.empty or "Valor_gestao" not in df.columns:
             return df
 
+        if PORTAL_KEEP_COL in df.columns:
+            work = apply_portal_filter(df)
+            logger.info("Filtro portal-first (pré-calculado) aplicado: %d registros mantidos.", len(work))
+            return work
+
         # Captura aliases de instalação antes dos filtros de valor da Gestão.
         raw = alias_lookup_df.copy() if alias_lookup_df is not None else df.copy()
         raw["_uc_base_raw"] = raw[ENRICHMENT_KEY].apply(_normalize_uc_text)
@@ -401,6 +669,15 @@ class Orchestrator:
         logger.info("Filtro portal-first aplicado: %d registros mantidos.", len(work))
         return work
 
+    def _portal_scope(self, selected_clients: List[str], selected_periods: List[str]) -> pd.DataFrame:
+        """Escopo filtrado já no recorte portal-first (em SQL no backend DuckDB)."""
+        if self.uses_sql_backend:
+            scoped = self.reader.portal_data(selected_clients, selected_periods)
+            return scoped if scoped is not None else self.reader.filter_data(selected_clients, selected_periods)
+        filtered_df = self.reader.filter_data(selected_clients, selected_periods)
+        alias_scope_df = None if PORTAL_KEEP_COL in self.reader.df.columns else self.reader.filter_data(selected_clients, [])
+        return self._restrict_to_portal_invoices(filtered_df, alias_lookup_df=alias_scope_df)
+
     def _apply_classification(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
         if CLASSIFICATION_SOURCE_COL not in df.columns:
@@ -429,23 +706,19 @@ class Orchestrator:
                     df.at[pi, CLASSIFICATION_COL] = majority_label
         return df
 
-    def generate(self, selected_clients: List[str], selected_periods: List[str], incomplete_filter: str = "all", group_by_distributor: bool = False, enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)") -> Optional[bytes]:
+    def _build_render_frame(self, selected_clients: List[str], selected_periods: List[str], incomplete_filter: str = "all", group_by_distributor: bool = False, enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)") -> Optional[tuple[pd.DataFrame, "OrderedDict[str, str]"]]:
+        """
+        Executa o pipeline até o quadro final (filtro, portal, enriquecimento, ordenação,
+        agrupamento, classificação e regras de pagamento), sem tocar no template.
+        Retorna (quadro, mapeamento coluna da base -> cabeçalho) ou None se não houver dados.
+        """
         if grouping_mode == GROUPING_MODE_DEFAULT and group_by_distributor:
             grouping_mode = GROUPING_MODE_DISTRIBUTOR
 
         logger.info("Gerando planilha. Modo: %s | Filhas: %s | Ordenação: %s", grouping_mode, include_child_rows, sort_by)
-        filtered_df = self.reader.filter_data(selected_clients, selected_periods)
-        alias_scope_df = self.reader.filter_data(selected_clients, [])
-        filtered_df = self._restrict_to_portal_invoices(filtered_df, alias_lookup_df=alias_scope_df)
-
-        actual_enrichment_cols = []
-        if enrichment_df is not None and not enrichment_df.empty:
-            clean_enrichment = enrichment_df.drop_duplicates(subset=[ENRICHMENT_KEY], keep='last')
-            existing_cols = set(filtered_df.columns) - {ENRICHMENT_KEY}
-            cols_to_drop = [c for c in clean_enrichment.columns if c in existing_cols]
-            if cols_to_drop: clean_enrichment = clean_enrichment.drop(columns=cols_to_drop)
-            actual_enrichment_cols = [c for c in clean_enrichment.columns if c != ENRICHMENT_KEY and c not in COLUMN_MAPPING]
-            filtered_df = pd.merge(filtered_df, clean_enrichment, on=ENRICHMENT_KEY, how='left')
+        filtered_df = self._portal_scope(selected_clients, selected_periods)
+
+        filtered_df, actual_enrichment_cols = self._merge_enrichment(filtered_df, enrichment_df)
 
         if filtered_df.empty: return None
         if incomplete_filter == "complete_only":
@@ -472,7 +745,11 @@ class Orchestrator:
             else:
                 filtered_df = filtered_df.sort_values(by=sort_col, ascending=ascending)
 
-        processed_df = self._apply_grouping(filtered_df, grouping_mode=grouping_mode, include_child_rows=include_child_rows)
+        # Filtros que mudam a composição dos grupos invalidam os agregados do sync
+        processed_df = self._apply_grouping(
+            filtered_df, grouping_mode=grouping_mode, include_child_rows=include_child_rows,
+            use_precomputed=incomplete_filter == "all",
+        )
         processed_df = self._apply_classification(processed_df)
         
         legacy_keys = list(COLUMN_MAPPING.keys())
@@ -493,47 +770,124 @@ class Orchestrator:
             is_pago = processed_df["Status Pos-Faturamento"].astype(str).str.strip().str.lower() == "pago"
             processed_df = processed_df.loc[~is_pago].copy()
 
+        return processed_df, full_mapping
+
+    def generate(self, selected_clients: List[str], selected_periods: List[str], incomplete_filter: str = "all", group_by_distributor: bool = False, enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)") -> Optional[bytes]:
+        rendered = self._build_render_frame(selected_clients, selected_periods, incomplete_filter=incomplete_filter, group_by_distributor=group_by_distributor, enrichment_df=enrichment_df, somente_pendencias=somente_pendencias, grouping_mode=grouping_mode, include_child_rows=include_child_rows, sort_by=sort_by)
+        if rendered is None:
+            return None
+        processed_df, full_mapping = rendered
+
         writer = TemplateExcelWriter(self.template_file)
-        return writer.generate_bytes(processed_df, full_mapping, tipo_apresentacao=tipo_apresentacao, incluir_resumo=incluir_resumo, separar_auditoria=separar_auditoria)
-
-    def generate_multiple(self, groups: List[Dict[str, Any]], incomplete_filter: str = "all", group_by_distributor: bool = False, enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)") -> Optional[bytes]:
-        import zipfile
-        import io
-        zip_buffer = io.BytesIO()
-        generated_count = 0
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-            for group in groups:
-                clients = group.get('clients', []) or []
-                periods = group.get('periods', []) or []
-                if not clients or not periods:
-                    continue
+        return writer.generate_bytes(processed_df, full_mapping, tipo_apresentacao=tipo_apresentacao, incluir_resumo=incluir_resumo, separar_auditoria=separar_auditoria, missing_marker=settings.missing_marker_mode)
+
+    @property
+    def base_version(self) -> str:
+        """
+        Identificador da versão de base + template (+ enriquecimento pré-juntado) carregada,
+        calculado na primeira consulta. Usado como parte da chave do cache de resultados.
+        """
+        if getattr(self, "_base_version", None) is None:
+            base_fp = optional_file_fingerprint(self.base_file) or dataframe_fingerprint(self.reader.df)
+            if not self.prejoined_enrichment_cols:
+                prejoined_fp = ""
+            elif self.uses_sql_backend:
+                from logic.services import enrichment_prejoin
+                prejoined_fp = optional_file_fingerprint(enrichment_prejoin.PREJOINED_FILE) or ""
+            else:
+                prejoined_fp = dataframe_fingerprint(self.reader.df[self.prejoined_enrichment_cols])
+            template_fp = optional_file_fingerprint(self.template_file)
+            if not template_fp and hasattr(self.template_file, "getvalue"):
+                template_fp = hashlib.sha256(self.template_file.getvalue()).hexdigest()
+            self._base_version = canonical_hash([base_fp, template_fp, prejoined_fp])
+        return self._base_version
+
+    def generate_cached(self, selected_clients: List[str], selected_periods: List[str], enrichment_df: pd.DataFrame = None, **options: Any) -> Optional[bytes]:
+        """
+        Igual a generate(), mas consulta antes o cache de resultados em disco: o mesmo
+        escopo, opções, base e enriquecimento devolvem os bytes já gerados. O
+        enriquecimento vindo do cache de processo é identificado pela versão que o
+        acompanha; só outros DataFrames têm o conteúdo hasheado.
+        """
+        from logic.services import enrichment_cache, result_cache
+
+        if not result_cache.is_enabled():
+            return self.generate(selected_clients, selected_periods, enrichment_df=enrichment_df, **options)
+
+        payload = {
+            "clients": sorted(str(c) for c in selected_clients),
+            "periods": sorted(str(p) for p in selected_periods),
+            "options": options,
+            "missing_marker": settings.missing_marker_mode,
+        }
+        enrichment_version = enrichment_cache.version_of(enrichment_df)
+        if enrichment_version is None:
+            enrichment_version = dataframe_fingerprint(enrichment_df)
+        key = result_cache.make_key(payload, self.base_version, enrichment_version)
+        return result_cache.get_or_generate(
+            key, lambda: self.generate(selected_clients, selected_periods, enrichment_df=enrichment_df, **options)
+        )
+
+    def preview(self, selected_clients: List[str], selected_periods: List[str], limit: Optional[int] = PREVIEW_ROW_LIMIT, incomplete_filter: str = "all", enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)") -> pd.DataFrame:
+        """
+        Prévia da planilha: o mesmo quadro que generate() entregaria ao TemplateExcelWriter,
+        com os cabeçalhos do template e uma coluna "Linha" (Fatura Pai / UC Filha / Individual).
+        Separadores visuais são omitidos e apenas as primeiras `limit` linhas são devolvidas.
+        """
+        rendered = self._build_render_frame(selected_clients, selected_periods, incomplete_filter=incomplete_filter, enrichment_df=enrichment_df, somente_pendencias=somente_pendencias, grouping_mode=grouping_mode, include_child_rows=include_child_rows, sort_by=sort_by)
+        if rendered is None:
+            return pd.DataFrame()
+        processed_df, full_mapping = rendered
+
+        is_separator = processed_df[SEPARATOR_ROW_FLAG].eq(True)
+        rows = processed_df.loc[~is_separator]
+        if limit is not None:
+            rows = rows.head(limit)
+
+        is_parent = rows[PARENT_ROW_FLAG].eq(True).to_numpy()
+        is_child = rows[CHILD_ROW_FLAG].eq(True).to_numpy()
+        preview_df = rows[list(full_mapping.keys())].rename(columns=full_mapping).reset_index(drop=True)
+        preview_df.insert(0, "Linha", np.select([is_parent, is_child], ["Fatura Pai", "UC Filha"], default="Individual"))
+        return preview_df
+
+    def generate_multiple(self, groups: List[Dict[str, Any]], incomplete_filter: str = "all", group_by_distributor: bool = False, enrichment_df: pd.DataFrame = None, somente_pendencias: bool = False, tipo_apresentacao: str = "Tabela Única", incluir_resumo: bool = False, separar_auditoria: bool = False, grouping_mode: str = GROUPING_MODE_DEFAULT, include_child_rows: bool = True, sort_by: str = "Economia Gerada (Desc)", output_format: Optional[str] = None) -> Optional[bytes]:
+        """
+        Gera vários grupos de uma vez. Por padrão (settings.batch_output_format='zip')
+        devolve um ZIP com um .xlsx por grupo; com output_format='workbook', um único
+        .xlsx com uma aba por grupo (nesse modo cada grupo vira uma aba só — a divisão
+        por distribuidora e a separação de auditoria não se aplicam).
+        """
+        from collections import OrderedDict
+        from logic.services import archive
+
+        valid_groups = [g for g in groups if (g.get('clients') or []) and (g.get('periods') or [])]
 
+        if archive.batch_format(output_format) == archive.BATCH_FORMAT_WORKBOOK:
+            sheets = []
+            mapping = OrderedDict()
+            for group in valid_groups:
+                rendered = self._build_render_frame(group['clients'], group['periods'], incomplete_filter=incomplete_filter, group_by_distributor=group_by_distributor, enrichment_df=enrichment_df, somente_pendencias=somente_pendencias, grouping_mode=grouping_mode, include_child_rows=include_child_rows, sort_by=sort_by)
+                if rendered is None:
+                    continue
+                processed_df, full_mapping = rendered
+                mapping.update(full_mapping)
+                sheets.append((group.get('name') or 'Sem_Nome', processed_df))
+            if not sheets:
+                return None
+            writer = TemplateExcelWriter(self.template_file)
+            return writer.generate_sheets_bytes(sheets, mapping, incluir_resumo=incluir_resumo, missing_marker=settings.missing_marker_mode)
+
+        def _entries():
+            for group in valid_groups:
+                clients, periods = group['clients'], group['periods']
                 excel_bytes = self.generate(clients, periods, incomplete_filter=incomplete_filter, grouping_mode=grouping_mode, include_child_rows=include_child_rows, enrichment_df=enrichment_df, somente_pendencias=somente_pendencias, tipo_apresentacao=tipo_apresentacao, incluir_resumo=incluir_resumo, separar_auditoria=separar_auditoria, sort_by=sort_by)
-                if excel_bytes:
-                    raw_name = str(group.get('name', 'Sem_Nome') or 'Sem_Nome')
-
-                    if _is_generic_group_name(raw_name):
-                        if len(clients) == 1:
-                            base = clients[0]
-                        elif len(clients) > 1:
-                            base = f"{clients[0]}_e_outros"
-                        else:
-                            base = raw_name
-                        base = _sanitize_filename(base)
-                        period_part = _format_periods_for_name(periods)
-                        if period_part:
-                            file_name = f"{base}_{period_part}.xlsx"
-                        else:
-                            file_name = f"{base}.xlsx"
-                    else:
-                        # Nome manual/custom permanece como informado (apenas sanitização).
-                        file_name = f"{_sanitize_filename(raw_name)}.xlsx"
-
-                    zip_file.writestr(file_name, excel_bytes)
-                    generated_count += 1
-        return zip_buffer.getvalue() if generated_count > 0 else None
+                yield build_output_filename(group.get('name', 'Sem_Nome'), clients, periods), excel_bytes
+
+        return archive.build_zip(_entries())
 
     def get_all_ucs_with_names(self) -> pd.DataFrame:
+        if self.uses_sql_backend:
+            return self.reader.distinct_rows([ENRICHMENT_KEY, CLIENT_COLUMN]).sort_values(by=CLIENT_COLUMN)
         if self.reader.df.empty: return pd.DataFrame(columns=[ENRICHMENT_KEY, CLIENT_COLUMN])
         cols = [ENRICHMENT_KEY, CLIENT_COLUMN]
         return self.reader.df[cols].drop_duplicates().sort_values(by=CLIENT_COLUMN)
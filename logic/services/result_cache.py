@@ -0,0 +1,176 @@
+"""
+Cache em disco das planilhas geradas (bytes do .xlsx).
+
+A chave é o hash canônico do payload de geração (clientes, períodos, opções) somado
+à versão da base/template e à versão do enriquecimento: qualquer mudança em um
+deles produz outra chave, então entradas antigas nunca são servidas — apenas
+envelhecem e saem pela política LRU (mtime atualizado a cada leitura), limitada
+por settings.result_cache_max_mb.
+
+A chave também leva a versão do código que monta a planilha (hash das fontes de
+`logic/`): mudar o writer ou o layout gerado invalida o cache sem depender de
+alguém lembrar de incrementar _KEY_VERSION.
+"""
+import functools
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+from logic.core.fingerprint import canonical_hash, file_fingerprint
+from logic.services.sync_service import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+_ENTRY_SUFFIX = ".xlsx.bin"
+
+# Versão do formato da chave; incrementar invalida todo o cache
+_KEY_VERSION = 1
+
+# Pacote cujas fontes definem o conteúdo e o layout da planilha gerada
+_RENDER_SOURCES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses
+
+
+_stats = ResultCacheStats()
+_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return bool(settings.result_cache_enabled) and settings.result_cache_max_mb > 0
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash das fontes .py de logic/ (writer, regras e layout), calculado uma vez por processo."""
+    sources = []
+    for root, dirs, files in os.walk(_RENDER_SOURCES_DIR):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                sources.append([os.path.relpath(path, _RENDER_SOURCES_DIR), file_fingerprint(path)])
+    return canonical_hash(sources)
+
+
+def make_key(payload: Dict[str, Any], base_version: str, enrichment_version: str) -> str:
+    """Chave da entrada: hash do payload normalizado + versões do código, da base e do enriquecimento."""
+    return canonical_hash({
+        "v": _KEY_VERSION,
+        "code": code_version(),
+        "payload": payload,
+        "base": base_version,
+        "enrichment": enrichment_version,
+    })
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(RESULT_CACHE_DIR, key + _ENTRY_SUFFIX)
+
+
+def get(key: str) -> Optional[bytes]:
+    """Bytes da entrada, ou None. Leituras contam como uso recente (LRU)."""
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except FileNotFoundError:
+        _count(hit=False)
+        return None
+    except OSError as e:
+        logger.warning("Cache de resultados: falha ao ler %s: %s", path, e)
+        _count(hit=False)
+        return None
+    _count(hit=True)
+    return data
+
+
+def put(key: str, data: bytes) -> None:
+    """Grava a entrada de forma atômica e aplica o limite de tamanho."""
+    try:
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        path = _entry_path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        evict(settings.result_cache_max_mb * 1024 * 1024)
+    except OSError as e:
+        logger.warning("Cache de resultados: falha ao gravar entrada: %s", e)
+
+
+def get_or_generate(key: str, producer: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """Serve do cache ou executa `producer`, gravando o resultado (exceto vazio/None)."""
+    if not is_enabled():
+        return producer()
+    cached = get(key)
+    if cached is not None:
+        return cached
+    data = producer()
+    if data:
+        put(key, data)
+    return data
+
+
+def evict(max_bytes: int) -> int:
+    """Remove as entradas menos usadas até o total caber em max_bytes. Retorna quantas saíram."""
+    if not os.path.isdir(RESULT_CACHE_DIR):
+        return 0
+    entries = []
+    for entry in os.scandir(RESULT_CACHE_DIR):
+        if entry.is_file() and entry.name.endswith(_ENTRY_SUFFIX):
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    if removed:
+        logger.info("Cache de resultados: %d entradas antigas removidas.", removed)
+    return removed
+
+
+def clear() -> None:
+    """Remove todas as entradas (ex.: após trocar o template)."""
+    evict(-1)
+
+
+def stats() -> ResultCacheStats:
+    with _lock:
+        return ResultCacheStats(_stats.hits, _stats.misses)
+
+
+def reset_stats() -> None:
+    with _lock:
+        _stats.hits = 0
+        _stats.misses = 0
+
+
+def _count(hit: bool) -> None:
+    with _lock:
+        if hit:
+            _stats.hits += 1
+        else:
+            _stats.misses += 1
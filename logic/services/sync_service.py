@@ -9,12 +9,18 @@ import pandas as pd
 import json
 from datetime import datetime
 from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.catalog import build_catalog, save_catalog
+from logic.core.grouping import PARENT_GROUP_COL, build_parent_aggregates
+from logic.core.merge_keys import combined_keys, encode_uc_keys, lookup_positions, uc_digits
+from logic.core.periods import PERIOD_KEY_COL, PERIOD_KEY_MISSING, nullable_period_keys, period_key_to_timestamp, period_keys
+from logic.core.portal import resolve_portal_identity
 from logic.core.mapping import (
     ACCOUNT_NUMBER_COL,
     CLASSIFICATION_SOURCE_COL,
     ENRICHMENT_KEY,
     HIERARCHY_KEY_COL,
     ID_UC_NEGOCIADA_COL,
+    PERIOD_COLUMN,
     PORTAL_UC_COL,
 )
 from config.settings import settings
@@ -32,6 +38,7 @@ GESTAO_REMOTE = "bases/gd_gestao_cobranca.xlsx"
 
 BALANCO_LOCAL = os.path.join(CACHE_DIR, "Balanco_Energetico.xlsm")
 GESTAO_LOCAL = os.path.join(CACHE_DIR, "gd_gestao.xlsx")
+PARENT_AGGREGATES_SUFFIX = ".parents.parquet"
 
 # Colunas que são intencionalmente texto — nunca converter para numérico
 _TEXT_COLUMNS = {
@@ -180,13 +187,6 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
             df_gestao = pd.read_excel(GESTAO_LOCAL, usecols=cols_to_read)
 
             # 1. Definir auxiliares de normalização
-            def normalize_uc(val):
-                if pd.isna(val): return ""
-                s = str(val).strip()
-                if s.endswith(".0"): s = s[:-2]
-                s = ''.join(filter(str.isdigit, s))
-                return s.lstrip('0')
-
             def normalize_portal_uc(val):
                 if pd.isna(val):
                     return pd.NA
@@ -209,34 +209,21 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
                 return "".join(ch for ch in s if ch.isalnum()).upper()
             
             # 2. Normalizar e colher conjunto total de UCs na gestão para o relatório
-            df_gestao["No. UC_norm"] = df_gestao[uc_col].apply(normalize_uc)
+            df_gestao["No. UC_norm"] = uc_digits(df_gestao[uc_col])
             df_gestao[PORTAL_UC_COL] = df_gestao[uc_col].apply(normalize_portal_uc)
             all_gestao_ucs = set(df_gestao["No. UC_norm"].unique())
 
-            def parse_ref(val):
-                from logic.core.dates import parse_reference_period
-                ref_str = parse_reference_period(val)
-                if ref_str:
-                    return pd.Timestamp(year=int(ref_str[3:]), month=int(ref_str[:2]), day=1)
-                return pd.NaT
-
             # 3. Normalizar chaves em ambas as bases para detecção de cancelados
-            df_consolidado["No. UC_norm"] = df_consolidado["No. UC"].apply(normalize_uc)
+            df_consolidado["No. UC_norm"] = uc_digits(df_consolidado["No. UC"])
             base_docs = set()
             if "CPF/CNPJ" in df_consolidado.columns:
                 base_docs = set(df_consolidado["CPF/CNPJ"].apply(normalize_doc).replace("", pd.NA).dropna())
             
+            # Chave inteira yyyymm (_period_key) nos dois lados; NA quando a referência é inválida
             ref_merge_col = "Referencia_merge"
             if ref_col:
-                df_gestao[ref_merge_col] = df_gestao[ref_col].apply(parse_ref)
-                
-                from logic.core.dates import parse_reference_period
-                def map_ref(val):
-                    ref_str = parse_reference_period(val)
-                    if ref_str:
-                        return pd.Timestamp(year=int(ref_str[3:]), month=int(ref_str[:2]), day=1)
-                    return pd.NaT
-                df_consolidado[ref_merge_col] = df_consolidado["Referencia"].apply(map_ref)
+                df_gestao[ref_merge_col] = nullable_period_keys(df_gestao[ref_col])
+                df_consolidado[ref_merge_col] = nullable_period_keys(df_consolidado["Referencia"])
 
             # REVERTIDO: Não removemos mais faturas do Balanço com base na Gestão (evitar "deduplicação assassina")
             # Deixamos que apareçam e o usuário decida ou o status indique o problema.
@@ -302,14 +289,9 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
                 df_gestao = df_gestao.drop(columns=["_venc_sort"])
             
             # A base de Gestão sempre usa No. UC; no consolidado permitimos fallback por UC p Rateio.
-            # Para isso, criamos uma chave de merge explícita no lado esquerdo.
-            left_merge_uc_col = "_merge_uc_norm"
-            df_consolidado[left_merge_uc_col] = df_consolidado["No. UC_norm"]
-            merge_keys = [left_merge_uc_col]
-            if ref_merge_col in df_gestao.columns and ref_merge_col in df_consolidado.columns:
-                merge_keys.append(ref_merge_col)
-
-            df_gestao_for_merge = df_gestao.rename(columns={merge_right_uc_key: left_merge_uc_col}).copy()
+            # Os dois lados viram chaves int64 (UC, yyyymm) e as buscas primária e de
+            # fallback são feitas numa só passada por hash sobre a Gestão deduplicada.
+            df_gestao_for_merge = df_gestao.drop(columns=[c for c in merge_keys if c in df_gestao.columns])
 
             # Dropar colunas de identidade que já existem no Balanço para
             # evitar conflitos de sufixo _x/_y no merge.  Mantemos no
@@ -317,6 +299,7 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
             _identity_overlap = [c for c in [dist_col, nome_col, doc_col] if c and c in df_gestao_for_merge.columns]
             if _identity_overlap:
                 df_gestao_for_merge = df_gestao_for_merge.drop(columns=_identity_overlap)
+            df_gestao_for_merge = df_gestao_for_merge.reset_index(drop=True)
 
             logger.info("Realizando merge (cruzamento) usando chaves %s (%d registros únicos na Gestão)...", merge_keys, len(df_gestao_for_merge))
             _original_len = len(df_consolidado)  # capture antes do merge
@@ -324,46 +307,55 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
             # Segurança: Se a coluna de conta já existir na base de Balanço (vazia), dropar antes do merge para evitar _x/_y
             if ACCOUNT_NUMBER_COL in df_consolidado.columns:
                 df_consolidado.drop(columns=[ACCOUNT_NUMBER_COL], inplace=True)
-                
-            df_consolidado = pd.merge(df_consolidado, df_gestao_for_merge, on=merge_keys, how="left")
-
-            # Fallback: se não encontrou por No. UC, tenta casar por UC p Rateio.
-            if "UC p Rateio" in df_consolidado.columns:
-                df_consolidado["_merge_uc_rateio_norm"] = df_consolidado["UC p Rateio"].apply(normalize_uc)
-                if "Valor_gestao" in df_consolidado.columns:
-                    missing_after_primary = df_consolidado["Valor_gestao"].isna() | (pd.to_numeric(df_consolidado["Valor_gestao"], errors="coerce").fillna(0) <= 0)
+            df_consolidado = df_consolidado.reset_index(drop=True)
+
+            has_rateio = HIERARCHY_KEY_COL in df_consolidado.columns
+            uc_columns = [df_gestao[merge_right_uc_key], df_consolidado[ENRICHMENT_KEY]]
+            if has_rateio:
+                uc_columns.append(df_consolidado[HIERARCHY_KEY_COL])
+            uc_keys = encode_uc_keys(*uc_columns)
+            period_columns = None
+            if ref_merge_col in merge_keys:
+                gestao_periods = df_gestao[ref_merge_col].fillna(PERIOD_KEY_MISSING).to_numpy(dtype="int64")
+                base_periods = df_consolidado[ref_merge_col].fillna(PERIOD_KEY_MISSING).to_numpy(dtype="int64")
+                period_columns = [gestao_periods] + [base_periods] * (len(uc_keys) - 1)
+            gestao_keys, *base_keys = combined_keys(uc_keys, period_columns)
+
+            joined = df_gestao_for_merge.reindex(lookup_positions(gestao_keys, base_keys[0]))
+            joined.index = df_consolidado.index
+
+            # Fallback: se não encontrou por No. UC, usa a cobrança casada por UC p Rateio (coalesce).
+            if has_rateio:
+                if "Valor_gestao" in joined.columns:
+                    valor_primary = pd.to_numeric(joined["Valor_gestao"], errors="coerce")
+                    missing_after_primary = valor_primary.isna() | (valor_primary <= 0)
                 else:
-                    missing_after_primary = df_consolidado["Vencimento"].isna() if "Vencimento" in df_consolidado.columns else pd.Series(False, index=df_consolidado.index)
-                missing_after_primary = missing_after_primary & df_consolidado["_merge_uc_rateio_norm"].notna()
+                    missing_after_primary = joined["Vencimento"].isna() if "Vencimento" in joined.columns else pd.Series(False, index=joined.index)
 
                 if missing_after_primary.any():
-                    alt_left = df_consolidado.loc[missing_after_primary, [c for c in df_consolidado.columns if c not in df_gestao_for_merge.columns or c in merge_keys]].copy()
-                    alt_left["_row_id"] = alt_left.index
-                    alt_left[left_merge_uc_col] = alt_left["_merge_uc_rateio_norm"]
-
-                    alt_merged = pd.merge(alt_left, df_gestao_for_merge, on=merge_keys, how="left")
-                    if not alt_merged.empty:
-                        alt_merged = alt_merged.set_index("_row_id")
-                        fill_cols = [
-                            "Vencimento",
-                            "Status Pos-Faturamento_gestao",
-                            "Valor_gestao",
-                            "Base_gestao",
-                            ACCOUNT_NUMBER_COL,
-                            "Data de Pagamento",
-                            "_is_duplicate_gestao",
-                            PORTAL_UC_COL,
-                        ]
-                        for col in fill_cols:
-                            if col in df_consolidado.columns and col in alt_merged.columns:
-                                current = df_consolidado.loc[missing_after_primary, col]
-                                incoming = alt_merged[col]
-                                if col == "Valor_gestao":
-                                    current_num = pd.to_numeric(current, errors="coerce")
-                                    replace_mask = current_num.isna() | (current_num <= 0)
-                                else:
-                                    replace_mask = current.isna()
-                                df_consolidado.loc[missing_after_primary, col] = current.where(~replace_mask, incoming)
+                    rateio = df_gestao_for_merge.reindex(lookup_positions(gestao_keys, base_keys[1]))
+                    rateio.index = joined.index
+                    fill_cols = [
+                        "Vencimento",
+                        "Status Pos-Faturamento_gestao",
+                        "Valor_gestao",
+                        "Base_gestao",
+                        ACCOUNT_NUMBER_COL,
+                        "Data de Pagamento",
+                        "_is_duplicate_gestao",
+                        PORTAL_UC_COL,
+                    ]
+                    for col in fill_cols:
+                        if col not in joined.columns:
+                            continue
+                        current = joined[col]
+                        if col == "Valor_gestao":
+                            replace_mask = missing_after_primary
+                        else:
+                            replace_mask = missing_after_primary & current.isna()
+                        joined[col] = current.where(~replace_mask, rateio[col])
+
+            df_consolidado = df_consolidado.join(joined, lsuffix="_x", rsuffix="_y")
 
             # Cobranças que existem na Gestão, pertencem a documentos já presentes
             # no Balanço, mas não têm linha técnica correspondente, devem entrar
@@ -373,7 +365,7 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
                 base_key_cols = ["No. UC_norm"]
                 if HIERARCHY_KEY_COL in df_consolidado.columns:
                     rateio_key_col = "_rateio_norm_for_portal_only"
-                    df_consolidado[rateio_key_col] = df_consolidado[HIERARCHY_KEY_COL].apply(normalize_uc)
+                    df_consolidado[rateio_key_col] = uc_digits(df_consolidado[HIERARCHY_KEY_COL])
                     base_key_cols.append(rateio_key_col)
 
                 for key_col in base_key_cols:
@@ -394,7 +386,7 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
                         ENRICHMENT_KEY: row.get(PORTAL_UC_COL),
                         PORTAL_UC_COL: row.get(PORTAL_UC_COL),
                         HIERARCHY_KEY_COL: pd.NA,
-                        "Referencia": row.get(ref_merge_col),
+                        "Referencia": period_key_to_timestamp(row.get(ref_merge_col)),
                         "CPF/CNPJ": row.get(doc_col),
                         "Razao Social": row.get(nome_col) if nome_col else pd.NA,
                         "Distribuidora": row.get(dist_col) if dist_col else pd.NA,
@@ -515,7 +507,7 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
                         json.dump(report, f, indent=2, ensure_ascii=False)
                 except: pass
 
-            drop_aux = ["No. UC_norm", "Referencia_merge", left_merge_uc_col, "_merge_uc_rateio_norm", "_rateio_norm_for_portal_only"]
+            drop_aux = ["No. UC_norm", "Referencia_merge", "_rateio_norm_for_portal_only"]
             df_consolidado.drop(columns=[c for c in drop_aux if c in df_consolidado.columns], inplace=True)
         except ValueError as e:
             # Re-raise erros de validação propositais
@@ -546,8 +538,32 @@ def _process_dataframes(balanco_path: str, gestao_bytes: bytes | None, gestao_pa
         # Colunas que continuam object: forçar string para evitar erro de encoding
         df_consolidado[col] = df_consolidado[col].astype(str).replace("nan", pd.NA)
 
-    # 6. Salvar o Parquet consolidado
+    # 5.1 Chave inteira canônica da Referência (yyyymm), usada pelos filtros
+    if PERIOD_COLUMN in df_consolidado.columns:
+        df_consolidado[PERIOD_KEY_COL] = period_keys(df_consolidado[PERIOD_COLUMN])
+
+    # 6. Identidade portal-first (UC final, preferência e linha mantida) resolvida uma vez
+    df_consolidado = resolve_portal_identity(df_consolidado)
+
+    # 6.1 Grupos de Fatura Pai do agrupamento padrão (id por linha + tabela de agregados)
+    parent_aggregates = None
+    try:
+        built = build_parent_aggregates(df_consolidado)
+        if built is not None:
+            df_consolidado[PARENT_GROUP_COL], parent_aggregates = built
+    except Exception as e:
+        logger.warning("Falha ao pré-calcular agregados de Fatura Pai (geração agregará na hora): %s", e)
+
+    # 7. Salvar o Parquet consolidado
     if _save_parquet_safe(df_consolidado, PARQUET_FILE):
+        if parent_aggregates is not None:
+            _save_parquet_safe(parent_aggregates, parent_aggregates_path(PARQUET_FILE))
+        # 8. Catálogo de clientes/períodos para os seletores (lido sem varrer a base)
+        save_catalog(build_catalog(df_consolidado), PARQUET_FILE)
+
+        # 9. Enriquecimento pré-juntado (opcional) acompanha cada nova base
+        from logic.services import enrichment_prejoin
+        enrichment_prejoin.refresh_if_enabled()
         return True, report
     else:
         return False, report
@@ -583,6 +599,28 @@ def _read_parquet_safe(filepath: str) -> pd.DataFrame:
     raise FileNotFoundError(f"Não foi possível ler {filepath} com nenhuma engine disponível (pyarrow/fastparquet)")
 
 
+def parent_aggregates_path(parquet_path: str) -> str:
+    """Tabela lateral de agregados de Fatura Pai de um Parquet consolidado."""
+    return os.path.splitext(parquet_path)[0] + PARENT_AGGREGATES_SUFFIX
+
+
+def load_parent_aggregates(parquet_path: str):
+    """
+    Lê os agregados de Fatura Pai gravados no sync; None se ausentes, ilegíveis
+    ou mais antigos que a base (o Parquet é sempre gravado antes da tabela).
+    """
+    path = parent_aggregates_path(parquet_path)
+    if not os.path.exists(path) or not os.path.exists(parquet_path):
+        return None
+    if os.path.getmtime(path) < os.path.getmtime(parquet_path):
+        return None
+    try:
+        return _read_parquet_safe(path)
+    except Exception as e:
+        logger.warning("Falha ao ler agregados de Fatura Pai %s: %s", path, e)
+        return None
+
+
 def get_parquet_dataframe() -> pd.DataFrame:
     """Lê e retorna o DataFrame cacheado. Levanta FileNotFoundError se não existir."""
     if not os.path.exists(PARQUET_FILE):
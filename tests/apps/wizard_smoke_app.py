@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+from logic.services.orchestrator import IncompleteRows, ReviewMetrics
 from ui.groups_wizard_ui import render_groups_section_wizard
 
 
@@ -8,18 +12,19 @@ class FakeOrchestrator:
     def count_filtered(self, clients, periods):
         return 3
 
-    def check_incomplete_rows(self, clients, periods):
-        return {
-            "total_registros": 3,
-            "registros_incompletos": 1,
-            "ucs_afetadas": [
-                {"no_uc": "UC001", "referencia": "01/2026", "razao_social": "Cliente A"}
-            ],
-        }
+    def review_metrics(self, clients, periods):
+        source = pd.DataFrame({"No. UC": ["UC001"], "Referencia": ["01/2026"], "Razao Social": ["Cliente A"]})
+        return ReviewMetrics(total=3, incomplete=1, incomplete_rows=IncompleteRows(source, np.array([0])))
+
+    def preview(self, clients, periods, **kwargs):
+        return pd.DataFrame({"Linha": ["Individual"], "No. UC": ["UC001"]})
 
     def generate(self, clients, periods, **kwargs):
         self.generate_calls += 1
         return b"fake-excel-bytes"
 
+    def generate_cached(self, clients, periods, **kwargs):
+        return self.generate(clients, periods, **kwargs)
+
 
 render_groups_section_wizard(["Cliente A"], ["01/2026"], FakeOrchestrator())
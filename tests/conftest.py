@@ -8,6 +8,16 @@ import pandas as pd
 import openpyxl
 import io
 
+from logic.adapters import firebase_adapter
+
+
+@pytest.fixture(autouse=True)
+def reset_firebase_registry():
+    """Cada teste começa sem adaptador Firebase compartilhado (nem falha registrada)."""
+    firebase_adapter.reset_shared_adapters()
+    yield
+    firebase_adapter.reset_shared_adapters()
+
 
 @pytest.fixture
 def sample_base_df():
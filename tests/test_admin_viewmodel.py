@@ -39,7 +39,7 @@ def test_admin_viewmodel_local_sync_enabled(mock_settings):
     assert state.can_sync_local is True
     assert state.local_path == "caminho_mock"
 
-@patch('ui.viewmodels.admin_viewmodel.FirebaseAdapter')
+@patch('ui.viewmodels.admin_viewmodel.get_shared_adapter')
 def test_admin_viewmodel_firebase_success(mock_adapter_class):
     mock_adapter_instance = MagicMock()
     mock_adapter_class.return_value = mock_adapter_instance
@@ -50,7 +50,7 @@ def test_admin_viewmodel_firebase_success(mock_adapter_class):
     assert fb == mock_adapter_instance
     assert warn is None
 
-@patch('ui.viewmodels.admin_viewmodel.FirebaseAdapter')
+@patch('ui.viewmodels.admin_viewmodel.get_shared_adapter')
 def test_admin_viewmodel_firebase_warning(mock_adapter_class):
     mock_adapter_class.side_effect = FirebaseAdapterError("Bucket missing")
     
@@ -14,6 +14,7 @@ class FakeOrchestrator:
     def __init__(self, *args, **kwargs):
         self.reader = MagicMock()
         self.reader.df = [1, 2, 3]
+        self.base_row_count = len(self.reader.df)
 
     def get_available_periods(self):
         return ["01/2026", "02/2026"]
@@ -0,0 +1,86 @@
+"""
+Testes do gerador sintético e da comparação com baseline da suíte de benchmarks.
+"""
+import json
+
+import pandas as pd
+
+from benchmarks.harness import BenchmarkResult, compare_to_baseline, load_baseline, save_baseline
+from benchmarks.synthetic import generate_bases, materialize, parse_size
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.mapping import GROUPING_FLAG_VALUE, HIERARCHY_KEY_COL, HIERARCHY_PARENT_COL
+
+
+def test_generate_bases_is_deterministic_per_seed():
+    a = generate_bases(1200, seed=7)
+    b = generate_bases(1200, seed=7)
+    c = generate_bases(1200, seed=8)
+
+    pd.testing.assert_frame_equal(a.balanco, b.balanco)
+    pd.testing.assert_frame_equal(a.gestao, b.gestao)
+    pd.testing.assert_frame_equal(a.consolidated, b.consolidated)
+    assert not a.balanco["No. UC"].equals(c.balanco["No. UC"])
+
+
+def test_generate_bases_covers_dirty_scenarios():
+    bases = generate_bases(6000, seed=3)
+    balanco, gestao = bases.balanco, bases.gestao
+
+    assert len(balanco) == 6000
+    assert (balanco[HIERARCHY_PARENT_COL] == "Y").any()
+    assert (balanco[HIERARCHY_PARENT_COL] == "N").any()
+    assert (balanco["Excecao Fat."] == GROUPING_FLAG_VALUE).any()
+    # Aliases alfanuméricos com UC p Rateio numérico
+    alias = balanco["No. UC"].astype(str).str.match(r"^[A-Z]")
+    assert alias.any()
+    assert balanco.loc[alias, HIERARCHY_KEY_COL].notna().all()
+    # Referências em formatos mistos (datetime + textos)
+    assert balanco["Referencia"].map(type).nunique() > 1
+    # Duplicatas e canceladas na Gestão
+    assert gestao.duplicated(subset=["Instalação", "Mês de Referência"]).any()
+    assert (gestao["Cancelada"] == "Sim").any()
+    assert gestao["Vencimento"].isin(["-"]).any()
+
+
+def test_materialized_parquet_is_readable_by_base_reader(tmp_path):
+    files = materialize(600, str(tmp_path), seed=1, with_workbooks=False)
+    reader = BaseExcelReader(files.parquet)
+
+    assert len(reader.df) >= 600
+    assert reader.get_periods()
+    assert "Valor_gestao" in reader.df.columns
+
+
+def test_parse_size_labels():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("2500") == 2500
+
+
+def test_compare_to_baseline_flags_throughput_and_memory_regressions(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    save_baseline(str(baseline_path), [BenchmarkResult("generate", "10k", 1000, 1.0, 1000.0, peak_mb=50.0)])
+    baseline = load_baseline(str(baseline_path))
+
+    ok = BenchmarkResult("generate", "10k", 1000, 1.1, 900.0, peak_mb=55.0)
+    slow = BenchmarkResult("generate", "10k", 1000, 2.0, 500.0, peak_mb=80.0)
+
+    assert compare_to_baseline([ok], baseline, tolerance=0.25) == []
+    metrics = {r.metric for r in compare_to_baseline([slow], baseline, tolerance=0.25)}
+    assert metrics == {"rows_per_s", "peak_mb"}
+    assert json.loads(baseline_path.read_text(encoding="utf-8"))["results"]["generate@10k"]["rows_per_s"] == 1000.0
+
+
+def test_patched_sync_paths_isola_caches_de_enriquecimento(tmp_path):
+    from benchmarks.run import _patched_sync_paths
+    from benchmarks.synthetic import SyntheticFiles
+    from logic.services import enrichment_cache, enrichment_prejoin, sync_service
+
+    originals = (sync_service.PARQUET_FILE, enrichment_prejoin.PREJOINED_FILE, enrichment_cache.SNAPSHOT_FILE, enrichment_cache.SNAPSHOT_META_FILE)
+    files = SyntheticFiles(n_rows=0, seed=0, balanco_xlsx="b.xlsx", gestao_xlsx="g.xlsx", parquet="")
+
+    with _patched_sync_paths(files, str(tmp_path)):
+        patched = (sync_service.PARQUET_FILE, enrichment_prejoin.PREJOINED_FILE, enrichment_cache.SNAPSHOT_FILE, enrichment_cache.SNAPSHOT_META_FILE)
+        assert all(path.startswith(str(tmp_path)) for path in patched)
+
+    assert (sync_service.PARQUET_FILE, enrichment_prejoin.PREJOINED_FILE, enrichment_cache.SNAPSHOT_FILE, enrichment_cache.SNAPSHOT_META_FILE) == originals
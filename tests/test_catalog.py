@@ -0,0 +1,57 @@
+"""
+Testes do catálogo de clientes/períodos gravado ao lado do cache consolidado.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from logic.adapters import excel_adapter
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.catalog import build_catalog, catalog_path, load_catalog, save_catalog
+
+
+@pytest.fixture
+def base_parquet(tmp_path, sample_base_df):
+    path = tmp_path / "base_consolidada.parquet"
+    sample_base_df.to_parquet(path, index=False)
+    return str(path)
+
+
+def test_catalogo_ordena_e_conta_linhas():
+    df = pd.DataFrame({
+        "Razao Social": ["Beta", "Alpha", "Beta", None],
+        "CPF/CNPJ": ["22.222.222/0001-02", "111", 22222222000102.0, "999"],
+        "Referencia": ["2025-12-01", "01/2026", "12/2025", "-"],
+    })
+
+    catalog = build_catalog(df)
+
+    assert catalog.clients == ["Alpha", "Beta"]
+    assert catalog.client_rows == {"Alpha": 1, "Beta": 2}
+    assert catalog.periods == ["12/2025", "01/2026"]
+    assert catalog.period_rows == {"12/2025": 2, "01/2026": 1}
+    assert catalog.client_documents["Beta"] == ["22222222000102"]
+    assert catalog.document_clients()["111"] == ["Alpha"]
+    assert catalog.row_count == 4
+
+
+def test_leitor_usa_catalogo_gravado_sem_varrer_base(base_parquet, sample_base_df, monkeypatch):
+    assert save_catalog(build_catalog(sample_base_df), base_parquet)
+    monkeypatch.setattr(excel_adapter, "build_catalog", lambda df: pytest.fail("base varrida para o catálogo"))
+
+    reader = BaseExcelReader(base_parquet)
+
+    assert reader.get_periods() == ["01/2026", "02/2026"]
+    assert reader.get_clients()[0] == "Cliente Alpha"
+    assert reader.get_client_documents()["Cliente Gamma"] == ["33333333000103"]
+
+
+def test_catalogo_de_outra_versao_da_base_e_ignorado(base_parquet, sample_base_df):
+    save_catalog(build_catalog(sample_base_df.head(1)), base_parquet)
+    sample_base_df.iloc[::-1].to_parquet(base_parquet, index=False)
+    os.utime(base_parquet, ns=(0, 0))
+
+    assert os.path.exists(catalog_path(base_parquet))
+    assert load_catalog(base_parquet) is None
+    assert BaseExcelReader(base_parquet).get_periods() == ["01/2026", "02/2026"]
@@ -0,0 +1,144 @@
+"""
+Testes do CLI headless de geração em massa (python -m logic.cli generate).
+"""
+import json
+import zipfile
+
+import pytest
+
+from logic import cli
+from logic.cli import ManifestError, load_manifest, run_generate
+
+
+@pytest.fixture
+def json_manifest(tmp_path):
+    path = tmp_path / "fechamento.json"
+    path.write_text(json.dumps({
+        "defaults": {"incluir_resumo": True},
+        "groups": [
+            {"name": "Alpha", "clients": ["Cliente Alpha"], "periods": ["01/2026", "02/2026"], "options": {"split_periods": True}},
+            {"name": "Grupo_2", "clients": ["Cliente Gamma"], "periods": ["01/2026"], "grouping_mode": "cnpj"},
+            {"name": "Vazio", "clients": ["Cliente Inexistente"], "periods": ["01/2026"]},
+        ],
+    }), encoding="utf-8")
+    return str(path)
+
+
+class TestLoadManifest:
+    def test_json_manifest_applies_defaults_and_output_names(self, json_manifest):
+        jobs = load_manifest(json_manifest)
+
+        assert [j.output_file for j in jobs] == ["Alpha.zip", "Cliente_Gamma_jan_2026.xlsx", "Vazio.xlsx"]
+        assert all(j.options["incluir_resumo"] for j in jobs)
+        assert jobs[1].options["grouping_mode"] == "cnpj"
+
+    def test_csv_manifest_with_semicolon_and_pipe_lists(self, tmp_path):
+        path = tmp_path / "fechamento.csv"
+        path.write_text(
+            "name;clients;periods;grouping_mode;incluir_resumo\n"
+            "Alpha;Cliente Alpha|Cliente Beta;01/2026|02/2026;distributor;sim\n",
+            encoding="utf-8",
+        )
+        [job] = load_manifest(str(path))
+
+        assert job.clients == ["Cliente Alpha", "Cliente Beta"]
+        assert job.periods == ["01/2026", "02/2026"]
+        assert job.options["grouping_mode"] == "distributor"
+        assert job.options["incluir_resumo"] is True
+
+    def test_duplicate_output_names_are_disambiguated(self, tmp_path):
+        path = tmp_path / "m.json"
+        path.write_text(json.dumps([
+            {"name": "Mesmo", "clients": ["A"], "periods": ["01/2026"]},
+            {"name": "Mesmo", "clients": ["B"], "periods": ["01/2026"]},
+        ]), encoding="utf-8")
+
+        assert [j.output_file for j in load_manifest(str(path))] == ["Mesmo.xlsx", "Mesmo_2.xlsx"]
+
+    @pytest.mark.parametrize("group, message", [
+        ({"name": "X", "periods": ["01/2026"]}, "nenhum cliente"),
+        ({"name": "X", "clients": ["A"], "periods": ["01/2026"], "grouping_mode": "foo"}, "grouping_mode"),
+        ({"name": "X", "clients": ["A"], "periods": ["01/2026"], "cor": "azul"}, "opções desconhecidas"),
+    ])
+    def test_invalid_groups_raise_manifest_error(self, tmp_path, group, message):
+        path = tmp_path / "m.json"
+        path.write_text(json.dumps([group]), encoding="utf-8")
+
+        with pytest.raises(ManifestError, match=message):
+            load_manifest(str(path))
+
+    def test_unsupported_extension(self, tmp_path):
+        path = tmp_path / "m.txt"
+        path.write_text("[]", encoding="utf-8")
+
+        with pytest.raises(ManifestError, match="não suportado"):
+            load_manifest(str(path))
+
+
+class TestRunGenerate:
+    @pytest.fixture(autouse=True)
+    def reset_worker_state(self, monkeypatch):
+        monkeypatch.setattr(cli, "_WORKER_ORCH", None)
+        monkeypatch.setattr(cli, "_WORKER_ENRICHMENT", None)
+
+    def test_generates_outputs_and_summary(self, json_manifest, sample_base_xlsx, sample_template_xlsx, tmp_path):
+        out = tmp_path / "out"
+        summary = run_generate(load_manifest(json_manifest), str(out), sample_base_xlsx, sample_template_xlsx)
+
+        assert summary.totals == {"ok": 2, "skipped": 0, "empty": 1, "failed": 0}
+        with zipfile.ZipFile(out / "Alpha.zip") as z:
+            assert sorted(z.namelist()) == ["Alpha_fev_2026.xlsx", "Alpha_jan_2026.xlsx"]
+        assert (out / "Cliente_Gamma_jan_2026.xlsx").exists()
+
+        report = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+        assert [o["status"] for o in report["outputs"]] == ["ok", "ok", "empty"]
+        assert report["base_fingerprint"]
+
+    def test_resume_skips_outputs_with_matching_hash(self, json_manifest, sample_base_xlsx, sample_template_xlsx, tmp_path, monkeypatch):
+        out = tmp_path / "out"
+        run_generate(load_manifest(json_manifest), str(out), sample_base_xlsx, sample_template_xlsx)
+
+        calls = []
+        original = cli._run_job
+        monkeypatch.setattr(cli, "_run_job", lambda job, output_dir: calls.append(job.name) or original(job, output_dir))
+
+        jobs = load_manifest(json_manifest)
+        jobs[1].options["incluir_resumo"] = False  # muda o hash apenas deste grupo
+        (out / "Alpha.zip").unlink()  # saída removida deve ser regenerada
+
+        summary = run_generate(jobs, str(out), sample_base_xlsx, sample_template_xlsx, resume=True)
+
+        assert sorted(calls) == ["Alpha", "Grupo_2"]
+        assert [o.status for o in summary.outputs] == ["ok", "ok", "empty"]
+
+    def test_resume_regenerates_when_missing_marker_mode_changes(self, json_manifest, sample_base_xlsx, sample_template_xlsx, tmp_path, monkeypatch):
+        from config.settings import settings
+
+        out = tmp_path / "out"
+        run_generate(load_manifest(json_manifest), str(out), sample_base_xlsx, sample_template_xlsx)
+
+        calls = []
+        original = cli._run_job
+        monkeypatch.setattr(cli, "_run_job", lambda job, output_dir: calls.append(job.name) or original(job, output_dir))
+        monkeypatch.setattr(settings, "missing_marker_mode", "column")
+
+        run_generate(load_manifest(json_manifest), str(out), sample_base_xlsx, sample_template_xlsx, resume=True)
+
+        assert sorted(calls) == ["Alpha", "Grupo_2", "Vazio"]
+
+    def test_parallel_workers_produce_same_outputs(self, json_manifest, sample_base_xlsx, sample_template_xlsx, tmp_path):
+        out = tmp_path / "out"
+        summary = run_generate(load_manifest(json_manifest), str(out), sample_base_xlsx, sample_template_xlsx, workers=2)
+
+        assert summary.totals["ok"] == 2
+        assert summary.totals["failed"] == 0
+
+
+def test_main_returns_2_for_invalid_manifest(tmp_path, capsys):
+    path = tmp_path / "m.json"
+    path.write_text("{}", encoding="utf-8")
+
+    code = cli.main(["generate", "--manifest", str(path), "--output", str(tmp_path / "out")])
+
+    assert code == 2
+    assert "Manifesto inválido" in capsys.readouterr().err
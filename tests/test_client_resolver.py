@@ -0,0 +1,72 @@
+"""
+Testes da resolução em lote de UCs/CPF/CNPJ (logic.core.client_resolver).
+"""
+import pandas as pd
+
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.client_resolver import ClientResolver, normalize_uc_identifier, parse_identifiers
+
+
+def _base() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Razao Social": ["Alfa Ltda", "Alfa Ltda", "Beta SA", "Gama ME"],
+        "CPF/CNPJ": ["01.234.567/0001-89", "01.234.567/0001-89", 98765432000110, None],
+        "No. UC": [1001.0, "1002", "20-03", None],
+        "UC p Rateio": [None, None, "9999", "3003"],
+        "_portal_uc": [None, None, None, "P-77"],
+    })
+
+
+def test_parse_identifiers_separadores_e_duplicados():
+    text = "1001\n1002, 1002;20-03\t 3003\r\n\n"
+    assert parse_identifiers(text) == ["1001", "1002", "20-03", "3003"]
+    assert parse_identifiers("") == []
+
+
+def test_normaliza_uc_de_planilha_numerica():
+    assert normalize_uc_identifier(" 1001.0 ") == "1001"
+    assert normalize_uc_identifier("p-77") == "P77"
+
+
+def test_resolve_ucs_documentos_e_nao_encontrados():
+    resolver = ClientResolver.from_frame(_base())
+    result = resolver.resolve(["1001", "2003", "p77", "1234567000189", "98.765.432/0001-10", "3003", "555", "1001"])
+
+    assert result.clients == ["Alfa Ltda", "Beta SA", "Gama ME"]
+    assert result.matches["2003"] == ["Beta SA"]
+    assert result.matches["p77"] == ["Gama ME"]  # UC do portal
+    assert result.matches["1234567000189"] == ["Alfa Ltda"]  # CNPJ sem o zero à esquerda
+    assert result.matches["3003"] == ["Gama ME"]  # UC p Rateio
+    assert result.unmatched == ["555"]
+    assert result.matched_count == 6
+
+
+def test_nome_com_espacos_e_devolvido_como_esta_na_base(sample_base_xlsx):
+    reader = BaseExcelReader(str(sample_base_xlsx))
+    df = reader.df.copy()
+    padded = f"{df['Razao Social'].iloc[0]} "
+    df.loc[df["Razao Social"] == df["Razao Social"].iloc[0], "Razao Social"] = padded
+    reader.df = df
+    uc = str(df["No. UC"].iloc[0])
+
+    result = reader.client_resolver.resolve([uc])
+
+    assert result.clients == [padded]
+    assert padded in reader.get_clients()
+    assert len(reader.filter_data(result.clients, [])) == (df["Razao Social"] == padded).sum()
+
+
+def test_base_sem_coluna_de_cliente_nao_resolve():
+    result = ClientResolver.from_frame(pd.DataFrame({"No. UC": ["1"]})).resolve(["1"])
+    assert result.clients == [] and result.unmatched == ["1"]
+
+
+def test_reader_reaproveita_indices_por_versao_da_base(sample_base_xlsx):
+    reader = BaseExcelReader(str(sample_base_xlsx))
+    resolver = reader.client_resolver
+    assert reader.client_resolver is resolver
+    uc = str(reader.df["No. UC"].dropna().iloc[0])
+    assert reader.df.loc[reader.df["No. UC"].astype(str) == uc, "Razao Social"].iloc[0] in resolver.resolve([uc]).clients
+
+    reader.df = reader.df.copy()
+    assert reader.client_resolver is not resolver
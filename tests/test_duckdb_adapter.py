@@ -0,0 +1,144 @@
+"""
+Paridade do backend DuckDB (logic.adapters.duckdb_adapter) com o motor pandas.
+"""
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from benchmarks.synthetic import generate_bases
+from config.settings import settings
+from logic.adapters.duckdb_adapter import DuckDBBaseReader, open_base_reader, query_backend
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.grouping import AGG_IS_GROUP, AGG_MEMBERS, PARENT_GROUP_COL, build_parent_aggregates
+from logic.core.mapping import SUM_COLUMNS
+from logic.core.periods import PERIOD_KEY_COL, PeriodRange
+from logic.core.portal import PORTAL_COLUMNS, apply_portal_filter, resolve_portal_identity
+from logic.services.orchestrator import Orchestrator
+from logic.services.sync_service import _save_parquet_safe, parent_aggregates_path
+
+
+@pytest.fixture(scope="module")
+def synthetic_parquet(tmp_path_factory):
+    """Base sintética sincronizada (com colunas portal e ids de grupo), sem catálogo lateral."""
+    path = str(tmp_path_factory.mktemp("duckdb") / "base_consolidada.parquet")
+    assert _save_parquet_safe(generate_bases(3000, seed=11).consolidated, path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def readers(synthetic_parquet):
+    return BaseExcelReader(synthetic_parquet), DuckDBBaseReader(synthetic_parquet)
+
+
+def _scopes(reader):
+    clients, periods = reader.get_clients(), reader.get_periods()
+    return [
+        (clients[:3], periods[:2]), (clients[:3], []), ([], periods[-1:]), ([], []), (clients[:1], ["13/2099"]),
+        (clients[:3], PeriodRange.between(periods[0], periods[2])), ([], PeriodRange.last_months(2, latest=periods[-1])),
+    ]
+
+
+def test_catalogo_sql_igual_ao_pandas(readers):
+    pandas_reader, duck_reader = readers
+    assert duck_reader.catalog == pandas_reader.catalog
+    assert duck_reader.row_count == len(pandas_reader.df)
+
+
+def test_filter_data_e_contagem_iguais_ao_pandas(readers):
+    pandas_reader, duck_reader = readers
+    for clients, periods in _scopes(pandas_reader):
+        expected = pandas_reader.filter_data(clients, periods)
+        pd.testing.assert_frame_equal(duck_reader.filter_data(clients, periods), expected)
+        assert duck_reader.count_rows(clients, periods) == len(expected)
+
+
+def test_portal_em_sql_igual_ao_pandas(readers, tmp_path):
+    pandas_reader, duck_reader = readers
+    # Base antiga, sem a resolução do sync: a deduplicação inteira roda em SQL
+    legacy_path = str(tmp_path / "legacy.parquet")
+    _save_parquet_safe(pandas_reader.df.drop(columns=PORTAL_COLUMNS + [PARENT_GROUP_COL, PERIOD_KEY_COL]), legacy_path)
+    legacy_reader = DuckDBBaseReader(legacy_path)
+
+    for clients, periods in _scopes(pandas_reader):
+        expected = apply_portal_filter(pandas_reader.filter_data(clients, periods))
+        pd.testing.assert_frame_equal(duck_reader.portal_data(clients, periods), expected)
+        pd.testing.assert_frame_equal(
+            legacy_reader.portal_data(clients, periods), expected.drop(columns=[PARENT_GROUP_COL, PERIOD_KEY_COL]), check_dtype=False,
+        )
+
+
+def test_agregados_fatura_pai_em_sql(readers):
+    pandas_reader, duck_reader = readers
+    _, expected = build_parent_aggregates(pandas_reader.df)
+    table = duck_reader.parent_aggregates()
+
+    assert len(table) == len(expected)
+    assert table[AGG_MEMBERS].tolist() == expected[AGG_MEMBERS].tolist()
+    assert table[AGG_IS_GROUP].tolist() == expected[AGG_IS_GROUP].tolist()
+    for col in SUM_COLUMNS:
+        pd.testing.assert_series_equal(table[col], expected[col], check_names=False)
+
+
+def test_orchestrator_duckdb_igual_ao_pandas(synthetic_parquet, monkeypatch):
+    _, table = build_parent_aggregates(BaseExcelReader(synthetic_parquet).df)
+    _save_parquet_safe(table, parent_aggregates_path(synthetic_parquet))
+    pandas_orch = Orchestrator(synthetic_parquet, "mc.xlsx")
+    monkeypatch.setattr(settings, "query_backend", "duckdb")
+    duck_orch = Orchestrator(synthetic_parquet, "mc.xlsx")
+    assert duck_orch.uses_sql_backend and not pandas_orch.uses_sql_backend
+
+    clients, periods = pandas_orch.get_available_clients()[:6], pandas_orch.get_available_periods()[:3]
+    for options in ({}, {"incomplete_filter": "incomplete_only"}, {"grouping_mode": "none"}):
+        expected, _ = pandas_orch._build_render_frame(clients, periods, **options)
+        rendered, _ = duck_orch._build_render_frame(clients, periods, **options)
+        pd.testing.assert_frame_equal(rendered, expected)
+
+    expected_metrics = pandas_orch.review_metrics(clients, periods)
+    metrics = duck_orch.review_metrics(clients, periods)
+    assert (metrics.total, metrics.incomplete) == (expected_metrics.total, expected_metrics.incomplete)
+    pd.testing.assert_frame_equal(metrics.incomplete_rows.to_frame(), expected_metrics.incomplete_rows.to_frame())
+    assert duck_orch.count_filtered(clients, []) == pandas_orch.count_filtered(clients, [])
+    assert duck_orch.base_row_count == pandas_orch.base_row_count
+    assert duck_orch.get_last_periods(2) == pandas_orch.get_last_periods(2) == pandas_orch.get_available_periods()[-2:]
+
+
+def test_backend_desconhecido_e_fallback_para_pandas(sample_base_xlsx):
+    with pytest.raises(ValueError):
+        query_backend("spark")
+    # Planilhas não passam pelo DuckDB
+    assert isinstance(open_base_reader(str(sample_base_xlsx), backend="duckdb"), BaseExcelReader)
+
+
+def test_resolucao_em_lote_igual_ao_pandas(readers):
+    pandas_reader, duck_reader = readers
+    df = pandas_reader.df
+    identifiers = df["No. UC"].astype(str).head(20).tolist() + df["CPF/CNPJ"].astype(str).head(5).tolist() + ["inexistente"]
+    expected = pandas_reader.client_resolver.resolve(identifiers)
+    result = duck_reader.client_resolver.resolve(identifiers)
+    assert (result.clients, result.matches, result.unmatched) == (expected.clients, expected.matches, expected.unmatched)
+    assert expected.unmatched == ["inexistente"]
+
+
+def test_portal_legado_em_sql_respeita_escopo_de_cliente(readers, tmp_path):
+    pandas_reader, _ = readers
+    df = pandas_reader.df.drop(columns=PORTAL_COLUMNS + [PARENT_GROUP_COL, PERIOD_KEY_COL]).copy()
+    # Dois clientes com cobrança na mesma UC/período e aliases diferentes para essa UC do portal
+    clients = pandas_reader.get_clients()[:2]
+    charged = pd.to_numeric(df["Valor_gestao"], errors="coerce") > 0
+    rows = [df.index[(df["Razao Social"] == c) & charged][0] for c in clients]
+    aliases = [df.index[(df["Razao Social"] == c) & ~df.index.isin(rows)][0] for c in clients]
+    df.loc[rows, ["No. UC", "Referencia"]] = ["555000", df.loc[rows[0], "Referencia"]]
+    df.loc[rows, "_portal_uc"] = pd.NA
+    df.loc[aliases, "No. UC"] = ["W555A", "W555B"]
+    df.loc[aliases, "_portal_uc"] = "555000"
+    legacy_path = str(tmp_path / "shared_portal.parquet")
+    _save_parquet_safe(df, legacy_path)
+    legacy_reader = DuckDBBaseReader(legacy_path)
+
+    resolved = resolve_portal_identity(df)
+    assert resolved.loc[rows, "_uc_final"].tolist() == ["W555A", "W555B"]
+    for scope in ([clients[0]], [clients[1]], clients):
+        expected = apply_portal_filter(resolved[resolved["Razao Social"].isin(scope)])
+        result = legacy_reader.portal_data(list(scope), [])
+        assert sorted(result["No. UC"].astype(str)) == sorted(expected["No. UC"].astype(str))
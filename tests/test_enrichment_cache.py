@@ -0,0 +1,204 @@
+"""
+Testes do cache de processo de enriquecimento (snapshot local + refresh delta).
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from config.settings import settings
+from logic.services import enrichment_cache, enrichment_service
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _Doc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Collection:
+    def __init__(self, store):
+        self._store = store
+        self._since = None
+
+    def stream(self):
+        self._store.calls.append("delta" if self._since is not None else "full")
+        for doc_id, data in self._store.docs.items():
+            ts = data.get("updated_at")
+            if self._since is None or (ts is not None and ts > self._since):
+                yield _Doc(doc_id, data)
+
+    def where(self, *args, filter=None):
+        query = _Collection(self._store)
+        query._since = filter.value if filter is not None else args[2]
+        return query
+
+
+class _Db:
+    def __init__(self, store):
+        self._store = store
+
+    def collection(self, _name):
+        return _Collection(self._store)
+
+
+class _Store:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+        self.down = False
+
+    def _get_db(self):
+        if self.down:
+            raise RuntimeError("offline")
+        return _Db(self)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = _Store({
+        "UC1": {"Contrato": "A", "updated_at": T0},
+        "UC2": {"Contrato": "B", "updated_at": T0 - timedelta(days=1)},
+    })
+    monkeypatch.setattr(enrichment_service, "_get_adapter", lambda: store)
+    monkeypatch.setattr(enrichment_cache, "SNAPSHOT_FILE", str(tmp_path / "enrichment_snapshot.parquet"))
+    monkeypatch.setattr(enrichment_cache, "SNAPSHOT_META_FILE", str(tmp_path / "enrichment_snapshot.json"))
+    monkeypatch.setattr(settings, "enrichment_cache_ttl_seconds", 0)
+    monkeypatch.setattr(settings, "enrichment_full_refresh_seconds", 3600)
+    enrichment_cache.invalidate()
+    yield store
+    enrichment_cache.invalidate()
+
+
+def _as_dict(df):
+    return df.set_index("No. UC")["Contrato"].to_dict()
+
+
+def test_primeira_carga_faz_varredura_completa_sem_updated_at(store):
+    df = enrichment_cache.get_enrichment_frame()
+
+    assert _as_dict(df) == {"UC1": "A", "UC2": "B"}
+    assert "updated_at" not in df.columns
+    assert store.calls == ["full"]
+
+
+def test_refresh_seguinte_busca_apenas_alteracoes(store):
+    enrichment_cache.get_enrichment_frame()
+    store.docs["UC2"] = {"Contrato": "B2", "updated_at": T0 + timedelta(minutes=1)}
+    store.docs["UC3"] = {"Contrato": "C", "updated_at": T0 + timedelta(minutes=2)}
+
+    df = enrichment_cache.get_enrichment_frame()
+
+    assert _as_dict(df) == {"UC1": "A", "UC2": "B2", "UC3": "C"}
+    assert store.calls == ["full", "delta"]
+
+
+def test_documentos_legados_sem_updated_at_nao_forcam_varredura_completa(store):
+    store.docs = {"UC1": {"Contrato": "A"}, "UC2": {"Contrato": "B"}}
+    enrichment_cache.get_enrichment_frame()
+    store.docs["UC3"] = {"Contrato": "C", "updated_at": datetime.now(timezone.utc) + timedelta(seconds=1)}
+
+    df = enrichment_cache.get_enrichment_frame()
+    enrichment_cache.get_enrichment_frame()
+
+    assert _as_dict(df) == {"UC1": "A", "UC2": "B", "UC3": "C"}
+    assert store.calls == ["full", "delta", "delta"]
+
+
+def test_dentro_do_ttl_serve_da_memoria(store, monkeypatch):
+    monkeypatch.setattr(settings, "enrichment_cache_ttl_seconds", 300)
+    enrichment_cache.get_enrichment_frame()
+    store.docs["UC3"] = {"Contrato": "C", "updated_at": T0 + timedelta(minutes=2)}
+
+    df = enrichment_cache.get_enrichment_frame()
+
+    assert "UC3" not in _as_dict(df)
+    assert store.calls == ["full"]
+
+
+def test_snapshot_em_disco_evita_varredura_completa_em_novo_processo(store):
+    enrichment_cache.get_enrichment_frame()
+    enrichment_cache.invalidate()  # simula novo processo: memória vazia, snapshot no disco
+
+    df = enrichment_cache.get_enrichment_frame()
+
+    assert _as_dict(df) == {"UC1": "A", "UC2": "B"}
+    assert store.calls == ["full", "delta"]
+
+
+def test_firestore_indisponivel_serve_versao_em_cache(store):
+    enrichment_cache.get_enrichment_frame()
+    store.down = True
+
+    df = enrichment_cache.get_enrichment_frame()
+
+    assert _as_dict(df) == {"UC1": "A", "UC2": "B"}
+
+
+def test_gravacoes_e_exclusoes_locais_atualizam_o_cache(store, monkeypatch):
+    monkeypatch.setattr(settings, "enrichment_cache_ttl_seconds", 300)
+    enrichment_cache.get_enrichment_frame()
+
+    enrichment_cache.apply_local_upsert(pd.DataFrame({"No. UC": [" UC1 ", "UC9"], "Contrato": ["A2", "Z"]}))
+    enrichment_cache.apply_local_delete(["UC2"])
+
+    assert _as_dict(enrichment_cache.get_enrichment_frame()) == {"UC1": "A2", "UC9": "Z"}
+
+
+def test_edicoes_locais_gravam_snapshot_so_no_proximo_refresh(store, monkeypatch):
+    enrichment_cache.get_enrichment_frame()
+    written = os.path.getmtime(enrichment_cache.SNAPSHOT_FILE)
+    saves = []
+    original_save = enrichment_cache._save_snapshot
+    monkeypatch.setattr(enrichment_cache, "_save_snapshot", lambda: saves.append(1) or original_save())
+
+    for uc in ("UC7", "UC8", "UC9"):
+        enrichment_cache.apply_local_upsert(pd.DataFrame({"No. UC": [uc], "Contrato": ["N"]}))
+    enrichment_cache.apply_local_delete(["UC2"])
+
+    assert saves == [] and os.path.getmtime(enrichment_cache.SNAPSHOT_FILE) == written
+    store.down = True
+    enrichment_cache.get_enrichment_frame()  # mesmo sem Firestore, as edições vão para o disco
+    enrichment_cache.invalidate()
+    store.down = False
+
+    assert saves == [1]
+    assert set(enrichment_cache.get_enrichment_frame()["No. UC"]) == {"UC1", "UC7", "UC8", "UC9"}
+
+
+def test_snapshot_interrompido_preserva_arquivos_anteriores(store, monkeypatch):
+    enrichment_cache.get_enrichment_frame()
+    with open(enrichment_cache.SNAPSHOT_META_FILE, encoding="utf-8") as f:
+        meta = f.read()
+
+    def interrupted(src, dst):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(enrichment_cache.os, "replace", interrupted)
+    enrichment_cache.apply_local_upsert(pd.DataFrame({"No. UC": ["UC9"], "Contrato": ["Z"]}))
+    enrichment_cache.get_enrichment_frame()
+
+    with open(enrichment_cache.SNAPSHOT_META_FILE, encoding="utf-8") as f:
+        assert f.read() == meta
+    assert sorted(os.listdir(os.path.dirname(enrichment_cache.SNAPSHOT_FILE))) == ["enrichment_snapshot.json", "enrichment_snapshot.parquet"]
+    assert "UC9" not in set(enrichment_cache._read_parquet_safe(enrichment_cache.SNAPSHOT_FILE)["No. UC"])
+
+
+def test_versao_acompanha_a_copia_entregue_e_muda_com_edicao_local(store, monkeypatch):
+    monkeypatch.setattr(settings, "enrichment_cache_ttl_seconds", 300)
+    first = enrichment_cache.get_enrichment_frame()
+    version = enrichment_cache.version_of(first)
+
+    assert version and enrichment_cache.version_of(enrichment_cache.get_enrichment_frame()) == version
+    assert enrichment_cache.version_of(first[first["Contrato"] == "A"]) is None
+    assert enrichment_cache.version_of(pd.DataFrame({"No. UC": ["UC1"]})) is None
+
+    enrichment_cache.apply_local_upsert(pd.DataFrame({"No. UC": ["UC1"], "Contrato": ["A2"]}))
+
+    assert enrichment_cache.version_of(enrichment_cache.get_enrichment_frame()) != version
@@ -0,0 +1,87 @@
+"""
+Testes do enriquecimento pré-juntado à base consolidada (settings.prejoin_enrichment).
+"""
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from config.settings import settings
+from logic.core.mapping import PORTAL_UC_COL
+from logic.services import enrichment_prejoin
+from logic.services.orchestrator import Orchestrator
+
+
+@pytest.fixture
+def prejoin_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "prejoin_enrichment", True)
+    path = tmp_path / "enrichment_prejoined.parquet"
+    monkeypatch.setattr(enrichment_prejoin, "PREJOINED_FILE", str(path))
+    return path
+
+
+def _cell_values(excel_bytes):
+    wb = openpyxl.load_workbook(io.BytesIO(excel_bytes))
+    return {cell for ws in wb.worksheets for row in ws.iter_rows(values_only=True) for cell in row if cell is not None}
+
+
+def test_normaliza_chave_da_uc():
+    keys = enrichment_prejoin.normalize_uc_key(pd.Series([" UC1 ", 123.0, "456.0", None, ""]))
+
+    assert keys.tolist()[:3] == ["UC1", "123", "456"]
+    assert keys.isna().tolist()[3:] == [True, True]
+
+
+def test_materializa_e_junta_pela_uc_do_portal(prejoin_file):
+    enrichment = pd.DataFrame({
+        "No. UC": ["UC1 ", "P-2", "UC1"],
+        "Contrato": ["velho", "portal", "novo"],
+        "Razao Social": ["nunca sobrescreve", "x", "y"],
+    })
+    assert enrichment_prejoin.materialize_prejoined(enrichment)
+
+    table = enrichment_prejoin.load_prejoined()
+    base = pd.DataFrame({"No. UC": ["UC1", "UC2", "UC3"], PORTAL_UC_COL: [None, "P-2", None]})
+    joined, cols = enrichment_prejoin.join_prejoined(base, table)
+
+    assert cols == ["Contrato"]
+    assert joined["Contrato"].tolist()[:2] == ["novo", "portal"]
+    assert pd.isna(joined["Contrato"].iloc[2])
+
+
+def test_desligado_nao_carrega_tabela(prejoin_file, monkeypatch):
+    enrichment_prejoin.materialize_prejoined(pd.DataFrame({"No. UC": ["UC1"], "Contrato": ["A"]}))
+    monkeypatch.setattr(settings, "prejoin_enrichment", False)
+
+    assert enrichment_prejoin.load_prejoined() is None
+    assert enrichment_prejoin.prejoined_mtime() == 0.0
+
+
+def test_generate_usa_colunas_pre_juntadas_sem_merge(prejoin_file, sample_base_xlsx, sample_template_xlsx):
+    enrichment = pd.DataFrame({"No. UC": ["UC001"], "Contrato Interno": ["CT-ALPHA"]})
+    enrichment_prejoin.materialize_prejoined(enrichment)
+
+    orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+    periods = orch.get_available_periods()
+
+    assert orch.has_prejoined_enrichment
+    prejoined = orch.generate(["Cliente Alpha"], periods)
+    merged = orch.generate(["Cliente Alpha"], periods, enrichment_df=enrichment)
+
+    assert "CT-ALPHA" in _cell_values(prejoined)
+    assert _cell_values(prejoined) == _cell_values(merged)
+
+
+def test_enrichment_explicito_substitui_pre_juntado(prejoin_file, sample_base_xlsx, sample_template_xlsx):
+    enrichment_prejoin.materialize_prejoined(pd.DataFrame({"No. UC": ["UC001"], "Contrato Interno": ["CT-ANTIGO"]}))
+    orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+
+    result = orch.generate(
+        ["Cliente Alpha"], orch.get_available_periods(),
+        enrichment_df=pd.DataFrame({"No. UC": ["UC001"], "Contrato Interno": ["CT-NOVO"]}),
+    )
+
+    values = _cell_values(result)
+    assert "CT-NOVO" in values
+    assert "CT-ANTIGO" not in values
@@ -1,3 +1,6 @@
+import threading
+
+import pytest
 import pandas as pd
 
 from logic.services import enrichment_service
@@ -76,3 +79,213 @@ def test_load_mapping_retorna_dataframe_quando_existe(monkeypatch):
     assert isinstance(result, pd.DataFrame)
     assert "No. UC" in result.columns
     assert len(result) == 1
+
+
+# --- Escrita em lote (WriteBatch) ---
+
+
+class _BatchStore:
+    """Firestore falso em memória com suporte a batch(), thread-safe."""
+
+    def __init__(self, fail_commits=0, failing_docs=(), permanent_error=None, transient_docs=()):
+        self.docs = {}
+        self.transient_docs = set(transient_docs)
+        self.permanent_error = permanent_error
+        self.commit_attempts = 0
+        self.commit_sizes = []
+        self.fail_commits = fail_commits
+        self.failing_docs = set(failing_docs)
+        self.lock = threading.Lock()
+
+    def collection(self, _name):
+        return _BatchCollection(self)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+class _BatchCollection:
+    def __init__(self, store):
+        self._store = store
+
+    def document(self, doc_id):
+        return _BatchDocRef(self._store, doc_id)
+
+
+class _BatchDocRef:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+
+    def set(self, data, merge=False):
+        if self.id in self._store.transient_docs:
+            raise TimeoutError("deadline exceeded")
+        if self.id in self._store.failing_docs:
+            raise ValueError("invalid document")
+        with self._store.lock:
+            current = self._store.docs.get(self.id, {}) if merge else {}
+            self._store.docs[self.id] = {**current, **data}
+
+    def delete(self):
+        if self.id in self._store.failing_docs:
+            raise ValueError("invalid document")
+        with self._store.lock:
+            self._store.docs.pop(self.id, None)
+
+
+class _FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref, lambda: ref.set(data, merge=merge)))
+
+    def delete(self, ref):
+        self._ops.append((ref, ref.delete))
+
+    def commit(self):
+        with self._store.lock:
+            if self._store.fail_commits > 0:
+                self._store.fail_commits -= 1
+                raise ConnectionError("unavailable")
+            # Lote atômico: qualquer documento inválido rejeita o lote inteiro
+            if any(ref.id in self._store.failing_docs for ref, _ in self._ops):
+                raise ValueError("batch rejected")
+            if self._store.permanent_error is not None:
+                self._store.commit_attempts += 1
+                raise self._store.permanent_error
+            self._store.commit_sizes.append(len(self._ops))
+        for _, op in self._ops:
+            op()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(enrichment_service, "BATCH_BACKOFF_SECONDS", 0)
+
+
+def _use_store(monkeypatch, store):
+    monkeypatch.setattr(enrichment_service, "_get_adapter", lambda: _FakeAdapter(store))
+
+
+def test_save_enrichment_data_usa_lotes_de_ate_500(monkeypatch, no_backoff):
+    store = _BatchStore()
+    _use_store(monkeypatch, store)
+    df = pd.DataFrame({"No. UC": [f"UC{i}" for i in range(1203)], "Contrato": ["C"] * 1203, "Obs": [None] * 1203})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert summary
+    assert (summary.written, summary.failed) == (1203, 0)
+    assert sorted(store.commit_sizes) == [203, 500, 500]
+    assert store.docs["UC7"]["Contrato"] == "C"
+    assert "Obs" not in store.docs["UC7"]
+    assert enrichment_service.UPDATED_AT_FIELD in store.docs["UC7"]
+
+
+def test_save_enrichment_data_repete_lote_apos_falha_transitoria(monkeypatch, no_backoff):
+    store = _BatchStore(fail_commits=2)
+    _use_store(monkeypatch, store)
+    df = pd.DataFrame({"No. UC": ["UC1", "UC2"], "Contrato": ["A", "B"]})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert (summary.written, summary.failed) == (2, 0)
+    assert store.commit_sizes == [2]
+
+
+def test_save_enrichment_data_isola_documentos_com_falha(monkeypatch, no_backoff):
+    store = _BatchStore(failing_docs={"UC2"})
+    _use_store(monkeypatch, store)
+    df = pd.DataFrame({"No. UC": ["UC1", "UC2", "UC3"], "Contrato": ["A", "B", "C"]})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert not summary
+    assert (summary.written, summary.failed, summary.failed_ids) == (2, 1, ["UC2"])
+    assert set(store.docs) == {"UC1", "UC3"}
+
+
+def test_save_enrichment_data_falha_transitoria_esgotada_falha_o_lote_inteiro(monkeypatch, no_backoff):
+    store = _BatchStore(fail_commits=10)
+    _use_store(monkeypatch, store)
+    df = pd.DataFrame({"No. UC": ["UC1", "UC2", "UC3"], "Contrato": ["A", "B", "C"]})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert (summary.written, summary.failed) == (0, 3)
+    assert sorted(summary.failed_ids) == ["UC1", "UC2", "UC3"]
+    assert store.fail_commits == 10 - enrichment_service.BATCH_MAX_RETRIES
+    assert store.docs == {}
+
+
+def test_save_enrichment_data_isolamento_para_na_primeira_falha_transitoria(monkeypatch, no_backoff):
+    store = _BatchStore(failing_docs={"UC1"}, transient_docs={"UC2"})
+    _use_store(monkeypatch, store)
+    df = pd.DataFrame({"No. UC": ["UC0", "UC1", "UC2", "UC3"], "Contrato": ["A", "B", "C", "D"]})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert (summary.written, summary.failed, summary.failed_ids) == (1, 3, ["UC1", "UC2", "UC3"])
+    assert set(store.docs) == {"UC0"}
+
+
+def test_save_enrichment_data_erro_permanente_falha_lote_sem_retry(monkeypatch):
+    store = _BatchStore(permanent_error=PermissionError("permission denied"))
+    _use_store(monkeypatch, store)
+    sleeps = []
+    monkeypatch.setattr(enrichment_service.time, "sleep", sleeps.append)
+    df = pd.DataFrame({"No. UC": [f"UC{i}" for i in range(3)], "Contrato": ["A"] * 3})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert (summary.written, summary.failed) == (0, 3)
+    assert store.commit_attempts == 1
+    assert sleeps == []
+    assert store.docs == {}
+
+
+def test_save_enrichment_data_ucs_repetidas_vale_a_ultima_linha(monkeypatch, no_backoff):
+    store = _BatchStore()
+    _use_store(monkeypatch, store)
+    ucs = [f"UC{i}" for i in range(600)] + ["UC0 ", "UC10"]
+    df = pd.DataFrame({"No. UC": ucs, "Contrato": ["velho"] * 600 + ["novo", "novo"]})
+
+    summary = enrichment_service.save_enrichment_data(df)
+
+    assert (summary.written, summary.failed) == (600, 0)
+    assert sorted(store.commit_sizes) == [100, 500]
+    assert store.docs["UC0"]["Contrato"] == "novo"
+    assert store.docs["UC10"]["Contrato"] == "novo"
+    assert store.docs["UC11"]["Contrato"] == "velho"
+
+
+def test_delete_enrichment_data_em_lote(monkeypatch, no_backoff):
+    store = _BatchStore()
+    store.docs = {f"UC{i}": {"x": 1} for i in range(600)}
+    _use_store(monkeypatch, store)
+
+    summary = enrichment_service.delete_enrichment_data([f"UC{i}" for i in range(550)])
+
+    assert (summary.written, summary.failed) == (550, 0)
+    assert sorted(store.commit_sizes) == [50, 500]
+    assert len(store.docs) == 50
+
+
+def test_save_enrichment_data_sem_adapter_reporta_falha(monkeypatch):
+    monkeypatch.setattr(enrichment_service, "_get_adapter", lambda: None)
+
+    summary = enrichment_service.save_enrichment_data(pd.DataFrame({"No. UC": ["UC1"]}))
+
+    assert not summary
+    assert summary.failed == 1
+
+
+def test_erros_transitorios_do_firestore():
+    gexc = pytest.importorskip("google.api_core.exceptions")
+    transient = enrichment_service._transient_errors()
+    for error in (gexc.ServiceUnavailable("x"), gexc.DeadlineExceeded("x"), gexc.Aborted("x"), gexc.ResourceExhausted("x")):
+        assert isinstance(error, transient)
+    for error in (gexc.PermissionDenied("x"), gexc.InvalidArgument("x"), ValueError("caminho inválido")):
+        assert not isinstance(error, transient)
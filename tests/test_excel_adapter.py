@@ -6,6 +6,7 @@ Cobre detecção dinâmica de header e formatação de Fatura Pai.
 import pytest
 import openpyxl
 import io
+import numpy as np
 import pandas as pd
 
 from logic.adapters.excel_adapter import (
@@ -15,6 +16,7 @@ from logic.adapters.excel_adapter import (
     HeaderNotFoundError,
 )
 from logic.core.mapping import COLUMN_MAPPING, PARENT_ROW_FLAG
+from logic.core.periods import PERIOD_KEY_COL, PeriodRange
 
 
 def _mapped_column_index(logical_name: str) -> int:
@@ -75,6 +77,14 @@ class TestBaseExcelReader:
         assert "Cliente Gamma" in clients
         assert clients == sorted(clients)
 
+    def test_get_client_documents(self, sample_base_xlsx):
+        """Deve retornar os CPF/CNPJ distintos de cada cliente, apenas com dígitos."""
+        reader = BaseExcelReader(sample_base_xlsx)
+        documents = reader.get_client_documents()
+
+        assert documents["Cliente Alpha"] == ["11111111000101"]
+        assert documents["Cliente Gamma"] == ["33333333000103"]
+
     def test_get_periods(self, sample_base_xlsx):
         """Deve retornar lista de períodos únicos."""
         reader = BaseExcelReader(sample_base_xlsx)
@@ -139,6 +149,40 @@ class TestBaseExcelReader:
         filtered = reader.filter_data(["CORPOREOS SERVICOS"], ["11/2025"])
         assert set(filtered["No. UC"].tolist()) == {"UC1", "UC2"}
 
+    def test_filter_data_por_intervalo_de_periodos(self):
+        """PeriodRange recorta o mesmo que a lista equivalente de competências, em qualquer formato."""
+        reader = BaseExcelReader.__new__(BaseExcelReader)
+        reader.sheet_name = "Balanco Operacional"
+        reader.df = pd.DataFrame(
+            {
+                "Referencia": ["2025-11-01", "12/2025", "01-2026", pd.Timestamp("2026-02-01"), None, "11/2025"],
+                "No. UC": ["UC1", "UC2", "UC3", "UC4", "UC5", "UC6"],
+            }
+        )
+
+        by_range = reader.filter_data([], PeriodRange.between("12/2025", "02/2026"))
+        by_list = reader.filter_data([], ["12/2025", "01/2026", "02/2026"])
+        assert by_range["No. UC"].tolist() == by_list["No. UC"].tolist() == ["UC2", "UC3", "UC4"]
+
+        last_two = reader.periods_in_range(PeriodRange.last_months(2, latest="02/2026"))
+        assert last_two == ["01/2026", "02/2026"]
+        assert reader.filter_data([], PeriodRange(start=202101, end=202112)).empty
+
+    def test_filter_data_usa_chave_inteira_do_sync(self):
+        """Com _period_key gravada no sync, o filtro compara as chaves sem reinterpretar a Referência."""
+        reader = BaseExcelReader.__new__(BaseExcelReader)
+        reader.sheet_name = "Balanco Operacional"
+        reader.df = pd.DataFrame(
+            {
+                "Referencia": ["texto livre", "texto livre"],
+                PERIOD_KEY_COL: np.array([202601, 202602], dtype=np.int32),
+                "No. UC": ["UC1", "UC2"],
+            }
+        )
+
+        assert reader.filter_data([], ["02/2026"])["No. UC"].tolist() == ["UC2"]
+        assert reader.filter_data([], PeriodRange.between("01/2026", "01/2026"))["No. UC"].tolist() == ["UC1"]
+
 
 class TestTemplateExcelWriter:
     """Testes do escritor de template com formatação de Fatura Pai."""
@@ -210,6 +254,122 @@ class TestTemplateExcelWriter:
         # Linha 3 = UC Filha (não deve estar em negrito via parent_font)
         child_cell = ws.cell(row=3, column=razao_social_col)
         assert child_cell.value == "Cliente Alpha"
+
+    def test_estilos_por_tipo_de_linha_nao_vazam_entre_linhas(self, sample_template_xlsx):
+        """Estilo de Fatura Pai e destaque de ausência não devem contaminar as linhas seguintes."""
+        df = pd.DataFrame({
+            "No. UC": ["AGRUPADO", "UC001", "UC002"],
+            "Razao Social": ["TOTAL AGRUPADO", "Cliente Alpha", "Cliente Alpha"],
+            "Vencimento": [pd.NA, "2026-01-15", pd.NA],
+            "Valor Enviado Emissão": [700, 350, 350],
+            PARENT_ROW_FLAG: [True, False, False],
+        })
+
+        result = TemplateExcelWriter(sample_template_xlsx).generate_bytes(df, COLUMN_MAPPING)
+        ws = openpyxl.load_workbook(io.BytesIO(result)).active
+
+        razao_col = _mapped_column_index("Razao Social")
+        venc_col = _mapped_column_index("Vencimento")
+        valor_col = _mapped_column_index("Valor Enviado Emissão")
+
+        assert ws.cell(row=2, column=razao_col).fill.fill_type == "solid"
+        assert ws.cell(row=3, column=razao_col).font.bold is not True
+        assert ws.cell(row=3, column=razao_col).fill.fill_type is None
+        assert ws.cell(row=4, column=venc_col).font.color.rgb.endswith("BF360C")
+        assert ws.cell(row=3, column=venc_col).font.color.rgb != "00BF360C"
+        assert {ws.cell(row=r, column=valor_col).number_format for r in (2, 3, 4)} == {"#,##0.00"}
+
+    def test_abas_por_distribuidora_herdam_layout_do_template(self, tmp_path):
+        """Cada aba por distribuidora recebe cabeçalho, larguras e painel do template, sem aba temporária."""
+        template_path = tmp_path / "template_layout.xlsx"
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.cell(row=1, column=1, value="UC").font = openpyxl.styles.Font(bold=True, color="FFFFFF")
+        ws.column_dimensions["A"].width = 24
+        ws.freeze_panes = "A2"
+        wb.save(template_path)
+
+        df = pd.DataFrame({
+            "No. UC": ["UC001", "UC002", "UC003"],
+            "Distribuidora": ["CEMIG", "ENEL", "CEMIG"],
+            PARENT_ROW_FLAG: [False, False, False],
+        })
+        mapping = {"No. UC": "No. UC", "Distribuidora": "Distribuidora"}
+        result = TemplateExcelWriter(str(template_path)).generate_bytes(df, mapping, tipo_apresentacao="Por Distribuidora")
+
+        wb_res = openpyxl.load_workbook(io.BytesIO(result))
+        assert wb_res.sheetnames == ["CEMIG", "ENEL"]
+        for ws_res in wb_res.worksheets:
+            assert [c.value for c in ws_res[1]] == ["No. UC", "Distribuidora"]
+            assert ws_res.cell(row=1, column=1).font.bold is True
+            assert ws_res.column_dimensions["A"].width == 24
+            assert ws_res.freeze_panes == "A2"
+        assert [c.value for c in wb_res["CEMIG"]["A"]][1:] == ["UC001", "UC003"]
+
+    def test_abas_herdam_formatacao_condicional_validacao_e_impressao_do_mc(self, tmp_path):
+        """Abas escritas do zero mantêm formatação condicional, validação e impressão do template real."""
+        from openpyxl.formatting.rule import CellIsRule
+        from openpyxl.worksheet.datavalidation import DataValidation
+
+        wb = openpyxl.load_workbook("mc.xlsx")
+        ws = wb.active
+        ws.conditional_formatting.add("B2:B500", CellIsRule(operator="lessThan", formula=["0"], font=openpyxl.styles.Font(color="FF0000")))
+        validation = DataValidation(type="list", formula1='"Sim,Não"', allow_blank=True)
+        validation.add("C2:C500")
+        ws.add_data_validation(validation)
+        ws.page_setup.orientation = "landscape"
+        ws.page_setup.paperSize = ws.PAPERSIZE_A4
+        ws.sheet_properties.pageSetUpPr.fitToPage = True
+        ws.print_title_rows = "1:1"
+        ws.page_margins.left = 0.3
+        template_path = tmp_path / "mc_impressao.xlsx"
+        wb.save(template_path)
+
+        df = pd.DataFrame({"No. UC": ["UC001", "UC002"], "Distribuidora": ["CEMIG", "ENEL"], PARENT_ROW_FLAG: [False, False]})
+        mapping = {"No. UC": "No. UC", "Distribuidora": "Distribuidora", "Contrato": "Contrato"}
+        result = TemplateExcelWriter(str(template_path)).generate_bytes(df, mapping, tipo_apresentacao="Por Distribuidora")
+
+        wb_res = openpyxl.load_workbook(io.BytesIO(result))
+        assert wb_res.sheetnames == ["CEMIG", "ENEL"]
+        for ws_res in wb_res.worksheets:
+            assert [str(cf.sqref) for cf in ws_res.conditional_formatting] == ["B2:B500"]
+            assert [(str(dv.sqref), dv.formula1) for dv in ws_res.data_validations.dataValidation] == [("C2:C500", '"Sim,Não"')]
+            assert (ws_res.page_setup.orientation, ws_res.page_setup.paperSize) == ("landscape", 9)
+            assert ws_res.sheet_properties.pageSetUpPr.fitToPage is True
+            assert ws_res.print_title_rows == "$1:$1"
+            assert ws_res.page_margins.left == 0.3
+
+    def test_template_lido_uma_vez_por_processo_e_mtime(self, tmp_path, monkeypatch):
+        """O descritor do template é reaproveitado entre gerações e refeito quando o arquivo muda."""
+        import os
+        from logic.adapters import excel_adapter
+
+        template_path = tmp_path / "template_cache.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.column_dimensions["A"].width = 18
+        wb.save(template_path)
+
+        excel_adapter.clear_template_cache()
+        loads = []
+        real_load = openpyxl.load_workbook
+        monkeypatch.setattr(openpyxl, "load_workbook", lambda *a, **k: loads.append(1) or real_load(*a, **k))
+
+        df = pd.DataFrame({"No. UC": ["UC001"], PARENT_ROW_FLAG: [False]})
+        mapping = {"No. UC": "No. UC"}
+        for _ in range(3):
+            TemplateExcelWriter(str(template_path)).generate_bytes(df, mapping)
+        assert len(loads) == 1
+
+        wb.active.column_dimensions["A"].width = 30
+        wb.save(template_path)
+        stat = os.stat(template_path)
+        os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        monkeypatch.setattr(openpyxl, "load_workbook", real_load)
+        result = TemplateExcelWriter(str(template_path)).generate_bytes(df, mapping)
+        assert openpyxl.load_workbook(io.BytesIO(result)).active.column_dimensions["A"].width == 30
+        excel_adapter.clear_template_cache()
+
     def test_renomeacao_headers_legados(self, tmp_path):
         """Deve detectar nomes antigos no template e convertê-los para os nomes da fonte no resultado."""
         template_path = tmp_path / "legacy_template.xlsx"
@@ -316,6 +476,45 @@ class TestTemplateExcelWriter:
         assert uc_cell.comment is not None
         assert "Dado ausente" in uc_cell.comment.text
 
+    def test_marcador_ausencia_em_coluna(self, sample_template_xlsx):
+        """Perfil 'column': campos faltantes numa coluna extra, sem comentários."""
+        df = pd.DataFrame({
+            "No. UC": ["UC001", "UC002"],
+            "Vencimento": [pd.NA, "2026-01-15"],
+            "Status Pos-Faturamento": [pd.NA, "Pago"],
+            PARENT_ROW_FLAG: [False, False],
+        })
+
+        result = TemplateExcelWriter(sample_template_xlsx).generate_bytes(df, COLUMN_MAPPING, missing_marker="column")
+        ws = openpyxl.load_workbook(io.BytesIO(result)).active
+
+        marker_col = len(COLUMN_MAPPING) + 1
+        assert ws.cell(row=1, column=marker_col).value == "Dados Ausentes"
+        assert ws.cell(row=2, column=marker_col).value == "Data de Vencimento, Situação do Pagamento"
+        assert ws.cell(row=3, column=marker_col).value is None
+        assert ws.cell(row=2, column=_mapped_column_index("No. UC")).comment is None
+
+    def test_marcador_ausencia_em_aba_legenda(self, sample_template_xlsx):
+        """Perfil 'legend': uma aba Legenda lista aba, linha e UC das linhas com ausência."""
+        df = pd.DataFrame({
+            "No. UC": ["UC001", "UC002", "UC003"],
+            "Vencimento": ["2026-01-15", pd.NA, pd.NA],
+            "Status Pos-Faturamento": ["Pago", "Em aberto", "Em aberto"],
+            PARENT_ROW_FLAG: [False, False, False],
+        })
+
+        result = TemplateExcelWriter(sample_template_xlsx).generate_bytes(df, COLUMN_MAPPING, missing_marker="legend")
+        wb = openpyxl.load_workbook(io.BytesIO(result))
+
+        assert wb.sheetnames == ["Consolidado", "Legenda"]
+        legend = [row for row in wb["Legenda"].iter_rows(min_row=4, values_only=True)]
+        assert [(aba, linha, uc) for aba, linha, uc, _ in legend] == [("Consolidado", 3, "UC002"), ("Consolidado", 4, "UC003")]
+        assert wb["Consolidado"].cell(row=3, column=_mapped_column_index("No. UC")).comment is None
+
+    def test_marcador_ausencia_invalido(self, sample_template_xlsx):
+        with pytest.raises(ValueError):
+            TemplateExcelWriter(sample_template_xlsx).generate_bytes(pd.DataFrame({"No. UC": ["UC001"]}), COLUMN_MAPPING, missing_marker="vml")
+
     def test_format_date_iso_regression(self):
         """
         Garante que strings de data em formato ISO (YYYY-MM-DD) convertidas pelo pandas 
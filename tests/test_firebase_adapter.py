@@ -11,7 +11,20 @@ sys.modules['firebase_admin.firestore'] = MagicMock()
 import firebase_admin
 firebase_admin._apps = {}
 
-from logic.adapters.firebase_adapter import FirebaseAdapter, FirebaseAdapterError
+from logic.adapters import firebase_adapter
+from logic.adapters.firebase_adapter import FirebaseAdapter, FirebaseAdapterError, get_shared_adapter
+
+
+@pytest.fixture(autouse=True)
+def fake_firebase_sdk(monkeypatch):
+    """O SDK é importado sob demanda: cada teste vê um mock próprio, sem app inicializado."""
+    sdk = MagicMock()
+    sdk._apps = {}
+    monkeypatch.setitem(sys.modules, "firebase_admin", sdk)
+    for sub in ("credentials", "storage", "firestore"):
+        monkeypatch.setitem(sys.modules, f"firebase_admin.{sub}", getattr(sdk, sub))
+    return sdk
+
 
 def test_firebase_missing_bucket():
     # Deve falhar imediatamente sem bucket
@@ -23,3 +36,54 @@ def test_firebase_missing_credentials():
     # A inicialização vai tentar ler e eventualmente falhar na credencial nula
     with pytest.raises(FirebaseAdapterError, match="Nenhuma credencial Firebase encontrada"):
         FirebaseAdapter(credentials_path="/fake/path/doesnt_exist.json", bucket_name="dummy_bucket")
+
+
+def test_adaptador_compartilhado_inicializa_uma_vez(fake_firebase_sdk):
+    cred = {"type": "service_account"}
+
+    first = get_shared_adapter(cred, "dummy_bucket")
+    second = get_shared_adapter(cred, "dummy_bucket")
+
+    assert first is second
+    assert fake_firebase_sdk.initialize_app.call_count == 1
+    assert first._get_db() is first._get_db()
+    assert first._get_bucket() is first._get_bucket()
+    assert fake_firebase_sdk.firestore.client.call_count == 1
+    assert fake_firebase_sdk.storage.bucket.call_count == 1
+
+
+def test_falha_aguarda_intervalo_antes_de_reconectar(monkeypatch):
+    calls = []
+    real_init = FirebaseAdapter.__init__
+
+    def counting_init(self, *args):
+        calls.append(args)
+        real_init(self, *args)
+
+    monkeypatch.setattr(FirebaseAdapter, "__init__", counting_init)
+    for _ in range(2):
+        with pytest.raises(FirebaseAdapterError, match="Nenhuma credencial"):
+            get_shared_adapter("/fake/path/doesnt_exist.json", "dummy_bucket")
+    assert len(calls) == 1
+
+    monkeypatch.setattr(firebase_adapter, "RETRY_AFTER_SECONDS", 0.0)
+    with pytest.raises(FirebaseAdapterError):
+        get_shared_adapter("/fake/path/doesnt_exist.json", "dummy_bucket")
+    assert len(calls) == 2
+
+
+def test_health_check_em_cache_e_reconexao_apos_falha(fake_firebase_sdk):
+    adapter = get_shared_adapter({"type": "service_account"}, "dummy_bucket")
+    db = fake_firebase_sdk.firestore.client.return_value
+
+    assert adapter.test_connection(max_age_seconds=60)
+    assert adapter.test_connection(max_age_seconds=60)
+    assert db.collections.call_count == 1
+
+    db.collections.side_effect = RuntimeError("deadline exceeded")
+    with pytest.raises(FirebaseAdapterError, match="indisponível"):
+        adapter.test_connection(max_age_seconds=0)
+
+    db.collections.side_effect = None
+    assert adapter.test_connection(max_age_seconds=0)
+    assert fake_firebase_sdk.firestore.client.call_count == 2
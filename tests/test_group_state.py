@@ -0,0 +1,70 @@
+"""
+Testes do estado dos grupos do wizard (seleção de clientes e índice de grupos).
+"""
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from ui.state import group_state
+from ui.state.group_state import GroupState
+
+
+class _SessionState(dict):
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture
+def session(monkeypatch):
+    state = _SessionState()
+    monkeypatch.setattr(group_state, "st", SimpleNamespace(session_state=state))
+    group_state.initialize_groups()
+    return state
+
+
+def test_selecao_mantem_ordem_e_ignora_duplicados(session):
+    group_state.select_clients(1, ["B", "A", "B"])
+    group_state.update_group_clients(1, "A", True)
+    group_state.update_group_clients(1, "C", True)
+
+    group = group_state.get_group(1)
+    assert group.clients == ["B", "A", "C"]
+    assert group_state.group_has_client(group, "C")
+
+
+def test_remocao_individual_e_em_lote(session):
+    group_state.select_clients(1, ["A", "B", "C", "D"])
+
+    group_state.update_group_clients(1, "B", False)
+    group_state.deselect_clients(1, ["D", "A", "Z"])
+
+    group = group_state.get_group(1)
+    assert group.clients == ["C"]
+    assert not group_state.group_has_client(group, "A")
+
+    group_state.clear_group_clients(1)
+    assert group.clients == []
+    assert not group_state.group_has_client(group, "C")
+
+
+def test_indice_de_grupos_acompanha_inclusao_e_remocao(session):
+    novo = group_state.add_group()
+    assert group_state.get_group(novo.id) is novo
+
+    group_state.remove_group(novo.id)
+    assert group_state.get_group(novo.id) is None
+
+    session.groups = [GroupState(id=7, name="Externo")]
+    assert group_state.get_group(7).name == "Externo"
+
+
+def test_construtor_deduplica_e_objeto_e_serializavel():
+    group = GroupState(id=1, name="G", clients=["A", "B", "A"], periods=["01/2026"])
+
+    assert group.clients == ["A", "B"]
+    assert not hasattr(group, "__dict__")
+
+    restored = pickle.loads(pickle.dumps(group))
+    assert restored == group
+    assert group_state.group_has_client(restored, "B")
@@ -0,0 +1,85 @@
+"""
+Testes dos agregados de Fatura Pai pré-calculados no sync (logic.core.grouping).
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_bases
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.grouping import PARENT_GROUP_COL, build_parent_aggregates
+from logic.core.mapping import PARENT_ROW_FLAG
+from logic.services.orchestrator import Orchestrator
+from logic.services.sync_service import _save_parquet_safe, parent_aggregates_path
+
+
+def _orchestrator(df, table):
+    reader = BaseExcelReader.__new__(BaseExcelReader)
+    reader.sheet_name = "Balanco Operacional"
+    reader.df = df
+    orch = Orchestrator.__new__(Orchestrator)
+    orch.reader = reader
+    orch.prejoined_enrichment_cols = []
+    orch._parent_aggregates_table = table
+    return orch
+
+
+def _assert_same_grouping(orch, scope, monkeypatch=None, **kwargs):
+    if monkeypatch is not None:
+        # Garante que o caminho pré-calculado foi de fato usado
+        with monkeypatch.context() as m:
+            m.setattr(orch, "_aggregate_groups", lambda *a, **k: pytest.fail("agregou na hora"))
+            fast = orch._apply_grouping(scope, **kwargs)
+    else:
+        fast = orch._apply_grouping(scope, **kwargs)
+    live = orch._apply_grouping(scope, use_precomputed=False, **kwargs)
+    pd.testing.assert_frame_equal(fast, live, check_dtype=False)
+    return fast
+
+
+def test_agregados_por_grupo_e_id_por_linha(sample_base_df):
+    row_groups, table = build_parent_aggregates(sample_base_df)
+
+    gamma = sample_base_df["Razao Social"].eq("Cliente Gamma").to_numpy()
+    assert row_groups[gamma].nunique() == 1
+    parent = table.loc[row_groups[gamma].iloc[0]]
+    assert parent["membros"] == 2
+    assert bool(parent["is_group"]) is True
+    assert parent["Valor Enviado Emissão"] == pytest.approx(380.0)
+    assert int(table["is_group"].sum()) == 1
+
+
+@pytest.mark.parametrize("include_child_rows", [True, False])
+def test_agrupamento_pre_calculado_equivale_ao_calculado_na_hora(include_child_rows, monkeypatch):
+    base = generate_bases(3000, seed=11).consolidated
+    orch = _orchestrator(base, build_parent_aggregates(base)[1])
+    clients = orch.reader.get_clients()
+
+    for selection in (clients[:20], clients):
+        scope = orch._restrict_to_portal_invoices(orch.reader.filter_data(selection, orch.reader.get_periods()[:2]))
+        result = _assert_same_grouping(orch, scope, monkeypatch, include_child_rows=include_child_rows)
+        assert PARENT_GROUP_COL not in result.columns
+
+
+def test_grupo_incompleto_no_escopo_agrega_na_hora(sample_base_df):
+    row_groups, table = build_parent_aggregates(sample_base_df)
+    base = sample_base_df.assign(**{PARENT_GROUP_COL: row_groups})
+    orch = _orchestrator(base, table)
+    partial = base[base["No. UC"].isin(["UC004", "UC006"])].copy()
+
+    assert orch._precomputed_grouping(partial, ["Referencia"], True) is None
+    result = _assert_same_grouping(orch, partial)
+    assert not result[PARENT_ROW_FLAG].eq(True).any()
+
+
+def test_orchestrator_le_agregados_gravados_ao_lado_da_base(tmp_path, sample_base_df, sample_template_xlsx, monkeypatch):
+    row_groups, table = build_parent_aggregates(sample_base_df)
+    parquet = str(tmp_path / "base_consolidada.parquet")
+    sample_base_df.assign(**{PARENT_GROUP_COL: row_groups}).to_parquet(parquet, index=False)
+    assert _save_parquet_safe(table, parent_aggregates_path(parquet))
+
+    orch = Orchestrator(parquet, sample_template_xlsx)
+    scope = orch.reader.filter_data(orch.get_available_clients(), orch.get_available_periods())
+
+    assert orch._parent_aggregates() is not None
+    result = _assert_same_grouping(orch, scope, monkeypatch)
+    assert result[PARENT_ROW_FLAG].eq(True).sum() == 1
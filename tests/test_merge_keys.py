@@ -0,0 +1,42 @@
+"""
+Testes das chaves inteiras do cruzamento Balanço × Gestão (logic.core.merge_keys).
+"""
+import numpy as np
+import pandas as pd
+
+from logic.core.merge_keys import UC_KEY_MISSING, combined_keys, encode_uc_keys, lookup_positions, uc_digits
+
+
+def test_uc_digits_normaliza_como_o_sync():
+    series = pd.Series([42074274.0, "42074274.0", " 0005143128 ", "UC-77", None, "", "abc"], dtype=object)
+    assert uc_digits(series).tolist() == ["42074274", "42074274", "5143128", "77", "", "", ""]
+
+
+def test_encode_uc_keys_conjunto_e_ucs_largas():
+    wide = "1" * 25
+    left, right = encode_uc_keys(pd.Series(["0042", wide, None]), pd.Series([42, "x", f"{wide}.0"]))
+    assert left.dtype == np.int64
+    assert left[0] == right[0] == 42
+    assert left[2] == right[1] == UC_KEY_MISSING
+    assert left[1] == right[2] and left[1] < UC_KEY_MISSING
+
+
+def test_combined_keys_e_busca_unica():
+    gestao_uc, base_uc, rateio_uc = encode_uc_keys(
+        pd.Series(["10", "10", "20"]), pd.Series(["10", "10", "99", ""]), pd.Series(["", "", "20", "20"]),
+    )
+    gestao_periods = np.array([202601, 202602, 202601])
+    base_periods = np.array([202602, 0, 202601, 202601])
+    gestao_keys, base_keys, rateio_keys = combined_keys(
+        [gestao_uc, base_uc, rateio_uc], [gestao_periods, base_periods, base_periods],
+    )
+
+    assert len(set(gestao_keys)) == 3
+    assert lookup_positions(gestao_keys, base_keys).tolist() == [1, -1, -1, -1]
+    assert lookup_positions(gestao_keys, rateio_keys).tolist() == [-1, -1, 2, 2]
+
+
+def test_combined_keys_sem_competencia():
+    gestao_uc, base_uc = encode_uc_keys(pd.Series(["10", "20"]), pd.Series(["20", None]))
+    gestao_keys, base_keys = combined_keys([gestao_uc, base_uc])
+    assert lookup_positions(gestao_keys, base_keys).tolist() == [1, -1]
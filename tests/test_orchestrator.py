@@ -56,6 +56,23 @@ class TestOrchestrator:
         assert isinstance(result, bytes)
         assert len(result) > 0
 
+    def test_preview_aplica_pipeline_sem_gerar_excel(self, sample_base_xlsx, sample_template_xlsx, monkeypatch):
+        """A prévia deve trazer Fatura Pai e filhas com cabeçalhos do template, sem usar o writer."""
+        import logic.services.orchestrator as orchestrator_module
+
+        def _writer_proibido(*args, **kwargs):
+            raise AssertionError("preview não deve instanciar o TemplateExcelWriter")
+        monkeypatch.setattr(orchestrator_module, "TemplateExcelWriter", _writer_proibido)
+
+        orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+        preview = orch.preview(["Cliente Gamma", "Cliente Alpha"], orch.get_available_periods(), sort_by="Razão Social")
+
+        assert preview.columns[0] == "Linha"
+        assert "Tipo de Faturamento" in preview.columns
+        assert preview["Linha"].value_counts().to_dict() == {"Individual": 2, "Fatura Pai": 1, "UC Filha": 2}
+        assert len(orch.preview(["Cliente Gamma", "Cliente Alpha"], orch.get_available_periods(), limit=2)) == 2
+        assert orch.preview(["Cliente Fantasma"], orch.get_available_periods()).empty
+
     def test_generate_retorna_none_sem_dados(self, sample_base_xlsx, sample_template_xlsx):
         """Deve retornar None quando não há dados após filtragem."""
         orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
@@ -233,6 +250,46 @@ class TestGenerateMultiple:
             names = zf.namelist()
             assert "Cliente_Alpha_jan_fev_2026.xlsx" in names
 
+    def test_generate_multiple_zip_sem_recompressao_por_padrao(self, sample_base_xlsx, sample_template_xlsx, monkeypatch):
+        """Membros .xlsx já são comprimidos: o padrão é ZIP_STORED; deflated respeita o nível configurado."""
+        from config.settings import settings
+        from logic.services import archive
+
+        orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+        groups = [{"name": "Grupo_Alpha", "clients": ["Cliente Alpha"], "periods": orch.get_available_periods()}]
+
+        with zipfile.ZipFile(io.BytesIO(orch.generate_multiple(groups))) as zf:
+            assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_STORED}
+
+        monkeypatch.setattr(settings, "archive_compression", "deflated")
+        monkeypatch.setattr(settings, "archive_compresslevel", 9)
+        assert archive.zip_options() == {"compression": zipfile.ZIP_DEFLATED, "compresslevel": 9}
+        with zipfile.ZipFile(io.BytesIO(orch.generate_multiple(groups))) as zf:
+            assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_DEFLATED}
+
+    def test_generate_multiple_workbook_uma_aba_por_grupo(self, sample_base_xlsx, sample_template_xlsx):
+        """Com output_format='workbook', o lote vira um único .xlsx com uma aba por grupo."""
+        import openpyxl
+
+        orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+        periods = orch.get_available_periods()
+        groups = [
+            {"name": "Grupo_Alpha", "clients": ["Cliente Alpha"], "periods": periods},
+            {"name": "Grupo_Beta", "clients": ["Cliente Beta"], "periods": periods},
+            {"name": "Grupo_Vazio", "clients": ["Fantasma"], "periods": periods},
+        ]
+
+        result = orch.generate_multiple(groups, incluir_resumo=True, output_format="workbook")
+
+        wb = openpyxl.load_workbook(io.BytesIO(result))
+        assert wb.sheetnames == ["Grupo_Alpha", "Grupo_Beta", "Resumo Executivo"]
+        assert wb["Grupo_Alpha"].max_row > 1
+
+    def test_generate_multiple_formato_invalido(self, sample_base_xlsx, sample_template_xlsx):
+        orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+        with pytest.raises(ValueError):
+            orch.generate_multiple([], output_format="rar")
+
 
 class TestIncompleteData:
     """Testes para identificação de faturas sem correspondência na gestão."""
@@ -283,6 +340,25 @@ class TestIncompleteData:
         assert info["registros_incompletos"] == 0
         assert len(info["ucs_afetadas"]) == 0
 
+    def test_review_metrics_conta_por_mascara_e_pagina_detalhes(self, sample_base_xlsx, sample_template_xlsx, monkeypatch):
+        """review_metrics não deve copiar a base e deve bater com check_incomplete_rows."""
+        orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+        orch.reader.df.loc[orch.reader.df["No. UC"].isin(["UC001", "UC004"]), "Vencimento"] = None
+        periods = orch.get_available_periods()
+        expected = orch.check_incomplete_rows(["Cliente Alpha", "Cliente Gamma"], periods)
+
+        def _no_copy(*args, **kwargs):
+            raise AssertionError("filter_data não deve ser chamado")
+        monkeypatch.setattr(orch.reader, "filter_data", _no_copy)
+
+        metrics = orch.review_metrics(["Cliente Alpha", "Cliente Gamma"], periods)
+        assert orch.count_filtered(["Cliente Alpha", "Cliente Gamma"], periods) == metrics.total == 4
+        assert metrics.incomplete == expected["registros_incompletos"] == 2
+        assert metrics.complete == 2
+        assert metrics.incomplete_rows.to_frame().to_dict("records") == expected["ucs_afetadas"]
+        assert list(metrics.incomplete_rows.page(0, size=1).columns) == ["no_uc", "referencia", "razao_social"]
+        assert metrics.incomplete_rows.page(1, size=1)["no_uc"].tolist() == ["UC004"]
+
 
 class TestPortalOnlyGeneration:
     """Testes do filtro portal-first aplicado na geração."""
@@ -0,0 +1,67 @@
+"""
+Testes da chave inteira de competência e da seleção por intervalo (logic.core.periods).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.core.periods import (
+    PERIOD_KEY_MISSING,
+    PeriodRange,
+    add_months,
+    format_period_key,
+    nullable_period_keys,
+    period_key,
+    period_key_to_timestamp,
+    period_keys,
+    periods_in_range,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("03/2026", 202603),
+    ("03-2026", 202603),
+    ("2026-03", 202603),
+    ("2026-03-01 00:00:00", 202603),
+    (pd.Timestamp("2026-03-15"), 202603),
+    (202603, 202603),
+    ("", PERIOD_KEY_MISSING),
+    (None, PERIOD_KEY_MISSING),
+    ("não disponível", PERIOD_KEY_MISSING),
+])
+def test_period_key_aceita_formatos_da_base(value, expected):
+    assert period_key(value) == expected
+
+
+def test_period_keys_vetorizado_int32_e_nullable_para_merge():
+    series = pd.Series(["01/2026", "2026-01-01", None, "12/2025"], index=[10, 11, 12, 13])
+    keys = period_keys(series)
+
+    assert keys.dtype == np.int32
+    assert keys.index.tolist() == [10, 11, 12, 13]
+    assert keys.tolist() == [202601, 202601, PERIOD_KEY_MISSING, 202512]
+    assert nullable_period_keys(series).isna().tolist() == [False, False, True, False]
+
+
+def test_conversoes_e_aritmetica_de_meses():
+    assert format_period_key(202603) == "03/2026"
+    assert period_key_to_timestamp(202603) == pd.Timestamp("2026-03-01")
+    assert pd.isna(period_key_to_timestamp(pd.NA))
+    assert add_months(202601, -1) == 202512
+    assert add_months(202611, 14) == 202801
+
+
+def test_intervalos_por_busca_binaria():
+    periods = ["02/2026", "10/2025", "11/2025", "12/2025", "01/2026"]
+
+    assert periods_in_range(periods, PeriodRange.last_months(3, latest="02/2026")) == ["12/2025", "01/2026", "02/2026"]
+    # Limites invertidos são normalizados; limites abertos vão até as pontas
+    assert periods_in_range(periods, PeriodRange.between("01/2026", "11/2025")) == ["11/2025", "12/2025", "01/2026"]
+    assert periods_in_range(periods, PeriodRange.between(start="01/2026")) == ["01/2026", "02/2026"]
+    assert periods_in_range(periods, PeriodRange(start=202001, end=202012)) == []
+
+    sorted_keys = np.array([202510, 202510, 202511, 202601])
+    assert PeriodRange.between("10/2025", "11/2025").locate(sorted_keys) == slice(0, 3)
+
+    with pytest.raises(ValueError):
+        PeriodRange.last_months(0, latest="02/2026")
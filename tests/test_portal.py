@@ -0,0 +1,136 @@
+"""
+Testes da identidade portal-first pré-calculada no sync (logic.core.portal).
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_bases
+from logic.adapters.excel_adapter import BaseExcelReader
+from logic.core.portal import PORTAL_COLUMNS, client_scope_keys, resolve_portal_identity
+from logic.services.orchestrator import Orchestrator
+
+
+def _orchestrator(df):
+    reader = BaseExcelReader.__new__(BaseExcelReader)
+    reader.sheet_name = "Balanco Operacional"
+    reader.df = df
+    orch = Orchestrator.__new__(Orchestrator)
+    orch.reader = reader
+    orch.prejoined_enrichment_cols = []
+    return orch
+
+
+def _rows(df):
+    cols = ["No. UC", "Referencia", "Valor Enviado Emissão", "Número da conta", "Fonte dos Dados"]
+    return sorted(map(str, df[cols].itertuples(index=False, name=None)))
+
+
+def test_resolve_uc_final_rank_e_linha_mantida():
+    df = pd.DataFrame({
+        "No. UC": ["631753726", "W7008678589", "UC1", "UC1", "UC2", "UC3.0"],
+        "UC p Rateio": [pd.NA, "631753726", "P-1", "P-1", pd.NA, pd.NA],
+        "Referencia": ["11/2025", "02/2026", "11/2025", "11/2025", "11/2025", "11/2025"],
+        "Fonte dos Dados": ["Fatura", "Contrato", "Regra de Negócio", "Fatura", "Fatura", "Fatura"],
+        "Número da conta": ["A1", pd.NA, pd.NA, "C1", "C2", "C3"],
+        "Valor Enviado Emissão": ["1,00", 0.0, 10.0, 20.0, 30.0, 40.0],
+        "Valor_gestao": [2687.26, 0.0, 111.0, 111.0, pd.NA, 50.0],
+    }, index=[7, 7, 8, 9, 10, 11])
+
+    out = resolve_portal_identity(df)
+
+    assert out.index.tolist() == df.index.tolist()
+    assert out["_uc_final"].tolist() == ["W7008678589", "631753726", "P-1", "P-1", "UC2", "UC3"]
+    assert out["_portal_rank"].tolist() == [0, -1, 1, 0, -1, 0]
+    assert out["_portal_keep"].tolist() == [True, False, False, True, False, True]
+
+
+def test_base_sem_gestao_fica_inalterada():
+    df = pd.DataFrame({"No. UC": ["UC1"], "Referencia": ["01/2026"]})
+
+    assert resolve_portal_identity(df) is df
+
+
+@pytest.mark.parametrize("with_periods", [False, True])
+def test_filtro_pre_calculado_equivale_a_resolucao_por_escopo(with_periods):
+    base = generate_bases(1200, seed=5).consolidated
+    fast = _orchestrator(base)
+    legacy = _orchestrator(base.drop(columns=PORTAL_COLUMNS))
+    periods = fast.reader.get_periods()[:2] if with_periods else []
+
+    for client in fast.reader.get_clients()[:25]:
+        expected = legacy._restrict_to_portal_invoices(
+            legacy.reader.filter_data([client], periods),
+            alias_lookup_df=legacy.reader.filter_data([client], []),
+        )
+        result = fast._restrict_to_portal_invoices(fast.reader.filter_data([client], periods))
+
+        assert _rows(result) == _rows(expected)
+        assert not set(PORTAL_COLUMNS) & set(result.columns)
+
+
+def test_clientes_com_a_mesma_uc_do_portal_nao_se_misturam():
+    df = pd.DataFrame({
+        "Razao Social": ["Beta", "Alfa", "Alfa Filial", "Beta"],
+        "CPF/CNPJ": ["222", "111", "11.1", "222"],
+        "No. UC": ["W700B", "W700A", "631", "631"],
+        "_portal_uc": ["631", "631", pd.NA, pd.NA],
+        "Referencia": ["01/2026"] * 4,
+        "Fonte dos Dados": ["Fatura"] * 4,
+        "Número da conta": ["C1", "C2", "C3", "C4"],
+        "Valor Enviado Emissão": [0.0, 0.0, 10.0, 20.0],
+        "Valor_gestao": [0.0, 0.0, 10.0, 20.0],
+    })
+
+    out = resolve_portal_identity(df)
+
+    # Alfa Filial compartilha o CNPJ de Alfa: usa o alias de Alfa, não o de Beta (que vem antes)
+    assert out["_uc_final"].tolist()[2:] == ["W700A", "W700B"]
+    assert out["_portal_keep"].tolist() == [False, False, True, True]
+
+    orch = _orchestrator(out)
+    legacy = _orchestrator(df)
+    for client in ["Alfa", "Beta"]:
+        expected = legacy._restrict_to_portal_invoices(
+            legacy.reader.filter_data([client], []), alias_lookup_df=legacy.reader.filter_data([client], []),
+        )
+        assert _rows(orch._restrict_to_portal_invoices(orch.reader.filter_data([client], []))) == _rows(expected)
+
+
+def test_client_scope_keys_liga_razoes_sociais_pelo_documento():
+    keys = client_scope_keys(
+        pd.Series(["Alfa", "Alfa Filial", "Beta", pd.NA, pd.NA, "Gama"]),
+        pd.Series(["111", "1.11", "222", "222", pd.NA, pd.NA]),
+    )
+    assert keys[0] == keys[1]
+    assert keys[2] == keys[3] != keys[0]
+    assert keys[4] == -1
+    assert len({keys[0], keys[2], keys[5]}) == 3
+
+
+def test_escopo_transitivo_na_cadeia_de_documentos_e_selecao_de_um_passo():
+    # Cadeia A–doc1–B–doc2–C: o escopo reúne a cadeia, filter_mask de A anda um passo só
+    df = pd.DataFrame({
+        "Razao Social": ["A", "B", "B", "C", "D"],
+        "CPF/CNPJ": ["111", "111", "222", "222", "333"],
+        "No. UC": ["10", "20", "30", "10", "40"],
+        "_portal_uc": pd.array([pd.NA] * 5, dtype="string"),
+        "Referencia": ["01/2026"] * 5,
+        "Fonte dos Dados": ["Fatura"] * 5,
+        "Número da conta": ["C1", "C2", "C3", "C4", "C5"],
+        "Valor Enviado Emissão": [10.0, 20.0, 30.0, 15.0, 40.0],
+        "Valor_gestao": [10.0, 20.0, 30.0, 15.0, 40.0],
+    })
+
+    keys = client_scope_keys(df["Razao Social"], df["CPF/CNPJ"])
+    assert keys[0] == keys[1] == keys[2] == keys[3] != keys[4]
+
+    orch = _orchestrator(resolve_portal_identity(df))
+    assert orch.reader.filter_data(["A"], [])["No. UC"].tolist() == ["10", "20"]
+
+    # UC 10 de A e de C é a mesma cobrança no grupo: sai uma vez só, no arquivo de C
+    exported = [
+        uc
+        for client in ["A", "C"]
+        for uc in orch._restrict_to_portal_invoices(orch.reader.filter_data([client], []))["No. UC"]
+    ]
+    assert sorted(exported) == ["10", "20", "30"]
@@ -0,0 +1,101 @@
+"""
+Testes do cache em disco de planilhas geradas.
+"""
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from config.settings import settings
+from logic.services import result_cache
+from logic.services.orchestrator import Orchestrator
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(settings, "result_cache_enabled", True)
+    monkeypatch.setattr(settings, "result_cache_max_mb", 16)
+    result_cache.reset_stats()
+    yield tmp_path / "results"
+    result_cache.reset_stats()
+
+
+def test_chave_muda_com_payload_base_e_enriquecimento():
+    key = result_cache.make_key({"clients": ["A"], "periods": ["01/2026"]}, "base1", "enr1")
+
+    assert key == result_cache.make_key({"periods": ["01/2026"], "clients": ["A"]}, "base1", "enr1")
+    assert key != result_cache.make_key({"clients": ["A"], "periods": ["02/2026"]}, "base1", "enr1")
+    assert key != result_cache.make_key({"clients": ["A"], "periods": ["01/2026"]}, "base2", "enr1")
+    assert key != result_cache.make_key({"clients": ["A"], "periods": ["01/2026"]}, "base1", "enr2")
+
+
+def test_chave_muda_com_a_versao_do_codigo(monkeypatch):
+    key = result_cache.make_key({"clients": ["A"]}, "base1", "enr1")
+    monkeypatch.setattr(result_cache, "code_version", lambda: "outro-writer")
+
+    assert key != result_cache.make_key({"clients": ["A"]}, "base1", "enr1")
+
+
+def test_get_or_generate_conta_acertos_e_faltas():
+    calls = []
+
+    def producer():
+        calls.append(1)
+        return b"xlsx"
+
+    assert result_cache.get_or_generate("k", producer) == b"xlsx"
+    assert result_cache.get_or_generate("k", producer) == b"xlsx"
+
+    assert len(calls) == 1
+    assert (result_cache.stats().hits, result_cache.stats().misses) == (1, 1)
+
+
+def test_resultado_vazio_nao_e_gravado():
+    assert result_cache.get_or_generate("vazio", lambda: None) is None
+    assert result_cache.get("vazio") is None
+
+
+def test_evicao_lru_remove_menos_usados(cache_dir):
+    for i, key in enumerate(["a", "b", "c"]):
+        result_cache.put(key, b"x" * 100)
+        past = time.time() - 100 + i
+        os.utime(cache_dir / f"{key}.xlsx.bin", (past, past))
+    result_cache.get("a")  # "a" passa a ser o mais recente
+
+    removed = result_cache.evict(max_bytes=200)
+
+    assert removed == 1
+    assert result_cache.get("b") is None
+    assert result_cache.get("a") == b"x" * 100
+    assert result_cache.get("c") == b"x" * 100
+
+
+def test_generate_cached_reaproveita_planilha(sample_base_xlsx, sample_template_xlsx, monkeypatch):
+    orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+    periods = orch.get_available_periods()
+    first = orch.generate_cached(["Cliente Alpha"], periods, sort_by="Razão Social")
+
+    monkeypatch.setattr(orch, "generate", lambda *a, **k: pytest.fail("deveria vir do cache"))
+    assert orch.generate_cached(["Cliente Alpha"], periods, sort_by="Razão Social") == first
+    assert result_cache.stats().hits == 1
+
+    monkeypatch.setattr(orch, "generate", lambda *a, **k: b"outra")
+    assert orch.generate_cached(["Cliente Alpha"], periods, sort_by="Instalação (UC)") == b"outra"
+
+
+def test_generate_cached_nao_hasheia_enriquecimento_do_cache(sample_base_xlsx, sample_template_xlsx, monkeypatch):
+    from logic.services import enrichment_cache
+    from logic.services import orchestrator as orchestrator_module
+
+    orch = Orchestrator(sample_base_xlsx, sample_template_xlsx)
+    periods = orch.get_available_periods()
+    enrichment = pd.DataFrame({"No. UC": ["UC-NADA"], "Contrato": ["X"]})
+    monkeypatch.setattr(enrichment_cache, "version_of", lambda df: "v1" if df is enrichment else None)
+    monkeypatch.setattr(orchestrator_module, "dataframe_fingerprint", lambda df: pytest.fail("não deveria hashear"))
+
+    first = orch.generate_cached(["Cliente Alpha"], periods, enrichment_df=enrichment)
+    monkeypatch.setattr(orch, "generate", lambda *a, **k: pytest.fail("deveria vir do cache"))
+
+    assert orch.generate_cached(["Cliente Alpha"], periods, enrichment_df=enrichment) == first
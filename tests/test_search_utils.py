@@ -0,0 +1,55 @@
+"""
+Testes do índice de busca de clientes do wizard.
+"""
+from ui.utils.search_utils import ClientSearchIndex, normalize_string
+
+CLIENTS = [
+    "Padaria São João LTDA",
+    "Supermercado Alpha S/A",
+    "Alpha Energia",
+    "Condomínio Beta",
+    "Metalúrgica Gama",
+]
+DOCUMENTS = {
+    "Alpha Energia": ["11222333000144"],
+    "Condomínio Beta": ["12345678901"],
+}
+
+
+def _index():
+    return ClientSearchIndex(CLIENTS, DOCUMENTS)
+
+
+def test_normalize_string_remove_acentos_e_pontuacao():
+    assert normalize_string("  Condomínio   São-João/LTDA ") == "condominio sao joao ltda"
+
+
+def test_busca_por_prefixo_e_trecho_sem_acento():
+    index = _index()
+
+    assert index.search("sao jo") == ["Padaria São João LTDA"]
+    assert index.search("urgica") == ["Metalúrgica Gama"]
+
+
+def test_resultados_com_nome_iniciando_pela_busca_vem_primeiro():
+    assert _index().search("alpha") == ["Alpha Energia", "Supermercado Alpha S/A"]
+
+
+def test_tolera_erro_de_digitacao():
+    assert _index().search("supermecado") == ["Supermercado Alpha S/A"]
+    assert _index().search("metalurgia") == ["Metalúrgica Gama"]
+
+
+def test_busca_por_cpf_cnpj_com_ou_sem_mascara():
+    index = _index()
+
+    assert index.search("11.222.333/0001") == ["Alpha Energia"]
+    assert index.search("456789") == ["Condomínio Beta"]
+
+
+def test_limite_e_busca_vazia():
+    index = ClientSearchIndex([f"Cliente {i:03d}" for i in range(200)])
+
+    assert len(index.search("cliente", limit=10)) == 10
+    assert index.search("   ") == []
+    assert index.search("xyzw") == []
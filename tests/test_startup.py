@@ -0,0 +1,68 @@
+"""
+Orçamento de importação do app: os módulos que app.py carrega no topo não podem
+puxar SDKs pesados (Firebase/Firestore/gRPC, openpyxl) nem passar do tempo limite.
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo máximo (s) para importar os módulos do app, descontados streamlit/pandas/pydantic
+STARTUP_IMPORT_BUDGET_S = float(os.environ.get("MC_STARTUP_IMPORT_BUDGET_S", "1.5"))
+
+# Dependências que só devem carregar sob demanda
+LAZY_MODULES = ["firebase_admin", "google.cloud.firestore", "grpc", "openpyxl"]
+
+_PROBE = r"""
+import json, sys, time
+import streamlit, pandas, pydantic_settings  # custo fixo do runtime, fora do orçamento
+statements = json.loads(sys.argv[1])
+start = time.perf_counter()
+for statement in statements:
+    exec(statement, {})
+elapsed = time.perf_counter() - start
+
+from ui.viewmodels.admin_viewmodel import AdminViewModel
+AdminViewModel(mode="development").get_state()  # render do painel admin
+
+print(json.dumps({"elapsed": elapsed, "loaded": sorted(m for m in json.loads(sys.argv[2]) if m in sys.modules)}))
+"""
+
+
+def _app_imports():
+    """Imports do projeto feitos no topo de app.py (inclusive dentro do try de inicialização)."""
+    with open(os.path.join(PROJECT_ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    statements = []
+    for node in tree.body:
+        for inner in ast.walk(node) if isinstance(node, ast.Try) else [node]:
+            if isinstance(inner, ast.ImportFrom) and inner.module:
+                names = [inner.module]
+            elif isinstance(inner, ast.Import):
+                names = [alias.name for alias in inner.names]
+            else:
+                continue
+            if all(name.split(".")[0] in {"config", "logic", "ui"} for name in names):
+                statements.append(ast.unparse(inner))
+    return statements
+
+
+def _probe():
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(_app_imports()), json.dumps(LAZY_MODULES)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_nao_carrega_sdks_pesados_na_inicializacao():
+    assert _probe()["loaded"] == []
+
+
+def test_importacao_do_app_dentro_do_orcamento():
+    elapsed = _probe()["elapsed"]
+    assert elapsed < STARTUP_IMPORT_BUDGET_S, f"Importação do app levou {elapsed:.2f}s (orçamento {STARTUP_IMPORT_BUDGET_S:.2f}s)"
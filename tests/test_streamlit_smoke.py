@@ -30,7 +30,7 @@ def test_admin_panel_smoke(monkeypatch):
 def test_wizard_step_3_generate_smoke(monkeypatch):
     import ui.groups_wizard_ui as wizard_ui
 
-    monkeypatch.setattr(wizard_ui.enrichment_service, "get_all_enrichment_data", lambda: None)
+    monkeypatch.setattr(wizard_ui.enrichment_cache, "get_enrichment_frame", lambda: None)
     at = AppTest.from_file("tests/apps/wizard_smoke_app.py")
     at.session_state["groups"] = [
         GroupState(id=1, name="Projeto Teste", clients=["Cliente A"], periods=["01/2026"])
@@ -48,6 +48,27 @@ def test_wizard_step_3_generate_smoke(monkeypatch):
     assert not at.error
 
 
+def test_wizard_step_3_preview_smoke(monkeypatch):
+    import ui.groups_wizard_ui as wizard_ui
+
+    monkeypatch.setattr(wizard_ui.enrichment_cache, "get_enrichment_frame", lambda: None)
+    at = AppTest.from_file("tests/apps/wizard_smoke_app.py")
+    at.session_state["groups"] = [
+        GroupState(id=1, name="Projeto Teste", clients=["Cliente A"], periods=["01/2026"])
+    ]
+    at.session_state["group_counter"] = 1
+    at.session_state["active_group_id"] = 1
+    at.session_state["wizard_step"] = 3
+    at.run()
+
+    preview_button = next(button for button in at.button if button.label == "Pré-visualizar")
+    preview_button.click().run()
+
+    assert any("Prévia das primeiras 1 linhas" in caption.value for caption in at.caption)
+    assert at.dataframe
+    assert not at.error
+
+
 def test_enrichment_empty_state_smoke(monkeypatch):
     import ui.enrichment_ui as enrichment_ui
 
@@ -0,0 +1,64 @@
+"""
+Testes do resumo executivo vetorizado.
+"""
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from logic.adapters.excel_adapter import TemplateExcelWriter
+from logic.core.mapping import COLUMN_MAPPING, PARENT_ROW_FLAG, SEPARATOR_ROW_FLAG
+from logic.core.summary import build_executive_summary, to_numeric_column
+
+
+@pytest.fixture
+def summary_df():
+    return pd.DataFrame({
+        "Distribuidora": ["CEMIG", "CEMIG", "ENEL", "CEMIG", None],
+        "Referencia": ["2026-02", "01/2026", "2026-01-01", "02/2026", None],
+        "Status Pos-Faturamento": ["Pago", "Em aberto", "Pago", "Pago", None],
+        "Valor Enviado Emissão": [100.0, 50.0, 25.0, 999.0, None],
+        "Ganho total Padrão": ["1.000,50", "10", "-", "999", None],
+        "Cred. Consumido Raizen": [10, 20, 30, 999, None],
+        "Custo s/ GD": [200.0, 100.0, 0.0, 999.0, None],
+        PARENT_ROW_FLAG: [False, False, False, True, False],
+        SEPARATOR_ROW_FLAG: [False, False, False, False, True],
+    })
+
+
+def test_converte_numeros_sem_reparse_de_colunas_numericas():
+    assert to_numeric_column(pd.Series(["1.234,56", "7.5", "", "--", None, "abc"])).tolist() == [1234.56, 7.5, 0.0, 0.0, 0.0, 0.0]
+    numeric = pd.Series([1, None], dtype="Int64")
+    assert to_numeric_column(numeric).tolist() == [1.0, 0.0]
+
+
+def test_totais_ignoram_fatura_pai_e_separador(summary_df):
+    summary = build_executive_summary(summary_df)
+
+    assert summary.totals["linhas"] == 3
+    assert summary.totals["faturamento"] == 175.0
+    assert summary.totals["economia"] == 1010.5
+    assert summary.totals["kwh"] == 60.0
+    assert summary.economy_pct == pytest.approx(1010.5 / 300.0)
+
+
+def test_recortes_por_distribuidora_referencia_e_status(summary_df):
+    summary = build_executive_summary(summary_df)
+
+    assert summary.by_distributor["faturamento"].to_dict() == {"CEMIG": 150.0, "ENEL": 25.0}
+    assert list(summary.by_period.index) == ["01/2026", "02/2026"]
+    assert summary.by_period.loc["01/2026", "linhas"] == 2
+    assert summary.by_status.loc["Pago", "linhas"] == 2
+    assert pd.isna(summary.by_distributor.loc["ENEL", "economia_pct"])
+
+
+def test_aba_resumo_executivo_lista_recortes(summary_df, sample_template_xlsx):
+    result = TemplateExcelWriter(sample_template_xlsx).generate_bytes(summary_df, COLUMN_MAPPING, incluir_resumo=True)
+    ws = openpyxl.load_workbook(io.BytesIO(result))["Resumo Executivo"]
+    rows = {row[0]: row[1:] for row in ws.iter_rows(values_only=True) if row and row[0] is not None}
+
+    assert rows["Soma da Fatura Raízen (R$):"][0] == 175.0
+    assert rows["Energia Compensada (kWh):"][0] == 60.0
+    assert {"Situação do Pagamento", "Distribuidora", "Mês de Referência", "ENEL", "01/2026"} <= set(rows)
+    assert rows["ENEL"][:4] == (1, 30.0, 25.0, 0.0)
@@ -23,7 +23,9 @@ from logic.services.sync_service import (
     _read_parquet_safe,
     _save_parquet_safe
 )
+from logic.core.catalog import load_catalog
 from logic.core.mapping import HIERARCHY_KEY_COL, ID_UC_NEGOCIADA_COL, PORTAL_UC_COL
+from logic.core.periods import PERIOD_KEY_COL
 
 
 @pytest.fixture(autouse=True)
@@ -127,6 +129,7 @@ def test_sync_service_merge_logic(mock_balanco_df, mock_gestao_df, isolated_cach
     
     assert success is True
     assert parquet_path.exists()
+    assert load_catalog(str(parquet_path)) is not None
     
     # Validações no parquet gerado
     df_result = pd.read_parquet(parquet_path, engine="fastparquet")
@@ -155,6 +158,11 @@ def test_sync_service_merge_logic(mock_balanco_df, mock_gestao_df, isolated_cach
     assert cliente_c["Vencimento"] == "20-03-2026"
     assert cliente_c["Status Pos-Faturamento"] == "Pago"
 
+    # 4. Chave inteira canônica da referência gravada no cache
+    assert df_result[PERIOD_KEY_COL].dtype == "int32"
+    assert cliente_a_jan[PERIOD_KEY_COL] == 202601
+    assert cliente_a_fev[PERIOD_KEY_COL] == 202602
+
 
 @pytest.mark.xfail(
     reason="Bug preexistente: o teste espera ValueError('Merge abortado') mas essa guarda nunca foi implementada no sync_service.",
@@ -278,6 +286,10 @@ def test_sync_service_appends_portal_charge_missing_from_balanco(isolated_cache_
     assert portal_only[PORTAL_UC_COL] == "4000621352"
     assert portal_only["Valor_gestao"] == pytest.approx(170.71)
     assert portal_only["Status Pos-Faturamento"] == "Em aberto"
+    assert portal_only["_uc_final"] == "4000621352"
+    assert bool(portal_only["_portal_keep"]) is True
+    assert portal_only["_parent_group"] >= 0
+    assert sync.load_parent_aggregates(str(parquet_path)) is not None
 
 
 def test_sync_service_backfills_identity_for_portal_rows_with_blank_client(isolated_cache_dirs, monkeypatch):
@@ -498,3 +510,41 @@ def test_pendencias_vazio_quando_todos_completos(mock_balanco_df, tmp_path, monk
     assert success is True
     assert report["total_ucs_sem_vencimento"] == 0
     assert len(report["pendencias"]) == 0
+
+
+def test_fallback_por_uc_p_rateio(mock_balanco_df, isolated_cache_dirs, monkeypatch):
+    """Linha sem cobrança pela No. UC herda a cobrança casada pela UC p Rateio (mesmo período)."""
+    parquet_path = isolated_cache_dirs["parquet"]
+    import logic.services.sync_service as sync
+
+    balanco = mock_balanco_df.copy()
+    balanco.loc[3, "No. UC"] = "123"
+    balanco.loc[3, "UC p Rateio"] = "0004000476449"
+
+    class MockExcelReader:
+        def __init__(self, *args, **kwargs):
+            self.df = balanco.copy()
+    monkeypatch.setattr(sync, "BaseExcelReader", MockExcelReader)
+
+    gestao_df = pd.DataFrame({
+        "Instalação": [42074274, "4000476449.0", 4000476449],
+        "Mês de Referência": ["01-2026", "02-2026", "01-2026"],
+        "Vencimento": ["10-02-2026", "20-03-2026", "20-02-2026"],
+        "Status": ["Pago", "Atrasado", "Pago"],
+        "Valor da cobrança R$": [50.0, 75.0, 80.0],
+    })
+    gestao_io = io.BytesIO()
+    gestao_df.to_excel(gestao_io, index=False, engine='openpyxl')
+
+    success, _ = sync.build_consolidated_cache_from_uploads(b"fake", gestao_io.getvalue())
+    assert success is True
+
+    df_result = pd.read_parquet(parquet_path, engine="fastparquet")
+    rateio_row = df_result[df_result[ID_UC_NEGOCIADA_COL].astype(str).str.endswith("4")].iloc[0]
+    assert rateio_row["Vencimento"] == "20-03-2026"
+    assert rateio_row["Valor_gestao"] == 75.0
+    assert rateio_row["Status Pos-Faturamento"] == "Atrasado"
+
+    primary_row = df_result[df_result[ID_UC_NEGOCIADA_COL].astype(str).str.endswith("1")].iloc[0]
+    assert primary_row["Vencimento"] == "10-02-2026"
+    assert primary_row["Valor_gestao"] == 50.0
@@ -1,17 +1,17 @@
 import pytest
 import re
 from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+from logic.services.orchestrator import IncompleteRows, ReviewMetrics
 from ui.viewmodels.wizard_viewmodel import WizardViewModel, GenerationPayload
 from ui.state.group_state import GroupState
 
 def test_wizard_viewmodel_metrics():
     mock_orch = MagicMock()
-    mock_orch.count_filtered.return_value = 100
-    mock_orch.check_incomplete_rows.return_value = {
-        "total_registros": 100,
-        "registros_incompletos": 5,
-        "ucs_afetadas": []
-    }
+    mock_orch.review_metrics.return_value = ReviewMetrics(
+        total=100, incomplete=5, incomplete_rows=IncompleteRows(pd.DataFrame(), np.array([], dtype=int))
+    )
     
     vm = WizardViewModel(mock_orch)
     metrics = vm.get_review_metrics(["CLI_A"], ["01/2024"])
@@ -25,7 +25,7 @@ def test_wizard_viewmodel_empty_metrics():
     vm = WizardViewModel(mock_orch)
     metrics = vm.get_review_metrics([], [])
     assert metrics.total_invoices == 0
-    mock_orch.count_filtered.assert_not_called()
+    mock_orch.review_metrics.assert_not_called()
 
 def test_wizard_viewmodel_payload_single():
     mock_orch = MagicMock()
@@ -52,6 +52,19 @@ def test_wizard_viewmodel_payload_multiplexed():
     assert "zip" in payload.mime_type
     assert payload.incomplete_filter == "complete_only"
 
+def test_wizard_viewmodel_payload_multiplexed_workbook(monkeypatch):
+    from config.settings import settings
+    monkeypatch.setattr(settings, "batch_output_format", "workbook")
+    vm = WizardViewModel(MagicMock())
+
+    group = GroupState(id=1, name="Projeto Alpha", clients=["CLI_A"], periods=["01/2024", "02/2024"])
+    payload = vm.prepare_generation_payload(group, "all", None)
+
+    assert payload.is_multiplexed is True
+    assert payload.batch_format == "workbook"
+    assert payload.filename.endswith(".xlsx")
+    assert "spreadsheetml.sheet" in payload.mime_type
+
 def test_wizard_viewmodel_payload_uses_default_sort_when_missing_attr():
     mock_orch = MagicMock()
     vm = WizardViewModel(mock_orch)
@@ -1,7 +1,5 @@
 import time
 import logging
-import io
-import zipfile
 import streamlit as st
 
 logger = logging.getLogger(__name__)
@@ -9,9 +7,9 @@ from typing import List, Any
 from ui.state.group_state import (
     GroupState, initialize_groups, add_group,
     update_group_name, update_group_clients, clear_group_clients, 
-    select_clients, update_group_periods, get_active_group
+    select_clients, deselect_clients, group_has_client, update_group_periods, get_active_group
 )
-from ui.utils.search_utils import build_search_index, filter_values
+from ui.utils.search_utils import ClientSearchIndex
 from ui.utils.format_utils import (
     format_period_label,
     build_zip_entry_filename,
@@ -19,8 +17,9 @@ from ui.utils.format_utils import (
     sanitize_filename,
     generate_suggested_filename,
 )
-from logic.services import enrichment_service
+from logic.services import archive, enrichment_cache
 from logic.services.client_group_service import save_client_group, list_client_groups
+from logic.core.periods import PeriodRange, period_key, periods_in_range
 from logic.core.mapping import (
     GROUPING_MODE_DEFAULT,
     GROUPING_MODE_DISTRIBUTOR,
@@ -36,6 +35,17 @@ def _get_wizard_group() -> GroupState:
         active_group = add_group()
     return active_group
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _get_client_search_index(_orch: Any, _clients: tuple, clients_key: int) -> ClientSearchIndex:
+    """
+    Índice de busca de clientes, montado uma vez por versão da base.
+    Só clients_key (hash da lista de clientes) entra na chave do cache — os
+    argumentos prefixados com _ não são hasheados pelo Streamlit.
+    """
+    get_documents = getattr(_orch, "get_client_documents", None)
+    documents = get_documents() if callable(get_documents) else {}
+    return ClientSearchIndex(list(_clients), documents)
+
 def render_groups_section_wizard(available_clients: List[str], available_periods: List[str], orch: Any) -> None:
     """Renderiza a interface guiada passo a passo (Wizard)."""
     
@@ -53,7 +63,7 @@ def render_groups_section_wizard(available_clients: List[str], available_periods
     
     # Renderização Condicional baseada no passo
     if current_step == 1:
-        _render_step_1_clients(group, available_clients)
+        _render_step_1_clients(group, available_clients, orch)
     elif current_step == 2:
         _render_step_2_periods(group, available_periods)
     elif current_step == 3:
@@ -76,7 +86,7 @@ def _render_stepper(current_step: int):
                 </div>
             """, unsafe_allow_html=True)
 
-def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> None:
+def _render_step_1_clients(group: GroupState, available_clients: List[str], orch: Any = None) -> None:
     """Pede apenas os clientes."""
     st.markdown(
         """
@@ -146,16 +156,17 @@ def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> N
 
         # 1. Área de Busca (Foco Central)
         with col_search:
-            search_index = build_search_index(available_clients)
+            clients_tuple = tuple(available_clients)
+            search_index = _get_client_search_index(orch, clients_tuple, hash(clients_tuple))
             search_term = st.text_input(
                 "Buscar cliente...", 
                 key=f"wiz_search_cli_{group.id}", 
-                placeholder="🔎 Digite o nome da empresa...",
+                placeholder="🔎 Digite o nome da empresa ou CPF/CNPJ...",
                 label_visibility="collapsed"
             )
     
-    filtered_clients = filter_values(search_term, search_index) if search_term else []
-    unselected_clients = [c for c in filtered_clients if c not in group.clients]
+    filtered_clients = search_index.search(search_term) if search_term else []
+    unselected_clients = [c for c in filtered_clients if not group_has_client(group, c)]
 
     if search_term and unselected_clients:
         with st.container(border=True):
@@ -170,7 +181,7 @@ def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> N
             with cols_batch[1]:
                 if len(unselected_clients) > 1:
                     if st.button(f"Adicionar {len(unselected_clients)} variações", key=f"wiz_add_all_{group.id}", width="stretch"):
-                        select_clients(group.id, group.clients + unselected_clients)
+                        select_clients(group.id, unselected_clients)
                         st.rerun()
             
             st.markdown("<div style='max-height: 180px; overflow-y: auto; padding: 5px; border: 1px solid rgba(0,0,0,0.05); border-radius: 8px;'>", unsafe_allow_html=True)
@@ -182,6 +193,9 @@ def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> N
     elif search_term and not unselected_clients:
         st.info("Nenhum cliente novo encontrado.")
 
+    if orch is not None and hasattr(orch, "resolve_clients"):
+        _render_bulk_resolver(group, orch)
+
     # 2. Cesta de Selecionados (Progressive Disclosure)
     if group.clients:
         with st.container(border=True):
@@ -236,8 +250,7 @@ def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> N
                     label_visibility="collapsed"
                 )
                 if selected_to_remove:
-                    for client in selected_to_remove:
-                         update_group_clients(group.id, client, False)
+                    deselect_clients(group.id, selected_to_remove)
                     st.rerun()
             else:
                  st.markdown(f"<div style='font-size: 0.8rem; color: #555;'>{', '.join(group.clients[:10])}{'...' if len(group.clients)>10 else ''}</div>", unsafe_allow_html=True)
@@ -254,6 +267,103 @@ def _render_step_1_clients(group: GroupState, available_clients: List[str]) -> N
             st.session_state.wizard_step = 2
             st.rerun()
 
+def _read_identifiers_file(uploaded: Any) -> str:
+    """Conteúdo de uma lista enviada (.txt/.csv como texto; .xlsx com todas as células) como texto único."""
+    if uploaded.name.lower().endswith((".xlsx", ".xls")):
+        import pandas as pd
+        cells = pd.read_excel(uploaded, header=None, dtype=str).stack()
+        return "\n".join(cells.astype(str))
+    return uploaded.getvalue().decode("utf-8-sig", errors="replace")
+
+
+def _render_bulk_resolver(group: GroupState, orch: Any) -> None:
+    """Cola/envio de uma lista de UCs ou CPF/CNPJ, resolvida de uma vez para clientes da base."""
+    result_key = f"wiz_bulk_result_{group.id}"
+    with st.expander("📋 Colar lista de UCs ou CPF/CNPJ", expanded=False):
+        pasted = st.text_area(
+            "Identificadores",
+            key=f"wiz_bulk_text_{group.id}",
+            placeholder="Um por linha (ou separados por vírgula/ponto e vírgula)",
+            height=120,
+        )
+        uploaded = st.file_uploader(
+            "...ou envie um arquivo",
+            type=["txt", "csv", "xlsx"],
+            key=f"wiz_bulk_file_{group.id}",
+        )
+        if st.button("Resolver e adicionar", key=f"wiz_bulk_btn_{group.id}", width="stretch"):
+            from logic.core.client_resolver import parse_identifiers
+            text = pasted or ""
+            if uploaded is not None:
+                try:
+                    text += "\n" + _read_identifiers_file(uploaded)
+                except Exception as e:
+                    logger.error("Erro ao ler lista de identificadores: %s", e)
+                    st.error(f"Não foi possível ler o arquivo: {e}")
+            identifiers = parse_identifiers(text)
+            if not identifiers:
+                st.warning("Nenhum identificador informado.")
+            else:
+                result = orch.resolve_clients(identifiers)
+                if result.clients:
+                    select_clients(group.id, result.clients)
+                st.session_state[result_key] = result
+                st.rerun()
+
+        result = st.session_state.get(result_key)
+        if result is not None:
+            st.success(
+                f"{result.matched_count} identificador(es) encontrado(s) → {len(result.clients)} cliente(s) adicionados ao escopo."
+            )
+            if result.unmatched:
+                st.warning(f"{len(result.unmatched)} identificador(es) sem correspondência na base:")
+                st.code("\n".join(result.unmatched), language=None)
+
+PERIOD_MODE_PICK = "pick"
+PERIOD_MODE_LAST = "last"
+PERIOD_MODE_RANGE = "range"
+_PERIOD_MODES = {
+    PERIOD_MODE_PICK: "Meses avulsos",
+    PERIOD_MODE_LAST: "Últimos N meses",
+    PERIOD_MODE_RANGE: "Intervalo (de/até)",
+}
+
+
+def _render_period_range(group: GroupState, available_periods: List[str], mode: str) -> None:
+    """Seleção de períodos por intervalo contínuo, resolvida sobre as chaves yyyymm da base."""
+    if not available_periods:
+        st.info("Nenhum período disponível na base.")
+        return
+
+    if mode == PERIOD_MODE_LAST:
+        months = st.number_input(
+            "Quantidade de meses",
+            min_value=1,
+            max_value=120,
+            value=min(3, len(available_periods)),
+            step=1,
+            key=f"wiz_period_last_{group.id}",
+            help="Contados a partir da competência mais recente da base.",
+        )
+        latest = max(available_periods, key=period_key)
+        period_range = PeriodRange.last_months(int(months), latest=latest)
+    else:
+        col_from, col_to = st.columns(2)
+        with col_from:
+            start = st.selectbox("De", options=available_periods, index=0, format_func=format_period_label, key=f"wiz_period_from_{group.id}")
+        with col_to:
+            end = st.selectbox("Até", options=available_periods, index=len(available_periods) - 1, format_func=format_period_label, key=f"wiz_period_to_{group.id}")
+        period_range = PeriodRange.between(start, end)
+
+    selected = periods_in_range(available_periods, period_range)
+    st.caption(", ".join(format_period_label(p) for p in selected) or "Nenhum período no intervalo.")
+    if selected != group.periods:
+        update_group_periods(group.id, selected)
+        from ui.state.group_state import update_group_name_if_auto
+        update_group_name_if_auto(group.id)
+        st.rerun()
+
+
 def _render_step_2_periods(group: GroupState, available_periods: List[str]) -> None:
     """Passo focado 100% em Tempo e Nome do Arquivo."""
     st.markdown(
@@ -287,11 +397,21 @@ def _render_step_2_periods(group: GroupState, available_periods: List[str]) -> N
         st.markdown(
             """
             <div class="wiz-search-title">Janela de emissão</div>
-            <div class="wiz-search-copy">Selecione um ou mais meses. Se houver mais de um período, a geração final será multiplexada em ZIP por referência.</div>
+            <div class="wiz-search-copy">Selecione meses avulsos, os últimos N meses ou um intervalo. Se houver mais de um período, a geração final será multiplexada em ZIP por referência.</div>
             """,
             unsafe_allow_html=True,
         )
-        if hasattr(st, "pills"):
+        mode = st.radio(
+            "Forma de seleção",
+            options=list(_PERIOD_MODES),
+            format_func=_PERIOD_MODES.get,
+            horizontal=True,
+            key=f"wiz_period_mode_{group.id}",
+            label_visibility="collapsed",
+        )
+        if mode != PERIOD_MODE_PICK:
+            _render_period_range(group, available_periods, mode)
+        elif hasattr(st, "pills"):
             new_periods = st.pills(
                 "Meses",
                 options=available_periods,
@@ -359,6 +479,43 @@ def _render_step_2_periods(group: GroupState, available_periods: List[str]) -> N
             st.session_state.wizard_step = 3
             st.rerun()
 
+def _output_format_label(payload: Any) -> str:
+    if not payload.is_multiplexed:
+        return "Excel único"
+    if payload.batch_format == archive.BATCH_FORMAT_WORKBOOK:
+        return "Excel com uma aba por período"
+    return "ZIP por período"
+
+def _load_auto_enrichment(orch: Any) -> Any:
+    """
+    Enriquecimento Automático: busca TODOS os perfis de metadados registrados no sistema
+    (servido pelo cache de processo; só alterações desde o último refresh vêm do Firestore).
+    """
+    try:
+        if getattr(orch, "has_prejoined_enrichment", False):
+            # Colunas já juntadas à base na carga (settings.prejoin_enrichment)
+            return None
+        all_enrichment = enrichment_cache.get_enrichment_frame()
+        if all_enrichment is not None and not all_enrichment.empty:
+            logger.info("Enriquecimento automático: %d registros carregados de todos os perfis.", len(all_enrichment))
+            return all_enrichment
+    except Exception as enrich_err:
+        logger.warning("Falha ao carregar enriquecimento automático: %s. Continuando sem enriquecimento.", enrich_err)
+    return None
+
+def _render_incomplete_details(details: Any) -> None:
+    """Exibe as faturas sem vencimento uma página por vez."""
+    page = 0
+    if details.page_count > 1:
+        page = st.number_input(
+            f"Página (de {details.page_count})",
+            min_value=1,
+            max_value=details.page_count,
+            value=1,
+            key="wiz_incomplete_page",
+        ) - 1
+    st.dataframe(details.page(page), hide_index=True)
+
 def _render_step_3_review(group: GroupState, orch: Any) -> None:
     """Passo 3 com fluxo simples: revisão, configuração essencial, avançado e geração."""
     current_sort_by = getattr(group, "sort_by", "Economia Gerada (Desc)")
@@ -447,10 +604,10 @@ def _render_step_3_review(group: GroupState, orch: Any) -> None:
             )
             if hasattr(st, "popover"):
                 with st.popover("Ver faturas com pendência", width="stretch"):
-                    st.dataframe(metrics.incomplete_details, hide_index=True)
+                    _render_incomplete_details(metrics.incomplete_details)
             else:
                 with st.expander("Ver faturas com pendência"):
-                    st.dataframe(metrics.incomplete_details, hide_index=True)
+                    _render_incomplete_details(metrics.incomplete_details)
         else:
             st.success("Nenhuma pendência de vencimento encontrada no escopo atual.")
 
@@ -560,27 +717,51 @@ def _render_step_3_review(group: GroupState, orch: Any) -> None:
             """,
             unsafe_allow_html=True,
         )
+    if st.button("Pré-visualizar", width="stretch", icon="👁️", key=f"wiz_preview_{group.id}"):
+        payload = vm.prepare_generation_payload(group, incomplete_filter, _load_auto_enrichment(orch))
+        with st.spinner("Montando prévia..."):
+            preview_df = orch.preview(
+                payload.clients,
+                payload.periods,
+                incomplete_filter=payload.incomplete_filter,
+                grouping_mode=payload.grouping_mode,
+                include_child_rows=payload.include_child_rows,
+                enrichment_df=payload.enrichment_df,
+                somente_pendencias=payload.somente_pendencias,
+                sort_by=payload.sort_by,
+            )
+        if preview_df.empty:
+            st.info("Nenhuma fatura para exibir com as opções atuais.")
+        else:
+            st.caption(f"Prévia das primeiras {len(preview_df)} linhas (sem formatação do template).")
+            st.dataframe(preview_df, hide_index=True)
+
     if st.button("Preparar Arquivo para Download", type="primary", width="stretch", icon="✨"):
-        # Enriquecimento Automático: busca TODOS os perfis de metadados registrados no sistema
-        enrichment_df = None
-        try:
-            all_enrichment = enrichment_service.get_all_enrichment_data()
-            if all_enrichment is not None and not all_enrichment.empty:
-                enrichment_df = all_enrichment
-                logger.info("Enriquecimento automático: %d registros carregados de todos os perfis.", len(enrichment_df))
-        except Exception as enrich_err:
-            logger.warning("Falha ao carregar enriquecimento automático: %s. Continuando sem enriquecimento.", enrich_err)
+        enrichment_df = _load_auto_enrichment(orch)
 
         start_time = time.time()
         with st.spinner("Refinando dados e construindo Excel..."):
             payload = vm.prepare_generation_payload(group, incomplete_filter, enrichment_df)
             
-            if payload.is_multiplexed:
+            if payload.is_multiplexed and payload.batch_format == archive.BATCH_FORMAT_WORKBOOK:
+                # Geração Multiplexada: um único Excel com uma aba por referência
+                final_data = orch.generate_multiple(
+                    [{"name": period, "clients": payload.clients, "periods": [period]} for period in payload.periods],
+                    incomplete_filter=payload.incomplete_filter,
+                    grouping_mode=payload.grouping_mode,
+                    include_child_rows=payload.include_child_rows,
+                    enrichment_df=payload.enrichment_df,
+                    somente_pendencias=payload.somente_pendencias,
+                    incluir_resumo=payload.incluir_resumo,
+                    sort_by=payload.sort_by,
+                    output_format=archive.BATCH_FORMAT_WORKBOOK,
+                )
+            elif payload.is_multiplexed:
                 # Geração Multiplexada: Um arquivo por referência dentro de um ZIP
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as z:
-                    for period in payload.periods:
-                        period_excel = orch.generate(
+                final_data = archive.build_zip(
+                    (
+                        build_zip_entry_filename(group.name, payload.clients, period),
+                        orch.generate_cached(
                             payload.clients,
                             [period],
                             incomplete_filter=payload.incomplete_filter,
@@ -592,15 +773,13 @@ def _render_step_3_review(group: GroupState, orch: Any) -> None:
                             incluir_resumo=payload.incluir_resumo,
                             separar_auditoria=payload.separar_auditoria,
                             sort_by=payload.sort_by
-                        )
-                        if period_excel:
-                            f_name = build_zip_entry_filename(group.name, payload.clients, period)
-                            z.writestr(f_name, period_excel)
-                
-                final_data = zip_buffer.getvalue()
+                        ),
+                    )
+                    for period in payload.periods
+                )
             else:
                 # Geração Individual: Um único arquivo Excel
-                final_data = orch.generate(
+                final_data = orch.generate_cached(
                     payload.clients, 
                     payload.periods, 
                     incomplete_filter=payload.incomplete_filter,
@@ -620,7 +799,7 @@ def _render_step_3_review(group: GroupState, orch: Any) -> None:
             with st.container(border=True):
                 st.success(
                     f"Arquivo preparado com sucesso em {elapsed:.1f}s. "
-                    f"Formato final: {'ZIP por período' if payload.is_multiplexed else 'Excel único'}."
+                    f"Formato final: {_output_format_label(payload)}."
                 )
                 if metrics.incomplete_count > 0:
                     if payload.incomplete_filter == "all":
@@ -633,7 +812,7 @@ def _render_step_3_review(group: GroupState, orch: Any) -> None:
                     st.info("O filtro para ocultar registros pagos foi aplicado na geração.")
 
             st.download_button(
-                label=f"📥 Baixar Arquivo {'ZIP' if payload.is_multiplexed else 'Excel'}",
+                label=f"📥 Baixar Arquivo {'ZIP' if payload.mime_type == archive.ZIP_MIME_TYPE else 'Excel'}",
                 data=final_data,
                 file_name=payload.filename,
                 mime=payload.mime_type,
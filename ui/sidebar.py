@@ -12,3 +12,10 @@ def render_sidebar_metrics(available_clients: List[str], available_periods: List
     col_m2.metric("Períodos", format_number(len(available_periods)))
     
     st.sidebar.metric("Registros Totais", format_number(total_records))
+
+
+def render_sidebar_cache_stats(hits: int, misses: int) -> None:
+    """Exibe acertos/faltas do cache de planilhas geradas neste servidor."""
+    if hits + misses == 0:
+        return
+    st.sidebar.caption(f"Cache de planilhas: {format_number(hits)} acerto(s) · {format_number(misses)} geração(ões)")
@@ -1,11 +1,15 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, Iterable, List
 import streamlit as st
 from logic.core.mapping import GROUPING_MODE_DEFAULT, GROUPING_MODE_DISTRIBUTOR
 
-@dataclass
+@dataclass(slots=True)
 class GroupState:
-    """Modelo de dados tipado representando um grupo de exportação."""
+    """
+    Modelo de dados tipado representando um grupo de exportação.
+    `clients` mantém a ordem de seleção; `_client_index` (dict ordenado usado como
+    conjunto) responde pertença em O(1) e é mantido pelas funções deste módulo.
+    """
     id: int
     name: str
     clients: List[str] = field(default_factory=list)
@@ -19,6 +23,22 @@ class GroupState:
     incluir_resumo: bool = True
     separar_auditoria: bool = False
     sort_by: str = "Economia Gerada (Desc)"
+    _client_index: Dict[str, None] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._client_index = dict.fromkeys(self.clients)
+        if len(self._client_index) != len(self.clients):
+            self.clients = list(self._client_index)
+
+
+def _client_index(group: GroupState) -> Dict[str, None]:
+    """Índice de clientes do grupo, refeito se a lista tiver sido trocada por fora do módulo."""
+    index = getattr(group, "_client_index", None)
+    if index is None or len(index) != len(group.clients):
+        index = dict.fromkeys(group.clients)
+        group._client_index = index
+        group.clients = list(index)
+    return index
 
 
 def _normalize_group_state(group: GroupState) -> None:
@@ -41,6 +61,7 @@ def _normalize_group_state(group: GroupState) -> None:
     group.separar_auditoria = False
     if not hasattr(group, "sort_by"):
         group.sort_by = "Economia Gerada (Desc)"
+    _client_index(group)
 
 def initialize_groups() -> None:
     """Inicializa o estado dos grupos na sessão do Streamlit, se não existir."""
@@ -58,11 +79,17 @@ def initialize_groups() -> None:
             st.session_state.groups[0].id if st.session_state.groups else None
         )
 
+def _groups_by_id() -> Dict[int, GroupState]:
+    """Índice id -> grupo, refeito apenas quando a lista de grupos da sessão muda."""
+    groups = st.session_state.groups
+    cached = st.session_state.get("_groups_by_id")
+    if cached is None or cached[0] is not groups or cached[1] != len(groups):
+        cached = (groups, len(groups), {g.id: g for g in groups})
+        st.session_state._groups_by_id = cached
+    return cached[2]
+
 def get_group(group_id: int) -> GroupState | None:
-    for group in st.session_state.groups:
-        if group.id == group_id:
-            return group
-    return None
+    return _groups_by_id().get(group_id)
 
 def get_active_group() -> GroupState | None:
     active_group_id = st.session_state.get("active_group_id")
@@ -114,35 +141,57 @@ def set_custom_group_name(group_id: int, new_name: str) -> None:
             group.is_auto_name = False
         group.name = new_name.strip() or f"Grupo_{group_id}"
 
+def group_has_client(group: GroupState, client: str) -> bool:
+    """Verifica em O(1) se o cliente está selecionado no grupo."""
+    return client in _client_index(group)
+
 def update_group_clients(group_id: int, client: str, checked: bool) -> None:
-    """Adiciona ou remove um cliente da seleção do grupo de forma imutável."""
+    """Adiciona ou remove um cliente da seleção do grupo."""
     group = get_group(group_id)
     if not group:
         return
 
+    index = _client_index(group)
     if checked:
-        if client not in group.clients:
+        if client not in index:
+            index[client] = None
             group.clients.append(client)
-    else:
-        group.clients = [c for c in group.clients if c != client]
+    elif client in index:
+        del index[client]
+        group.clients.remove(client)
 
 def clear_group_clients(group_id: int) -> None:
     """Limpa todos os clientes selecionados para o grupo."""
     group = get_group(group_id)
     if group:
         group.clients.clear()
+        group._client_index = {}
 
-def select_clients(group_id: int, clients_to_add: List[str]) -> None:
+def select_clients(group_id: int, clients_to_add: Iterable[str]) -> None:
     """Seleciona em lote uma lista de clientes para o grupo."""
     group = get_group(group_id)
     if not group:
         return
 
-    existing = set(group.clients)
+    index = _client_index(group)
     for client in clients_to_add:
-        if client not in existing:
+        if client not in index:
+            index[client] = None
             group.clients.append(client)
-            existing.add(client)
+
+def deselect_clients(group_id: int, clients_to_remove: Iterable[str]) -> None:
+    """Remove em lote clientes da seleção do grupo, numa única passada."""
+    group = get_group(group_id)
+    if not group:
+        return
+
+    index = _client_index(group)
+    removed = {c for c in clients_to_remove if c in index}
+    if not removed:
+        return
+    for client in removed:
+        del index[client]
+    group.clients = list(index)
 
 def update_group_periods(group_id: int, periods: List[str]) -> None:
     """Atualiza a lista completa de períodos selecionados do grupo."""
@@ -183,13 +232,11 @@ def set_somente_pendencias(group_id: int, value: bool) -> None:
         group.somente_pendencias = value
 
 def set_separar_auditoria(group_id: int, value: bool) -> None:
-    for g in st.session_state.groups:
-        if g.id == group_id:
-            g.separar_auditoria = value
-            break
+    group = get_group(group_id)
+    if group:
+        group.separar_auditoria = value
 
 def set_sort_by(group_id: int, value: str) -> None:
-    for g in st.session_state.groups:
-        if g.id == group_id:
-            g.sort_by = value
-            break
+    group = get_group(group_id)
+    if group:
+        group.sort_by = value
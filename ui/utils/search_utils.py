@@ -1,6 +1,9 @@
 import unicodedata
 import re
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 def normalize_string(text: str) -> str:
     """Normaliza string para busca: minúsculas, sem acentos e sem pontuação."""
@@ -30,3 +33,119 @@ def filter_values(search_term: str, index: Dict[str, str]) -> List[str]:
     
     norm_search = normalize_string(search_term)
     return [orig for orig, norm in index.items() if norm_search in norm]
+
+
+# --- ÍNDICE DE BUSCA DE CLIENTES (trigramas) ---
+
+DEFAULT_SEARCH_LIMIT = 50
+
+
+def _word_grams(word: str) -> List[str]:
+    """Trigramas de uma palavra com preenchimento à esquerda ('  a', ' ab', 'abc', ...)."""
+    padded = f"  {word}"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _text_grams(text: str) -> set:
+    return {gram for word in text.split() for gram in _word_grams(word)}
+
+
+def _min_shared_grams(word: str) -> int:
+    """
+    Trigramas que um nome precisa compartilhar com a palavra buscada. Um erro de
+    digitação no meio da palavra derruba até 3 trigramas; no fim, só 1. Palavras
+    curtas exigem o prefixo exato.
+    """
+    if len(word) >= 6:
+        return len(word) - 3
+    if len(word) >= 4:
+        return len(word) - 1
+    return len(word)
+
+
+class ClientSearchIndex:
+    """
+    Índice de busca de clientes montado uma vez por versão da base.
+
+    Os nomes são normalizados na construção e indexados por trigramas (um índice
+    invertido trigrama -> ids). A busca soma os trigramas em comum com numpy e só
+    verifica os candidatos, de modo que o custo por tecla não cresce com a varredura
+    de dezenas de milhares de Razões Sociais. Resultados com a busca contida no nome
+    vêm primeiro; os demais toleram um erro de digitação por palavra.
+    Buscas só com dígitos (3+) procuram também no CPF/CNPJ dos clientes.
+    """
+
+    def __init__(self, clients: List[str], documents: Optional[Dict[str, Iterable[str]]] = None):
+        self.clients: List[str] = [str(c) for c in clients]
+        self._normalized: List[str] = [normalize_string(c) for c in self.clients]
+        self._name_postings = self._build_postings(_text_grams(n) for n in self._normalized)
+
+        documents = documents or {}
+        self._documents: List[Tuple[str, ...]] = [
+            tuple(d for d in documents.get(c, ()) if d) for c in self.clients
+        ]
+        self._doc_postings = self._build_postings(
+            {d[i:i + 3] for d in docs for i in range(len(d) - 2)} for docs in self._documents
+        )
+
+    @staticmethod
+    def _build_postings(grams_per_id: Iterable[set]) -> Dict[str, np.ndarray]:
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for idx, grams in enumerate(grams_per_id):
+            for gram in grams:
+                postings[gram].append(idx)
+        return {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def _gram_counts(self, grams: List[str], postings: Dict[str, np.ndarray]) -> np.ndarray:
+        arrays = [postings[g] for g in grams if g in postings]
+        if not arrays:
+            return np.zeros(len(self.clients), dtype=np.int64)
+        return np.bincount(np.concatenate(arrays), minlength=len(self.clients))
+
+    def search(self, term: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[str]:
+        """Retorna até `limit` clientes ordenados por relevância para o termo buscado."""
+        norm_term = normalize_string(term)
+        if not norm_term or not self.clients:
+            return []
+
+        # Cada palavra da busca precisa casar: como prefixo aproximado (trigramas com
+        # preenchimento) ou, a partir de 3 letras, como trecho exato no meio de uma palavra.
+        accepted = np.ones(len(self.clients), dtype=bool)
+        counts = np.zeros(len(self.clients), dtype=np.int64)
+        for word in dict.fromkeys(norm_term.split()):
+            grams = sorted(set(_word_grams(word)))
+            word_counts = self._gram_counts(grams, self._name_postings)
+            word_ok = word_counts >= min(len(grams), _min_shared_grams(word))
+            inner = sorted({word[i:i + 3] for i in range(len(word) - 2)})
+            if inner:
+                word_ok |= self._gram_counts(inner, self._name_postings) >= len(inner)
+            accepted &= word_ok
+            counts += word_counts
+        candidates = np.flatnonzero(accepted)
+
+        ranked: Dict[int, tuple] = {}
+        for idx in candidates.tolist():
+            name = self._normalized[idx]
+            pos = name.find(norm_term)
+            exact = pos >= 0
+            ranked[idx] = (
+                0 if exact else 1,
+                0 if pos == 0 else 1,
+                -int(counts[idx]),
+                len(name),
+                self.clients[idx],
+            )
+
+        digits = re.sub(r"\D", "", term)
+        if len(digits) >= 3 and digits == re.sub(r"[\s./-]", "", term):
+            doc_grams = sorted({digits[i:i + 3] for i in range(len(digits) - 2)})
+            doc_counts = self._gram_counts(doc_grams, self._doc_postings)
+            for idx in np.flatnonzero(doc_counts >= len(doc_grams)).tolist():
+                if any(digits in d for d in self._documents[idx]):
+                    ranked[idx] = (0, 0, 0, 0, self.clients[idx])
+
+        order = sorted(ranked, key=ranked.__getitem__)
+        return [self.clients[idx] for idx in order[:limit]]
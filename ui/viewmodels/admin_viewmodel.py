@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional
 from config.settings import settings, ConfigurationError
-from logic.adapters.firebase_adapter import FirebaseAdapter, FirebaseAdapterError
+from logic.adapters.firebase_adapter import FirebaseAdapter, FirebaseAdapterError, get_shared_adapter
 
 @dataclass
 class AdminState:
@@ -11,6 +11,8 @@ class AdminState:
     local_path: Optional[str] = None
     firebase_adapter: Optional[FirebaseAdapter] = None
     firebase_warning: Optional[str] = None
+    # Firebase só é inicializado quando o backup é necessário (upload), não a cada render
+    firebase_checked: bool = False
 
 
 @dataclass
@@ -26,7 +28,8 @@ class AdminViewModel:
     def get_state(self) -> AdminState:
         """
         Calcula o estado do painel admin sem depender do Streamlit.
-        Avalia configurações, ambiente e conectividade.
+        Avalia configurações e ambiente; o Firebase fica para ensure_firebase(),
+        para que o SDK (gRPC) não seja carregado a cada render da sidebar.
         """
         state = AdminState()
 
@@ -38,12 +41,6 @@ class AdminViewModel:
             if runtime_status.get("network_ready"):
                 state.can_sync_local = True
                 state.local_path = settings.network_balanco_path
-                
-            # 3. Inicializa Firebase no State
-            fb, fb_warn = self._initialize_firebase()
-            state.firebase_adapter = fb
-            state.firebase_warning = fb_warn
-                
         except ConfigurationError as e:
             state.fatal_error = f"Bloqueio de Segurança Operacional:\n{e}"
             return state
@@ -52,19 +49,27 @@ class AdminViewModel:
 
     def _initialize_firebase(self) -> tuple[Optional[FirebaseAdapter], Optional[str]]:
         """
-        Tenta inicializar o Firebase. Retorna a instância e/ou uma mensagem de aviso.
+        Obtém o adaptador Firebase compartilhado. Retorna a instância e/ou uma mensagem de aviso.
         """
         try:
-            fb = FirebaseAdapter(settings.firebase_credentials_path, settings.firebase_storage_bucket)
+            fb = get_shared_adapter(settings.firebase_credentials_path, settings.firebase_storage_bucket)
             return fb, None
         except FirebaseAdapterError as e:
             return None, f"Backup na nuvem indisponível: {e}"
         except Exception as e:
             return None, f"Erro inesperado no adaptador Firebase: {e}"
 
+    def ensure_firebase(self, state: AdminState) -> AdminState:
+        """Inicializa o Firebase no state na primeira necessidade (backup dos uploads)."""
+        if state.firebase_adapter is None and not state.firebase_checked:
+            state.firebase_adapter, state.firebase_warning = self._initialize_firebase()
+        state.firebase_checked = True
+        return state
+
     def process_uploads(self, balanco_bytes: bytes, gestao_bytes: bytes, state: AdminState) -> UploadProcessingResult:
         """Processa os uploads de arquivos em cache e opcionalmente no Firebase."""
         from logic.services.sync_service import build_consolidated_cache_from_uploads
+        self.ensure_firebase(state)
         success, report = build_consolidated_cache_from_uploads(balanco_bytes, gestao_bytes, state.firebase_adapter)
         warning_message = state.firebase_warning
         if report and report.get("backup_warning"):
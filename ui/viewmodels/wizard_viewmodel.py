@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List, Any, Optional
 from ui.utils.format_utils import sanitize_filename, build_runtime_filename
+from logic.services import archive
 
 @dataclass
 class WizardReviewMetrics:
@@ -25,6 +26,8 @@ class GenerationPayload:
     is_multiplexed: bool
     filename: str
     mime_type: str
+    # Formato da saída multiplexada: ZIP (um .xlsx por período) ou workbook (uma aba por período)
+    batch_format: str = archive.BATCH_FORMAT_ZIP
 
 class WizardViewModel:
     def __init__(self, orchestrator: Any):
@@ -36,12 +39,12 @@ class WizardViewModel:
         if not clients or not periods:
             return metrics
 
-        metrics.total_invoices = self.orch.count_filtered(clients, periods)
-        
-        incomplete_info = self.orch.check_incomplete_rows(clients, periods)
-        metrics.incomplete_count = incomplete_info.get("registros_incompletos", 0)
-        metrics.complete_count = incomplete_info.get("total_registros", 0) - metrics.incomplete_count
-        metrics.incomplete_details = incomplete_info.get("ucs_afetadas")
+        review = self.orch.review_metrics(clients, periods)
+        metrics.total_invoices = review.total
+        metrics.incomplete_count = review.incomplete
+        metrics.complete_count = review.complete
+        # Detalhe paginado (IncompleteRows): o quadro só é montado quando exibido
+        metrics.incomplete_details = review.incomplete_rows
         
         return metrics
 
@@ -54,13 +57,14 @@ class WizardViewModel:
         
         is_multiplexed = len(group.periods) > 1
         safe_name = sanitize_filename(group.name)
+        batch_format = archive.batch_format()
         
-        if is_multiplexed:
+        if is_multiplexed and batch_format == archive.BATCH_FORMAT_ZIP:
             filename = build_runtime_filename(safe_name, ".zip")
-            mime_type = "application/zip"
+            mime_type = archive.ZIP_MIME_TYPE
         else:
             filename = build_runtime_filename(safe_name, ".xlsx")
-            mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mime_type = archive.XLSX_MIME_TYPE
 
         return GenerationPayload(
             clients=group.clients,
@@ -76,7 +80,8 @@ class WizardViewModel:
             sort_by=getattr(group, "sort_by", "Economia Gerada (Desc)"),
             is_multiplexed=is_multiplexed,
             filename=filename,
-            mime_type=mime_type
+            mime_type=mime_type,
+            batch_format=batch_format,
         )
 
     @staticmethod